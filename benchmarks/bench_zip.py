@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: release zip build times
+
+Compares the previous packaging (zipfile, every file recompressed), a cold
+incremental build (no manifest) and a rebuild after one source file changed.
+
+Run from the repository root:
+    python -m benchmarks.bench_zip [--repeat 5]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import zipfile
+from typing import Callable, List, Tuple
+
+import wowaddon
+
+
+def best_of(repeat: int, setup: Callable[[], None], func: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def zip_everything(zip_path: str, inputs: List[Tuple[str, str]]):
+    """ The previous do_zip: recompress every input with zipfile """
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zip_file:
+        for name, path in inputs:
+            zip_file.write(path, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    inputs = wowaddon.collect_inputs(wowaddon.ADDON_NAME_CLASSIC, wowaddon.COPY_DIRS,
+                                     wowaddon.COPY_FILES)
+    total = sum(os.path.getsize(path) for _, path in inputs)
+    print(f"Inputs: {len(inputs)} files, {total / 1024:.0f} KiB")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        zip_path = os.path.join(temp_dir, "AngrySparks.zip")
+        manifest = os.path.join(temp_dir, "AngrySparks.manifest.json")
+        # Stand-in for an edited source file: a copy of Core.lua we can touch freely
+        changed = os.path.join(temp_dir, "Core.lua")
+        with open("Src/Core.lua", "rb") as src, open(changed, "wb") as dst:
+            dst.write(src.read())
+        bench_inputs = [(name, changed if name.endswith("/Src/Core.lua") else path) for name, path in inputs]
+
+        def cold():
+            for path in (zip_path, manifest):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        def edit_one_file():
+            with open(changed, "ab") as f:
+                f.write(b"\n-- edit\n")
+
+        legacy = best_of(args.repeat, lambda: None, lambda: zip_everything(zip_path, bench_inputs))
+        cold_build = best_of(args.repeat, cold, lambda: wowaddon.build_zip(zip_path, bench_inputs, manifest))
+        one_changed = best_of(args.repeat, edit_one_file,
+                              lambda: wowaddon.build_zip(zip_path, bench_inputs, manifest))
+
+    print(f"zipfile, recompress everything: {legacy * 1000:8.1f} ms")
+    print(f"cold build (no manifest):       {cold_build * 1000:8.1f} ms")
+    print(f"one file changed:               {one_changed * 1000:8.1f} ms "
+          f"({cold_build / one_changed:.1f}x faster than cold)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 ﻿rem COPY this to install.bat and edit path to your game to have a quick install option
 rem
 
-python wowaddon.py --dst="../_Releases" zip
+python wowaddon.py --dst="../_Releases" release
 
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold vs warm-text vs warm-binary sheet loads
+
+Compares parsing a freshly downloaded CSV (cold), re-parsing the cached CSV text
+(warm-text, the behaviour before the frame cache) and loading the parsed frame
+from the binary frame cache (warm-binary).
+
+Run from the spreadsheet-tool directory:
+    python -m benchmarks.bench_frame_cache [--rows 20000] [--cols 30] [--repeat 5]
+"""
+
+import argparse
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.timing import best_of
+from sparks.cache_manager import CacheManager
+from sparks.frame_cache import FrameCache, HAVE_PYARROW
+from sparks.google_web_client import GoogleWebClient
+
+
+def make_csv(rows: int, cols: int) -> str:
+    """Build a synthetic assignment workbook tab: names, notes and empty cells."""
+    header = ",".join(f"Col{c}" for c in range(cols))
+    lines = [header]
+    for r in range(rows):
+        cells = [f"Player{r}_{c}" if (r + c) % 3 else "" for c in range(cols)]
+        lines.append(",".join(cells))
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--cols", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    content = make_csv(args.rows, args.cols)
+    content_hash = GoogleWebClient.content_hash(content)
+    print(f"Payload: {args.rows} rows x {args.cols} cols, {len(content) / 1024:.0f} KiB")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        client = GoogleWebClient(cache_dir=Path(temp_dir))
+        cache_name = client._get_cache_name("bench")
+        client._save_to_cache(cache_name, content, "bench")
+
+        def cached_entry() -> dict:
+            entry = client._load_from_cache(cache_name)
+            if entry is None:
+                raise RuntimeError("Benchmark cache entry is missing")
+            return entry
+
+        formats = [("pickle", False)] + ([("parquet", True)] if HAVE_PYARROW else [])
+        cold = best_of(args.repeat, lambda: pd.read_csv(StringIO(content)))
+        warm_text = best_of(args.repeat, lambda: pd.read_csv(StringIO(
+            client._load_cache_content(cache_name, cached_entry()))))
+
+        print(f"{'cold (parse downloaded CSV)':<32} {cold * 1000:8.1f} ms")
+        print(f"{'warm-text (re-parse cached CSV)':<32} {warm_text * 1000:8.1f} ms")
+
+        for name, use_parquet in formats:
+            frame_cache = FrameCache(CacheManager(Path(temp_dir) / name), use_parquet=use_parquet)
+            frame_cache.store(content_hash, pd.read_csv(StringIO(content)))
+            warm_binary = best_of(args.repeat, lambda: frame_cache.load(cached_entry()["content_hash"]))
+            print(f"{f'warm-binary ({name})':<32} {warm_binary * 1000:8.1f} ms"
+                  f"  ({warm_text / warm_binary:.1f}x faster than warm-text)")
+
+        if not HAVE_PYARROW:
+            print("pyarrow is not installed, Parquet format skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass markup rendering vs the addon's gsub chain
+
+Renders a corpus of large assignment pages with the single-pass MarkupRenderer
+and with render_display_chained, the literal port of the gsub chain in
+coreModule:UpdateDisplayed (one full pass over the page per rule), and checks
+that both produce the same text.
+
+Run from the spreadsheet-tool directory:
+    python -m benchmarks.bench_markup [--pages 20] [--lines 200] [--repeat 5]
+"""
+
+import argparse
+import random
+from typing import List
+
+from benchmarks.timing import best_of
+from sparks.markup import (MarkupRenderer, RAID_TARGETS, chained_rules, highlight_tokens,
+                           render_display_chained)
+
+PLAYERS = ["Arthas", "Jaina", "Thrall", "Sylvanas", "Varian", "Anduin", "Tyrande", "Malfurion",
+           "Rexxar", "Valeera", "Garrosh", "Uther", "Gul'dan", "Medivh", "Khadgar", "Velen"]
+CLASSES = ["warrior", "paladin", "hunter", "rogue", "priest", "shaman", "mage", "warlock", "druid"]
+VARIABLES = [("mt", "|cwarriorArthas|r"), ("ot", "|cpaladinUther|r"), ("heals", "{healer} Jaina, Velen")]
+
+
+def make_page(rng: random.Random, lines: int) -> str:
+    """A large assignment page: headings, marked targets, class-colored names and spells."""
+    out = []
+    for i in range(lines):
+        kind = i % 6
+        if kind == 0:
+            out.append(f"|cyellow-- Pull {i // 6 + 1} --|r")
+        elif kind == 1:
+            out.append(f"{{{rng.choice(list(RAID_TARGETS))}}} {{mt}}  {{{rng.choice(list(RAID_TARGETS))}}} {{ot}}")
+        elif kind == 2:
+            names = ", ".join(f"|c{rng.choice(CLASSES)}{rng.choice(PLAYERS)}|r" for _ in range(4))
+            out.append(f"{{{rng.choice(CLASSES)}}} Interrupts: {names}")
+        elif kind == 3:
+            out.append(f"{{heals}} on group {rng.randint(1, 8)}, dispel {{spell {rng.randint(1000, 30000)}}}")
+        elif kind == 4:
+            out.append(f"{{tank}} {rng.choice(PLAYERS)} taunts at 3 stacks, {{hs}} at 40% ({{icon INV_Potion_54}})")
+        else:
+            out.append(f"g{rng.randint(1, 8)}: {rng.choice(PLAYERS)} soaks, {rng.choice(PLAYERS)} kicks")
+        if i % 60 == 59:
+            out.append("{page}")
+    return "\n".join(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus: List[str] = [make_page(rng, args.lines) for _ in range(args.pages)]
+    highlights = highlight_tokens("Arthas group", group=3)
+    renderer = MarkupRenderer()
+    rules = chained_rules()
+
+    single = [renderer.render(page, VARIABLES, highlights) for page in corpus]
+    chained = [render_display_chained(page, VARIABLES, highlights, rules=rules) for page in corpus]
+    if single != [text for text, _ in chained]:
+        raise SystemExit("Single-pass and chained rendering differ")
+
+    size = sum(len(page) for page in corpus)
+    print(f"Corpus: {args.pages} pages, {size / 1024:.0f} KiB, best of {args.repeat}")
+    print(f"  passes per page: chained {chained[0][1]}, single-pass 1")
+    t_chained = best_of(args.repeat, lambda: [render_display_chained(page, VARIABLES, highlights, rules=rules)
+                                              for page in corpus])
+    t_single = best_of(args.repeat, lambda: [renderer.render(page, VARIABLES, highlights) for page in corpus])
+    print(f"  chained gsub port: {t_chained * 1000:8.1f} ms")
+    print(f"  single pass:       {t_single * 1000:8.1f} ms  ({t_chained / t_single:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: roster cross-check over full multi-raid weekly rosters
+
+Builds synthetic raid groups (every raid, several groups each, many sections of
+tank/healer/dps assignments) and times check_assignments at growing sizes, next
+to a pairwise comparison of every two records, the way conflicts were found by
+reading the outputs side by side. The check should grow linearly.
+
+Run from the spreadsheet-tool directory:
+    python -m benchmarks.bench_roster [--groups 4] [--sections 12] [--repeat 5]
+"""
+
+import argparse
+import random
+from typing import Dict, List
+
+from benchmarks.timing import best_of
+from sparks.layout import Assignment
+from sparks.roster import CLASS_ROLES, Roster, RosterEntry, check_assignments
+
+RAIDS = ["MC", "BWL", "AQ40", "Naxx"]
+
+
+def make_groups(rng: random.Random, groups: int, sections: int, players: List[str]) -> Dict[str, List[Assignment]]:
+    """groups raid groups per raid, each with sections of 8 tanks, their healers and 20 dps."""
+    result = {}
+    for raid in RAIDS:
+        for g in range(groups):
+            records = []
+            for s in range(sections):
+                section = f"Boss {s + 1}"
+                raiders = rng.sample(players, 40)
+                tanks, healers, dps = raiders[:8], raiders[8:20], raiders[20:]
+                records += [Assignment(tank, "tank", "", section, raid) for tank in tanks]
+                records += [Assignment(healer, "healer", tanks[i % 8], section, raid) for i, healer in enumerate(healers)]
+                records += [Assignment(name, "dps", "adds", section, raid) for name in dps]
+            result[f"{raid.lower()}_{g + 1}.toml"] = records
+    return result
+
+
+def pairwise_conflicts(groups: Dict[str, List[Assignment]]) -> int:
+    """Count pairs of records that clash, comparing every record with every other one."""
+    records = [(group, record) for group, assignments in groups.items() for record in assignments]
+    clashes = 0
+    for i, (group_a, a) in enumerate(records):
+        for group_b, b in records[i + 1:]:
+            if a.player.casefold() != b.player.casefold():
+                continue
+            same_section = group_a == group_b and a.section == b.section and a.role == b.role
+            clashes += same_section or (group_a != group_b and a.raid == b.raid)
+    return clashes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=4, help="raid groups per raid at the largest size")
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    classes = list(CLASS_ROLES)
+    players = [f"Raider{i}" for i in range(400)]
+    player_classes = {name: rng.choice(classes) for name in players}
+    roster = Roster(RosterEntry(name, cls, CLASS_ROLES[cls]) for name, cls in player_classes.items())
+
+    for groups in sorted({1, max(args.groups // 2, 1), args.groups}):
+        data = make_groups(rng, groups, args.sections, players)
+        records = sum(len(assignments) for assignments in data.values())
+        seconds = best_of(args.repeat, lambda: check_assignments(data, roster))
+        line = f"{len(data):3d} groups {records:7d} records  check {seconds * 1e3:8.2f} ms"
+        if records <= 5000:
+            line += f"  pairwise {best_of(1, lambda: pairwise_conflicts(data)) * 1e3:9.1f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
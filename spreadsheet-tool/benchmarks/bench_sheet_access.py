@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-cell iloc helpers vs SheetGrid range extraction
+
+The baseline reproduces the get_cell_value/get_cell_range helpers that
+sparks/bwl.py used before SheetGrid: one bounds-checked iloc call per cell.
+
+Run from the spreadsheet-tool directory:
+    python -m benchmarks.bench_sheet_access [--rows 200] [--cols 30] [--repeat 50]
+"""
+
+import argparse
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.timing import best_of
+from sparks.sheet import SheetGrid
+
+# A1 ranges read by the BWL trash page, plus a full-block read
+RANGES = [("E", 6, 10), ("N", 6, 10), ("G", 13, 13), ("E", 17, 19),
+          ("N", 13, 15), ("N", 16, 18), ("N", 19, 19)]
+BLOCK = ("E", 6, "N", 19)
+
+
+def get_cell_value(sheet_data: pd.DataFrame, col_letter: str, row_num: int) -> str:
+    col_idx = ord(col_letter.upper()) - ord('A')
+    row_idx = row_num - 1
+    try:
+        if row_idx < len(sheet_data) and col_idx < len(sheet_data.columns):
+            value = sheet_data.iloc[row_idx, col_idx]
+            return str(value).strip() if pd.notna(value) else ""
+        return ""
+    except (IndexError, KeyError):
+        return ""
+
+
+def get_cell_range(sheet_data: pd.DataFrame, col_letter: str, start_row: int, end_row: int) -> List[str]:
+    values = []
+    for row in range(start_row, end_row + 1):
+        value = get_cell_value(sheet_data, col_letter, row)
+        if value:
+            values.append(value)
+    return values
+
+
+def baseline(sheet_data: pd.DataFrame) -> None:
+    for col, start, end in RANGES:
+        get_cell_range(sheet_data, col, start, end)
+    first, start, last, end = BLOCK
+    for code in range(ord(first), ord(last) + 1):
+        get_cell_range(sheet_data, chr(code), start, end)
+
+
+def vectorized(sheet_data: pd.DataFrame) -> None:
+    grid = SheetGrid(sheet_data)
+    grid.preload_range("E6:N19")
+    for col, start, end in RANGES:
+        grid.values(f"{col}{start}:{col}{end}")
+    first, start, last, end = BLOCK
+    grid.range(f"{first}{start}:{last}{end}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--cols", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    values = np.full((args.rows, args.cols), None, dtype=object)
+    values[rng.random((args.rows, args.cols)) < 0.5] = "Player"
+    sheet_data = pd.DataFrame(values, columns=[f"Col{c}" for c in range(args.cols)])
+
+    old = best_of(args.repeat, lambda: baseline(sheet_data))
+    new = best_of(args.repeat, lambda: vectorized(sheet_data))
+    print(f"Sheet: {args.rows} rows x {args.cols} cols")
+    print(f"{'per-cell iloc helpers':<32} {old * 1e6:10.1f} us")
+    print(f"{'SheetGrid (incl. conversion)':<32} {new * 1e6:10.1f} us  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
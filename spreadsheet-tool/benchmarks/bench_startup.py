@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: interpreter startup cost of importing the CLI
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and reports the
+cumulative import time of main and its slowest top-level dependencies, next to the
+same import followed by pandas (what every run paid before pandas was lazy).
+
+Run from the spreadsheet-tool directory:
+    python -m benchmarks.bench_startup [--repeat 5] [--top 8]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+TOOL_DIR = Path(__file__).resolve().parent.parent
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_times(code: str = "import main") -> Dict[str, Tuple[int, float]]:
+    """Nesting depth and cumulative import time in seconds of every module code imports.
+
+    Each run uses a fresh interpreter, so nothing is imported already. Depth 0 is a
+    module code imports itself, depth 1 a module that one imports first, and so on.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=TOOL_DIR,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            times[match.group(4)] = (len(match.group(3)) // 2, int(match.group(2)) / 1e6)
+    return times
+
+
+def best_of(repeat: int, code: str) -> Dict[str, Tuple[int, float]]:
+    runs = [import_times(code) for _ in range(repeat)]
+    return {name: (depth, min(run[name][1] for run in runs if name in run))
+            for name, (depth, _) in runs[0].items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    lazy = best_of(args.repeat, "import main")
+    eager = best_of(args.repeat, "import main, pandas")
+    print(f"{'import main':<32} {lazy['main'][1] * 1e3:8.1f} ms")
+    print(f"{'import main, pandas':<32} {(eager['main'][1] + eager['pandas'][1]) * 1e3:8.1f} ms")
+
+    slowest = sorted(((seconds, name) for name, (depth, seconds) in lazy.items() if depth == 1), reverse=True)
+    print("Slowest modules imported by main:")
+    for seconds, name in slowest[:args.top]:
+        print(f"  {name:<30} {seconds * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+Timing helpers shared by the benchmark scripts
+"""
+
+import time
+from typing import Callable
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """The fastest of repeat calls to func, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
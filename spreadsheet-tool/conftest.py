@@ -0,0 +1,125 @@
+"""
+Shared pytest fixtures for the WoW Raid Assignment Tool
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class StandInSheetServer:
+    """Local HTTP server standing in for the Google Sheets CSV export endpoint.
+
+    Serves /<sheet_id>/export?format=csv&gid=<gid> from the tabs dict, and the tab
+    list script of /<sheet_id>/htmlview from the tab_names dict (name -> gid), or
+    tab_names_status when that is not 200.
+    """
+
+    def __init__(self) -> None:
+        self.tabs: Dict[str, str] = {}
+        self.tab_names: Dict[str, str] = {}
+        self.tab_names_status = 200
+        self.fail_gids: Set[str] = set()
+        self.delay = 0.0
+        self.send_validators = False
+        self.last_modified = "Sat, 18 Oct 2025 12:00:00 GMT"
+        self.requests: List[str] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.requests.append(self.path)
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    if server.delay:
+                        time.sleep(server.delay)
+                    server.handle(self)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+        return Handler
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        parsed = urlparse(request.path)
+        gid = parse_qs(parsed.query).get("gid", [""])[0]
+
+        if parsed.path.endswith("/htmlview") and self.tab_names_status != 200:
+            self.send(request, self.tab_names_status, b"not found")
+        elif parsed.path.endswith("/htmlview"):
+            items = "".join(f'items.push({{name: {json.dumps(name)}, pageUrl: "https:\\/\\/docs.google.com'
+                            f'\\/sheet?headers\\x3dtrue\\x26gid\\x3d{gid}", gid: "{gid}",initialSheet: '
+                            f'("{gid}" == gid)}});' for name, gid in self.tab_names.items())
+            self.send(request, 200, f"<script>var items = [];{items}</script>".encode("utf-8"))
+        elif gid in self.fail_gids:
+            self.send(request, 500, b"failure")
+        elif gid in self.tabs:
+            body = self.tabs[gid].encode("utf-8")
+            if not self.send_validators:
+                self.send(request, 200, body)
+                return
+
+            validators = {"ETag": f'"{hashlib.sha1(body).hexdigest()}"',
+                          "Last-Modified": self.last_modified}
+            if request.headers.get("If-None-Match") == validators["ETag"]:
+                self.send(request, 304, b"", validators)
+            else:
+                self.send(request, 200, body, validators)
+        else:
+            self.send(request, 404, b"not found")
+
+    @staticmethod
+    def send(request: BaseHTTPRequestHandler, status: int, body: bytes,
+             headers: Optional[Dict[str, str]] = None) -> None:
+        request.send_response(status)
+        request.send_header("Content-Type", "text/csv; charset=utf-8")
+        if status != 304:
+            request.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        try:
+            request.wfile.write(body)
+        except ConnectionError:
+            pass  # The client stopped reading once it had the rows it needed
+
+
+@pytest.fixture
+def sheet_server():
+    """A running stand-in Google Sheets export server."""
+    server = StandInSheetServer()
+    server.start()
+    yield server
+    server.stop()
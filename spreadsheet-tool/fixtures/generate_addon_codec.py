@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Regenerate addon_codec.json from the Lua libraries bundled with the addon.
+
+Requires the lupa package (pip install lupa); run from the spreadsheet-tool directory:
+    python fixtures/generate_addon_codec.py
+"""
+
+import json
+from pathlib import Path
+
+from lupa import lua51
+
+FIXTURES_DIR = Path(__file__).parent
+ADDON_DIR = FIXTURES_DIR.parent.parent
+LUA_LIBS = ["libs/LibStub/LibStub.lua",
+            "libs/LibSerialize-1.1.0/LibSerialize.lua",
+            "libs/LibDeflate/LibDeflate.lua"]
+
+# (name, Lua expression, Python literal of the deserialized value, stable)
+CASES = [
+    ("small ints", '{0, 1, 127, 128, -1, 4095, -4095}', "[0, 1, 127, 128, -1, 4095, -4095]", False),
+    ("wide ints", '{4096, -4096, 65535, 70000, -16777215, 16777216, 4294967295, 4294967296, -1099511627776}',
+     "[4096, -4096, 65535, 70000, -16777215, 16777216, 4294967295, 4294967296, -1099511627776]", False),
+    ("floats", '{0.5, -2.25, 3.14159265358979, 1e-5, -1e-300, 123456.5}',
+     "[0.5, -2.25, 3.14159265358979, 1e-05, -1e-300, 123456.5]", False),
+    ("booleans", '{true, false}', "[True, False]", False),
+    ("strings", '{"", "ab", "abc", "0123456789abcdef", string.rep("x", 300), "Ænima ♥"}',
+     "['', 'ab', 'abc', '0123456789abcdef', 'x' * 300, 'Ænima ♥']", False),
+    ("string refs", '{"Tank", "Tank", "abc", "abc", "ab", "ab"}',
+     "['Tank', 'Tank', 'abc', 'abc', 'ab', 'ab']", False),
+    ("long array", '{1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17}', "list(range(1, 18))", False),
+    ("single key map", '{Name = "Trash"}', "{'Name': 'Trash'}", False),
+    ("stable map", '{b = 2, a = 1, [5] = "five", [true] = "yes", Contents = "x"}',
+     "{'b': 2, 'a': 1, 5: 'five', True: 'yes', 'Contents': 'x'}", True),
+    ("mixed embedded", '{"x", "y", key = 1}', "{1: 'x', 2: 'y', 'key': 1}", False),
+    ("mixed with hole", '{"PAGE", 3123456789, 1700000000, "Trash", "Tank 1: Warr", nil, {}}',
+     "{1: 'PAGE', 2: 3123456789, 3: 1700000000, 4: 'Trash', 5: 'Tank 1: Warr', 7: []}", False),
+    ("table refs", '(function() local t = {"shared"}; return {t, t} end)()', "(lambda t: [t, t])(['shared'])", False),
+    ("nested", '{{1, {2, {3}}}, {}}', "[[1, [2, [3]]], []]", False),
+]
+
+SERIALIZE = """
+function(expr, stable)
+    local LibSerialize = LibStub("LibSerialize")
+    local LibDeflate = LibStub("LibDeflate")
+    local value = loadstring("return " .. expr)()
+    local serialized = LibSerialize:SerializeEx({stable = stable}, value)
+    local encoded = LibDeflate:EncodeForWoWAddonChannel(LibDeflate:CompressDeflate(serialized))
+    return serialized, encoded
+end
+"""
+
+
+def main() -> None:
+    lua = lua51.LuaRuntime(encoding=None, unpack_returned_tuples=True)
+    for lib in LUA_LIBS:
+        lua.execute((ADDON_DIR / lib).read_bytes())
+    serialize = lua.eval(SERIALIZE)
+
+    fixtures = []
+    for name, expr, python, stable in CASES:
+        serialized, encoded = serialize(expr.encode('utf-8'), stable)
+        fixtures.append({"name": name, "value": python, "stable": stable,
+                         "serialized": serialized.hex(), "encoded": encoded.hex()})
+
+    path = FIXTURES_DIR / "addon_codec.json"
+    path.write_text(json.dumps(fixtures, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"Wrote {len(fixtures)} fixtures to {path}")
+
+
+if __name__ == "__main__":
+    main()
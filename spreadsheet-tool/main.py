@@ -7,17 +7,29 @@ text files with formatted assignments for World of Warcraft raids.
 """
 
 import argparse
+import glob
 import sys
+import time
 import tomllib
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
-import pandas as pd
-
-from sparks.bwl import process_bwl_assignments
-from sparks.google_web_client import GoogleWebClient
-# from sparks.mc import process_mc_assignments
+from sparks.addon_export import encode_message, export_bundle, parse_pages
+from sparks.cache_manager import CacheManager
+from sparks.fileutil import atomic_write_bytes
+from sparks.google_web_client import CachePolicy, GoogleWebClient
+from sparks.incremental import IncrementalOutput
+from sparks.layout import Assignment, LayoutPlan, RenderedSection, find_layout
+from sparks.markup import MarkupRenderer, lint_markup, preview_html, to_ansi
+from sparks.metrics import RunMetrics
+from sparks.roster import Conflict, Roster, check_assignments
+from sparks.saved_variables import SavedState
+from sparks.sheet import SheetBounds, SheetData, union_bounds
+from sparks.sinks import OUTPUT_FORMATS, MarkupSink, OutputSink, TextSink, document_lines, write_document
+from sparks.transmission import (CTL_BURST, CTL_MAX_CPS, TransmissionCost, page_cost, send_seconds,
+                                 split_page)
+from sparks.watch import SheetWatcher
 
 
 class RaidAssignmentGenerator:
@@ -25,21 +37,39 @@ class RaidAssignmentGenerator:
 
     SUPPORTED_RAIDS = ["MC", "BWL", "AQ40", "Naxx"]
 
-    def __init__(self, config_path: str) -> None:
-        """Initialize with configuration file path."""
+    def __init__(self, config_path: str, metrics: Optional[RunMetrics] = None) -> None:
+        """Initialize with configuration file path and the run's metrics, if shared."""
         self.config_path = Path(config_path)
         self.config: Dict[str, Any] = {}
-        self.sheet_data: Optional[pd.DataFrame] = None
-        self.web_client = GoogleWebClient()
+        self.sheet_data: Optional[SheetData] = None
+        self.metrics = metrics or RunMetrics()
+        self._web_client: Optional[GoogleWebClient] = None
+        self.roster: Optional[Roster] = None  # colors player names in the markup output
+
+    @property
+    def web_client(self) -> GoogleWebClient:
+        """The client fetching this config's sheet, created on first use.
+
+        Batch runs fetch through the batch's shared client, so their generators never create one.
+        """
+        if self._web_client is None:
+            self._web_client = GoogleWebClient(metrics=self.metrics)
+            self._web_client.set_config(self.config)
+        return self._web_client
+
+    def close(self) -> None:
+        """Release pooled connections, if a client was created."""
+        if self._web_client is not None:
+            self._web_client.close()
 
     def load_config(self) -> None:
         """Load configuration from TOML file."""
         try:
-            with open(self.config_path, 'rb') as f:
+            with self.metrics.stage("config"), open(self.config_path, 'rb') as f:
                 self.config = tomllib.load(f)
-
-            self._validate_config()
-            self.web_client.set_config(self.config)
+                self._validate_config()
+            if self._web_client is not None:
+                self._web_client.set_config(self.config)
         except FileNotFoundError:
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
         except tomllib.TOMLDecodeError as e:
@@ -53,6 +83,9 @@ class RaidAssignmentGenerator:
             if key not in self.config:
                 raise ValueError(f"Missing required configuration key: {key}")
 
+        # Raises ValueError on an invalid [cache] table
+        CachePolicy.from_config(self.config)
+
         if self.config["raid_name"] not in self.SUPPORTED_RAIDS:
             raise ValueError(
                 f"Unsupported raid name: {self.config['raid_name']}. "
@@ -69,55 +102,111 @@ class RaidAssignmentGenerator:
 
     def generate_assignments(self) -> str:
         """Generate formatted raid assignments text."""
+        with self.metrics.stage("process"):
+            return "\n".join(document_lines(*self._document()))
+
+    def _document(self) -> Tuple[List[str], Optional[str], Iterator[RenderedSection]]:
+        """Header lines, category and the lazily rendered sections of the raid's assignments."""
         if self.sheet_data is None:
             raise RuntimeError("Sheet data not loaded. Call fetch_sheet_data() first.")
 
         raid_name = self.config["raid_name"]
-        assignments = []
-
-        assignments.append(f"=== {raid_name} RAID ASSIGNMENTS ===\n")
-
-        # Process the data based on raid type
-        # This is a placeholder - actual implementation would depend on spreadsheet structure
-        assignments.extend(self._process_raid_data(raid_name))
-
-        return "\n".join(assignments)
+        header = self._header_lines(raid_name)
+        layout = self._find_layout(raid_name)
+        if layout is None:
+            return header + [f"No sheet layout defined for {raid_name}"], None, iter(())
+        return header, layout.category, layout.iter_sections(self.sheet_data)
+
+    def output_paths(self, overrides: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, str]:
+        """Paths of the extra outputs by format: the [outputs] config table, then overrides."""
+        paths = {name: str(path) for name, path in self.config.get("outputs", {}).items()}
+        paths.update({name: path for name, path in (overrides or {}).items() if path})
+        unknown = sorted(set(paths) - set(OUTPUT_FORMATS))
+        if unknown:
+            raise ValueError(f"Unknown output format: {', '.join(unknown)}. "
+                             f"Supported formats: {', '.join(OUTPUT_FORMATS)}")
+        return paths
+
+    def write_outputs(self, output_path: Optional[str] = None, outputs: Optional[Dict[str, str]] = None,
+                      text: bool = True) -> List[str]:
+        """Stream the assignments into the text output and every extra output in one pass.
+
+        outputs maps formats of OUTPUT_FORMATS to paths (default: output_paths()). Each
+        file is written atomically. Returns the written paths, the text output first.
+        """
+        outputs = self.output_paths() if outputs is None else outputs
+        sinks: List[OutputSink] = [TextSink(self._output_path(output_path))] if text else []
+        for name, path in outputs.items():
+            sinks.append(MarkupSink(path, self._markup_roster()) if name == "markup" else OUTPUT_FORMATS[name](path))
+        if not sinks:
+            return []
 
-    def _process_raid_data(self, raid_name: str) -> list[str]:
-        """Process raid-specific data from the spreadsheet."""
-        assignments = []
+        try:
+            paths = write_document(sinks, *self._document(), metrics=self.metrics)
+        except OSError as e:
+            raise RuntimeError(f"Failed to save assignments to file: {e}")
+        for path in paths:
+            print(f"Assignments saved to: {path}")
+        return paths
 
-        # Placeholder implementation - would need to be customized based on
-        # the actual structure of your Google Sheets
-        assignments.append(f"Processing {raid_name} assignments...")
-        assignments.append(f"Found {len(self.sheet_data)} entries in spreadsheet")
+    def _markup_roster(self) -> Optional[Roster]:
+        if self.roster is None and self.config.get("roster"):
+            self.roster = Roster.load(self.config["roster"])
+        return self.roster
 
-        # if raid_name == "MC":
-        #     assignments.extend(process_mc_assignments(self.sheet_data))
-        if raid_name == "BWL":
-            assignments.extend(process_bwl_assignments(self.sheet_data))
-        # elif raid_name == "AQ40":
-        #     assignments.extend(process_aq40_assignments(self.sheet_data))
-        # elif raid_name == "Naxx":
+    def _header_lines(self, raid_name: str) -> list[str]:
+        """Lines written before the raid's category and pages."""
+        if self.sheet_data is None:
+            raise RuntimeError("Sheet data not loaded. Call fetch_sheet_data() first.")
+        rows = len(self.sheet_data)
+        bounds = self.sheet_bounds()
+        # A download cut short at the layout's last row does not tell how long the sheet is
+        if bounds is not None and rows == bounds.rows:
+            count = f"Read {rows} rows (bounded by layout)"
+        else:
+            count = f"Found {rows} entries in spreadsheet"
+        return [
+            f"=== {raid_name} RAID ASSIGNMENTS ===\n",
+            f"Processing {raid_name} assignments...",
+            count,
+        ]
+
+    def _find_layout(self, raid_name: str) -> Optional[LayoutPlan]:
+        # Raid layouts are declarative specs in sparks/layouts/<raid>.toml, or the
+        # file named by the optional `layout` config key
+        return find_layout(raid_name, self.config.get("layout"))
+
+    def update_output_file(self, output_path: Optional[str] = None) -> List[str]:
+        """Regenerate only the sections whose source cells changed since the previous run.
+
+        Returns the titles of the regenerated sections.
+        """
+        if self.sheet_data is None:
+            raise RuntimeError("Sheet data not loaded. Call fetch_sheet_data() first.")
 
-        # Example processing (would need real implementation):
-        # for index, row in self.sheet_data.iterrows():
-        #     player_name = row.get('Player', 'Unknown')
-        #     assignment = row.get('Assignment', 'No assignment')
-        #     assignments.append(f"{player_name}: {assignment}")
+        raid_name = self.config["raid_name"]
+        layout = self._find_layout(raid_name)
+        if layout is None:
+            raise RuntimeError(f"No sheet layout defined for {raid_name}")
 
-        return assignments
+        # Includes rewriting the changed sections of the output file
+        with self.metrics.stage("process"):
+            output = IncrementalOutput(self._output_path(output_path))
+            return output.update(self._header_lines(raid_name), layout, self.sheet_data,
+                                 self.sheet_data.attrs.get("content_hash"))
 
-    def save_to_file(self, assignments: str, output_path: Optional[str] = None) -> str:
-        """Save assignments to a text file."""
+    def _output_path(self, output_path: Optional[str] = None) -> Path:
         if output_path is None:
             raid_name = self.config["raid_name"]
-            output_path = f"{raid_name}_assignments.txt"
+            output_path = self.config.get("output_file", f"{raid_name}_assignments.txt")
+        return Path(output_path)
 
-        output_file = Path(output_path)
+    def save_to_file(self, assignments: str, output_path: Optional[str] = None) -> str:
+        """Save assignments to a text file."""
+        output_file = self._output_path(output_path)
 
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
+            with self.metrics.stage("write"), open(output_file, 'w', encoding='utf-8') as f:
                 f.write(assignments)
 
             print(f"Assignments saved to: {output_file.absolute()}")
@@ -126,12 +215,277 @@ class RaidAssignmentGenerator:
         except IOError as e:
             raise RuntimeError(f"Failed to save assignments to file: {e}")
 
+    def save_blob(self, assignments: str, blob_path: str, split_budget: Optional[float] = None,
+                  saved: Optional[SavedState] = None) -> Optional[str]:
+        """Save assignments as an encoded AngrySparks category/page blob.
+
+        With split_budget, pages taking longer than that many seconds to send are split into parts.
+        With saved, pages the SavedVariables already hold are left out, and no blob is written
+        if that leaves none.
+        """
+        categories, pages = parse_pages(assignments.split("\n"))
+        if split_budget is not None:
+            split = []
+            for page in pages:
+                parts = split_page(page, split_budget)
+                if len(parts) > 1:
+                    print(f"Split page '{page.name}' into {len(parts)} parts to send within {split_budget:g} s")
+                split.extend(parts)
+            pages = split
+        if saved is not None:
+            changed = saved.changed_pages(pages)
+            print(f"Skipping {len(pages) - len(changed)} of {len(pages)} pages already in the SavedVariables")
+            if not changed:
+                print("No changed pages, assignment blob not written")
+                return None
+            pages = changed
+            category_ids = {page.category_id for page in pages}
+            categories = [category for category in categories if category.id in category_ids]
+        blob = encode_message(export_bundle(categories, pages))
+        blob_file = Path(blob_path)
+
+        try:
+            with self.metrics.stage("write"):
+                atomic_write_bytes(blob_file, blob)
+        except OSError as e:
+            raise RuntimeError(f"Failed to save assignment blob: {e}")
+
+        print(f"Assignment blob saved to: {blob_file.absolute()} "
+              f"({len(blob)} bytes, text is {len(assignments.encode('utf-8'))} bytes)")
+        return str(blob_file.absolute())
+
+    def save_preview(self, assignments: str, preview_path: str) -> str:
+        """Save an HTML preview of the pages as AngrySparks displays them, or print them if '-'."""
+        renderer = MarkupRenderer()
+        pages = [(page.name, renderer.render(page.contents))
+                 for page in parse_pages(assignments.split("\n"), updated=0)[1]]
+
+        if preview_path == "-":
+            for name, text in pages:
+                print(f"== {name}\n{to_ansi(text)}")
+            return preview_path
+
+        preview_file = Path(preview_path)
+        try:
+            atomic_write_bytes(preview_file, preview_html(pages, f"{self.config['raid_name']} assignments")
+                               .encode('utf-8'))
+        except OSError as e:
+            raise RuntimeError(f"Failed to save preview: {e}")
+
+        print(f"Preview saved to: {preview_file.absolute()}")
+        return str(preview_file.absolute())
+
+    @staticmethod
+    def lint_pages(assignments: str) -> List[str]:
+        """Markers and color codes in the pages that AngrySparks would show as typed."""
+        return [f"{page.name} {issue}" for page in parse_pages(assignments.split("\n"), updated=0)[1]
+                for issue in lint_markup(page.contents)]
+
+    @staticmethod
+    def transmission_costs(assignments: str) -> List[TransmissionCost]:
+        """What sending each page over the addon channel costs, as commModule:SendOutMessage does it."""
+        return [page_cost(page) for page in parse_pages(assignments.split("\n"))[1]]
+
+    def sheet_bounds(self) -> Optional[SheetBounds]:
+        """The cells the raid's layout reads, or None when it has no layout."""
+        layout = self._find_layout(self.config.get("raid_name", ""))
+        return layout.bounds if layout else None
+
+    def assignment_records(self) -> List[Assignment]:
+        """The raid's assignments as structured records, for the roster check."""
+        if self.sheet_data is None:
+            raise RuntimeError("Sheet data not loaded. Call fetch_sheet_data() first.")
+        layout = self._find_layout(self.config["raid_name"])
+        return layout.assignments(self.sheet_data) if layout else []
+
+    def check_roster(self, roster: Optional[Roster] = None) -> List[Conflict]:
+        """Cross-check the raid's assignments, against the roster if one is given."""
+        records = self.assignment_records()
+        with self.metrics.stage("process"):
+            return check_assignments({str(self.config_path): records}, roster)
+
+    def _convert_to_csv_url(self, url: str) -> str:
+        """Convert a Google Sheets URL to the CSV export URL of the tab it links to."""
+        return self.web_client._convert_to_csv_url(url)
+
     def fetch_sheet_data(self) -> None:
-        self.sheet_data = self.web_client.fetch_sheet_data()
+        self.sheet_data = self.web_client.fetch_sheet_data(self.sheet_bounds())
+
+
+class BatchAssignmentGenerator:
+    """Generates assignments for many configs, fetching each distinct sheet tab only once."""
+
+    def __init__(self, config_paths: List[Path], metrics: Optional[RunMetrics] = None) -> None:
+        """Initialize with the list of configuration file paths."""
+        self.metrics = metrics or RunMetrics()
+        self.generators = [RaidAssignmentGenerator(str(path), self.metrics) for path in config_paths]
+        self.web_client = GoogleWebClient(metrics=self.metrics)
+        self.fetch_count = 0  # tabs requested from Google: downloaded, or revalidated with a 304
+        self.cached_count = 0  # tabs served from the cache without a request
+        self.failures: Dict[Path, Exception] = {}
+
+    @staticmethod
+    def expand_config_paths(patterns: List[str]) -> List[Path]:
+        """Expand directories and glob patterns into a sorted list of TOML files."""
+        paths: List[Path] = []
+        for pattern in patterns:
+            path = Path(pattern)
+            if path.is_dir():
+                paths.extend(sorted(path.glob("*.toml")))
+            elif glob.has_magic(pattern):
+                paths.extend(sorted(Path(p) for p in glob.glob(pattern)))
+            else:
+                paths.append(path)
+
+        # Keep the first occurrence of every file
+        unique: Dict[Path, None] = {}
+        for path in paths:
+            unique.setdefault(path, None)
+        return list(unique)
+
+    def load_configs(self) -> None:
+        """Load and validate every configuration file, and set up the shared client from them."""
+        for generator in self.generators:
+            generator.load_config()
+        self.web_client.set_config(self.client_config())
+
+    def client_config(self) -> Dict[str, Any]:
+        """The cache store and backend settings of the configs, which all fetches of a batch share.
+
+        Lifetime and revalidation stay per config: each tab is fetched with its own CachePolicy.
+        """
+        settings: Dict[Tuple, List[str]] = {}
+        for generator in self.generators:
+            cache = generator.config.get("cache", {})
+            store = tuple((name, cache[name]) for name in CacheManager.CONFIG_KEYS if name in cache)
+            key = (store, generator.config.get("backend", "csv"))
+            settings.setdefault(key, []).append(str(generator.config_path))
+        if len(settings) > 1:
+            examples = ", ".join(paths[0] for paths in settings.values())
+            raise ValueError(f"Configs use different [cache] store or backend settings ({examples}), "
+                             f"a batch shares one cache: use the same {', '.join(CacheManager.CONFIG_KEYS)} "
+                             f"and backend in every config")
+        if not settings:
+            return {}
+        cache, backend = next(iter(settings))
+        return {"cache": dict(cache), "backend": backend}
+
+    def group_by_tab(self) -> Dict[Tuple[str, str], List[RaidAssignmentGenerator]]:
+        """Group generators by (spreadsheet ID, sheet) so each tab is fetched once."""
+        groups: Dict[Tuple[str, str], List[RaidAssignmentGenerator]] = {}
+        for generator in self.generators:
+            key = GoogleWebClient.tab_key(generator.config)
+            groups.setdefault(key, []).append(generator)
+        return groups
+
+    @staticmethod
+    def group_bounds(groups: Dict[Tuple[str, str], List[RaidAssignmentGenerator]]
+                     ) -> Dict[Tuple[str, str], Optional[SheetBounds]]:
+        """The cells every raid sharing a tab reads, so one partial download serves them all."""
+        return {tab: union_bounds(generator.sheet_bounds() for generator in generators)
+                for tab, generators in groups.items()}
 
+    def fetch_sheet_data(self) -> None:
+        """Fetch each distinct tab once, concurrently, and share the parsed frame with its raids.
 
-def main() -> int:
+        A tab that fails to download is recorded in failures; other tabs are unaffected.
+        """
+        groups = self.group_by_tab()
+        print(f"Fetching {len(groups)} distinct sheet tab(s) for {len(self.generators)} config(s)...")
+        policies = {tab: CachePolicy.from_config(generators[0].config)
+                    for tab, generators in groups.items()}
+        results = self.web_client.fetch_many(list(groups), policies, self.group_bounds(groups))
+
+        for tab, result in results.items():
+            if isinstance(result, Exception):
+                for generator in groups[tab]:
+                    self.failures[generator.config_path] = result
+                continue
+
+            info = self.web_client.last_fetch.get(tab)
+            if info is not None and info.source == "cache":
+                self.cached_count += 1
+            else:
+                self.fetch_count += 1
+
+            for generator in groups[tab]:
+                generator.sheet_data = result
+
+    def run(self, incremental: bool = False) -> List[str]:
+        """Load, fetch, generate and save every config. Returns the output file paths.
+
+        With incremental, only sections whose source cells changed are regenerated.
+        Configs whose tab failed to download are skipped and listed in failures.
+        """
+        self.load_configs()
+        self.fetch_sheet_data()
+
+        output_files = []
+        for generator in self.generators:
+            if generator.config_path in self.failures:
+                continue
+            if incremental:
+                changed = generator.update_output_file()
+                output_path = generator._output_path()
+                print(describe_changed_sections(output_path, changed))
+                output_files.append(str(output_path.absolute()))
+                generator.write_outputs(text=False)
+            else:
+                output_files.append(generator.write_outputs()[0])
+        return output_files
+
+    def check_roster(self, roster: Optional[Roster] = None) -> List[Conflict]:
+        """Cross-check the assignments of every raid group in one pass.
+
+        Configs reading the same tab with the same raid and layout (e.g. one sheet
+        rendered to several outputs) are one raid group, checked once.
+        """
+        groups: Dict[str, List[Assignment]] = {}
+        seen = set()
+        for tab, generators in self.group_by_tab().items():
+            for generator in generators:
+                key = (tab, generator.config["raid_name"], generator.config.get("layout"))
+                if generator.config_path in self.failures or key in seen:
+                    continue
+                seen.add(key)
+                groups[str(generator.config_path)] = generator.assignment_records()
+        with self.metrics.stage("process"):
+            return check_assignments(groups, roster)
+
+    def watch(self, interval: float, max_interval: float,
+              metrics_path: Optional[Path] = None, max_polls: Optional[int] = None) -> None:
+        """Keep polling every distinct tab and regenerate the affected outputs on change."""
+        self.load_configs()
+        groups = self.group_by_tab()
+
+        def regenerate(tab: Tuple[str, str], sheet_data: SheetData) -> None:
+            for generator in groups[tab]:
+                generator.sheet_data = sheet_data
+                try:
+                    changed = generator.update_output_file()
+                    generator.write_outputs(text=False)
+                except Exception as e:
+                    # Keep watching; the next change may fix the sheet
+                    print(f"Warning: could not regenerate {generator.config_path}: {e}")
+                    continue
+                print(describe_changed_sections(generator._output_path(), changed))
+
+        watcher = SheetWatcher(self.web_client, list(groups), regenerate,
+                               interval=interval, max_interval=max_interval,
+                               metrics_path=metrics_path, bounds=self.group_bounds(groups))
+        watcher.run(max_polls)
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        self.web_client.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Main entry point for the CLI application."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "cache":
+        return cache_command(argv[1:])
+
     parser = argparse.ArgumentParser(
         description="Generate World of Warcraft raid assignments from Google Sheets",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -139,12 +493,26 @@ def main() -> int:
 Examples:
   python main.py config.toml
   python main.py --output custom_assignments.txt config.toml
+  python main.py configs/
+  python main.py "configs/*.toml"
+  python main.py --incremental config.toml
+  python main.py --discord bwl.discord.txt --markup bwl.sparks.txt --json bwl.json config.toml
+  python main.py --blob bwl.blob config.toml
+  python main.py --blob bwl.blob --saved-variables AngrySparks.lua config.toml
+  python main.py --lint --preview bwl.html config.toml
+  python main.py --send-cost --send-budget 5 --split-pages --blob bwl.blob config.toml
+  python main.py --metrics json --profile process.prof config.toml
+  python main.py --roster roster.toml configs/
+  python main.py --watch --interval 30 configs/
+  python main.py cache stats|prune|clear
         """
     )
 
     parser.add_argument(
         "config_file",
-        help="Path to TOML configuration file"
+        nargs="+",
+        help="Path to TOML configuration file. Several files, a directory or a glob "
+             "run in batch mode, fetching each distinct sheet tab only once"
     )
 
     parser.add_argument(
@@ -158,17 +526,183 @@ Examples:
         help="Enable verbose output"
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--discord",
+        metavar="PATH",
+        help="Also write the assignments as Discord messages of at most 2000 characters"
+    )
+
+    parser.add_argument(
+        "--markup",
+        metavar="PATH",
+        help="Also write the assignments with AngrySparks markup (raid target icons, class colors)"
+    )
+
+    parser.add_argument(
+        "--json",
+        metavar="PATH",
+        help="Also write the assignments and their structured records as JSON"
+    )
 
+    parser.add_argument(
+        "--incremental", "-i",
+        action="store_true",
+        help="Regenerate only the sections whose source cells changed since the previous run"
+    )
+
+    parser.add_argument(
+        "--blob", "-b",
+        help="Also write the assignments as an encoded AngrySparks page blob "
+             "(LibSerialize + LibDeflate, addon channel encoding) to this file"
+    )
+
+    parser.add_argument(
+        "--saved-variables",
+        metavar="PATH",
+        help="Leave pages out of the --blob whose name and contents already match this "
+             "WTF/.../SavedVariables/AngrySparks.lua"
+    )
+
+    parser.add_argument(
+        "--preview",
+        help="Also write an HTML preview of the pages as AngrySparks displays them to this file "
+             "('-' prints them with terminal colors)"
+    )
+
+    parser.add_argument(
+        "--lint",
+        action="store_true",
+        help="Warn about markers and color codes that AngrySparks would show as typed"
+    )
+
+    parser.add_argument(
+        "--send-cost",
+        action="store_true",
+        help="Print each page's serialized, compressed and encoded size, addon message count "
+             "and estimated send time"
+    )
+
+    parser.add_argument(
+        "--send-budget",
+        type=float, metavar="SECONDS",
+        help="Warn about pages that take longer than this to send over the addon channel"
+    )
+
+    parser.add_argument(
+        "--split-pages",
+        action="store_true",
+        help="Split pages over --send-budget into numbered parts in the --blob"
+    )
+
+    parser.add_argument(
+        "--check-roster",
+        action="store_true",
+        help="Warn about players listed twice, over their per-role limit or in two groups of the same raid"
+    )
+
+    parser.add_argument(
+        "--roster",
+        metavar="PATH",
+        help="Roster TOML file of raiders and their classes (default: the `roster` config key); "
+             "also warns about unknown names and class/role mismatches, implies --check-roster"
+    )
+
+    parser.add_argument(
+        "--metrics",
+        choices=["json"],
+        help="Print per-stage wall/CPU timings, cache hits and misses and bytes downloaded "
+             "as the last line of output"
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Run the processing stage under cProfile and write the stats to this file"
+    )
+
+    parser.add_argument(
+        "--watch", "-w",
+        action="store_true",
+        help="Keep running, poll the sheet tabs and regenerate changed outputs"
+    )
+
+    parser.add_argument(
+        "--interval",
+        type=float, default=30.0,
+        help="Watch mode: initial poll interval in seconds (default: 30)"
+    )
+
+    parser.add_argument(
+        "--max-interval",
+        type=float, default=600.0,
+        help="Watch mode: longest poll interval while nothing changes (default: 600)"
+    )
+
+    parser.add_argument(
+        "--watch-log",
+        help="Watch mode: append per-poll latency and bytes transferred to this JSON lines file"
+    )
+
+    args = parser.parse_args(argv)
+
+    config_paths = BatchAssignmentGenerator.expand_config_paths(args.config_file)
+    if not config_paths:
+        print(f"Error: No configuration files found in: {', '.join(args.config_file)}", file=sys.stderr)
+        return 1
+
+    single_only = [name for name, value in (("--blob", args.blob), ("--saved-variables", args.saved_variables),
+                                            ("--preview", args.preview), ("--discord", args.discord),
+                                            ("--markup", args.markup), ("--json", args.json),
+                                            ("--lint", args.lint), ("--send-cost", args.send_cost),
+                                            ("--send-budget", args.send_budget is not None),
+                                            ("--split-pages", args.split_pages)) if value]
+    if single_only and (args.watch or len(config_paths) > 1 or Path(args.config_file[0]).is_dir()):
+        print(f"Error: {', '.join(single_only)} can only be used with a single config", file=sys.stderr)
+        return 1
+
+    if args.split_pages and (not args.blob or args.send_budget is None):
+        print("Error: --split-pages requires --blob and --send-budget", file=sys.stderr)
+        return 1
+
+    if args.saved_variables and not args.blob:
+        print("Error: --saved-variables requires --blob", file=sys.stderr)
+        return 1
+
+    if args.watch:
+        if args.metrics or args.profile:
+            print("Error: --metrics and --profile cannot be used with --watch, use --watch-log",
+                  file=sys.stderr)
+            return 1
+        if args.check_roster or args.roster:
+            print("Error: --check-roster and --roster cannot be used with --watch", file=sys.stderr)
+            return 1
+        if args.output:
+            print("Error: --output cannot be used with --watch, set output_file in the config",
+                  file=sys.stderr)
+            return 1
+        return run_watch(config_paths, args)
+
+    if len(config_paths) > 1 or Path(args.config_file[0]).is_dir():
+        if args.output:
+            print("Error: --output cannot be used in batch mode, set output_file in each config",
+                  file=sys.stderr)
+            return 1
+        return run_batch(config_paths, args.verbose, args.incremental, RunMetrics(args.profile), args.metrics,
+                         args.check_roster, args.roster)
+
+    app = None
     try:
         # Initialize generator
-        app = RaidAssignmentGenerator(args.config_file)
+        app = RaidAssignmentGenerator(str(config_paths[0]), RunMetrics(args.profile))
 
         if args.verbose:
-            print(f"Loading configuration from: {args.config_file}")
+            print(f"Loading configuration from: {config_paths[0]}")
 
         # Load configuration
         app.load_config()
+        roster = load_roster(args.roster, [app])
+        app.roster = roster
+        outputs = app.output_paths({"discord": args.discord, "markup": args.markup, "json": args.json})
 
         if args.verbose:
             print(f"Raid: {app.config['raid_name']}")
@@ -179,14 +713,45 @@ Examples:
         print("Fetching data from Google Sheets...")
         app.fetch_sheet_data()
 
-        # Generate assignments
-        print("Generating raid assignments...")
-        assignments = app.generate_assignments()
-
-        # Save to file
-        output_file = app.save_to_file(assignments, args.output)
+        if args.incremental:
+            print("Updating changed raid assignment sections...")
+            changed = app.update_output_file(args.output)
+            print(describe_changed_sections(app._output_path(args.output), changed))
+            app.write_outputs(outputs=outputs, text=False)
+        else:
+            # Generate the assignments and stream them into every output file
+            print("Generating raid assignments...")
+            app.write_outputs(args.output, outputs)
+
+        if args.blob or args.preview or args.lint or args.send_cost or args.send_budget is not None:
+            assignments = app._output_path(args.output).read_text(encoding='utf-8')
+
+        if args.check_roster or roster is not None:
+            report_conflicts(app.check_roster(roster))
+        if args.blob:
+            saved = SavedState.load(args.saved_variables) if args.saved_variables else None
+            app.save_blob(assignments, args.blob, args.send_budget if args.split_pages else None, saved)
+        if args.preview:
+            app.save_preview(assignments, args.preview)
+        if args.lint:
+            for issue in app.lint_pages(assignments):
+                print(f"Markup warning: {issue}")
+        if args.send_cost or args.send_budget is not None:
+            costs = app.transmission_costs(assignments)
+            if args.send_cost:
+                print(f"Addon channel cost per page (ChatThrottleLib at {CTL_MAX_CPS} B/s, {CTL_BURST} B burst):")
+                for cost in costs:
+                    print(f"  {cost}")
+                all_messages = [size for cost in costs for size in cost.messages]
+                print(f"  All pages back to back: {len(all_messages)} chunks, {send_seconds(all_messages):.1f} s")
+            if args.send_budget is not None:
+                for cost in costs:
+                    if cost.seconds > args.send_budget:
+                        print(f"Warning: page '{cost.name}' takes {cost.seconds:.1f} s to send, "
+                              f"over the {args.send_budget:g} s budget")
 
         print(f"✓ Raid assignments generated successfully!")
+        report_metrics(app.metrics, args.metrics)
         return 0
 
     except KeyboardInterrupt:
@@ -195,6 +760,153 @@ Examples:
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
+    finally:
+        if app is not None:
+            app.close()
+
+
+def cache_command(argv: List[str]) -> int:
+    """Inspect or maintain the sheet cache: main.py cache stats|prune|clear."""
+    parser = argparse.ArgumentParser(
+        prog="main.py cache",
+        description="Inspect or maintain the downloaded sheet cache"
+    )
+    parser.add_argument(
+        "action", choices=["stats", "prune", "clear"],
+        help="stats: show cache size; prune: evict entries beyond the limits; clear: remove everything"
+    )
+    parser.add_argument(
+        "--config", "-c",
+        help="TOML configuration file whose [cache] table sets the directory and limits"
+    )
+    parser.add_argument("--cache-dir", help="Cache directory (default: .cache)")
+    parser.add_argument("--max-bytes", type=int, help="Maximum total size in bytes")
+    parser.add_argument("--max-entries", type=int, help="Maximum number of cached files")
+    parser.add_argument("--max-age", type=float, help="Maximum age in seconds")
+    args = parser.parse_args(argv)
+
+    try:
+        cache_config: Dict[str, Any] = {}
+        if args.config:
+            with open(args.config, 'rb') as f:
+                cache_config = dict(tomllib.load(f).get("cache", {}))
+
+        for key in ("max_bytes", "max_entries", "max_age"):
+            if getattr(args, key) is not None:
+                cache_config[key] = getattr(args, key)
+
+        cache = CacheManager.from_config(cache_config, args.cache_dir)
+
+        if args.action == "stats":
+            stats = cache.stats()
+            print(f"Cache directory: {stats['cache_dir']}")
+            print(f"Entries: {stats['entries']} (limit {stats['max_entries']})")
+            print(f"Size: {stats['bytes'] / 1024:.1f} KiB (limit {stats['max_bytes'] / 1024:.1f} KiB)")
+            if stats['oldest'] is not None:
+                print(f"Oldest entry: {time.ctime(stats['oldest'])}")
+                print(f"Newest entry: {time.ctime(stats['newest'])}")
+        elif args.action == "prune":
+            removed = cache.prune()
+            print(f"Pruned {len(removed)} cache file(s)")
+        else:
+            print(f"Removed {cache.clear()} cache file(s)")
+        return 0
+
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def describe_changed_sections(output_path: Path, changed: List[str]) -> str:
+    """One-line report of the sections an incremental run regenerated."""
+    if not changed:
+        return f"{output_path}: no sections changed"
+    return f"{output_path}: regenerated {len(changed)} section(s): {', '.join(changed)}"
+
+
+def run_watch(config_paths: List[Path], args: argparse.Namespace) -> int:
+    """Run watch mode until interrupted."""
+    batch = BatchAssignmentGenerator(config_paths)
+    try:
+        print(f"Watching {len(config_paths)} config(s), press Ctrl+C to stop...")
+        batch.watch(args.interval, args.max_interval,
+                    Path(args.watch_log) if args.watch_log else None)
+        return 0
+
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+        return 0
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        batch.close()
+
+
+def load_roster(roster_path: Optional[str], generators: List[RaidAssignmentGenerator]) -> Optional[Roster]:
+    """The --roster file, or the one named by the configs' `roster` key; None if neither is set."""
+    if roster_path is None:
+        paths = sorted({str(generator.config["roster"]) for generator in generators
+                        if generator.config.get("roster")})
+        if len(paths) > 1:
+            raise ValueError(f"Configs name different roster files ({', '.join(paths)}), choose one with --roster")
+        roster_path = paths[0] if paths else None
+    return Roster.load(roster_path) if roster_path else None
+
+
+def report_conflicts(conflicts: List[Conflict]) -> None:
+    if not conflicts:
+        print("Roster check: no conflicts found")
+        return
+    print(f"Roster check: {len(conflicts)} conflict(s)")
+    for conflict in conflicts:
+        print(f"  {conflict}")
+
+
+def report_metrics(metrics: RunMetrics, metrics_format: Optional[str]) -> None:
+    """Write the profile if one was requested, and print the metrics in the requested format."""
+    profile_path = metrics.dump_profile()
+    if profile_path:
+        print(f"Processing profile saved to: {profile_path.absolute()}")
+    if metrics_format == "json":
+        print(metrics.to_json())
+
+
+def run_batch(config_paths: List[Path], verbose: bool, incremental: bool = False,
+              metrics: Optional[RunMetrics] = None, metrics_format: Optional[str] = None,
+              check_roster: bool = False, roster_path: Optional[str] = None) -> int:
+    """Run batch mode over several configuration files."""
+    try:
+        batch = BatchAssignmentGenerator(config_paths, metrics)
+
+        if verbose:
+            for path in config_paths:
+                print(f"Loading configuration from: {path}")
+
+        try:
+            output_files = batch.run(incremental)
+        finally:
+            batch.close()
+
+        for config_path, error in batch.failures.items():
+            print(f"Error: {config_path}: {error}", file=sys.stderr)
+
+        roster = load_roster(roster_path, batch.generators)
+        if check_roster or roster is not None:
+            report_conflicts(batch.check_roster(roster))
+
+        print(f"✓ {len(output_files)} raid assignment file(s) generated "
+              f"from {batch.fetch_count} sheet fetch(es)"
+              + (f" and {batch.cached_count} cached tab(s)!" if batch.cached_count else "!"))
+        report_metrics(batch.metrics, metrics_format)
+        return 1 if batch.failures else 0
+
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user.")
+        return 1
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sparks.libdeflate import (compress_deflate, decode_for_wow_addon_channel,
+                               decompress_deflate, encode_for_wow_addon_channel)
+from sparks.libserialize import LuaValue, deserialize, serialize
+
+CMD_PAGE = "PAGE"  # commModule.CMD_PAGE in Src/Comm.lua
+
+
+@dataclass
+class Category:
+    """An AngrySparks category, as stored in AngrySparks_Categories."""
+    id: int
+    name: str
+
+    def to_lua(self) -> Dict[str, Any]:
+        return {"Id": self.id, "Name": self.name}
+
+
+@dataclass
+class Page:
+    """An AngrySparks page, as stored in AngrySparks_Pages."""
+    id: int
+    name: str
+    contents: str
+    updated: int
+    category_id: Optional[int] = None
+
+    def to_lua(self) -> Dict[str, Any]:
+        page = {"Id": self.id, "Updated": self.updated, "Name": self.name, "Contents": self.contents}
+        if self.category_id is not None:
+            page["CategoryId"] = self.category_id
+        return page
+
+    def message(self, variables: Optional[List[Tuple[str, str]]] = None) -> list:
+        """The PAGE comm message Src/Comm.lua sends for this page.
+
+        UpdateId is left nil so the receiver computes it; Variables must be a table
+        because the receiver replaces AngrySparks_Variables with it.
+        """
+        return [CMD_PAGE, self.id, self.updated, self.name, self.contents, None,
+                [list(v) for v in variables or []]]
+
+
+def stable_id(kind: str, *names: str) -> int:
+    """Deterministic 32-bit id, so re-exporting a page updates it instead of adding a copy."""
+    return zlib.crc32("\n".join((kind,) + names).encode('utf-8'))
+
+
+def parse_pages(lines: List[str], updated: Optional[int] = None) -> Tuple[List[Category], List[Page]]:
+    """Split assignment lines into categories ("# ") and pages ("## ").
+
+    Lines before the first page heading are tool output, not page contents.
+    """
+    updated = int(time.time()) if updated is None else updated
+    categories: List[Category] = []
+    pages: List[Page] = []
+    category: Optional[Category] = None
+    body: Optional[List[str]] = None
+
+    def finish_page() -> None:
+        if body is not None:
+            pages[-1].contents = "\n".join(body).strip("\n")
+
+    for line in lines:
+        if line.startswith("## "):
+            finish_page()
+            name = line[3:].strip()
+            category_name = category.name if category else ""
+            pages.append(Page(id=stable_id("page", category_name, name), name=name, contents="",
+                              updated=updated, category_id=category.id if category else None))
+            body = []
+        elif line.startswith("# "):
+            finish_page()
+            body = None
+            category = Category(id=stable_id("cat", line[2:].strip()), name=line[2:].strip())
+            categories.append(category)
+        elif body is not None:
+            body.append(line)
+    finish_page()
+
+    return categories, pages
+
+
+def encode_message(value: Any) -> bytes:
+    """LibSerialize -> LibDeflate:CompressDeflate -> EncodeForWoWAddonChannel, as in Comm.lua."""
+    return encode_for_wow_addon_channel(compress_deflate(serialize(value)))
+
+
+def decode_message(data: bytes) -> LuaValue:
+    """Reverse encode_message, like commModule:ReceiveMessage. Raises ValueError on bad data."""
+    values = deserialize(decompress_deflate(decode_for_wow_addon_channel(data)))
+    if len(values) != 1:
+        raise ValueError(f"Expected one serialized value, found {len(values)}")
+    return values[0]
+
+
+def export_bundle(categories: List[Category], pages: List[Page]) -> Dict[str, Dict[int, Any]]:
+    """Categories and pages keyed by Id, in the AngrySparks_Categories/_Pages saved format."""
+    return {
+        "Categories": {category.id: category.to_lua() for category in categories},
+        "Pages": {page.id: page.to_lua() for page in pages},
+    }
+
+
+def encode_assignments(text: str, updated: Optional[int] = None) -> bytes:
+    """Encode generated assignment text as one ready-to-import category/page blob."""
+    return encode_message(export_bundle(*parse_pages(text.split("\n"), updated)))
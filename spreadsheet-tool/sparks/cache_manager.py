@@ -0,0 +1,236 @@
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from sparks.fileutil import atomic_write_bytes
+
+
+class CacheManager:
+    """Bounded cache directory with atomic writes and an index of its files.
+
+    Every file is written to a temporary file and renamed into place, so concurrent
+    runs never see a half-written entry. index.json records size, modification and
+    last access time of every file, so lookups and limit checks need no stat calls.
+    When a limit is exceeded the least recently used files are evicted.
+    """
+
+    INDEX_FILE = "index.json"
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MiB
+    DEFAULT_MAX_ENTRIES = 1000
+    DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30 days in seconds
+    # [cache] keys read by from_config; the rest (lifetime, revalidate, ...) are per-fetch policy
+    CONFIG_KEYS = ("dir", "max_bytes", "max_entries", "max_age")
+
+    def __init__(self, cache_dir: Path, max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+                 max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._removed: Set[str] = set()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._index = self._load_index()
+
+    @classmethod
+    def from_config(cls, cache_config: dict, cache_dir: Optional[Path] = None) -> "CacheManager":
+        """Create a manager from the optional [cache] table of a configuration."""
+        return cls(cache_dir=Path(cache_dir or cache_config.get("dir", ".cache")),
+                   max_bytes=cache_config.get("max_bytes", cls.DEFAULT_MAX_BYTES),
+                   max_entries=cache_config.get("max_entries", cls.DEFAULT_MAX_ENTRIES),
+                   max_age=cache_config.get("max_age", cls.DEFAULT_MAX_AGE))
+
+    @property
+    def index_path(self) -> Path:
+        return self.cache_dir / self.INDEX_FILE
+
+    def path(self, name: str) -> Path:
+        """Get the path of a cache file by its name relative to the cache directory."""
+        return self.cache_dir / name
+
+    # Index handling
+
+    def _load_index(self) -> Dict[str, dict]:
+        """Load the index, rebuilding it from the directory if it is missing or corrupt."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if isinstance(index, dict):
+                return index
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return self._scan_directory()
+
+    def _scan_directory(self) -> Dict[str, dict]:
+        """Build index records for every file in the cache directory."""
+        index = {}
+        for path in self.cache_dir.rglob("*"):
+            if not path.is_file() or path == self.index_path or path.name.startswith(".tmp-"):
+                continue
+            stat = path.stat()
+            index[path.relative_to(self.cache_dir).as_posix()] = {
+                'size': stat.st_size,
+                'modified': stat.st_mtime,
+                'accessed': stat.st_mtime
+            }
+        return index
+
+    def rebuild_index(self) -> None:
+        """Re-scan the cache directory, e.g. after files were removed by hand."""
+        with self._lock:
+            self._index = self._scan_directory()
+            atomic_write_bytes(self.index_path, json.dumps(self._index).encode('utf-8'))
+            self._dirty = False
+
+    def flush(self) -> None:
+        """Write the index atomically if it changed.
+
+        Records added by other processes since the index was loaded are merged in.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    on_disk = json.load(f)
+                for name, record in on_disk.items():
+                    if name not in self._index and name not in self._removed:
+                        self._index[name] = record
+            except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+                pass
+            atomic_write_bytes(self.index_path, json.dumps(self._index).encode('utf-8'))
+            self._dirty = False
+
+    # File access
+
+    def contains(self, name: str) -> bool:
+        """Check whether a cache file exists, using the index only."""
+        return name in self._index
+
+    def age(self, name: str) -> Optional[float]:
+        """Seconds since the file was written or last validated, None if missing."""
+        record = self._index.get(name)
+        return None if record is None else time.time() - record['modified']
+
+    def read_bytes(self, name: str) -> Optional[bytes]:
+        """Read a cache file and mark it as recently used."""
+        if not self.contains(name):
+            return None
+        try:
+            data = self.path(name).read_bytes()
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+        self.mark_used(name)
+        return data
+
+    def read_text(self, name: str) -> Optional[str]:
+        data = self.read_bytes(name)
+        return None if data is None else data.decode('utf-8')
+
+    def write_bytes(self, name: str, data: bytes) -> None:
+        """Atomically write a cache file, then evict files beyond the limits."""
+        atomic_write_bytes(self.path(name), data)
+        now = time.time()
+        with self._lock:
+            self._index[name] = {'size': len(data), 'modified': now, 'accessed': now}
+            self._removed.discard(name)
+            self._dirty = True
+            self.prune(keep=name)
+
+    def write_text(self, name: str, text: str) -> None:
+        self.write_bytes(name, text.encode('utf-8'))
+
+    def mark_used(self, name: str) -> None:
+        """Record an access for LRU ordering; written with the next index flush."""
+        with self._lock:
+            if name in self._index:
+                self._index[name]['accessed'] = time.time()
+                self._dirty = True
+
+    def mark_validated(self, name: str) -> None:
+        """Reset the age of a file whose content was confirmed unchanged."""
+        with self._lock:
+            if name in self._index:
+                now = time.time()
+                self._index[name]['modified'] = now
+                self._index[name]['accessed'] = now
+                self._dirty = True
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self.path(name).unlink(missing_ok=True)
+            self._forget(name)
+
+    def _forget(self, name: str) -> None:
+        with self._lock:
+            self._removed.add(name)
+            if self._index.pop(name, None) is not None:
+                self._dirty = True
+
+    # Limits
+
+    def prune(self, keep: Optional[str] = None) -> List[str]:
+        """Evict expired files, then least recently used files until within limits.
+
+        Returns the names of the removed files. The file named by keep is never evicted.
+        """
+        with self._lock:
+            removed = set()
+            if self.max_age is not None:
+                cutoff = time.time() - self.max_age
+                removed = {name for name, record in self._index.items()
+                           if record['modified'] < cutoff and name != keep}
+
+            candidates = sorted((name for name in self._index if name not in removed and name != keep),
+                                key=lambda name: self._index[name]['accessed'])
+            entries = len(self._index) - len(removed)
+            total_bytes = sum(record['size'] for name, record in self._index.items()
+                              if name not in removed)
+
+            for name in candidates:
+                over_entries = self.max_entries is not None and entries > self.max_entries
+                over_bytes = self.max_bytes is not None and total_bytes > self.max_bytes
+                if not (over_entries or over_bytes):
+                    break
+                removed.add(name)
+                entries -= 1
+                total_bytes -= self._index[name]['size']
+
+            for name in removed:
+                self.remove(name)
+            self.flush()
+            return sorted(removed)
+
+    def clear(self) -> int:
+        """Remove every cache file. Returns the number of files removed."""
+        with self._lock:
+            count = len(self._scan_directory())
+            for child in self.cache_dir.iterdir():
+                if child.is_dir():
+                    shutil.rmtree(child)
+                else:
+                    child.unlink()
+            self._index = {}
+            self._removed = set()
+            self._dirty = False
+            return count
+
+    def stats(self) -> dict:
+        """Summary of the cache contents and limits."""
+        records = list(self._index.values())
+        return {
+            'cache_dir': str(self.cache_dir.absolute()),
+            'entries': len(records),
+            'bytes': sum(record['size'] for record in records),
+            'oldest': min((record['modified'] for record in records), default=None),
+            'newest': max((record['modified'] for record in records), default=None),
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'max_age': self.max_age
+        }
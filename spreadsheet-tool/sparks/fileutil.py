@@ -0,0 +1,51 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write to a temporary file in the target directory and rename it into place.
+
+    Readers see either the old or the new content, never a half-written file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=".tmp-", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Atomically write UTF-8 text, see atomic_write_bytes."""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+class AtomicTextFile:
+    """A UTF-8 text file written piece by piece to a temporary file next to path.
+
+    commit() renames it into place; abort() deletes it. Until commit, readers keep
+    seeing the previous content.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._temp_name = tempfile.mkstemp(prefix=".tmp-", dir=self.path.parent)
+        self._file = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+
+    def commit(self) -> Path:
+        self._file.close()
+        os.replace(self._temp_name, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self._file.close()
+        Path(self._temp_name).unlink(missing_ok=True)
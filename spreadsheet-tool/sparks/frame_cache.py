@@ -0,0 +1,72 @@
+import importlib.util
+import io
+import pickle
+from typing import TYPE_CHECKING, Optional
+
+from sparks.cache_manager import CacheManager
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Optional: enables the memory-mapped Parquet format. Like pandas, it is only
+# imported once a frame is actually loaded or stored.
+HAVE_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+class FrameCache:
+    """Second cache tier holding already-parsed sheets, keyed by payload content hash.
+
+    Frames are stored as Parquet and loaded memory-mapped when pyarrow is installed,
+    otherwise as pickled DataFrames. Frames Parquet cannot represent (e.g. columns
+    mixing numbers and text) are always pickled.
+    """
+
+    FRAMES_SUBDIR = "frames"
+    PARQUET_SUFFIX = ".parquet"
+    PICKLE_SUFFIX = ".pkl"
+
+    def __init__(self, cache: CacheManager, use_parquet: bool = HAVE_PYARROW) -> None:
+        self.cache = cache
+        self.use_parquet = use_parquet and HAVE_PYARROW
+
+    def _name(self, content_hash: str, suffix: str) -> str:
+        return f"{self.FRAMES_SUBDIR}/{content_hash}{suffix}"
+
+    def load(self, content_hash: str) -> Optional["pd.DataFrame"]:
+        """Load the parsed frame for a content hash, or None if it is not cached."""
+        import pandas as pd
+
+        parquet_name = self._name(content_hash, self.PARQUET_SUFFIX)
+        pickle_name = self._name(content_hash, self.PICKLE_SUFFIX)
+
+        try:
+            if HAVE_PYARROW and self.cache.contains(parquet_name):
+                frame = pd.read_parquet(self.cache.path(parquet_name), memory_map=True)
+                self.cache.mark_used(parquet_name)
+                return frame
+            if self.cache.contains(pickle_name):
+                frame = pd.read_pickle(self.cache.path(pickle_name))
+                self.cache.mark_used(pickle_name)
+                return frame
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Warning: Failed to load cached frame, parsing CSV instead: {e}")
+        return None
+
+    def store(self, content_hash: str, frame: "pd.DataFrame") -> None:
+        """Store a parsed frame under its content hash."""
+        try:
+            if self.use_parquet:
+                import pyarrow
+
+                try:
+                    self.cache.write_bytes(self._name(content_hash, self.PARQUET_SUFFIX),
+                                           frame.to_parquet())
+                    return
+                except (TypeError, ValueError, ImportError, pyarrow.ArrowException):
+                    pass
+
+            buffer = io.BytesIO()
+            frame.to_pickle(buffer)
+            self.cache.write_bytes(self._name(content_hash, self.PICKLE_SUFFIX), buffer.getvalue())
+        except OSError as e:
+            print(f"Warning: Failed to save parsed frame to cache: {e}")
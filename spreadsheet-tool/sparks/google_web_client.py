@@ -1,131 +1,608 @@
 import requests
-import pandas as pd
+import codecs
+import csv
 import hashlib
+import re
+import threading
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import StringIO
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from sparks.cache_manager import CacheManager
+from sparks.frame_cache import FrameCache
+from sparks.metrics import RunMetrics
+from sparks.sheet import EmptySheetError, SheetBounds, SheetData, SheetTable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TabKey = Tuple[str, str]  # (spreadsheet ID, sheet name or gid)
+
+# One tab in the JavaScript of a spreadsheet's htmlview page:
+#   items.push({name: "Raid \u2013 BWL", pageUrl: "https:\/\/...", gid: "1474", ...
+_TAB_ITEM_RE = re.compile(r'items\.push\(\{name: ("(?:[^"\\]|\\.)*"), pageUrl: "(?:[^"\\]|\\.)*", gid: "(\d+)"')
+_JS_ESCAPE_RE = re.compile(r"\\(\\|x[0-9A-Fa-f]{2}|')")
+_GID_RE = re.compile(r"[#?&]gid=(\d+)")
+
+
+def _js_string(literal: str) -> str:
+    """Decode a double-quoted JavaScript string literal: JSON plus the \\xNN and \\' escapes."""
+    def escape(match: re.Match) -> str:
+        code = match.group(1)
+        return "\\u00" + code[1:] if code[0] == "x" else ("'" if code == "'" else "\\\\")
+    return json.loads(_JS_ESCAPE_RE.sub(escape, literal))
+
+
+def parse_tab_names(html: str) -> Dict[str, str]:
+    """Map the tab names of a spreadsheet's htmlview page to their gids."""
+    return {_js_string(name): gid for name, gid in _TAB_ITEM_RE.findall(html)}
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How long cached sheets are served and when they are revalidated.
+
+    revalidate is one of:
+      "expired" - serve cached data within lifetime, then send a conditional request
+      "always"  - send a conditional request on every fetch (never serve stale data)
+      "never"   - serve cached data within lifetime, then download it again in full
+    """
+    lifetime: float = 3600
+    revalidate: str = "expired"
+
+    REVALIDATE_MODES = ("expired", "always", "never")
+
+    def __post_init__(self) -> None:
+        if self.revalidate not in self.REVALIDATE_MODES:
+            raise ValueError(
+                f"Invalid cache revalidate mode: {self.revalidate}. "
+                f"Supported modes: {', '.join(self.REVALIDATE_MODES)}"
+            )
+
+    @classmethod
+    def from_config(cls, config: dict) -> "CachePolicy":
+        """Read the optional [cache] table of a configuration."""
+        cache_config = config.get("cache", {})
+        return cls(lifetime=float(cache_config.get("lifetime", GoogleWebClient.CACHE_LIFETIME)),
+                   revalidate=cache_config.get("revalidate", "expired"))
+
+    def serves_fresh_cache(self) -> bool:
+        """Whether a cached entry inside its lifetime is used without a request."""
+        return self.revalidate != "always"
+
+    def sends_validators(self) -> bool:
+        """Whether expired entries are revalidated with a conditional request."""
+        return self.revalidate != "never"
+
+
+@dataclass
+class FetchInfo:
+    """How the most recent fetch of a tab was served."""
+    source: str  # "cache", "not-modified" or "download"
+    latency: float  # seconds spent in fetch_tab
+    bytes_downloaded: int = 0
 
 
 class GoogleWebClient:
     CACHE_DIR = Path(".cache")
     CACHE_LIFETIME = 3600  # 1 hour in seconds
+    TAB_NAMES_LIFETIME = 24 * 3600  # 1 day in seconds; tabs are rarely renamed or recreated
+    EXPORT_BASE_URL = "https://docs.google.com/spreadsheets/d"
+    REQUEST_TIMEOUT = 30  # seconds
+    STREAM_CHUNK_SIZE = 16 * 1024  # bytes read at a time from a body cut short by bounds
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    # "csv" parses with the csv module into a SheetTable; "pandas" uses pd.read_csv
+    # and the parsed frame cache, and imports pandas on first use
+    SHEET_BACKENDS = ("csv", "pandas")
 
-    def __init__(self):
-        self.config = {}
-        self._ensure_cache_dir()
+    def __init__(self, base_url: Optional[str] = None, cache_dir: Optional[Path] = None,
+                 max_workers: int = 4, retries: int = 3, backoff_factor: float = 0.5,
+                 metrics: Optional[RunMetrics] = None, backend: Optional[str] = None):
+        self.config: Dict[str, Any] = {}
+        self.metrics = metrics or RunMetrics()
+        self._backend_override = backend
+        self.base_url = (base_url or self.EXPORT_BASE_URL).rstrip("/")
+        self._cache_dir_override = Path(cache_dir) if cache_dir is not None else None
+        self.max_workers = max_workers
+        self.content_hashes: Dict[TabKey, str] = {}
+        self.last_fetch: Dict[TabKey, FetchInfo] = {}
+        self._tab_names_lock = threading.Lock()
+        # Spreadsheets whose tab list could not be downloaded, so one run asks only once
+        self._tab_names_errors: Dict[str, str] = {}
+        self._cache_lock = threading.Lock()
+        self._cache: Optional[CacheManager] = None
+        self.session = self._create_session(retries, backoff_factor)
+        self._configure_backend()
+        self._configure_cache({})
 
     def set_config(self, config: dict) -> None:
         self.config = config
+        self._configure_backend()
+        self._configure_cache(config.get("cache", {}))
+
+    def _configure_backend(self) -> None:
+        """Pick the sheet parser from the constructor argument or the optional `backend` config key."""
+        self.backend = self._backend_override or self.config.get("backend", "csv")
+        if self.backend not in self.SHEET_BACKENDS:
+            raise ValueError(f"Invalid sheet backend: {self.backend}. "
+                             f"Supported backends: {', '.join(self.SHEET_BACKENDS)}")
+
+    def _configure_cache(self, cache_config: dict) -> None:
+        """Use the [cache] table of a configuration; the directory is created on first use."""
+        with self._cache_lock:
+            if self._cache is not None:
+                self._cache.flush()
+            self._cache = None
+            self._cache_config = cache_config
+            self.cache_dir = self._cache_dir_override or Path(cache_config.get("dir", self.CACHE_DIR))
 
-    def _ensure_cache_dir(self) -> None:
-        """Ensure cache directory exists."""
-        self.CACHE_DIR.mkdir(exist_ok=True)
+    def _open_cache(self) -> CacheManager:
+        with self._cache_lock:
+            if self._cache is None:
+                self._cache = CacheManager.from_config(self._cache_config, self.cache_dir)
+                self._frame_cache = FrameCache(self._cache)
+            return self._cache
+
+    @property
+    def cache(self) -> CacheManager:
+        """The bounded cache directory, created when the first sheet is looked up."""
+        return self._open_cache()
+
+    @property
+    def frame_cache(self) -> FrameCache:
+        """The parsed frame tier, kept in the cache directory."""
+        self._open_cache()
+        return self._frame_cache
+
+    def _create_session(self, retries: int, backoff_factor: float) -> requests.Session:
+        """Create a keep-alive session with a connection pool sized for max_workers."""
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=self.RETRY_STATUS_CODES,
+                      allowed_methods=["GET"], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.max_workers,
+                              pool_maxsize=self.max_workers, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """Release pooled connections and write the cache index."""
+        self.session.close()
+        if self._cache is not None:
+            self._cache.flush()
 
     def _get_cache_key(self, url: str) -> str:
         """Generate a cache key for the given URL."""
         return hashlib.md5(url.encode()).hexdigest()
 
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """Get the cache file path for the given cache key."""
-        return self.CACHE_DIR / f"{cache_key}.json"
+    def _get_cache_name(self, cache_key: str) -> str:
+        """Get the cache metadata file name for the given cache key."""
+        return f"{cache_key}.json"
 
-    def _is_cache_valid(self, cache_path: Path) -> bool:
-        """Check if cache file exists and is within the cache lifetime."""
-        if not cache_path.exists():
-            return False
+    @staticmethod
+    def _get_content_name(cache_name: str) -> str:
+        """Get the name of the raw CSV text stored next to a cache metadata file."""
+        return cache_name.rsplit(".", 1)[0] + ".csv"
 
-        file_age = time.time() - cache_path.stat().st_mtime
-        return file_age < self.CACHE_LIFETIME
+    def _is_cache_valid(self, cache_name: str, lifetime: float) -> bool:
+        """Check if cache entry exists and was validated within the cache lifetime."""
+        age = self.cache.age(cache_name)
+        return age is not None and age < lifetime
 
-    def _load_from_cache(self, cache_path: Path) -> Optional[str]:
-        """Load cached data from file."""
+    def _load_from_cache(self, cache_name: str) -> Optional[dict]:
+        """Load a cache entry (validators and content hash) from its metadata file."""
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                return cache_data.get('content')
-        except (FileNotFoundError, json.JSONDecodeError):
+            cache_text = self.cache.read_text(cache_name)
+            if cache_text is None:
+                return None
+            cache_data = json.loads(cache_text)
+            has_content = cache_data.get('content') or self.cache.contains(self._get_content_name(cache_name))
+            return cache_data if has_content else None
+        except json.JSONDecodeError:
             return None
 
-    def _save_to_cache(self, cache_path: Path, content: str) -> None:
-        """Save data to cache file."""
+    def _load_cache_content(self, cache_name: str, cache_entry: dict) -> str:
+        """Load the raw CSV text of a cache entry."""
+        if cache_entry.get('content'):  # Entries written before the text moved out of the JSON
+            return cache_entry['content']
+        content = self.cache.read_text(self._get_content_name(cache_name))
+        if content is None:
+            raise RuntimeError("Cached sheet text was evicted, run again to download it")
+        return content
+
+    def _save_to_cache(self, cache_name: str, content: str, url: str,
+                       headers: Optional[Mapping[str, str]] = None, rows: Optional[int] = None) -> dict:
+        """Save CSV text and a metadata file with its HTTP validators and content hash.
+
+        rows is the number of rows after the header in a download cut short by
+        bounds, or None for the whole sheet.
+        """
+        headers = headers or {}
+        cache_data = {
+            'timestamp': time.time(),
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_hash': self.content_hash(content),
+            'rows': rows
+        }
         try:
-            cache_data = {
-                'content': content,
-                'timestamp': time.time(),
-                'url': getattr(self, '_current_url', 'unknown')
-            }
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f)
-        except IOError as e:
+            self.cache.write_text(self._get_content_name(cache_name), content)
+            self.cache.write_text(cache_name, json.dumps(cache_data))
+        except OSError as e:
             print(f"Warning: Failed to save to cache: {e}")
+        return cache_data
+
+    def _touch_cache(self, cache_name: str) -> None:
+        """Mark a cache entry as just validated without rewriting its content."""
+        self.cache.mark_validated(cache_name)
+        self.cache.mark_validated(self._get_content_name(cache_name))
+
+    @staticmethod
+    def _cache_covers(cache_entry: dict, bounds: Optional[SheetBounds]) -> bool:
+        """Whether a cache entry holds every row a fetch with bounds reads."""
+        rows = cache_entry.get('rows')
+        return rows is None or (bounds is not None and rows >= bounds.rows)
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """SHA-256 of the payload, used to detect byte-identical downloads."""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _conditional_headers(cache_entry: Optional[dict]) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from a cache entry."""
+        headers = {}
+        if cache_entry:
+            if cache_entry.get('etag'):
+                headers['If-None-Match'] = cache_entry['etag']
+            if cache_entry.get('last_modified'):
+                headers['If-Modified-Since'] = cache_entry['last_modified']
+        return headers
 
-    def fetch_sheet_data(self) -> pd.DataFrame:
+    def _load_sheet(self, tab: TabKey, cache_name: str, cache_entry: dict,
+                    content: Optional[str] = None, bounds: Optional[SheetBounds] = None) -> SheetData:
+        """Parse a sheet with the configured backend.
+
+        The pandas backend loads the parsed frame cache first, falling back to parsing
+        the CSV text. The csv module parses a few hundred rows in under a millisecond,
+        so the csv backend always parses the text, keeping only the cells within bounds.
+        """
+        content_hash = cache_entry.get('content_hash')
+        with self.metrics.stage("parse"):
+            if content_hash is None:
+                if content is None:
+                    content = self._load_cache_content(cache_name, cache_entry)
+                content_hash = self.content_hash(content)
+
+            if self.backend == "csv":
+                if content is None:
+                    content = self._load_cache_content(cache_name, cache_entry)
+                sheet_data = SheetTable.from_csv(content, bounds)
+            else:
+                sheet_data = self._load_frame(content_hash, cache_name, cache_entry, content)
+
+        self.content_hashes[tab] = content_hash
+        sheet_data.attrs['content_hash'] = content_hash
+        return sheet_data
+
+    def _load_frame(self, content_hash: str, cache_name: str, cache_entry: dict,
+                    content: Optional[str]) -> "pd.DataFrame":
+        import pandas as pd
+
+        sheet_data = self.frame_cache.load(content_hash)
+        if sheet_data is not None:
+            self.metrics.count("frame_cache_hits")
+            return sheet_data
+
+        self.metrics.count("frame_cache_misses")
+        if content is None:
+            content = self._load_cache_content(cache_name, cache_entry)
+        try:
+            sheet_data = pd.read_csv(StringIO(content))
+        except pd.errors.EmptyDataError as e:
+            raise EmptySheetError(str(e))
+        self.frame_cache.store(content_hash, sheet_data)
+        return sheet_data
+
+    def fetch_sheet_data(self, bounds: Optional[SheetBounds] = None) -> SheetData:
         """Fetch data from Google Sheets with caching."""
+        sheet_id, sheet = self.get_tab_key()
+        return self.fetch_tab(sheet_id, sheet, bounds=bounds)
+
+    def fetch_tab(self, sheet_id: str, sheet: str, policy: Optional[CachePolicy] = None,
+                  bounds: Optional[SheetBounds] = None, resolve_again: bool = True) -> SheetData:
+        """Fetch one spreadsheet tab with caching and conditional revalidation.
+
+        The SHA-256 of the CSV payload is stored in content_hashes and in the
+        frame's attrs['content_hash']; how the fetch was served is stored in last_fetch.
+        With bounds, the download stops after the last row within them and the csv
+        backend keeps only the columns within them. With resolve_again, a tab name
+        whose cached gid no longer exists is looked up once more.
+        """
+        policy = policy or CachePolicy.from_config(self.config)
+        tab = (sheet_id, sheet)
+        started = time.perf_counter()
+
         try:
             # Convert Google Sheets URL to CSV export format
-            sheet_url = self._convert_to_csv_url(url=self.config["spreadsheet_url"],
-                                                 sheet=self.config["sheet"])
+            with self.metrics.stage("url"):
+                sheet_url = self._build_csv_url(sheet_id, sheet)
             print("Requesting sheet data from: ", sheet_url)
 
-            # Store current URL for cache metadata
-            self._current_url = sheet_url
-
-            # Check cache first
-            cache_key = self._get_cache_key(sheet_url)
-            cache_path = self._get_cache_path(cache_key)
+            # Check cache first; an entry cut short by earlier bounds only serves smaller ones
+            with self.metrics.stage("cache_lookup"):
+                cache_key = self._get_cache_key(sheet_url)
+                cache_name = self._get_cache_name(cache_key)
+                cache_entry = self._load_from_cache(cache_name)
+                if cache_entry and not self._cache_covers(cache_entry, bounds):
+                    cache_entry = None
+                fresh = bool(cache_entry and policy.serves_fresh_cache()
+                             and self._is_cache_valid(cache_name, policy.lifetime))
 
-            if self._is_cache_valid(cache_path):
+            if fresh and cache_entry:
                 print("Loading data from cache...")
-                cached_content = self._load_from_cache(cache_path)
-                if cached_content:
-                    from io import StringIO
-                    sheet_data = pd.read_csv(StringIO(cached_content))
-                    print(f"Successfully loaded {len(sheet_data)} rows from cache")
-                    return sheet_data
-
-            # Fetch fresh data if cache miss or invalid
-            print("Fetching fresh data from Google Sheets...")
-            response = requests.get(sheet_url, timeout=30)
-            response.raise_for_status()
+                sheet_data = self._load_sheet(tab, cache_name, cache_entry, bounds=bounds)
+                self.last_fetch[tab] = FetchInfo("cache", time.perf_counter() - started)
+                self.metrics.count("cache_hits")
+                print(f"Successfully loaded {len(sheet_data)} rows from cache")
+                return sheet_data
+
+            # Revalidate the cached copy, or fetch fresh data on a cache miss
+            headers = self._conditional_headers(cache_entry) if policy.sends_validators() else {}
+            if headers:
+                print("Revalidating cached data with Google Sheets...")
+            else:
+                print("Fetching fresh data from Google Sheets...")
+            not_modified: Optional[dict] = None  # the cached entry a 304 reply confirmed
+            with self.metrics.stage("fetch"):
+                with self.session.get(sheet_url, headers=headers, timeout=self.REQUEST_TIMEOUT,
+                                      stream=True) as response:
+                    if response.status_code == 304 and cache_entry:
+                        not_modified = cache_entry
+                    else:
+                        response.raise_for_status()
+                        content, bytes_read, complete = self._read_body(response, bounds)
+            self.metrics.count("requests")
+
+            if not_modified is not None:
+                self._touch_cache(cache_name)
+                sheet_data = self._load_sheet(tab, cache_name, not_modified, bounds=bounds)
+                self.last_fetch[tab] = FetchInfo("not-modified", time.perf_counter() - started)
+                self.metrics.count("cache_revalidated")
+                print(f"Sheet not modified, reused {len(sheet_data)} cached rows")
+                return sheet_data
 
             # Save to cache
-            self._save_to_cache(cache_path, response.text)
+            with self.metrics.stage("cache_store"):
+                cache_entry = self._save_to_cache(cache_name, content, sheet_url, response.headers,
+                                                  rows=None if complete or bounds is None else bounds.rows)
 
             # Parse as CSV
-            from io import StringIO
-            sheet_data = pd.read_csv(StringIO(response.text))
+            sheet_data = self._load_sheet(tab, cache_name, cache_entry, content, bounds)
+            self.last_fetch[tab] = FetchInfo("download", time.perf_counter() - started, bytes_read)
+            self.metrics.count("cache_misses")
+            self.metrics.count("bytes_downloaded", bytes_read)
+            if not complete:
+                self.metrics.count("partial_downloads")
 
             print(f"Successfully loaded {len(sheet_data)} rows from spreadsheet")
             return sheet_data
 
+        except requests.HTTPError as e:
+            if (resolve_again and self._is_tab_name(sheet) and e.response is not None
+                    and e.response.status_code in (400, 404)):
+                print(f"Sheet {sheet!r} not found under its cached gid, looking up its name again...")
+                self.invalidate_tab_names(sheet_id)
+                return self.fetch_tab(sheet_id, sheet, policy, bounds, resolve_again=False)
+            raise RuntimeError(f"Failed to fetch spreadsheet data: {e}")
         except requests.RequestException as e:
             raise RuntimeError(f"Failed to fetch spreadsheet data: {e}")
-        except pd.errors.EmptyDataError:
+        except EmptySheetError:
             raise RuntimeError("Spreadsheet appears to be empty")
         except Exception as e:
             raise RuntimeError(f"Error processing spreadsheet data: {e}")
 
-    def _convert_to_csv_url(self, url: str, sheet: str) -> str:
-        """Convert Google Sheets URL to CSV export URL."""
-        # Extract sheet ID from the URL
+    def _read_body(self, response: requests.Response,
+                   bounds: Optional[SheetBounds]) -> Tuple[str, int, bool]:
+        """Read a streamed CSV body, stopping after the last row within bounds.
+
+        Returns the text read, the bytes downloaded, and whether that was the whole
+        body. The text ends with the last needed record, so rows past the bounds
+        never change its content hash.
+        """
+        if bounds is None:
+            content = response.content
+            return response.text, len(content), True
+
+        lines: List[str] = []
+        downloaded = 0
+
+        def read_lines() -> Iterator[str]:
+            nonlocal downloaded
+            decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')('replace')
+            pending = ""
+            for chunk in response.iter_content(self.STREAM_CHUNK_SIZE):
+                downloaded += len(chunk)
+                *complete_lines, pending = (pending + decoder.decode(chunk)).split("\n")
+                for line in complete_lines:
+                    lines.append(line + "\n")
+                    yield lines[-1]
+            pending += decoder.decode(b"", final=True)
+            if pending:
+                lines.append(pending)
+                yield pending
+
+        # Read one record past the bounds to tell a cut-off body from a complete one
+        needed = bounds.rows + 1  # the header, then A1 rows 1 to bounds.rows
+        records = kept = 0
+        complete = True
+        for row in csv.reader(read_lines()):
+            if not row:
+                continue
+            if records == needed:
+                complete = False
+                break
+            records += 1
+            kept = len(lines)
+        return "".join(lines if complete else lines[:kept]), downloaded, complete
+
+    def fetch_many(self, tabs: List[TabKey],
+                   policies: Optional[Dict[TabKey, CachePolicy]] = None,
+                   bounds: Optional[Dict[TabKey, Optional[SheetBounds]]] = None
+                   ) -> Dict[TabKey, Union[SheetData, Exception]]:
+        """Fetch several tabs concurrently over the pooled session.
+
+        At most max_workers requests are in flight. A failing tab does not affect the
+        others: its entry in the result holds the exception instead of the sheet.
+        policies optionally overrides the cache policy per tab, and bounds limits
+        the cells read per tab.
+        """
+        policies = policies or {}
+        bounds = bounds or {}
+        unique_tabs = list(dict.fromkeys(tabs))
+        results: Dict[TabKey, Union[SheetData, Exception]] = {}
+        if not unique_tabs:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique_tabs))) as executor:
+            futures = {tab: executor.submit(self.fetch_tab, *tab, policies.get(tab), bounds.get(tab))
+                       for tab in unique_tabs}
+            for tab, future in futures.items():
+                try:
+                    results[tab] = future.result()
+                except Exception as e:
+                    results[tab] = e
+        return results
+
+    def get_tab_key(self) -> TabKey:
+        """Return (spreadsheet ID, sheet) identifying the tab the current config points at."""
+        return self.tab_key(self.config)
+
+    @classmethod
+    def tab_key(cls, config: dict) -> TabKey:
+        """Return (spreadsheet ID, sheet) identifying the tab a config points at.
+
+        An empty `sheet` falls back to the gid in the spreadsheet URL, if it has one.
+        """
+        url = config["spreadsheet_url"]
+        sheet = str(config.get("sheet", ""))
+        return cls.extract_sheet_id(url), sheet or cls.extract_gid(url) or ""
+
+    @staticmethod
+    def extract_sheet_id(url: str) -> str:
+        """Extract the spreadsheet ID from a Google Sheets URL."""
         # Example: https://docs.google.com/spreadsheets/d/SHEET_ID/edit#gid=0
         if "docs.google.com/spreadsheets" not in url:
             raise ValueError("URL must be a Google Sheets URL")
 
         try:
-            # Extract sheet ID
             parts = url.split("/")
-            sheet_id = parts[parts.index("d") + 1]
+            return parts[parts.index("d") + 1]
+        except (ValueError, IndexError):
+            raise ValueError("Could not extract sheet ID from URL")
 
-            # Construct CSV export URL
-            csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv"
+    @staticmethod
+    def extract_gid(url: str) -> Optional[str]:
+        """Extract the gid of the tab a Google Sheets URL links to, if it names one."""
+        # Example: https://docs.google.com/spreadsheets/d/SHEET_ID/edit#gid=0
+        match = _GID_RE.search(url)
+        return match.group(1) if match else None
 
-            # Add specific sheet/page if needed
-            if sheet:
-                csv_url += f"&gid={sheet}"  # This would need proper GID handling
+    def _convert_to_csv_url(self, url: str, sheet: Optional[str] = None) -> str:
+        """Convert Google Sheets URL to CSV export URL, of the tab the URL links to by default."""
+        if sheet is None:
+            sheet = self.extract_gid(url) or ""
+        return self._build_csv_url(self.extract_sheet_id(url), sheet)
 
-            return csv_url
+    def _build_csv_url(self, sheet_id: str, sheet: str) -> str:
+        """Build the CSV export URL for a spreadsheet ID and sheet name or gid."""
+        csv_url = f"{self.base_url}/{sheet_id}/export?format=csv"
 
-        except (ValueError, IndexError):
-            raise ValueError("Could not extract sheet ID from URL")
+        # Add specific sheet/page if needed; without a gid Google exports the first tab
+        if sheet:
+            csv_url += f"&gid={self.resolve_gid(sheet_id, sheet)}"
+
+        return csv_url
+
+    @staticmethod
+    def _is_tab_name(sheet: str) -> bool:
+        """Whether a sheet setting is a tab name; numbers are gids already."""
+        return bool(sheet) and not sheet.isdigit()
+
+    @staticmethod
+    def _get_tab_names_name(sheet_id: str) -> str:
+        """Get the cache file name holding the tab names of a spreadsheet."""
+        return f"tabs-{sheet_id}.json"
+
+    def resolve_gid(self, sheet_id: str, sheet: str) -> str:
+        """Return the gid of a tab given by name or gid.
+
+        Names are looked up in the spreadsheet's tab list, which is cached per
+        spreadsheet for the [cache] tab_names_lifetime and downloaded again when it
+        has expired or lacks the name.
+        """
+        if not self._is_tab_name(sheet):
+            return sheet
+
+        with self._tab_names_lock:
+            if sheet_id in self._tab_names_errors:
+                raise RuntimeError(self._tab_names_errors[sheet_id])
+            tabs = self._load_tab_names(sheet_id)
+            if tabs is None or sheet not in tabs:
+                tabs = self._fetch_tab_names(sheet_id)
+
+        if sheet not in tabs:
+            raise ValueError(f"No sheet named {sheet!r} in spreadsheet {sheet_id}. "
+                             f"Sheets: {', '.join(tabs)}")
+        return tabs[sheet]
+
+    def _load_tab_names(self, sheet_id: str) -> Optional[Dict[str, str]]:
+        """Load the cached tab names of a spreadsheet, None if missing or expired."""
+        cache_name = self._get_tab_names_name(sheet_id)
+        lifetime = float(self.config.get("cache", {}).get("tab_names_lifetime", self.TAB_NAMES_LIFETIME))
+        if not self._is_cache_valid(cache_name, lifetime):
+            return None
+        try:
+            cache_text = self.cache.read_text(cache_name)
+            return json.loads(cache_text) if cache_text is not None else None
+        except json.JSONDecodeError:
+            return None
+
+    def _fetch_tab_names(self, sheet_id: str) -> Dict[str, str]:
+        """Download the tab names and gids of a spreadsheet and cache them."""
+        print(f"Looking up the sheet names of spreadsheet {sheet_id}...")
+        response = self.session.get(f"{self.base_url}/{sheet_id}/htmlview", timeout=self.REQUEST_TIMEOUT)
+        self.metrics.count("tab_name_requests")
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            # Not an export error: fetch_tab must not retry the lookup on this status
+            self._tab_names_errors[sheet_id] = (
+                f"Could not look up the sheet names of spreadsheet {sheet_id} ({e}), "
+                f"make sure it is shared publicly or set `sheet` to a gid")
+            raise RuntimeError(self._tab_names_errors[sheet_id])
+
+        tabs = parse_tab_names(response.text)
+        if not tabs:
+            raise RuntimeError(f"Could not read the sheet names of spreadsheet {sheet_id}, "
+                               f"make sure it is shared publicly or set `sheet` to a gid")
+        try:
+            self.cache.write_text(self._get_tab_names_name(sheet_id), json.dumps(tabs))
+        except OSError as e:
+            print(f"Warning: Failed to save to cache: {e}")
+        return tabs
+
+    def invalidate_tab_names(self, sheet_id: str) -> None:
+        """Forget the cached tab names of a spreadsheet, e.g. after a tab was recreated."""
+        with self._tab_names_lock:
+            self._tab_names_errors.pop(sheet_id, None)
+            self.cache.remove(self._get_tab_names_name(sheet_id))
@@ -0,0 +1,108 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sparks.fileutil import atomic_write_text
+from sparks.layout import CellRange, LayoutPlan, SectionPlan
+from sparks.sheet import SheetData
+
+SECTION_PREFIX = "## "
+
+
+def section_fingerprint(section: SectionPlan, values: Dict[CellRange, List[str]]) -> str:
+    """Hash of a section's spec and the values of its source ranges."""
+    digest = hashlib.sha256(repr(section).encode('utf-8'))
+    for cell_range in section.ranges:
+        digest.update(json.dumps([cell_range, values[cell_range]]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def split_sections(text: str) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Split output text into the lines before the first "## " page and each page's lines."""
+    head: List[str] = []
+    sections: Dict[str, List[str]] = {}
+    current = head
+    for line in text.split("\n"):
+        if line.startswith(SECTION_PREFIX):
+            current = sections.setdefault(line[len(SECTION_PREFIX):], [])
+        else:
+            current.append(line)
+    return head, sections
+
+
+class IncrementalOutput:
+    """Output file that is regenerated only where its source cells changed.
+
+    Per-section fingerprints of the previous run are kept next to the output in
+    <output>.fingerprints.json. Sections whose fingerprint still matches are copied
+    from the existing file; only the others are rendered again.
+    """
+
+    FINGERPRINT_SUFFIX = ".fingerprints.json"
+
+    def __init__(self, output_path: Path) -> None:
+        self.output_path = Path(output_path)
+        self.fingerprint_path = self.output_path.with_name(self.output_path.name + self.FINGERPRINT_SUFFIX)
+
+    def load_fingerprints(self) -> dict:
+        """Load the previous run's fingerprints, or an empty record."""
+        try:
+            with open(self.fingerprint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _load_previous_sections(self) -> Dict[str, List[str]]:
+        try:
+            return split_sections(self.output_path.read_text(encoding='utf-8'))[1]
+        except FileNotFoundError:
+            return {}
+
+    def update(self, head: List[str], plan: LayoutPlan, sheet_data: SheetData,
+               content_hash: Optional[str] = None) -> List[str]:
+        """Bring the output file up to date. Returns the titles of regenerated sections.
+
+        head holds the lines written before the "# Category" line. When content_hash
+        (the downloaded payload hash) and the layout are unchanged since the previous
+        run, nothing is extracted at all. The file is only rewritten (atomically)
+        when something changed.
+        """
+        previous = self.load_fingerprints()
+        layout_fingerprint = hashlib.sha256(repr((plan.category, plan.sections)).encode('utf-8')).hexdigest()
+        unchanged_input = (content_hash is not None and previous.get('content_hash') == content_hash
+                           and previous.get('layout') == layout_fingerprint and previous.get('head') == head)
+        if unchanged_input and self.output_path.exists():
+            return []
+
+        previous_sections = previous.get('sections', {})
+        existing = self._load_previous_sections() if previous_sections else {}
+
+        values = plan.extract(sheet_data)
+        fingerprints: Dict[str, str] = {}
+        changed: List[str] = []
+        lines = head + [f"# {plan.category}"]
+
+        for section in plan.sections:
+            fingerprint = section_fingerprint(section, values)
+            fingerprints[section.title] = fingerprint
+            lines.append(f"{SECTION_PREFIX}{section.title}")
+
+            if previous_sections.get(section.title) == fingerprint and section.title in existing:
+                lines.extend(existing[section.title])
+            else:
+                lines.extend(plan.render_section(section, values))
+                changed.append(section.title)
+
+        text = "\n".join(lines)
+        head_changed = previous.get('head') != head or previous.get('layout') != layout_fingerprint
+        if changed or head_changed or not self.output_path.exists():
+            atomic_write_text(self.output_path, text)
+
+        atomic_write_text(self.fingerprint_path, json.dumps({
+            'content_hash': content_hash,
+            'layout': layout_fingerprint,
+            'head': head,
+            'sections': fingerprints
+        }, indent=2))
+        return changed
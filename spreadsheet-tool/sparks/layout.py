@@ -0,0 +1,225 @@
+import functools
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sparks.sheet import SheetBounds, SheetData, parse_range, read_block
+
+LAYOUTS_DIR = Path(__file__).parent / "layouts"
+
+CellRange = Tuple[int, int, int, int]  # (row1, col1, row2, col2) as returned by parse_range
+
+BLOCK_KINDS = {
+    "list": ("range",),
+    "cell": ("cell",),
+    "pairs": ("left", "right"),
+}
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """One player's assignment read from a layout: e.g. Jaina, healer of Arthas, in BWL Trash."""
+    player: str
+    role: str
+    target: str
+    section: str
+    raid: str
+    block: int = 0  # position of the block in its section; roster limits count per block
+
+
+@dataclass(frozen=True)
+class RenderedSection:
+    """A section's output lines and the player assignments behind them."""
+    title: str
+    lines: Tuple[str, ...]
+    assignments: Tuple[Assignment, ...]
+
+
+@dataclass(frozen=True)
+class BlockPlan:
+    """One compiled block of a section: which ranges it reads and how lines are formatted."""
+    kind: str
+    line: str
+    ranges: Tuple[CellRange, ...]
+    heading: str = ""
+    missing: str = ""
+    role: str = ""  # role of the players in the block, or of the left cells of pairs
+    target: str = ""  # what they are assigned to; the right cells of pairs are assigned to the left ones
+    right_role: str = ""
+
+    def render(self, values: Dict[CellRange, List[str]]) -> List[str]:
+        """Format the block from the extracted non-empty values of its ranges."""
+        first = values[self.ranges[0]]
+        if not first:
+            return []
+
+        lines = [self.heading] if self.heading else []
+        if self.kind == "cell":
+            lines.append(self.line.format(value=first[0]))
+        elif self.kind == "list":
+            lines.extend(self.line.format(n=i + 1, value=value) for i, value in enumerate(first))
+        else:
+            right = values[self.ranges[1]]
+            for i, left in enumerate(first):
+                lines.append(self.line.format(n=i + 1, left=left,
+                                              right=right[i] if i < len(right) else self.missing))
+        lines.append("")
+        return lines
+
+    def assignments(self, values: Dict[CellRange, List[str]], section: str, raid: str,
+                    block: int = 0) -> List[Assignment]:
+        """The block's players as records; blocks without a role hold no player assignments."""
+        first = values[self.ranges[0]]
+        records = [Assignment(player, self.role, self.target, section, raid, block)
+                   for player in (first[:1] if self.kind == "cell" else first)] if self.role else []
+        if self.kind == "pairs" and self.right_role:
+            records.extend(Assignment(right, self.right_role, left, section, raid, block)
+                           for left, right in zip(first, values[self.ranges[1]]))
+        return records
+
+
+@dataclass(frozen=True)
+class SectionPlan:
+    """A "## Title" page and the blocks rendered into it."""
+    title: str
+    blocks: Tuple[BlockPlan, ...]
+
+    @property
+    def ranges(self) -> Tuple[CellRange, ...]:
+        return tuple(dict.fromkeys(r for block in self.blocks for r in block.ranges))
+
+
+class LayoutPlan:
+    """A raid layout spec compiled into an extraction plan.
+
+    All ranges of all sections are read from the sheet in one pass over their
+    common bounding box, then split into per-range value lists.
+    """
+
+    def __init__(self, raid: str, category: str, sections: Tuple[SectionPlan, ...],
+                 source: str = "") -> None:
+        self.raid = raid
+        self.category = category
+        self.sections = sections
+        self.source = source
+        self.ranges = tuple(dict.fromkeys(r for section in sections for r in section.ranges))
+        if self.ranges:
+            self.bounding_box: CellRange = (min(r[0] for r in self.ranges), min(r[1] for r in self.ranges),
+                                            max(r[2] for r in self.ranges), max(r[3] for r in self.ranges))
+        else:
+            self.bounding_box = (1, 0, 1, 0)
+
+    @property
+    def bounds(self) -> SheetBounds:
+        """The cells the layout reads, counted from A1, so the sheet can be read only that far."""
+        _, _, bottom, right = self.bounding_box
+        return SheetBounds(bottom, right + 1)
+
+    def extract(self, sheet_data: SheetData) -> Dict[CellRange, List[str]]:
+        """Read every range of the layout: one slice of the bounding box, then row slices of it."""
+        top, left, _, _ = self.bounding_box
+        box = read_block(sheet_data, *self.bounding_box)
+
+        values = {}
+        for row1, col1, row2, col2 in self.ranges:
+            values[(row1, col1, row2, col2)] = [value for row in box[row1 - top:row2 - top + 1]
+                                                for value in row[col1 - left:col2 - left + 1] if value != ""]
+        return values
+
+    @staticmethod
+    def render_section(section: SectionPlan, values: Dict[CellRange, List[str]]) -> List[str]:
+        """Render the body lines of one section from extracted values."""
+        return [line for block in section.blocks for line in block.render(values)]
+
+    def render_sections(self, sheet_data: SheetData) -> List[Tuple[str, List[str]]]:
+        """Render each section to (title, lines)."""
+        values = self.extract(sheet_data)
+        return [(section.title, self.render_section(section, values)) for section in self.sections]
+
+    def section_assignments(self, section: SectionPlan, values: Dict[CellRange, List[str]]) -> List[Assignment]:
+        return [record for i, block in enumerate(section.blocks)
+                for record in block.assignments(values, section.title, self.raid, i)]
+
+    def assignments(self, sheet_data: SheetData) -> List[Assignment]:
+        """Every player assignment of the layout, in section and block order."""
+        values = self.extract(sheet_data)
+        return [record for section in self.sections for record in self.section_assignments(section, values)]
+
+    def iter_sections(self, sheet_data: SheetData) -> Iterator[RenderedSection]:
+        """Render the sections one at a time, with their assignments, for the output sinks."""
+        values = self.extract(sheet_data)
+        for section in self.sections:
+            yield RenderedSection(section.title, tuple(self.render_section(section, values)),
+                                  tuple(self.section_assignments(section, values)))
+
+    def run(self, sheet_data: SheetData) -> List[str]:
+        """Render the whole layout as AngrySparks text lines."""
+        assignments = [f"# {self.category}"]  # Header level 1 will create a category in AngrySparks
+        for title, lines in self.render_sections(sheet_data):
+            assignments.append(f"## {title}")
+            assignments.extend(lines)
+        return assignments
+
+
+def _compile_block(spec: dict, where: str) -> BlockPlan:
+    kind = spec.get("kind")
+    if kind not in BLOCK_KINDS:
+        raise ValueError(f"{where}: unknown block kind {kind!r}, expected one of: {', '.join(BLOCK_KINDS)}")
+
+    for key in BLOCK_KINDS[kind] + ("line",):
+        if key not in spec:
+            raise ValueError(f"{where}: {kind} block is missing {key!r}")
+
+    try:
+        ranges = tuple(parse_range(spec[key]) for key in BLOCK_KINDS[kind])
+    except ValueError as e:
+        raise ValueError(f"{where}: {e}")
+
+    if kind != "pairs" and "right_role" in spec:
+        raise ValueError(f"{where}: only pairs blocks have a 'right_role'")
+
+    return BlockPlan(kind=kind, line=spec["line"], ranges=ranges,
+                     heading=spec.get("heading", ""), missing=spec.get("missing", ""),
+                     role=spec.get("role", ""), target=spec.get("target", ""),
+                     right_role=spec.get("right_role", ""))
+
+
+def compile_layout(spec: dict, source: str = "") -> LayoutPlan:
+    """Compile a parsed layout spec into a LayoutPlan, validating it."""
+    where = source or "layout"
+    if "raid" not in spec:
+        raise ValueError(f"{where}: missing 'raid'")
+
+    sections: List[SectionPlan] = []
+    for s_index, section in enumerate(spec.get("sections", [])):
+        if "title" not in section:
+            raise ValueError(f"{where}: section {s_index + 1} is missing 'title'")
+        if any(existing.title == section["title"] for existing in sections):
+            raise ValueError(f"{where}: duplicate section title {section['title']!r}")
+        blocks = tuple(_compile_block(block, f"{where}: section {section['title']!r} block {b_index + 1}")
+                       for b_index, block in enumerate(section.get("blocks", [])))
+        sections.append(SectionPlan(title=section["title"], blocks=blocks))
+
+    return LayoutPlan(raid=spec["raid"], category=spec.get("category", spec["raid"]),
+                      sections=tuple(sections), source=source)
+
+
+@functools.lru_cache(maxsize=None)
+def load_layout_file(path: Path) -> LayoutPlan:
+    """Load and compile a layout spec file; compiled plans are cached per path."""
+    try:
+        with open(path, 'rb') as f:
+            spec = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Invalid layout spec {path}: {e}")
+    return compile_layout(spec, source=str(path))
+
+
+def find_layout(raid_name: str, layout_path: Optional[str] = None) -> Optional[LayoutPlan]:
+    """Return the compiled layout for a raid: an explicit spec file, or the bundled one."""
+    if layout_path:
+        return load_layout_file(Path(layout_path).resolve())
+
+    bundled = LAYOUTS_DIR / f"{raid_name.lower()}.toml"
+    return load_layout_file(bundled) if bundled.exists() else None
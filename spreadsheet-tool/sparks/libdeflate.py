@@ -0,0 +1,503 @@
+import bisect
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Python counterparts of the LibDeflate calls used by Src/Comm.lua. CompressDeflate
+# produces a raw DEFLATE stream (RFC 1951, no zlib header), which zlib writes with
+# negative wbits; LibDeflate decompresses any valid raw stream, so the compressed
+# bytes need not match LibDeflate's own compressor. Where the exact size matters,
+# compress_deflate_exact is a port of LibDeflate:CompressDeflate itself.
+
+RAW_DEFLATE_WBITS = -15
+
+# EncodeForWoWAddonChannel is LibDeflate:CreateCodec("\000", "\001", ""):
+# "\000" becomes "\001\002" and the escape byte "\001" becomes "\001\003"
+_ADDON_ENCODE = {b"\x00": b"\x01\x02", b"\x01": b"\x01\x03"}
+_ADDON_DECODE = {b"\x02": b"\x00", b"\x03": b"\x01"}
+_ADDON_ENCODE_RE = re.compile(b"[\x00\x01]")
+_ADDON_DECODE_RE = re.compile(b"\x01([\x02\x03])")
+
+
+def compress_deflate(data: bytes, level: int = 9) -> bytes:
+    """Compress to a raw DEFLATE stream, like LibDeflate:CompressDeflate."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, RAW_DEFLATE_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress_deflate(data: bytes) -> bytes:
+    """Decompress a raw DEFLATE stream. Raises ValueError on invalid data."""
+    decompressor = zlib.decompressobj(RAW_DEFLATE_WBITS)
+    try:
+        result = decompressor.decompress(data) + decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"Invalid deflate data: {e}")
+    if not decompressor.eof:
+        raise ValueError("Invalid deflate data: truncated stream")
+    return result
+
+
+def encode_for_wow_addon_channel(data: bytes) -> bytes:
+    """Escape NUL bytes so data can be sent over the addon channel."""
+    return _ADDON_ENCODE_RE.sub(lambda m: _ADDON_ENCODE[m.group()], data)
+
+
+def decode_for_wow_addon_channel(data: bytes) -> bytes:
+    """Reverse encode_for_wow_addon_channel. Raises ValueError if data contains NUL."""
+    if b"\x00" in data:
+        raise ValueError("Addon channel data must not contain NUL bytes")
+    return _ADDON_DECODE_RE.sub(lambda m: _ADDON_DECODE[m.group(1)], data)
+
+
+# LibDeflate's _compression_level_configs:
+# (use_lazy, good_prev_length, max_lazy_match, nice_length, max_chain)
+LEVEL_CONFIGS = {
+    0: (False, 0, 0, 0, 0),
+    1: (False, 0, 4, 8, 4),
+    2: (False, 0, 5, 18, 8),
+    3: (False, 0, 6, 32, 32),
+    4: (True, 4, 4, 16, 16),
+    5: (True, 8, 16, 32, 32),
+    6: (True, 8, 16, 128, 128),
+    7: (True, 8, 32, 128, 256),
+    8: (True, 32, 128, 258, 1024),
+    9: (True, 32, 258, 258, 4096),
+}
+
+# RFC 1951 length and distance code tables
+_LENGTH_BASE = [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31,
+                35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258]
+_LENGTH_EXTRA_BITLEN = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2,
+                        3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0]
+_DIST_BASE = [1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193,
+              257, 385, 513, 769, 1025, 1537, 2049, 3073, 4097, 6145,
+              8193, 12289, 16385, 24577]
+_RLE_BITLEN_ORDER = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
+_FIXED_LITERAL_BITLENS = {symbol: 8 if symbol < 144 else 9 if symbol < 256 else 7 if symbol < 280 else 8
+                          for symbol in range(288)}
+_FIXED_DIST_BITLENS = {symbol: 5 for symbol in range(32)}
+
+# (lcodes, lextra_bits, lcodes_counts, dcodes, dextra_bits, dcodes_counts) of GetBlockLZ77Result
+LZ77Block = Tuple[List[int], List[int], Counter, List[int], List[int], Counter]
+
+
+def _length_code(length: int) -> Tuple[int, int, int]:
+    """Deflate code, extra bits and extra bit length of an LZ77 match length."""
+    if length == 258:
+        return 285, 0, 0
+    index = bisect.bisect_right(_LENGTH_BASE, length) - 1
+    return 257 + index, length - _LENGTH_BASE[index], _LENGTH_EXTRA_BITLEN[index]
+
+
+def _dist_code(dist: int) -> Tuple[int, int, int]:
+    """Deflate code, extra bits and extra bit length of an LZ77 distance."""
+    code = bisect.bisect_right(_DIST_BASE, dist) - 1
+    return code, dist - _DIST_BASE[code], _dist_extra_bitlen(code)
+
+
+def _length_extra_bitlen(code: int) -> int:
+    return _LENGTH_EXTRA_BITLEN[code - 257] if 264 < code < 285 else 0
+
+
+def _dist_extra_bitlen(code: int) -> int:
+    return code // 2 - 1 if code > 3 else 0
+
+
+class _BitWriter:
+    """LibDeflate's CreateWriter: bits are written LSB first, padding bits are ones."""
+
+    def __init__(self) -> None:
+        self.output = bytearray()
+        self.cache = 0
+        self.cache_bitlen = 0
+        self.total_bitlen = 0
+
+    def write_bits(self, value: int, bitlen: int) -> None:
+        self.cache |= value << self.cache_bitlen
+        self.cache_bitlen += bitlen
+        self.total_bitlen += bitlen
+        while self.cache_bitlen >= 8:
+            self.output.append(self.cache & 0xFF)
+            self.cache >>= 8
+            self.cache_bitlen -= 8
+
+    def write_bytes(self, data: bytes) -> None:
+        # Only called on a byte boundary, after the store block padding
+        self.output += data
+        self.total_bitlen += len(data) * 8
+
+    def flush(self) -> bytes:
+        if self.cache_bitlen:
+            padding = 8 - self.cache_bitlen
+            self.output.append((self.cache | ((1 << padding) - 1) << self.cache_bitlen) & 0xFF)
+            self.cache = self.cache_bitlen = 0
+        return bytes(self.output)
+
+
+def _heap_push(heap: list, node: list, heap_size: int) -> None:
+    # MinHeapPush, on a 1-based list that may hold garbage past heap_size
+    heap_size += 1
+    heap[heap_size] = node
+    pos = heap_size
+    parent = pos // 2
+    while parent >= 1 and heap[parent][0] > node[0]:
+        heap[parent], heap[pos] = node, heap[parent]
+        pos = parent
+        parent //= 2
+
+
+def _heap_pop(heap: list, heap_size: int) -> list:
+    # MinHeapPop: the popped node is swapped to heap[heap_size], not removed
+    top, node = heap[1], heap[heap_size]
+    heap[1], heap[heap_size] = node, top
+    heap_size -= 1
+    pos = 1
+    while pos * 2 <= heap_size:
+        left, right = pos * 2, pos * 2 + 1
+        child = right if right <= heap_size and heap[right][0] < heap[left][0] else left
+        if heap[child][0] >= node[0]:
+            break
+        heap[child], heap[pos] = node, heap[child]
+        pos = child
+    return top
+
+
+def _huffman_bitlens(counts: Dict[int, int], max_bitlen: int) -> Tuple[Dict[int, int], int]:
+    """Port of GetHuffmanBitlenAndCode: Huffman bit lengths, and the largest coded symbol.
+
+    Ties are broken exactly as LibDeflate breaks them, so the resulting code
+    lengths, and thus the compressed size, match the addon's.
+    """
+    if not counts:
+        return {}, -1
+    if len(counts) == 1:
+        symbol = next(iter(counts))
+        return {symbol: 1}, symbol
+
+    # Nodes are [weight (later bit length), symbol, left, right]; internal nodes have symbol -1
+    leafs: List[list] = sorted([count, symbol, None, None] for symbol, count in counts.items())
+    heap: List[Any] = [None] + leafs
+    heap_size = len(leafs)
+    while heap_size > 1:
+        left = _heap_pop(heap, heap_size)
+        heap_size -= 1
+        right = _heap_pop(heap, heap_size)
+        heap_size -= 1
+        _heap_push(heap, [left[0] + right[0], -1, left, right], heap_size)
+        heap_size += 1
+
+    bitlens: Dict[int, int] = {}
+    bitlen_counts: Counter = Counter()
+    max_symbol = -1
+    overflow = 0
+    root = heap[1]
+    root[0] = 0
+    fifo = [root]
+    for node in fifo:
+        bitlen, symbol, left, right = node
+        for child in (left, right):
+            if child is not None:
+                child[0] = bitlen + 1
+                fifo.append(child)
+        # Internal nodes count towards the overflow too, as in LibDeflate
+        if bitlen > max_bitlen:
+            overflow += 1
+            bitlen = max_bitlen
+        if symbol >= 0:
+            bitlens[symbol] = bitlen
+            max_symbol = max(max_symbol, symbol)
+            bitlen_counts[bitlen] += 1
+
+    if overflow > 0:
+        # zlib's gen_bitlen fix-up, then hand out the lengths to the leafs by frequency
+        while overflow > 0:
+            bitlen = max_bitlen - 1
+            while bitlen_counts[bitlen] == 0:
+                bitlen -= 1
+            bitlen_counts[bitlen] -= 1
+            bitlen_counts[bitlen + 1] += 2
+            bitlen_counts[max_bitlen] -= 1
+            overflow -= 2
+        index = 0
+        for bitlen in range(max_bitlen, 0, -1):
+            for _ in range(bitlen_counts[bitlen]):
+                bitlens[leafs[index][1]] = bitlen
+                index += 1
+
+    return bitlens, max_symbol
+
+
+def _huffman_codes(bitlens: Dict[int, int]) -> Dict[int, int]:
+    """Canonical Huffman codes of the bit lengths, bit-reversed for LSB-first writing."""
+    bitlen_counts = Counter(bitlens.values())
+    next_code = {}
+    code = 0
+    for bitlen in range(1, max(bitlens.values(), default=0) + 1):
+        code = (code + bitlen_counts[bitlen - 1]) * 2
+        next_code[bitlen] = code
+    codes = {}
+    for symbol in sorted(bitlens):
+        bitlen = bitlens[symbol]
+        code = next_code[bitlen]
+        next_code[bitlen] += 1
+        codes[symbol] = int(format(code, f"0{bitlen}b")[::-1], 2)
+    return codes
+
+
+def _rle_bitlens(lcode_bitlens: Dict[int, int], max_lcode: int, dcode_bitlens: Dict[int, int],
+                 max_dcode: int) -> Tuple[List[int], List[int], Counter]:
+    """Port of RunLengthEncodeHuffmanBitlen: the code length codes of a dynamic block header."""
+    rle_codes: List[int] = []
+    rle_extra_bits: List[int] = []
+    rle_counts: Counter = Counter()
+    max_dcode = max(max_dcode, 0)
+    max_code = max_lcode + max_dcode + 1
+    prev: Optional[int] = None
+    count = 0
+
+    for code in range(max_code + 2):
+        if code <= max_lcode:
+            bitlen = lcode_bitlens.get(code, 0)
+        elif code <= max_code:
+            bitlen = dcode_bitlens.get(code - max_lcode - 1, 0)
+        else:
+            bitlen = None
+        if bitlen == prev:
+            count += 1
+            if bitlen != 0 and count == 6:
+                rle_codes.append(16)
+                rle_extra_bits.append(3)
+                rle_counts[16] += 1
+                count = 0
+            elif bitlen == 0 and count == 138:
+                rle_codes.append(18)
+                rle_extra_bits.append(127)
+                rle_counts[18] += 1
+                count = 0
+        else:
+            # A run has a length only once prev holds a code length
+            if prev is not None and count in (1, 2):
+                rle_codes.extend([prev] * count)
+                rle_counts[prev] += count
+            elif count >= 3:
+                rle_code = 16 if prev != 0 else 17 if count <= 10 else 18
+                rle_codes.append(rle_code)
+                rle_counts[rle_code] += 1
+                rle_extra_bits.append(count - 3 if count <= 10 else count - 11)
+            prev = bitlen
+            if bitlen:
+                rle_codes.append(bitlen)
+                rle_counts[bitlen] += 1
+                count = 0
+            else:
+                count = 1
+
+    return rle_codes, rle_extra_bits, rle_counts
+
+
+def _lz77_block(level: int, data: bytes, hash_tables: Dict[int, List[int]],
+                block_start: int, block_end: int) -> LZ77Block:
+    """Port of GetBlockLZ77Result, with 1-based positions into data as in the Lua source.
+
+    data is the input with one leading and three trailing NUL bytes, standing in
+    for the "or 0" reads past the end of the string table.
+    """
+    use_lazy, good_prev_length, max_lazy_match, nice_length, max_chain = LEVEL_CONFIGS[level]
+    max_insert_length = 2147483646 if use_lazy else max_lazy_match
+    # LibDeflate's good_hash_chain, max_chain - max_chain % 4 / 4, equals max_chain at every level
+
+    lcodes: List[int] = []
+    lextra_bits: List[int] = []
+    lcodes_counts: Counter = Counter()
+    dcodes: List[int] = []
+    dextra_bits: List[int] = []
+    dcodes_counts: Counter = Counter()
+
+    match_available = False
+    prev_len = prev_dist = 0
+    cur_len = cur_dist = 0
+    hash_ = data[block_start] * 256 + data[block_start + 1]
+    index = block_start
+    index_end = block_end + (1 if use_lazy else 0)
+
+    while index <= index_end:
+        prev_len, prev_dist = cur_len, cur_dist
+        cur_len = 0
+
+        hash_ = (hash_ * 256 + data[index + 2]) % 16777216
+        chain = hash_tables.get(hash_)
+        if chain is None:
+            chain = hash_tables[hash_] = []
+        chain_index = len(chain)
+        if index <= block_end:
+            chain.append(index)
+
+        if chain_index > 0 and index + 2 <= block_end and (not use_lazy or prev_len < max_lazy_match):
+            depth = max_chain
+            # The hash is the three bytes themselves, so matches start at the fourth byte
+            last = index + min(block_end - index, 257)
+            while chain_index >= 1 and depth > 0:
+                prev = chain[chain_index - 1]
+                if index - prev > 32768:
+                    break
+                if prev < index:
+                    sj, pj = index + 3, prev + 3
+                    while sj <= last and data[pj] == data[sj]:
+                        sj += 1
+                        pj += 1
+                    if sj - index > cur_len:
+                        cur_len = sj - index
+                        cur_dist = index - prev
+                    if cur_len >= nice_length:
+                        break
+                chain_index -= 1
+                depth -= 1
+
+        if not use_lazy:
+            prev_len, prev_dist = cur_len, cur_dist
+        if ((not use_lazy or match_available) and (prev_len > 3 or (prev_len == 3 and prev_dist < 4096))
+                and cur_len <= prev_len):
+            code, extra_bits, extra_bitlen = _length_code(prev_len)
+            lcodes.append(code)
+            lcodes_counts[code] += 1
+            if extra_bitlen:
+                lextra_bits.append(extra_bits)
+            code, extra_bits, extra_bitlen = _dist_code(prev_dist)
+            dcodes.append(code)
+            dcodes_counts[code] += 1
+            if extra_bitlen:
+                dextra_bits.append(extra_bits)
+
+            for i in range(index + 1, index + prev_len - (1 if use_lazy else 0)):
+                hash_ = (hash_ * 256 + data[i + 2]) % 16777216
+                if prev_len <= max_insert_length:
+                    hash_tables.setdefault(hash_, []).append(i)
+            index += prev_len - (1 if use_lazy else 0)
+            match_available = False
+        elif not use_lazy or match_available:
+            code = data[index - 1 if use_lazy else index]
+            lcodes.append(code)
+            lcodes_counts[code] += 1
+            index += 1
+        else:
+            match_available = True
+            index += 1
+
+    lcodes.append(256)
+    lcodes_counts[256] += 1
+    return lcodes, lextra_bits, lcodes_counts, dcodes, dextra_bits, dcodes_counts
+
+
+def _codes_bitlen(lcodes: List[int], dcodes: List[int], lcode_bitlens: Dict[int, int],
+                  dcode_bitlens: Dict[int, int]) -> int:
+    bitlen = 0
+    dcode_iter = iter(dcodes)
+    for code in lcodes:
+        bitlen += lcode_bitlens[code]
+        if code > 256:
+            dist_code = next(dcode_iter)
+            bitlen += _length_extra_bitlen(code) + dcode_bitlens[dist_code] + _dist_extra_bitlen(dist_code)
+    return bitlen
+
+
+def _write_codes(writer: _BitWriter, block: LZ77Block, lcode_bitlens: Dict[int, int],
+                 lcode_codes: Dict[int, int], dcode_bitlens: Dict[int, int],
+                 dcode_codes: Dict[int, int]) -> None:
+    lcodes, lextra_bits, _, dcodes, dextra_bits, _ = block
+    dcode_iter, lextra_iter, dextra_iter = iter(dcodes), iter(lextra_bits), iter(dextra_bits)
+    for code in lcodes:
+        writer.write_bits(lcode_codes[code], lcode_bitlens[code])
+        if code > 256:
+            if _length_extra_bitlen(code):
+                writer.write_bits(next(lextra_iter), _length_extra_bitlen(code))
+            dist_code = next(dcode_iter)
+            writer.write_bits(dcode_codes[dist_code], dcode_bitlens[dist_code])
+            if _dist_extra_bitlen(dist_code):
+                writer.write_bits(next(dextra_iter), _dist_extra_bitlen(dist_code))
+
+
+_FIXED_LITERAL_CODES = _huffman_codes(_FIXED_LITERAL_BITLENS)
+_FIXED_DIST_CODES = _huffman_codes(_FIXED_DIST_BITLENS)
+
+
+def compress_deflate_exact(data: bytes, level: Optional[int] = None) -> bytes:
+    """Port of LibDeflate:CompressDeflate(data, {level = level}), byte for byte.
+
+    Without a level, LibDeflate picks 7 below 2 KiB, 5 up to 64 KiB and 3 above.
+    Much slower than compress_deflate; use it when the addon's exact output size matters.
+    """
+    if level is None:
+        level = 7 if len(data) < 2048 else 3 if len(data) > 65536 else 5
+    if level not in LEVEL_CONFIGS:
+        raise ValueError(f"Unsupported compression level: {level}")
+
+    padded = b"\x00" + data + b"\x00\x00\x00"
+    writer = _BitWriter()
+    hash_tables: Dict[int, List[int]] = {}
+    block_start, block_end = 1, 64 * 1024 - 1
+    is_last_block = False
+
+    while not is_last_block:
+        if block_end >= len(data):
+            block_end = len(data)
+            is_last_block = True
+        last_bit = 1 if is_last_block else 0
+        store_padding = (8 - (writer.total_bitlen + 3) % 8) % 8
+        store_bitlen = 3 + store_padding + 32 + (block_end - block_start + 1) * 8
+        fixed_bitlen = dynamic_bitlen = None
+
+        if level != 0:
+            # LibDeflate drops hash chain entries older than the window between
+            # blocks; the chain walk stops at the first of them anyway
+            block = _lz77_block(level, padded, hash_tables, block_start, block_end)
+            lcodes, _, lcodes_counts, dcodes, _, dcodes_counts = block
+            lcode_bitlens, max_lcode = _huffman_bitlens(lcodes_counts, 15)
+            dcode_bitlens, max_dcode = _huffman_bitlens(dcodes_counts, 15)
+            rle_codes, rle_extra_bits, rle_counts = _rle_bitlens(lcode_bitlens, max_lcode,
+                                                                 dcode_bitlens, max_dcode)
+            rle_bitlens, _ = _huffman_bitlens(rle_counts, 7)
+            hclen = max((i + 1 for i, symbol in enumerate(_RLE_BITLEN_ORDER) if rle_bitlens.get(symbol)),
+                        default=0) - 4
+            rle_extra_bitlens = {16: 2, 17: 3, 18: 7}
+
+            dynamic_bitlen = (17 + (hclen + 4) * 3
+                              + sum(rle_bitlens[code] + rle_extra_bitlens.get(code, 0) for code in rle_codes)
+                              + _codes_bitlen(lcodes, dcodes, lcode_bitlens, dcode_bitlens))
+            fixed_bitlen = 3 + _codes_bitlen(lcodes, dcodes, _FIXED_LITERAL_BITLENS, _FIXED_DIST_BITLENS)
+
+        smallest = min(bitlen for bitlen in (store_bitlen, fixed_bitlen, dynamic_bitlen) if bitlen is not None)
+        if store_bitlen == smallest:
+            size = block_end - block_start + 1
+            writer.write_bits(last_bit, 1)
+            writer.write_bits(0, 2)
+            if store_padding:
+                writer.write_bits((1 << store_padding) - 1, store_padding)
+            writer.write_bits(size, 16)
+            writer.write_bits(size ^ 0xFFFF, 16)
+            writer.write_bytes(data[block_start - 1:block_end])
+        elif fixed_bitlen == smallest:
+            writer.write_bits(last_bit, 1)
+            writer.write_bits(1, 2)
+            _write_codes(writer, block, _FIXED_LITERAL_BITLENS, _FIXED_LITERAL_CODES,
+                         _FIXED_DIST_BITLENS, _FIXED_DIST_CODES)
+        else:
+            writer.write_bits(last_bit, 1)
+            writer.write_bits(2, 2)
+            writer.write_bits(max_lcode + 1 - 257, 5)
+            writer.write_bits(max(max_dcode, 0), 5)
+            writer.write_bits(hclen, 4)
+            for symbol in _RLE_BITLEN_ORDER[:hclen + 4]:
+                writer.write_bits(rle_bitlens.get(symbol, 0), 3)
+            rle_codes_huffman = _huffman_codes(rle_bitlens)
+            rle_extra_iter = iter(rle_extra_bits)
+            for code in rle_codes:
+                writer.write_bits(rle_codes_huffman[code], rle_bitlens[code])
+                if code >= 16:
+                    writer.write_bits(next(rle_extra_iter), rle_extra_bitlens[code])
+            _write_codes(writer, block, lcode_bitlens, _huffman_codes(lcode_bitlens),
+                         dcode_bitlens, _huffman_codes(dcode_bitlens))
+
+        block_start, block_end = block_end + 1, block_end + 32 * 1024
+
+    return writer.flush()
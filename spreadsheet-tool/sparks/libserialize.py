@@ -0,0 +1,351 @@
+import math
+import struct
+from typing import Any, Dict, List, Tuple, Union
+
+# Port of the LibSerialize 1.1.0 wire format bundled in libs/LibSerialize-1.1.0.
+#
+# Lua values map to Python as: nil <-> None, boolean <-> bool, number <-> int/float,
+# string <-> str (bytes when not valid UTF-8), array table <-> list, any other
+# table <-> dict (mixed tables keep their 1..n keys as ints).
+
+VERSION = 1
+
+EMBEDDED_STRING, EMBEDDED_TABLE, EMBEDDED_ARRAY, EMBEDDED_MIXED = range(4)
+
+(NIL, NUM_16_POS, NUM_16_NEG, NUM_24_POS, NUM_24_NEG, NUM_32_POS, NUM_32_NEG,
+ NUM_64_POS, NUM_64_NEG, NUM_FLOAT, NUM_FLOATSTR_POS, NUM_FLOATSTR_NEG,
+ BOOL_T, BOOL_F, STR_8, STR_16, STR_24, TABLE_8, TABLE_16, TABLE_24,
+ ARRAY_8, ARRAY_16, ARRAY_24, MIXED_8, MIXED_16, MIXED_24,
+ STRINGREF_8, STRINGREF_16, STRINGREF_24, TABLEREF_8, TABLEREF_16, TABLEREF_24) = range(32)
+
+# Payload bytes of a number -> reader index of its positive variant (negative is +1)
+NUMBER_INDICES = {2: NUM_16_POS, 3: NUM_24_POS, 4: NUM_32_POS, 7: NUM_64_POS}
+NUMBER_BYTES = {index + sign: required for required, index in NUMBER_INDICES.items() for sign in (0, 1)}
+
+LuaValue = Union[None, bool, int, float, str, bytes, list, dict]
+
+
+def _required_bytes(value: int) -> int:
+    """Bytes needed for a count or reference index, at most three."""
+    if value < 256:
+        return 1
+    if value < 65536:
+        return 2
+    if value < 16777216:
+        return 3
+    raise ValueError("Object limit exceeded")
+
+
+def _required_bytes_number(value: int) -> int:
+    if value < 256:
+        return 1
+    if value < 65536:
+        return 2
+    if value < 16777216:
+        return 3
+    if value < 4294967296:
+        return 4
+    return 7
+
+
+def _lua_tostring(value: float) -> str:
+    """Format a number the way Lua 5.1 tostring() does ("%.14g")."""
+    return f"{value:.14g}"
+
+
+def _is_integral(value: Any) -> bool:
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+def _stable_key(key: Any) -> Tuple[int, Any]:
+    """Sort order of LibSerialize's StableKeySort: strings, then numbers, then booleans."""
+    if isinstance(key, (str, bytes)):
+        return 0, key.encode('utf-8') if isinstance(key, str) else key
+    if isinstance(key, bool):
+        return 2, int(key)
+    if isinstance(key, (int, float)):
+        return 1, key
+    raise ValueError(f"Unhandled sort type: {type(key).__name__}")
+
+
+class _Writer:
+    def __init__(self, stable: bool) -> None:
+        self.stable = stable
+        self.out = bytearray([VERSION])
+        self.string_refs: Dict[bytes, int] = {}
+        self.table_refs: Dict[int, int] = {}
+        self.tables: List[Any] = []  # keeps referenced tables alive while their id() is in use
+
+    def write_type(self, index: int) -> None:
+        self.out.append(index * 8)
+
+    def write_int(self, value: int, required: int) -> None:
+        self.out += value.to_bytes(required, 'big')
+
+    def write(self, value: Any) -> None:
+        if value is None:
+            self.write_type(NIL)
+        elif isinstance(value, bool):
+            self.write_type(BOOL_T if value else BOOL_F)
+        elif isinstance(value, (int, float)):
+            self.write_number(value)
+        elif isinstance(value, (str, bytes)):
+            self.write_string(value.encode('utf-8') if isinstance(value, str) else value)
+        elif isinstance(value, (list, tuple, dict)):
+            self.write_table(value)
+        else:
+            raise ValueError(f"Unhandled type: {type(value).__name__}")
+
+    def write_number(self, value: Union[int, float]) -> None:
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"Cannot serialize non-finite number: {value}")
+
+        if not _is_integral(value):
+            as_string = _lua_tostring(abs(value))
+            if len(as_string) < 7 and float(as_string) == abs(value):
+                self.write_type(NUM_FLOATSTR_NEG if value < 0 else NUM_FLOATSTR_POS)
+                self.out.append(len(as_string))
+                self.out += as_string.encode('ascii')
+            else:
+                self.write_type(NUM_FLOAT)
+                self.out += struct.pack('>d', value)
+            return
+
+        value = int(value)
+        if -4096 < value < 4096:
+            if 0 <= value < 128:
+                self.out.append(value * 2 + 1)
+            else:
+                packed = abs(value) * 16 + (8 if value < 0 else 0) + 4
+                self.out += bytes((packed % 256, packed // 256))
+            return
+
+        magnitude = abs(value)
+        if magnitude >= 1 << 56:
+            raise ValueError(f"Integer too large to serialize: {value}")
+        required = _required_bytes_number(magnitude)
+        self.write_type(NUMBER_INDICES[required] + (1 if value < 0 else 0))
+        self.write_int(magnitude, required)
+
+    def write_string(self, data: bytes) -> None:
+        ref = self.string_refs.get(data)
+        if ref is not None:
+            required = _required_bytes(ref)
+            self.write_type(STRINGREF_8 + required - 1)
+            self.write_int(ref, required)
+            return
+
+        if len(data) < 16:
+            self.out.append(len(data) * 16 + EMBEDDED_STRING * 4 + 2)
+        else:
+            required = _required_bytes(len(data))
+            self.write_type(STR_8 + required - 1)
+            self.write_int(len(data), required)
+        self.out += data
+        if len(data) > 2:
+            self.string_refs[data] = len(self.string_refs) + 1
+
+    def write_table(self, table: Union[list, tuple, dict]) -> None:
+        ref = self.table_refs.get(id(table))
+        if ref is not None:
+            required = _required_bytes(ref)
+            self.write_type(TABLEREF_8 + required - 1)
+            self.write_int(ref, required)
+            return
+
+        # Register before the contents so self-references resolve
+        self.tables.append(table)
+        self.table_refs[id(table)] = len(self.table_refs) + 1
+
+        # The array part is what Lua's ipairs() walks: keys 1..n up to the first nil
+        if isinstance(table, dict):
+            # True == 1 in Python, so boolean keys must not count as array indexes
+            numbered = {k: v for k, v in table.items() if _is_integral(k) and not isinstance(k, bool)}
+            array: List[LuaValue] = []
+            while numbered.get(len(array) + 1) is not None:
+                array.append(numbered[len(array) + 1])
+            entries = [(k, v) for k, v in table.items()
+                       if v is not None and not (k in numbered and 1 <= k <= len(array))]
+        else:
+            array = []
+            for value in table:
+                if value is None:
+                    break
+                array.append(value)
+            entries = [(i + 1, v) for i, v in enumerate(table) if i >= len(array) and v is not None]
+
+        if self.stable:
+            entries.sort(key=lambda entry: _stable_key(entry[0]))
+
+        array_count, map_count = len(array), len(entries)
+        if map_count == 0:
+            if array_count < 16:
+                self.out.append(array_count * 16 + EMBEDDED_ARRAY * 4 + 2)
+            else:
+                required = _required_bytes(array_count)
+                self.write_type(ARRAY_8 + required - 1)
+                self.write_int(array_count, required)
+        elif array_count:
+            if map_count < 5 and array_count < 5:
+                combined = (map_count - 1) * 4 + array_count - 1
+                self.out.append(combined * 16 + EMBEDDED_MIXED * 4 + 2)
+            else:
+                required = max(_required_bytes(map_count), _required_bytes(array_count))
+                self.write_type(MIXED_8 + required - 1)
+                self.write_int(array_count, required)
+                self.write_int(map_count, required)
+        else:
+            if map_count < 16:
+                self.out.append(map_count * 16 + EMBEDDED_TABLE * 4 + 2)
+            else:
+                required = _required_bytes(map_count)
+                self.write_type(TABLE_8 + required - 1)
+                self.write_int(map_count, required)
+
+        for value in array:
+            self.write(value)
+        for key, value in entries:
+            self.write(key)
+            self.write(value)
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+        self.string_refs: List[LuaValue] = []
+        self.table_refs: List[Union[list, dict]] = []
+
+    def read_bytes(self, count: int) -> bytes:
+        if self.pos + count > len(self.data):
+            raise ValueError("Reader went past end of input")
+        chunk = self.data[self.pos:self.pos + count]
+        self.pos += count
+        return chunk
+
+    def read_int(self, required: int) -> int:
+        return int.from_bytes(self.read_bytes(required), 'big')
+
+    def read(self) -> LuaValue:
+        value = self.read_int(1)
+
+        if value % 2 == 1:
+            return (value - 1) // 2
+
+        if value % 4 == 2:
+            kind, count = (value // 4) % 4, value // 16
+            if kind == EMBEDDED_STRING:
+                return self.read_string(count)
+            if kind == EMBEDDED_TABLE:
+                return self.read_table(count)
+            if kind == EMBEDDED_ARRAY:
+                return self.read_array(count)
+            return self.read_mixed(count % 4 + 1, count // 4 + 1)
+
+        if value % 8 == 4:
+            packed = self.read_int(1) * 256 + value
+            return -(packed - 12) // 16 if value % 16 == 12 else (packed - 4) // 16
+
+        return self.read_typed(value // 8)
+
+    def read_typed(self, kind: int) -> LuaValue:
+        if kind == NIL:
+            return None
+        if NUM_16_POS <= kind <= NUM_64_NEG:
+            number = self.read_int(NUMBER_BYTES[kind])
+            return -number if (kind - NUM_16_POS) % 2 else number
+        if kind == NUM_FLOAT:
+            return struct.unpack('>d', self.read_bytes(8))[0]
+        if kind in (NUM_FLOATSTR_POS, NUM_FLOATSTR_NEG):
+            real = float(self.read_bytes(self.read_int(1)))
+            return -real if kind == NUM_FLOATSTR_NEG else real
+        if kind in (BOOL_T, BOOL_F):
+            return kind == BOOL_T
+        if STR_8 <= kind <= STR_24:
+            return self.read_string(self.read_int(kind - STR_8 + 1))
+        if TABLE_8 <= kind <= TABLE_24:
+            return self.read_table(self.read_int(kind - TABLE_8 + 1))
+        if ARRAY_8 <= kind <= ARRAY_24:
+            return self.read_array(self.read_int(kind - ARRAY_8 + 1))
+        if MIXED_8 <= kind <= MIXED_24:
+            required = kind - MIXED_8 + 1
+            array_count = self.read_int(required)
+            return self.read_mixed(array_count, self.read_int(required))
+        if STRINGREF_8 <= kind <= STRINGREF_24:
+            return self._ref(self.string_refs, self.read_int(kind - STRINGREF_8 + 1))
+        if TABLEREF_8 <= kind <= TABLEREF_24:
+            return self._ref(self.table_refs, self.read_int(kind - TABLEREF_8 + 1))
+        raise ValueError(f"Unknown type index: {kind}")
+
+    @staticmethod
+    def _ref(refs: list, index: int) -> Any:
+        if not 1 <= index <= len(refs):
+            raise ValueError(f"Invalid reference: {index}")
+        return refs[index - 1]
+
+    def read_string(self, length: int) -> Union[str, bytes]:
+        data = self.read_bytes(length)
+        try:
+            value: Union[str, bytes] = data.decode('utf-8')
+        except UnicodeDecodeError:
+            value = data
+        if length > 2:
+            self.string_refs.append(value)
+        return value
+
+    def read_pairs(self, table: dict, count: int) -> dict:
+        for _ in range(count):
+            key = self.read()
+            value = self.read()
+            try:
+                table[key] = value
+            except TypeError:
+                raise ValueError("Tables used as table keys are not supported")
+        return table
+
+    def read_table(self, count: int) -> dict:
+        table: dict = {}
+        self.table_refs.append(table)
+        return self.read_pairs(table, count)
+
+    def read_array(self, count: int) -> list:
+        array: list = []
+        self.table_refs.append(array)
+        for _ in range(count):
+            array.append(self.read())
+        return array
+
+    def read_mixed(self, array_count: int, map_count: int) -> dict:
+        table: dict = {}
+        self.table_refs.append(table)
+        for i in range(array_count):
+            table[i + 1] = self.read()
+        return self.read_pairs(table, map_count)
+
+
+def serialize(*values: Any, stable: bool = False) -> bytes:
+    """Serialize values like LibSerialize:Serialize(...).
+
+    With stable=True map keys are sorted like LibSerialize's `stable` option;
+    otherwise they are written in dict order.
+    """
+    writer = _Writer(stable)
+    for value in values:
+        writer.write(value)
+    return bytes(writer.out)
+
+
+def deserialize(data: bytes) -> Tuple[LuaValue, ...]:
+    """Deserialize every value of a LibSerialize string. Raises ValueError on invalid input."""
+    if not data or data[0] != VERSION:
+        raise ValueError("Not a LibSerialize version 1 payload")
+
+    reader = _Reader(data)
+    reader.pos = 1
+    values = []
+    try:
+        while reader.pos < len(data):
+            values.append(reader.read())
+    except RecursionError:
+        raise ValueError("Serialized tables are nested too deeply")
+    return tuple(values)
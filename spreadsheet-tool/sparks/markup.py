@@ -0,0 +1,441 @@
+import html
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+# Python port of the page markup of coreModule:UpdateDisplayed in Src/Core.lua.
+# The addon rewrites the text with a chain of ~60 gsub calls, one full pass each;
+# render_display produces the same string in a single left-to-right scan.
+# render_display_chained is a literal port of the chain, kept as the reference.
+
+# Lua character classes (ASCII only, like the C locale the client uses)
+LUA_SPACE = " \t\n\v\f\r"
+LUA_PUNCT = r"!-/:-@\[-`{-~"
+WORD_RE = re.compile(rf"[^{LUA_SPACE}{LUA_PUNCT}]+")
+_LUA_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+DEFAULT_HIGHLIGHT_COLOR = "ffd200"  # configModule default highlightColor
+
+COLORS = {
+    "blue": "00cbf4", "green": "0adc00", "red": "eb310c", "yellow": "faf318",
+    "orange": "ff9d00", "pink": "f64c97", "purple": "dc44eb", "druid": "ff7d0a",
+    "hunter": "abd473", "mage": "40C7eb", "paladin": "f58cba", "priest": "ffffff",
+    "rogue": "fff569", "shaman": "0070de", "warlock": "8787ed", "warrior": "c79c6e",
+}
+RETAIL_COLORS = {"deathknight": "c41f3b", "monk": "00ff96", "demonhunter": "a330c9"}
+
+RAID_TARGET = "|TInterface\\TargetingFrame\\UI-RaidTargetingIcon_{}:0|t"
+RAID_TARGETS = {"star": 1, "circle": 2, "diamond": 3, "triangle": 4, "moon": 5,
+                "square": 6, "cross": 7, "x": 7, "skull": 8}
+ROLE_ICON = "|TInterface\\LFGFrame\\UI-LFG-ICON-PORTRAITROLES:0:0:0:0:64:64:{}|t"
+CLASS_ICON = "|TInterface\\GLUES\\CHARACTERCREATE\\UI-CHARACTERCREATE-CLASSES:0:0:0:0:64:64:{}|t"
+HEALTHSTONE = "|TInterface\\Icons\\INV_Stone_04:0|t"
+ICON = "|TInterface\\Icons\\{}:0|t"
+
+MARKERS = {
+    **{name: RAID_TARGET.format(n) for name, n in RAID_TARGETS.items()},
+    **{f"rt{n}": RAID_TARGET.format(n) for n in range(1, 9)},
+    "healthstone": HEALTHSTONE, "hs": HEALTHSTONE,
+    "tank": ROLE_ICON.format("0:19:22:41"),
+    "healer": ROLE_ICON.format("20:39:1:20"),
+    "damage": ROLE_ICON.format("20:39:22:41"), "dps": ROLE_ICON.format("20:39:22:41"),
+    "hunter": CLASS_ICON.format("0:16:16:32"), "warrior": CLASS_ICON.format("0:16:0:16"),
+    "rogue": CLASS_ICON.format("32:48:0:16"), "mage": CLASS_ICON.format("16:32:0:16"),
+    "priest": CLASS_ICON.format("32:48:16:32"), "warlock": CLASS_ICON.format("48:64:16:32"),
+    "paladin": CLASS_ICON.format("0:16:32:48"), "druid": CLASS_ICON.format("48:64:0:16"),
+    "shaman": CLASS_ICON.format("16:32:16:32"),
+    "elemental": "|T136048:0|t", "moonkin": "|T136096:0|t", "spriest": "|T136200:0|t",
+}
+RETAIL_MARKERS = {
+    "hero": ICON.format("ABILITY_Shaman_Heroism"), "heroism": ICON.format("ABILITY_Shaman_Heroism"),
+    "bloodlust": ICON.format("SPELL_Nature_Bloodlust"), "bl": ICON.format("SPELL_Nature_Bloodlust"),
+    "deathknight": CLASS_ICON.format("16:32:32:48"), "monk": CLASS_ICON.format("32:48:32:48"),
+    "demonhunter": CLASS_ICON.format("64:48:32:48"),
+}
+# Markers taking an argument: {spell 123}, {icon 123}, {icon Name}, {boss 1}, {journal 1}
+ARG_MARKER_RE = re.compile(rf"(spell|icon|boss|journal)[{LUA_SPACE}]+([A-Za-z0-9_]+)", re.I)
+RETAIL_ARG_MARKERS = ("boss", "journal")
+
+
+def offline_spell_link(spell_id: str) -> Optional[str]:
+    """Stand-in for GetSpellLink: a spell link without the spell name."""
+    return f"|cff71d5ff|Hspell:{spell_id}|h[Spell {spell_id}]|h|r"
+
+
+def offline_spell_icon(spell_id: str) -> str:
+    """Stand-in for the icon of GetSpellInfo: the question mark icon."""
+    return "Interface\\Icons\\INV_Misc_QuestionMark"
+
+
+def no_link(journal_id: str) -> Optional[str]:
+    """Stand-in for EJ_GetEncounterInfo/GetSectionInfo links: unknown, so the marker stays."""
+    return None
+
+
+@dataclass
+class GameData:
+    """The client API calls the markup needs. Returning None leaves the marker as typed."""
+    spell_link: Callable[[str], Optional[str]] = offline_spell_link
+    spell_icon: Callable[[str], str] = offline_spell_icon
+    encounter_link: Callable[[str], Optional[str]] = no_link
+    journal_link: Callable[[str], Optional[str]] = no_link
+
+
+OFFLINE = GameData()
+
+
+def lua_lower(text: str) -> str:
+    return text.translate(_LUA_LOWER)
+
+
+def _ascii_ignorecase(text: str) -> str:
+    """A regex matching TEXT with ASCII letters in either case, like utilsModule:Pattern."""
+    return "".join(f"[{c}{c.upper()}]" if "a" <= c <= "z" else re.escape(c) for c in lua_lower(text))
+
+
+def highlight_tokens(config: str, group: Optional[int] = None) -> List[str]:
+    """The words to highlight from the 'highlight' setting; "group" means the player's group."""
+    tokens = []
+    for token in WORD_RE.findall(config):
+        token = lua_lower(token)
+        tokens.append(f"g{group or 0}" if token == "group" else token)
+    return tokens
+
+
+def _lua_replacement(value: str, match: str) -> str:
+    """Expand a gsub replacement string for a pattern without captures (Lua 5.1 rules)."""
+    def expand(m: re.Match) -> str:
+        char = m.group(1)
+        if char in "01":
+            return match
+        if char.isdigit():
+            raise ValueError(f"invalid capture index in replacement {value!r}")
+        return char
+    return re.sub(r"%(.)", expand, value, flags=re.S)
+
+
+class MarkupRenderer:
+    """Renders page text to the string UpdateDisplayed shows, in one scan.
+
+    classic mirrors isClassic in Core.lua: when False the death knight, monk and
+    demon hunter colors and the hero, bloodlust, boss and journal markers apply too.
+    Variables are (name, value) pairs in AngrySparks_Variables order; names are
+    matched literally, where the addon would read magic characters as a pattern.
+    """
+
+    def __init__(self, classic: bool = True, game: GameData = OFFLINE) -> None:
+        self.classic = classic
+        self.game = game
+        self.colors = dict(COLORS, **({} if classic else RETAIL_COLORS))
+        self.markers = dict(MARKERS, **({} if classic else RETAIL_MARKERS))
+        names = "|".join(_ascii_ignorecase(name) for name in sorted(self.colors, key=len, reverse=True))
+        self.color_re = re.compile(rf"\|\|?[cC](?:{names})")  # "||" turns into "|" before the colors apply
+        self._base = rf"(?P<color>{self.color_re.pattern})|(?P<pipe>\|\|)|(?P<marker>\{{[^{{}}]*\}})"
+        self._patterns: Dict[FrozenSet[str], re.Pattern] = {}
+        # Rendered color and marker tokens, so GameData is asked once per distinct marker
+        self._rendered: Dict[Tuple[FrozenSet[str], str], Dict[str, str]] = {}
+
+    def _pattern(self, highlights: FrozenSet[str]) -> re.Pattern:
+        """Colors, escaped pipes, markers and the highlighted words, as one compiled pattern."""
+        pattern = self._patterns.get(highlights)
+        if pattern is None:
+            source = self._base
+            if highlights:
+                words = "|".join(_ascii_ignorecase(word) for word in sorted(highlights, key=len, reverse=True))
+                source += rf"|(?P<word>(?<![^{LUA_SPACE}{LUA_PUNCT}])(?:{words})(?![^{LUA_SPACE}{LUA_PUNCT}]))"
+            pattern = self._patterns[highlights] = re.compile(source)
+        return pattern
+
+    def replace_variables(self, text: str, variables: Sequence[Tuple[str, str]]) -> str:
+        """Substitute {name} variables, as AngrySparks:ReplaceVariables does with one gsub each.
+
+        A value may use variables listed after it but not before it, like the sequential gsubs.
+        """
+        index: Dict[str, int] = {}
+        for i, (name, _) in enumerate(variables):
+            index.setdefault(name, i)
+        if not index:
+            return text
+
+        expanded: Dict[int, str] = {}
+
+        def expand(segment: str, after: int) -> str:
+            usable = [name for name, i in index.items() if i > after]
+            if not usable:
+                return segment
+            pattern = "|".join(re.escape("{" + name + "}") for name in sorted(usable, key=len, reverse=True))
+
+            def substitute(m: re.Match) -> str:
+                i = index[m.group(0)[1:-1]]
+                if i not in expanded:
+                    expanded[i] = expand(_lua_replacement(variables[i][1], m.group(0)), i)
+                return expanded[i]
+            return re.sub(pattern, substitute, segment)
+        return expand(text, -1)
+
+    def render(self, text: str, variables: Sequence[Tuple[str, str]] = (),
+               highlights: Sequence[str] = (), highlight_color: str = DEFAULT_HIGHLIGHT_COLOR) -> str:
+        """The display string for a page's Contents, before it is split into {page}s.
+
+        Only markup is matched; the text between matches is copied as is.
+        """
+        # A token with punctuation never equals one of the words the addon's word pass sees
+        words = frozenset(word for word in highlights if WORD_RE.fullmatch(word))
+        return self._render(self.replace_variables(text, variables), words, highlight_color)
+
+    def _render(self, text: str, highlights: FrozenSet[str], highlight_color: str) -> str:
+        pattern = self._pattern(highlights)
+        rendered = self._rendered.setdefault((highlights, highlight_color), {})
+        color_end = -1  # a word right after a color code joins the code's letters, so it is no match
+
+        def replace(m: re.Match) -> str:
+            nonlocal color_end
+            kind, token = m.lastgroup or "", m.group(0)
+            if kind == "word":
+                return token if m.start() == color_end else f"|cff{highlight_color}{token}|r"
+            if kind == "color":
+                color_end = m.end()
+            if token not in rendered:
+                rendered[token] = self._render_token(kind, token, highlights, highlight_color)
+            return rendered[token]
+
+        return pattern.sub(replace, text)
+
+    def _render_token(self, kind: str, token: str, highlights: FrozenSet[str], highlight_color: str) -> str:
+        if kind == "color":
+            return f"|cff{self.colors[lua_lower(token.lstrip('|')[1:])]}"
+        if kind == "pipe":
+            return "|"
+        marker = self.marker(token[1:-1])
+        if marker is None or any(lua_lower(word) in highlights for word in WORD_RE.findall(token)):
+            # Not a marker, or broken by a highlight since the word pass runs first
+            return "{" + self._render(token[1:], highlights, highlight_color)
+        return marker
+
+    def knows(self, content: str) -> bool:
+        """Whether {content} is markup this client renders, whatever the game data returns."""
+        m = ARG_MARKER_RE.fullmatch(content)
+        if m is None:
+            return lua_lower(content) in self.markers
+        kind = lua_lower(m.group(1))
+        return (kind == "icon" or m.group(2).isdigit()) and not (self.classic and kind in RETAIL_ARG_MARKERS)
+
+    def marker(self, content: str) -> Optional[str]:
+        """The rendering of a {content} marker, or None if it is left as typed."""
+        rendered = self.markers.get(lua_lower(content))
+        if rendered is not None:
+            return rendered
+        m = ARG_MARKER_RE.fullmatch(content)
+        if m is None:
+            return None
+        kind, arg = lua_lower(m.group(1)), m.group(2)
+        if kind == "icon":
+            return f"|T{self.game.spell_icon(arg)}:0|t" if arg.isdigit() else ICON.format(arg)
+        if not arg.isdigit() or (self.classic and kind in RETAIL_ARG_MARKERS):
+            return None
+        if kind == "spell":
+            return self.game.spell_link(arg)
+        return self.game.encounter_link(arg) if kind == "boss" else self.game.journal_link(arg)
+
+
+def render_display(text: str, variables: Sequence[Tuple[str, str]] = (), highlights: Sequence[str] = (),
+                   highlight_color: str = DEFAULT_HIGHLIGHT_COLOR, classic: bool = True,
+                   game: GameData = OFFLINE) -> str:
+    """Render page text like UpdateDisplayed, with a one-off MarkupRenderer."""
+    return MarkupRenderer(classic, game).render(text, variables, highlights, highlight_color)
+
+
+def _lua_pattern(pattern: str) -> re.Pattern:
+    """utilsModule:Pattern for the patterns the chain uses: letters match either case."""
+    return re.compile(pattern.replace("%s", f"[{LUA_SPACE}]").replace("%d", "[0-9]")
+                      .replace("%w", "A-Za-z0-9"), re.I)
+
+
+# A gsub of the chain: pattern and replacement function, None for the highlight pass
+GsubRule = Tuple[re.Pattern, Optional[Callable[[re.Match], str]]]
+
+
+def chained_rules(classic: bool = True, game: GameData = OFFLINE) -> List[GsubRule]:
+    """The gsub chain of UpdateDisplayed as (pattern, replacement function), in order.
+
+    The highlight word pass is the rule with pattern WORD_RE; render_display_chained
+    supplies its callback.
+    """
+    def literal(value: str) -> Callable[[re.Match], str]:
+        return lambda m: value
+
+    def keep_if_none(func: Callable[[str], Optional[str]]) -> Callable[[re.Match], str]:
+        return lambda m: func(m.group(1)) or m.group(0)  # gsub keeps the match on nil
+
+    rules: List[GsubRule] = [(re.compile(r"\|\|"), literal("|"))]
+    rules += [(_lua_pattern(re.escape("|c" + name)), literal(f"|cff{hex_color}"))
+              for name, hex_color in COLORS.items()]
+    rules.append((WORD_RE, None))
+    rules.append((_lua_pattern(r"\{spell%s+(%d+)\}"), keep_if_none(game.spell_link)))
+    rules += [(_lua_pattern(rf"\{{{name}\}}"), literal(f"{{rt{n}}}")) for name, n in RAID_TARGETS.items()]
+    rules.append((_lua_pattern(r"\{rt([1-8])\}"), lambda m: RAID_TARGET.format(m.group(1))))
+    rules.append((_lua_pattern(r"\{healthstone\}"), literal("{hs}")))
+    rules.append((_lua_pattern(r"\{hs\}"), literal(HEALTHSTONE)))
+    rules.append((_lua_pattern(r"\{icon%s+(%d+)\}"), lambda m: f"|T{game.spell_icon(m.group(1))}:0|t"))
+    rules.append((_lua_pattern(r"\{icon%s+([%w_]+)\}"), lambda m: ICON.format(m.group(1))))
+    rules.append((_lua_pattern(r"\{damage\}"), literal("{dps}")))
+    rules += [(_lua_pattern(rf"\{{{name}\}}"), literal(MARKERS[name]))
+              for name in ("tank", "healer", "dps", "hunter", "warrior", "rogue", "mage", "priest",
+                           "warlock", "paladin", "druid", "shaman", "elemental", "moonkin", "spriest")]
+    if not classic:
+        rules += [(_lua_pattern(re.escape("|c" + name)), literal(f"|cff{hex_color}"))
+                  for name, hex_color in RETAIL_COLORS.items()]
+        rules.append((_lua_pattern(r"\{boss%s+(%d+)\}"), keep_if_none(game.encounter_link)))
+        rules.append((_lua_pattern(r"\{journal%s+(%d+)\}"), keep_if_none(game.journal_link)))
+        rules += [(_lua_pattern(r"\{hero\}"), literal("{heroism}")),
+                  (_lua_pattern(r"\{heroism\}"), literal(RETAIL_MARKERS["heroism"])),
+                  (_lua_pattern(r"\{bloodlust\}"), literal("{bl}")),
+                  (_lua_pattern(r"\{bl\}"), literal(RETAIL_MARKERS["bl"]))]
+        rules += [(_lua_pattern(rf"\{{{name}\}}"), literal(RETAIL_MARKERS[name]))
+                  for name in ("deathknight", "monk", "demonhunter")]
+    return rules
+
+
+def render_display_chained(text: str, variables: Sequence[Tuple[str, str]] = (),
+                           highlights: Sequence[str] = (), highlight_color: str = DEFAULT_HIGHLIGHT_COLOR,
+                           classic: bool = True, game: GameData = OFFLINE,
+                           rules: Optional[List[GsubRule]] = None) -> Tuple[str, int]:
+    """Render page text with one pass per gsub, like the addon. Returns (text, passes)."""
+    passes = 0
+    for name, value in variables:
+        text = text.replace("{" + name + "}", _lua_replacement(value, "{" + name + "}"))
+        passes += 1
+
+    def highlight(m: re.Match) -> str:
+        word = m.group(0)
+        return f"|cff{highlight_color}{word}|r" if lua_lower(word) in highlights else word
+
+    for pattern, replace in rules if rules is not None else chained_rules(classic, game):
+        text = pattern.sub(replace or highlight, text)
+        passes += 1
+    return text, passes
+
+
+def split_pages(text: str) -> List[str]:
+    """Split rendered text at {page}, like utilsModule:Explode."""
+    return text.split("{page}")
+
+
+# Rendering the client's escape sequences for previews
+ESCAPE_RE = re.compile(r"\|c([0-9a-fA-F]{8})|\|r|\|T([^|]*)\|t|\|H[^|]*\|h(.*?)\|h|\|\|", re.S)
+
+
+def _texture_labels() -> Dict[str, str]:
+    labels: Dict[str, str] = {}
+    for name, rendered in list(RETAIL_MARKERS.items()) + list(MARKERS.items()):
+        labels.setdefault(rendered[2:-2], name)
+    for n in range(1, 9):
+        labels[RAID_TARGET.format(n)[2:-2]] = next(k for k, v in RAID_TARGETS.items() if v == n)
+    return labels
+
+
+TEXTURE_LABELS = _texture_labels()
+
+
+def texture_label(texture: str) -> str:
+    """A readable name for a |T...|t texture: its marker name, else the file name."""
+    return TEXTURE_LABELS.get(texture) or texture.split(":")[0].replace("\\", "/").rsplit("/", 1)[-1]
+
+
+def _render_escapes(text: str, color: Callable[[str], str], reset: Callable[[], str],
+                    texture: Callable[[str], str], plain: Callable[[str], str]) -> str:
+    out: List[str] = []
+    pos = 0
+    for m in ESCAPE_RE.finditer(text):
+        out.append(plain(text[pos:m.start()]))
+        token = m.group(0)
+        if m.group(1):
+            out.append(color(m.group(1)[2:]))  # AARRGGBB
+        elif token == "|r":
+            out.append(reset())
+        elif m.group(2) is not None:
+            out.append(texture(m.group(2)))
+        elif token == "||":
+            out.append(plain("|"))
+        else:
+            out.append(plain(m.group(3)))  # hyperlink text, e.g. [Spell Name]
+        pos = m.end()
+    out.append(plain(text[pos:]))
+    out.append(reset())
+    return "".join(out)
+
+
+def to_html(text: str) -> str:
+    """Rendered display text as HTML: colored spans and labelled textures."""
+    depth = 0
+
+    def color(rgb: str) -> str:
+        nonlocal depth
+        depth += 1
+        return f'<span style="color:#{rgb.lower()}">'
+
+    def reset() -> str:
+        nonlocal depth
+        closed, depth = "</span>" * depth, 0
+        return closed
+
+    def texture(path: str) -> str:
+        return f'<span class="texture" title="{html.escape(path)}">[{html.escape(texture_label(path))}]</span>'
+
+    return _render_escapes(text, color, reset, texture, html.escape)
+
+
+def to_ansi(text: str) -> str:
+    """Rendered display text with 24-bit ANSI colors, for terminal previews."""
+    def color(rgb: str) -> str:
+        return f"\x1b[38;2;{int(rgb[0:2], 16)};{int(rgb[2:4], 16)};{int(rgb[4:6], 16)}m"
+
+    return _render_escapes(text, color, lambda: "\x1b[39m", lambda t: f"[{texture_label(t)}]", lambda s: s)
+
+
+def preview_html(pages: Sequence[Tuple[str, str]], title: str = "AngrySparks preview") -> str:
+    """A standalone HTML document showing (name, rendered text) pages on a dark background."""
+    sections: List[str] = []
+    for name, text in pages:
+        sections.extend(f"<section><h2>{html.escape(name)}</h2><pre>{to_html(part)}</pre></section>"
+                        for part in split_pages(text))
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>\n"
+            "<style>body{background:#1b1b1b;color:#fff;font-family:sans-serif}"
+            "pre{font-family:inherit;white-space:pre-wrap}.texture{color:#aaa}</style>\n"
+            "</head><body>\n" + "\n".join(sections) + "\n</body></html>\n")
+
+
+@dataclass
+class MarkupIssue:
+    """A markup problem in page text, at a 1-based line and column."""
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.line}:{self.column}: {self.message}"
+
+
+LINT_RE = re.compile(r"\{([A-Za-z][^{}\n]*)\}|\|c(?![0-9a-fA-F]{8})([A-Za-z]+)")
+
+
+def lint_markup(text: str, variables: Sequence[Tuple[str, str]] = (), classic: bool = True) -> List[MarkupIssue]:
+    """Find markers and color codes the addon would show as typed instead of rendering."""
+    renderer = MarkupRenderer(classic)
+    retail = MarkupRenderer(classic=False)
+    names = {name for name, _ in variables}
+    issues = []
+    for m in LINT_RE.finditer(text):
+        line = text.count("\n", 0, m.start()) + 1
+        column = m.start() - (text.rfind("\n", 0, m.start()) + 1) + 1
+        if m.group(1) is not None:
+            content = m.group(1)
+            if content in names or content == "page" or renderer.knows(content):
+                continue
+            if classic and retail.knows(content):
+                issues.append(MarkupIssue(line, column, f"{{{content}}} is not rendered by this client"))
+            else:
+                issues.append(MarkupIssue(line, column, f"Unknown marker {{{content}}}"))
+        elif not renderer.color_re.match(text, m.start()):
+            issues.append(MarkupIssue(line, column, f"Unknown color |c{m.group(2)}"))
+    return issues
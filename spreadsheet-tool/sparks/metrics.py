@@ -0,0 +1,84 @@
+import cProfile
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+# Pipeline stages, in the order a run goes through them
+STAGES = ("config", "url", "cache_lookup", "fetch", "cache_store", "parse", "process", "write")
+
+
+@dataclass
+class StageTiming:
+    """Time spent in one pipeline stage, summed over its calls."""
+    wall: float = 0.0
+    cpu: float = 0.0  # CPU time of the calling thread
+    calls: int = 0
+
+
+class RunMetrics:
+    """Per-stage wall/CPU timings and counters for one run of the tool.
+
+    Stages may run on several threads at once (fetch_many), so their summed wall
+    time can exceed the run's. With profile_path, the "process" stage runs under
+    cProfile and dump_profile() writes the stats there.
+    """
+
+    PROFILED_STAGE = "process"
+
+    def __init__(self, profile_path: Optional[Union[str, Path]] = None) -> None:
+        self.started = time.time()
+        self._started_wall = time.perf_counter()
+        self.stages: Dict[str, StageTiming] = {}
+        self.counters: Dict[str, int] = {}
+        self.profile_path = Path(profile_path) if profile_path else None
+        self.profiler = cProfile.Profile() if profile_path else None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of a with block as the named stage."""
+        profiler = self.profiler if name == self.PROFILED_STAGE else None
+        wall, cpu = time.perf_counter(), time.thread_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            with self._lock:
+                timing = self.stages.setdefault(name, StageTiming())
+                timing.wall += wall
+                timing.cpu += cpu
+                timing.calls += 1
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def dump_profile(self) -> Optional[Path]:
+        """Write the profiled stage's stats for pstats/snakeviz, if profiling is on."""
+        if self.profiler is None:
+            return None
+        self.profiler.dump_stats(str(self.profile_path))
+        return self.profile_path
+
+    def to_dict(self) -> dict:
+        order = {name: i for i, name in enumerate(STAGES)}
+        stages = sorted(self.stages.items(), key=lambda item: (order.get(item[0], len(order)), item[0]))
+        return {
+            "started": round(self.started, 3),
+            "wall": round(time.perf_counter() - self._started_wall, 6),
+            "stages": {name: {key: round(value, 6) for key, value in asdict(timing).items()}
+                       for name, timing in stages},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def to_json(self) -> str:
+        """One line of JSON, for appending to a log or feeding a graphing tool."""
+        return json.dumps(self.to_dict())
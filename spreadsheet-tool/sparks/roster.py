@@ -0,0 +1,175 @@
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from sparks.layout import Assignment
+
+# Roster model and a cross-check of the structured assignments of every section of
+# every configured raid. All lookups go through dicts keyed by case-folded player
+# name, so the check is one pass over the records however many raids there are.
+
+# Roles each class can fill in Classic raids; roles outside ROLES (e.g. "puller")
+# are open to every class
+CLASS_ROLES: Dict[str, FrozenSet[str]] = {
+    "druid": frozenset({"tank", "healer", "dps"}),
+    "hunter": frozenset({"dps"}),
+    "mage": frozenset({"dps"}),
+    "paladin": frozenset({"healer", "dps"}),
+    "priest": frozenset({"healer", "dps"}),
+    "rogue": frozenset({"dps"}),
+    "shaman": frozenset({"healer", "dps"}),
+    "warlock": frozenset({"dps"}),
+    "warrior": frozenset({"tank", "dps"}),
+}
+ROLES = frozenset({"tank", "healer", "dps"})
+
+CONFLICT_KINDS = ("duplicate", "overload", "lockout", "unknown", "mismatch")
+
+
+@dataclass(frozen=True)
+class RosterEntry:
+    """A raider, their class and the roles they play (all roles of the class by default)."""
+    name: str
+    player_class: str
+    roles: FrozenSet[str]
+
+
+class Roster:
+    """The guild's raiders, indexed by case-folded name.
+
+    Loaded from a TOML file with a [players] table mapping names to a class, or to
+    a table with `class` and `roles`, and an optional [limits] table with the most
+    targets a player may have per role in one block of a section (1 by default):
+
+        [players]
+        Arthas = "warrior"
+        Malfurion = { class = "druid", roles = ["healer"] }
+
+        [limits]
+        healer = 2
+    """
+
+    DEFAULT_LIMIT = 1
+
+    def __init__(self, entries: Iterable[RosterEntry], limits: Optional[Dict[str, int]] = None) -> None:
+        self._index: Dict[str, RosterEntry] = {entry.name.casefold(): entry for entry in entries}
+        self.limits = dict(limits or {})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Roster":
+        entries = []
+        for name, spec in data.get("players", {}).items():
+            if isinstance(spec, str):
+                spec = {"class": spec}
+            player_class = str(spec.get("class", "")).lower()
+            if player_class not in CLASS_ROLES:
+                raise ValueError(f"Roster: unknown class {spec.get('class')!r} for {name}. "
+                                 f"Classes: {', '.join(CLASS_ROLES)}")
+            roles = frozenset(spec.get("roles", CLASS_ROLES[player_class]))
+            entries.append(RosterEntry(name, player_class, roles))
+        return cls(entries, {role: int(limit) for role, limit in data.get("limits", {}).items()})
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Roster":
+        try:
+            with open(path, 'rb') as f:
+                return cls.from_dict(tomllib.load(f))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Roster file not found: {path}")
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"Invalid roster {path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name: str) -> bool:
+        return name.casefold() in self._index
+
+    def get(self, name: str) -> Optional[RosterEntry]:
+        return self._index.get(name.casefold())
+
+    def limit(self, role: str) -> int:
+        return self.limits.get(role, self.DEFAULT_LIMIT)
+
+
+@dataclass(frozen=True)
+class Conflict:
+    """One problem found by check_assignments."""
+    kind: str  # one of CONFLICT_KINDS
+    player: str
+    group: str  # the config (raid group) the assignment came from
+    section: str
+    detail: str
+
+    def __str__(self) -> str:
+        where = f"{self.group}, {self.section}" if self.section else self.group
+        return f"{self.kind}: {self.player} {self.detail} ({where})"
+
+
+def check_assignments(groups: Mapping[str, Iterable[Assignment]],
+                      roster: Optional[Roster] = None) -> List[Conflict]:
+    """Find conflicts in the assignments of every raid group, in one pass over the records.
+
+    groups maps a raid group (usually its config file) to its assignments. Found are:
+      duplicate - the same player, role and target twice in a section
+      overload  - more targets in one role and block than the roster's limit; a healer
+                  listed in several blocks of a section (tank and raid healing) is fine
+      lockout   - the same player in two groups of the same raid
+      unknown   - a player who is not on the roster
+      mismatch  - a role the player's roster entry or class does not play
+    Unknown names and mismatches need a roster.
+    """
+    limits = roster if roster is not None else Roster([])
+    conflicts: List[Conflict] = []
+    seen: Set[Tuple[str, str, str, str, str]] = set()
+    targets: Dict[Tuple[str, str, int, str, str], List[str]] = {}
+    names: Dict[Tuple[str, str, int, str, str], str] = {}
+    raid_groups: Dict[Tuple[str, str], str] = {}
+    reported: Set[Tuple[str, ...]] = set()
+
+    for group, assignments in groups.items():
+        for record in assignments:
+            player = record.player.casefold()
+            assignment = (group, record.section, player, record.role, record.target)
+            if assignment in seen:
+                conflicts.append(Conflict("duplicate", record.player, group, record.section,
+                                          f"is listed twice as {_describe(record.role, record.target)}"))
+                continue
+            seen.add(assignment)
+
+            role_key = (group, record.section, record.block, player, record.role)
+            targets.setdefault(role_key, []).append(record.target)
+            names.setdefault(role_key, record.player)
+
+            first_group = raid_groups.setdefault((record.raid, player), group)
+            if first_group != group and ("lockout", record.raid, player, group) not in reported:
+                reported.add(("lockout", record.raid, player, group))
+                conflicts.append(Conflict("lockout", record.player, group, "",
+                                          f"is also in {record.raid} group {first_group}"))
+
+            if roster is None:
+                continue
+            entry = roster.get(record.player)
+            if entry is None:
+                if ("unknown", group, player) not in reported:
+                    reported.add(("unknown", group, player))
+                    conflicts.append(Conflict("unknown", record.player, group, record.section,
+                                              "is not on the roster"))
+            elif record.role in ROLES and record.role not in entry.roles:
+                if ("mismatch", group, record.section, player, record.role) not in reported:
+                    reported.add(("mismatch", group, record.section, player, record.role))
+                    conflicts.append(Conflict("mismatch", record.player, group, record.section,
+                                              f"is a {entry.player_class} assigned as {record.role}"))
+
+    for role_key, role_targets in targets.items():
+        group, section, _, _, role = role_key
+        if len(role_targets) > limits.limit(role):
+            listed = ", ".join(target or "(none)" for target in role_targets)
+            conflicts.append(Conflict("overload", names[role_key], group, section,
+                                      f"has {len(role_targets)} {role} assignments: {listed}"))
+    return conflicts
+
+
+def _describe(role: str, target: str) -> str:
+    return f"{role} of {target}" if target else role
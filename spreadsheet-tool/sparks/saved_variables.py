@@ -0,0 +1,268 @@
+import mmap
+import re
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sparks.addon_export import Page
+from sparks.libserialize import LuaValue
+
+# Reader for WTF/Account/<ACCOUNT>/SavedVariables/AngrySparks.lua, the Lua file
+# the client writes AngrySparks_Pages and the other saved variables to. Values
+# map to Python like sparks.libserialize does. The file is scanned token by
+# token from a memory map, and values of variables nobody asked for are
+# skipped without being decoded.
+
+SAVED_VARIABLES = ("AngrySparks_Pages", "AngrySparks_Categories", "AngrySparks_Variables")
+
+_TOKEN_RE = re.compile(rb"""
+    (?P<space>(?:\s+|--\[(?P<comment_level>=*)\[.*?\](?P=comment_level)\]|--[^\n]*)+)
+  | (?P<string>"(?:[^"\\\n]|\\.|\\\n)*"|'(?:[^'\\\n]|\\.|\\\n)*')
+  | (?P<long_string>\[(?P<level>=*)\[.*?\](?P=level)\])
+  | (?P<number>-?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<punct>[{}\[\]=,;])
+""", re.S | re.X)
+_ESCAPE_RE = re.compile(rb"\\(\d{1,3}|.)", re.S)
+_ESCAPES = {b"n": b"\n", b"t": b"\t", b"r": b"\r", b"a": b"\a", b"b": b"\b", b"f": b"\f", b"v": b"\v",
+            b"\n": b"\n", b"\\": b"\\", b'"': b'"', b"'": b"'"}
+_CONSTANTS = {b"true": True, b"false": False, b"nil": None}
+
+Token = Tuple[str, bytes, int]
+Buffer = Union[bytes, mmap.mmap]  # the file's contents, or read_saved_variables' memory map
+
+
+def _unescape(match: "re.Match[bytes]") -> bytes:
+    escape = match.group(1)
+    if escape.isdigit():
+        if int(escape) > 255:
+            raise ValueError(f"Escape sequence too large: \\{escape.decode()}")
+        return bytes([int(escape)])
+    if escape not in _ESCAPES:
+        raise ValueError(f"Invalid escape sequence: \\{escape.decode('latin-1')}")
+    return _ESCAPES[escape]
+
+
+def _lua_string(data: bytes) -> Union[str, bytes]:
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data
+
+
+class _Parser:
+    """Recursive descent over the tokens of a SavedVariables file."""
+
+    def __init__(self, data: Buffer) -> None:
+        self.data = data
+        self.tokens = self._tokenize()
+        self.token: Token = next(self.tokens)
+
+    def _tokenize(self) -> Iterator[Token]:
+        pos, end = 0, len(self.data)
+        while pos < end:
+            match = _TOKEN_RE.match(self.data, pos)
+            if not match:
+                raise ValueError(f"Unexpected character at line {self.line(pos)}")
+            kind = match.lastgroup or ""
+            if kind != "space":
+                yield kind, match.group(), pos
+            pos = match.end()
+        yield "eof", b"", end
+
+    def line(self, pos: int) -> int:
+        # mmap has find but no count
+        line, newline = 1, self.data.find(b"\n", 0, pos)
+        while newline != -1:
+            line += 1
+            newline = self.data.find(b"\n", newline + 1, pos)
+        return line
+
+    def advance(self) -> Token:
+        token = self.token
+        if token[0] == "eof":
+            raise ValueError("Unexpected end of file")
+        self.token = next(self.tokens)
+        return token
+
+    def expect(self, text: bytes) -> None:
+        kind, value, pos = self.advance()
+        if value != text or kind not in ("punct", "name"):
+            found = value.decode('utf-8', 'replace') or "end of file"
+            raise ValueError(f"Expected '{text.decode()}' at line {self.line(pos)}, found '{found}'")
+
+    def assignments(self) -> Iterator[Tuple[str, int]]:
+        """Yield the name of each top-level "Name = value" with the parser positioned at the value."""
+        while self.token[0] != "eof":
+            kind, value, pos = self.advance()
+            if kind != "name":
+                raise ValueError(f"Expected a variable name at line {self.line(pos)}")
+            self.expect(b"=")
+            yield value.decode('ascii'), pos
+
+    def value(self) -> LuaValue:
+        kind, value, pos = self.advance()
+        if kind == "string":
+            return _lua_string(_ESCAPE_RE.sub(_unescape, value[1:-1]))
+        if kind == "long_string":
+            opening = value.index(b"[", 1) + 1
+            body = value[opening:len(value) - opening]
+            # A newline right after the opening bracket is not part of the string
+            return _lua_string(body[1:] if body.startswith(b"\n") else body)
+        if kind == "number":
+            text = value.decode('ascii')
+            if re.fullmatch(r"-?0[xX][0-9a-fA-F]+", text):
+                return int(text, 16)
+            number = float(text)
+            return int(text) if re.fullmatch(r"-?\d+", text) else number
+        if kind == "name" and value in _CONSTANTS:
+            return _CONSTANTS[value]
+        if value == b"{":
+            return self.table()
+        raise ValueError(f"Unexpected '{value.decode('utf-8', 'replace')}' at line {self.line(pos)}")
+
+    def table(self) -> Union[list, dict]:
+        table: Dict[Any, LuaValue] = {}
+        index = 1
+        while self.token[1] != b"}":
+            if self.token[1] == b"[" and self.token[0] == "punct":
+                self.advance()
+                key = self.value()
+                self.expect(b"]")
+                self.expect(b"=")
+                table[key] = self.value()
+            elif self.token[0] == "name" and self.token[1] not in _CONSTANTS:
+                key = self.advance()[1].decode('ascii')
+                self.expect(b"=")
+                table[key] = self.value()
+            else:
+                table[index] = self.value()
+                index += 1
+            if self.token[1] in (b",", b";"):
+                self.advance()
+            elif self.token[1] != b"}":
+                raise ValueError(f"Expected ',' or '}}' at line {self.line(self.token[2])}")
+        self.advance()
+        # Lua tables with keys 1..n read as lists, as in sparks.libserialize
+        table = {key: value for key, value in table.items() if value is not None}
+        if all(table.get(i) is not None for i in range(1, len(table) + 1)):
+            return [table[i] for i in range(1, len(table) + 1)]
+        return table
+
+    def skip_value(self) -> None:
+        """Skip a value without decoding it, counting braces only."""
+        depth = 0
+        while True:
+            kind, value, pos = self.advance()
+            if kind == "punct" and value == b"{":
+                depth += 1
+            elif kind == "punct" and value == b"}":
+                depth -= 1
+            if depth == 0:
+                return
+
+
+def parse_saved_variables(data: Buffer, names: Optional[Iterable[str]] = None) -> Dict[str, LuaValue]:
+    """Values of the top-level assignments in a SavedVariables file, or only of the given names.
+
+    Raises ValueError on malformed input.
+    """
+    wanted = None if names is None else set(names)
+    parser = _Parser(data)
+    values: Dict[str, LuaValue] = {}
+    for name, _ in parser.assignments():
+        if wanted is None or name in wanted:
+            values[name] = parser.value()
+        else:
+            parser.skip_value()
+    return values
+
+
+def read_saved_variables(path: Union[str, Path], names: Optional[Iterable[str]] = None) -> Dict[str, LuaValue]:
+    """parse_saved_variables for a file, memory-mapped so large files are not read into memory."""
+    with open(path, 'rb') as f:
+        if Path(path).stat().st_size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_saved_variables(data, names)
+
+
+def _lua_bytes(value: LuaValue) -> bytes:
+    """The bytes Lua's .. operator makes of a string or number."""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, float):
+        return f"{value:.14g}".encode('ascii')
+    return str(value).encode('utf-8')
+
+
+def page_hash(name: LuaValue, contents: LuaValue, variables: Optional[LuaValue] = None) -> int:
+    """AngrySparks:Hash in Src/Core.lua.
+
+    LibCompress's FCS-32 is CRC-32; the bit library works on signed 32-bit numbers.
+    """
+    data = _lua_bytes(name) + b"\n" + _lua_bytes(contents)
+    if variables is not None:
+        data += b"\n" + _lua_bytes(variables)
+    crc = zlib.crc32(data)
+    return crc - (1 << 32) if crc >= 1 << 31 else crc
+
+
+def serialize_variables(variables: LuaValue) -> bytes:
+    """AngrySparks:SerializeVariables: "name replacement" lines in ipairs order."""
+    if isinstance(variables, list):
+        entries: List[LuaValue] = variables
+    elif isinstance(variables, dict):
+        entries = []
+        while isinstance(variables.get(len(entries) + 1), (list, dict)):
+            entries.append(variables[len(entries) + 1])
+    else:
+        entries = []
+
+    def get(entry: LuaValue, index: int) -> LuaValue:
+        if isinstance(entry, list):
+            return entry[index - 1] if index <= len(entry) else None
+        return entry.get(index) if isinstance(entry, dict) else None
+
+    text = b""
+    for entry in entries:
+        name, replacement = get(entry, 1), get(entry, 2)
+        if name not in (None, False) and replacement not in (None, False):
+            text += _lua_bytes(name) + b" " + _lua_bytes(replacement) + b"\n"
+    return text
+
+
+@dataclass
+class SavedState:
+    """The AngrySparks pages and variables of a SavedVariables file."""
+    pages: Dict[Any, Dict[str, LuaValue]] = field(default_factory=dict)
+    variables: bytes = b""
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SavedState":
+        values = read_saved_variables(path, SAVED_VARIABLES)
+        pages = values.get("AngrySparks_Pages") or {}
+        if isinstance(pages, list):
+            pages = dict(enumerate(pages, 1))
+        if not isinstance(pages, dict):
+            raise ValueError("AngrySparks_Pages is not a table")
+        return cls(pages={key: page for key, page in pages.items() if isinstance(page, dict)},
+                   variables=serialize_variables(values.get("AngrySparks_Variables")))
+
+    def update_id(self, page: Page) -> int:
+        """The UpdateId the addon computes for page with these saved variables."""
+        return page_hash(page.name, page.contents, self.variables)
+
+    def is_current(self, page: Page) -> bool:
+        """Whether the saved page with this Id already has this name and contents."""
+        saved = self.pages.get(page.id)
+        if saved is None:
+            return False
+        update_id = saved.get("UpdateId")
+        if update_id is None:
+            update_id = page_hash(saved.get("Name", ""), saved.get("Contents", ""), self.variables)
+        return update_id == self.update_id(page)
+
+    def changed_pages(self, pages: List[Page]) -> List[Page]:
+        return [page for page in pages if not self.is_current(page)]
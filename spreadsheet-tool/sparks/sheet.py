@@ -0,0 +1,208 @@
+import csv
+import functools
+import itertools
+import re
+from dataclasses import dataclass
+from io import StringIO
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+_CELL_RE = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+
+def column_index(letters: str) -> int:
+    """Convert spreadsheet column letters to a 0-based index (A=0, Z=25, AA=26, AB=27...)."""
+    if not letters.isalpha():
+        raise ValueError(f"Invalid column letters: {letters}")
+
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+
+def parse_cell(ref: str) -> Tuple[int, int]:
+    """Parse an A1 cell reference into (row number, 0-based column index)."""
+    match = _CELL_RE.match(ref.strip())
+    if not match:
+        raise ValueError(f"Invalid cell reference: {ref}")
+    return int(match.group(2)), column_index(match.group(1))
+
+
+def parse_range(ref: str) -> Tuple[int, int, int, int]:
+    """Parse an A1 range ("E6:N19", or a single cell) into (row1, col1, row2, col2), inclusive."""
+    start, _, end = ref.partition(":")
+    row1, col1 = parse_cell(start)
+    row2, col2 = parse_cell(end) if end else (row1, col1)
+    return min(row1, row2), min(col1, col2), max(row1, row2), max(col1, col2)
+
+
+@dataclass(frozen=True)
+class SheetBounds:
+    """The top-left rows x cols cells a reader needs; A1 row N is the Nth record after the header."""
+    rows: int
+    cols: int
+
+    def covers(self, other: "SheetBounds") -> bool:
+        return self.rows >= other.rows and self.cols >= other.cols
+
+
+def union_bounds(bounds: Iterable[Optional[SheetBounds]]) -> Optional[SheetBounds]:
+    """Bounds covering all of bounds; None, the whole sheet, if any of them is None."""
+    bounds = list(bounds)
+    known = [b for b in bounds if b is not None]
+    if not bounds or len(known) < len(bounds):
+        return None
+    return SheetBounds(max(b.rows for b in known), max(b.cols for b in known))
+
+
+class EmptySheetError(ValueError):
+    """The CSV export has no header row."""
+
+
+class SheetTable:
+    """A parsed CSV sheet as rows of strings, the stdlib stand-in for a DataFrame.
+
+    Like pd.read_csv, the first line is the header and blank lines are skipped, so
+    A1 row N is rows[N-1]. Cells are kept as exported: "3" stays "3" where pandas
+    reads 3.0 in a column with empty cells. attrs mirrors DataFrame.attrs.
+    """
+
+    def __init__(self, columns: Sequence[str], rows: List[Tuple[str, ...]]) -> None:
+        self.columns = tuple(columns)
+        self.rows = rows
+        self.attrs: Dict[str, Any] = {}
+
+    @classmethod
+    def from_csv(cls, content: Union[str, Iterable[str]], bounds: Optional[SheetBounds] = None) -> "SheetTable":
+        """Parse CSV text, or an iterable of lines, keeping only the cells within bounds.
+
+        Reading stops after the last row within bounds, so lines after it are never consumed.
+        """
+        lines = StringIO(content) if isinstance(content, str) else content
+        records = (row for row in csv.reader(lines) if row)
+        if bounds is not None:
+            records = (row[:bounds.cols] for row in itertools.islice(records, bounds.rows + 1))
+        rows = [tuple(row) for row in records]
+        if not rows:
+            raise EmptySheetError("No columns to parse from file")
+        return cls(rows[0], rows[1:])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.rows), len(self.columns)
+
+    def block(self, row1: int, col1: int, row2: int, col2: int) -> List[List[str]]:
+        """Return the rectangle of 1-based rows and 0-based columns as stripped strings, padded with ""."""
+        width = col2 - col1 + 1
+        end = min(col2 + 1, len(self.columns))
+        result = []
+        for row_number in range(row1, row2 + 1):
+            row = self.rows[row_number - 1] if 0 < row_number <= len(self.rows) else ()
+            cells = [value.strip() for value in row[col1:end]]
+            result.append(cells + [""] * (width - len(cells)))
+        return result
+
+    def to_frame(self) -> "pd.DataFrame":
+        """The same cells as a DataFrame, for processors that want pandas (imported on first use)."""
+        import pandas as pd
+
+        frame = pd.DataFrame([[value if value != "" else None for value in row[:len(self.columns)]]
+                              for row in self.rows], columns=list(self.columns), dtype=object)
+        frame.attrs.update(self.attrs)
+        return frame
+
+
+# What the sheet fetchers return: SheetTable, or a DataFrame with the pandas backend
+SheetData = Union["pd.DataFrame", SheetTable]
+
+
+@functools.lru_cache(maxsize=None)
+def _strip_cells() -> "np.ufunc":
+    import numpy as np
+
+    return np.frompyfunc(lambda value: str(value).strip(), 1, 1)
+
+
+class SheetGrid:
+    """Sheet cells converted to a NumPy object array, with A1-style access.
+
+    Only the top-left region that has been addressed so far is converted, so a
+    layout reading E6:N19 never pays for thousands of rows of history below it.
+    Empty and NaN cells become "" and values are stripped, like the original
+    per-cell helpers. Row numbers address the parsed frame the same way those
+    helpers did: row N is frame row N-1. Cells outside the sheet read as "".
+    """
+
+    def __init__(self, sheet_data: "pd.DataFrame") -> None:
+        import numpy as np
+
+        self.sheet_data = sheet_data
+        self.cells: np.ndarray = np.empty((0, 0), dtype=object)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.sheet_data.shape
+
+    def preload(self, rows: int, cols: int) -> None:
+        """Convert the first rows x cols cells at once, e.g. a layout's bounding box."""
+        rows = min(rows, self.sheet_data.shape[0])
+        cols = min(cols, self.sheet_data.shape[1])
+        if rows <= self.cells.shape[0] and cols <= self.cells.shape[1]:
+            return
+
+        import numpy as np
+        import pandas as pd
+
+        rows = max(rows, self.cells.shape[0])
+        cols = max(cols, self.cells.shape[1])
+        values = self.sheet_data.iloc[:rows, :cols].to_numpy(dtype=object)
+        self.cells = np.where(pd.isna(values), "", values)
+
+    def preload_range(self, ref: str) -> None:
+        """Convert every cell up to the bottom-right corner of an A1 range at once."""
+        _, _, row2, col2 = parse_range(ref)
+        self.preload(row2, col2 + 1)
+
+    def block(self, row1: int, col1: int, row2: int, col2: int) -> "np.ndarray":
+        """Return the rectangle of 1-based rows and 0-based columns, padded with ""."""
+        import numpy as np
+
+        self.preload(row2, col2 + 1)
+        result = np.full((row2 - row1 + 1, col2 - col1 + 1), "", dtype=object)
+        rows, cols = self.cells.shape
+        src = self.cells[max(row1 - 1, 0):min(row2, rows), max(col1, 0):min(col2 + 1, cols)]
+        result[:src.shape[0], :src.shape[1]] = src
+        # Only the requested cells are converted to stripped strings
+        return _strip_cells()(result)
+
+    def range(self, ref: str) -> "np.ndarray":
+        """Return an A1 range such as "E6:N19" as a 2-D string array in one slice."""
+        return self.block(*parse_range(ref))
+
+    def cell(self, ref: str) -> str:
+        """Return the value of a single A1 cell such as "G13"."""
+        row, col = parse_cell(ref)
+        return str(self.block(row, col, row, col)[0, 0])
+
+    def values(self, ref: str) -> List[str]:
+        """Return the non-empty values of an A1 range in row-major order."""
+        block = self.range(ref)
+        return block[block != ""].tolist()
+
+
+def read_block(sheet_data: SheetData, row1: int, col1: int, row2: int,
+               col2: int) -> Union[List[List[str]], "np.ndarray"]:
+    """Rows of stripped cell strings in a rectangle, from either sheet backend, padded with "".
+
+    The csv backend gives lists, the pandas backend a 2-D array; both index as box[row][col].
+    """
+    if isinstance(sheet_data, SheetTable):
+        return sheet_data.block(row1, col1, row2, col2)
+    return SheetGrid(sheet_data).block(row1, col1, row2, col2)
@@ -0,0 +1,232 @@
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sparks.fileutil import AtomicTextFile
+from sparks.layout import RenderedSection
+from sparks.metrics import RunMetrics
+from sparks.roster import Roster
+
+# Output sinks: each receives the document (header lines, the "# " category, then
+# the "## " sections one at a time) as it is generated and streams its own format
+# to a temporary file, renamed into place only when the whole document was written.
+# write_document feeds all sinks from one pass over the lazily rendered sections.
+
+DISCORD_LIMIT = 2000  # characters per Discord message
+MESSAGE_SEPARATOR = "--- 8< ---"
+
+# Raid target icons for the tanks of a section, in the usual marking order
+TANK_MARKS = ("skull", "cross", "square", "moon", "triangle", "diamond", "circle", "star")
+
+
+def head_lines(header: Sequence[str], category: Optional[str]) -> List[str]:
+    """The lines before the first section: tool output, then the category heading."""
+    return list(header) + ([f"# {category}"] if category is not None else [])
+
+
+def section_lines(section: RenderedSection) -> List[str]:
+    return [f"## {section.title}", *section.lines]
+
+
+def document_lines(header: Sequence[str], category: Optional[str],
+                   sections: Iterable[RenderedSection]) -> Iterator[str]:
+    """Every line of the text document, as the text sink writes it."""
+    yield from head_lines(header, category)
+    for section in sections:
+        yield from section_lines(section)
+
+
+class OutputSink(ABC):
+    """Base class: an output file that receives the document part by part."""
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self._file: Optional[AtomicTextFile] = None
+
+    @property
+    def file(self) -> AtomicTextFile:
+        """The temporary file being written, between begin() and commit()."""
+        if self._file is None:
+            raise RuntimeError("Output not started. Call begin() first.")
+        return self._file
+
+    def begin(self, header: Sequence[str], category: Optional[str]) -> None:
+        self._file = AtomicTextFile(self.path)
+
+    @abstractmethod
+    def section(self, section: RenderedSection) -> None:
+        """Write one "## " section of the document."""
+
+    def commit(self) -> str:
+        """Finish the file and move it into place; returns its absolute path."""
+        return str(self.file.commit().absolute())
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.abort()
+
+
+class TextSink(OutputSink):
+    """The plain text document, the same as generate_assignments() returns."""
+
+    def begin(self, header: Sequence[str], category: Optional[str]) -> None:
+        super().begin(header, category)
+        self._first = True
+        self._write_lines(head_lines(header, category))
+
+    def section(self, section: RenderedSection) -> None:
+        self._write_lines(section_lines(section))
+
+    def _write_lines(self, lines: Sequence[str]) -> None:
+        for line in lines:
+            self.file.write(line if self._first else "\n" + line)
+            self._first = False
+
+
+class MarkupSink(TextSink):
+    """The text document with AngrySparks markup: raid target icons before each
+    section's tanks and, for players on the roster, class colors."""
+
+    def __init__(self, path, roster: Optional[Roster] = None) -> None:
+        super().__init__(path)
+        self.roster = roster
+
+    def section(self, section: RenderedSection) -> None:
+        names = self._decorated_names(section)
+        if names:
+            pattern = re.compile(r"(?<![\w|])(" + "|".join(map(re.escape, sorted(names, key=len, reverse=True)))
+                                 + r")(?!\w)")
+            section = RenderedSection(section.title, tuple(pattern.sub(lambda m: names[m.group(1)], line)
+                                                           for line in section.lines), section.assignments)
+        super().section(section)
+
+    def _decorated_names(self, section: RenderedSection) -> Dict[str, str]:
+        names: Dict[str, str] = {}
+        marks = iter(TANK_MARKS)
+        marked = set()
+        for record in section.assignments:
+            if record.player not in names:
+                entry = self.roster.get(record.player) if self.roster is not None else None
+                names[record.player] = f"|c{entry.player_class}{record.player}|r" if entry else record.player
+            if record.role == "tank" and record.player not in marked:
+                mark = next(marks, None)
+                if mark is not None:
+                    names[record.player] = f"{{{mark}}} {names[record.player]}"
+                    marked.add(record.player)
+        return {name: decorated for name, decorated in names.items() if decorated != name}
+
+
+class DiscordSink(OutputSink):
+    """Messages of at most DISCORD_LIMIT characters, separated by MESSAGE_SEPARATOR lines.
+
+    Messages break between sections; a section longer than a message breaks
+    between lines, and a line longer than a message wherever it has to.
+    """
+
+    def __init__(self, path, limit: int = DISCORD_LIMIT) -> None:
+        super().__init__(path)
+        self.limit = limit
+
+    def begin(self, header: Sequence[str], category: Optional[str]) -> None:
+        super().begin(header, category)
+        self._message = ""
+        self.messages = 0
+        self._add_block(head_lines(header, category))
+
+    def section(self, section: RenderedSection) -> None:
+        self._add_block(section_lines(section))
+
+    def commit(self) -> str:
+        self._flush()
+        return super().commit()
+
+    def _add_block(self, lines: Sequence[str]) -> None:
+        text = "\n".join(lines).rstrip()
+        if not text:
+            return
+        if self._message and len(self._message) + 1 + len(text) <= self.limit:
+            self._message += "\n" + text
+            return
+        self._flush()
+        for line in text.split("\n"):
+            while len(line) > self.limit:
+                self._flush()
+                self._message = line[:self.limit]
+                line = line[self.limit:]
+            if self._message and len(self._message) + 1 + len(line) > self.limit:
+                self._flush()
+            self._message = self._message + "\n" + line if self._message else line
+
+    def _flush(self) -> None:
+        message = self._message.rstrip()
+        self._message = ""
+        if not message:
+            return
+        self.file.write((f"\n{MESSAGE_SEPARATOR}\n" if self.messages else "") + message)
+        self.messages += 1
+
+
+class JsonSink(OutputSink):
+    """A JSON object with the header lines, the category and each section's lines and assignments."""
+
+    def begin(self, header: Sequence[str], category: Optional[str]) -> None:
+        super().begin(header, category)
+        self._sections = 0
+        header_lines = "\n".join(header).split("\n") if header else []
+        self.file.write('{"header": %s, "category": %s, "sections": ['
+                         % (json.dumps(header_lines, ensure_ascii=False), json.dumps(category, ensure_ascii=False)))
+
+    def section(self, section: RenderedSection) -> None:
+        record = {
+            "title": section.title,
+            "lines": list(section.lines),
+            "assignments": [{"player": a.player, "role": a.role, "target": a.target} for a in section.assignments],
+        }
+        self.file.write(("," if self._sections else "") + "\n  " + json.dumps(record, ensure_ascii=False))
+        self._sections += 1
+
+    def commit(self) -> str:
+        self.file.write("\n]}\n")
+        return super().commit()
+
+
+# Outputs besides the text output_file, by the name used in [outputs] and on the command line
+OUTPUT_FORMATS = {"markup": MarkupSink, "discord": DiscordSink, "json": JsonSink}
+
+
+def _timed_sections(sections: Iterable[RenderedSection], metrics: RunMetrics) -> Iterator[RenderedSection]:
+    """Render each section inside the process stage, so writing it is not counted there."""
+    iterator = iter(sections)
+    while True:
+        with metrics.stage("process"):
+            section = next(iterator, None)
+        if section is None:
+            return
+        yield section
+
+
+def write_document(sinks: Sequence[OutputSink], header: Sequence[str], category: Optional[str],
+                   sections: Iterable[RenderedSection], metrics: Optional[RunMetrics] = None) -> List[str]:
+    """Stream one document into every sink at once, returning the written paths.
+
+    Sections are rendered lazily and handed to all sinks before the next one is
+    rendered, so no sink holds the whole document. If anything fails before the
+    sinks commit, every sink discards its temporary file and the previous outputs
+    stay in place.
+    """
+    metrics = metrics or RunMetrics()
+    try:
+        with metrics.stage("write"):
+            for sink in sinks:
+                sink.begin(header, category)
+        for section in _timed_sections(sections, metrics):
+            with metrics.stage("write"):
+                for sink in sinks:
+                    sink.section(section)
+        with metrics.stage("write"):
+            return [sink.commit() for sink in sinks]
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
@@ -0,0 +1,137 @@
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from sparks.addon_export import Page, stable_id
+from sparks.libdeflate import compress_deflate_exact, encode_for_wow_addon_channel
+from sparks.libserialize import serialize
+
+# AceComm-3.0 SendCommMessage: 255 bytes per addon message, multipart messages
+# spend one of them on the part marker
+MAX_TEXT_LEN = 255
+MSG_MULTI_FIRST = b"\x01"
+MSG_MULTI_NEXT = b"\x02"
+MSG_MULTI_LAST = b"\x03"
+MSG_ESCAPE = b"\x04"
+_CONTROL_CHAR_RE = re.compile(b"[\x01-\x09]")
+
+# ChatThrottleLib defaults (libs/AceComm-3.0/ChatThrottleLib.lua)
+CTL_MAX_CPS = 800
+CTL_BURST = 4000
+CTL_MSG_OVERHEAD = 40
+CTL_UPDATE_INTERVAL = 0.08  # OnUpdate despools at most this often
+
+
+@dataclass
+class TransmissionCost:
+    """Sizes at each step of commModule:SendOutMessage, and the time to send them."""
+    name: str
+    text: int
+    serialized: int
+    compressed: int
+    encoded: int
+    messages: List[int] = field(repr=False)
+
+    @property
+    def chunks(self) -> int:
+        return len(self.messages)
+
+    @property
+    def seconds(self) -> float:
+        return send_seconds(self.messages)
+
+    def __str__(self) -> str:
+        return (f"{self.name}: {self.text} B text, {self.serialized} serialized, {self.compressed} compressed, "
+                f"{self.encoded} encoded, {self.chunks} chunks, {self.seconds:.1f} s")
+
+
+def comm_messages(text: bytes) -> List[bytes]:
+    """The addon messages AceComm:SendCommMessage splits text into."""
+    force_multipart = False
+    if _CONTROL_CHAR_RE.match(text):
+        # A leading control character would read as a part marker, so it gets escaped
+        if len(text) + 1 > MAX_TEXT_LEN:
+            force_multipart = True
+        else:
+            return [MSG_ESCAPE + text]
+    if not force_multipart and len(text) <= MAX_TEXT_LEN:
+        return [text]
+
+    size = MAX_TEXT_LEN - 1
+    messages = [MSG_MULTI_FIRST + text[:size]]
+    pos = size
+    while pos + size < len(text):
+        messages.append(MSG_MULTI_NEXT + text[pos:pos + size])
+        pos += size
+    messages.append(MSG_MULTI_LAST + text[pos:])
+    return messages
+
+
+def send_seconds(messages: List[int], cps: float = CTL_MAX_CPS, burst: float = CTL_BURST,
+                 interval: float = CTL_UPDATE_INTERVAL) -> float:
+    """Seconds until ChatThrottleLib has sent messages of these lengths on an idle connection.
+
+    Messages go out directly while the burst allowance lasts; the rest are queued
+    and despooled every interval seconds as bandwidth accrues at cps bytes per
+    second. Each message costs its length plus CTL_MSG_OVERHEAD.
+    """
+    queue = deque(size + CTL_MSG_OVERHEAD for size in messages)
+    avail = burst
+    while queue and queue[0] < avail:
+        avail -= queue.popleft()
+
+    elapsed = 0.0
+    prio_avail = 0.0
+    while queue:
+        elapsed += interval
+        avail = min(burst, avail + cps * interval)
+        prio_avail += avail
+        avail = 0.0
+        while queue and prio_avail > queue[0]:
+            prio_avail -= queue.popleft()
+    return elapsed
+
+
+def page_cost(page: Page, variables: Optional[List[Tuple[str, str]]] = None) -> TransmissionCost:
+    """Cost of sending the PAGE message for page, like commModule:SendOutMessage."""
+    serialized = serialize(page.message(variables))
+    compressed = compress_deflate_exact(serialized)
+    encoded = encode_for_wow_addon_channel(compressed)
+    return TransmissionCost(name=page.name, text=len(page.contents.encode('utf-8')),
+                            serialized=len(serialized), compressed=len(compressed), encoded=len(encoded),
+                            messages=[len(message) for message in comm_messages(encoded)])
+
+
+def split_page(page: Page, budget: float, variables: Optional[List[Tuple[str, str]]] = None) -> List[Page]:
+    """Split a page that takes longer than budget seconds to send into numbered parts.
+
+    Parts break between lines; a single line over the budget becomes a part of its own.
+    """
+    if page_cost(page, variables).seconds <= budget:
+        return [page]
+
+    lines = page.contents.split("\n")
+    # Measure with the longest part suffix the split can produce
+    widest = f"{page.name} ({len(lines)}/{len(lines)})"
+
+    def fits(start: int, end: int) -> bool:
+        part = Page(id=page.id, name=widest, contents="\n".join(lines[start:end]), updated=page.updated)
+        return page_cost(part, variables).seconds <= budget
+
+    bounds = []
+    start = 0
+    while start < len(lines):
+        low, high = start + 1, len(lines)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits(start, middle):
+                low = middle
+            else:
+                high = middle - 1
+        bounds.append((start, low))
+        start = low
+
+    return [Page(id=stable_id("part", str(page.id), str(number)), name=f"{page.name} ({number}/{len(bounds)})",
+                 contents="\n".join(lines[start:end]), updated=page.updated, category_id=page.category_id)
+            for number, (start, end) in enumerate(bounds, 1)]
@@ -0,0 +1,128 @@
+import json
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional
+
+from sparks.google_web_client import CachePolicy, GoogleWebClient, TabKey
+from sparks.sheet import SheetBounds, SheetData
+
+# Every poll is a conditional request; a 304 reuses the warm cache
+POLL_POLICY = CachePolicy(lifetime=0, revalidate="always")
+
+
+class AdaptiveInterval:
+    """Poll interval that backs off while nothing changes and resets on a change."""
+
+    def __init__(self, base: float, maximum: float, factor: float = 2.0) -> None:
+        if base <= 0 or maximum < base:
+            raise ValueError("Poll interval must be positive and not above the maximum interval")
+        self.base = base
+        self.maximum = maximum
+        self.factor = factor
+        self.current = base
+
+    def update(self, changed: bool) -> float:
+        """Return the delay before the next poll after a poll with or without a change."""
+        self.current = self.base if changed else min(self.current * self.factor, self.maximum)
+        return self.current
+
+
+@dataclass
+class PollRecord:
+    """Metrics of one poll of one tab."""
+    timestamp: float
+    sheet_id: str
+    sheet: str
+    status: str  # "changed", "unchanged" or "error"
+    source: str  # how GoogleWebClient served the fetch, see FetchInfo
+    latency: float
+    bytes_downloaded: int
+    next_interval: float
+    error: str = ""
+
+
+class SheetWatcher:
+    """Long-lived poller that regenerates outputs when a watched tab changes.
+
+    One GoogleWebClient (and so one keep-alive session and warm cache) is reused for
+    every poll. Each tab has its own AdaptiveInterval. on_change is called with the
+    tab and its new frame whenever the payload's content hash differs from the last
+    seen one, including on the first poll. Only the last max_records polls are kept
+    in records; metrics_path receives all of them.
+    """
+
+    MAX_RECORDS = 1000
+
+    def __init__(self, web_client: GoogleWebClient, tabs: List[TabKey],
+                 on_change: Callable[[TabKey, SheetData], None],
+                 interval: float = 30.0, max_interval: float = 600.0,
+                 metrics_path: Optional[Path] = None,
+                 bounds: Optional[Dict[TabKey, Optional[SheetBounds]]] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic,
+                 max_records: int = MAX_RECORDS) -> None:
+        self.web_client = web_client
+        self.on_change = on_change
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.bounds = bounds or {}
+        self.sleep = sleep
+        self.clock = clock
+        self.intervals = {tab: AdaptiveInterval(interval, max_interval) for tab in tabs}
+        self.next_poll: Dict[TabKey, float] = {tab: clock() for tab in tabs}
+        self.last_hash: Dict[TabKey, str] = {}
+        self.records: Deque[PollRecord] = deque(maxlen=max_records)
+
+    def poll_due(self) -> List[PollRecord]:
+        """Poll every tab whose interval has elapsed, concurrently."""
+        now = self.clock()
+        due = [tab for tab, when in self.next_poll.items() if when <= now]
+        results = self.web_client.fetch_many(due, {tab: POLL_POLICY for tab in due}, self.bounds)
+
+        records = []
+        for tab, result in results.items():
+            if isinstance(result, Exception):
+                status, source, latency, downloaded, error = "error", "", 0.0, 0, str(result)
+            else:
+                content_hash = result.attrs.get("content_hash", "")
+                status = "unchanged" if self.last_hash.get(tab) == content_hash else "changed"
+                self.last_hash[tab] = content_hash
+                info = self.web_client.last_fetch.get(tab)
+                source = info.source if info else ""
+                latency = info.latency if info else 0.0
+                downloaded = info.bytes_downloaded if info else 0
+                error = ""
+
+            next_interval = self.intervals[tab].update(changed=status == "changed")
+            self.next_poll[tab] = self.clock() + next_interval
+            records.append(PollRecord(time.time(), tab[0], tab[1], status, source,
+                                      latency, downloaded, next_interval, error))
+
+            if status == "changed":
+                self.on_change(tab, result)
+
+        self._record(records)
+        return records
+
+    def _record(self, records: List[PollRecord]) -> None:
+        self.records.extend(records)
+        for record in records:
+            print(f"Poll {record.sheet_id} tab {record.sheet}: {record.status}"
+                  f" ({record.source or record.error}, {record.latency * 1000:.0f} ms,"
+                  f" {record.bytes_downloaded} bytes), next poll in {record.next_interval:.0f}s")
+
+        if self.metrics_path and records:
+            with open(self.metrics_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(asdict(record)) + "\n")
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """Poll until interrupted, or until max_polls rounds have run."""
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            delay = min(self.next_poll.values()) - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            self.poll_due()
+            polls += 1
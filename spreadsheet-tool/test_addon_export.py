@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for the LibSerialize/LibDeflate port and AngrySparks page export
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from main import RaidAssignmentGenerator
+from sparks.addon_export import (Page, decode_message, encode_assignments, encode_message,
+                                 parse_pages, stable_id)
+from sparks.libdeflate import (compress_deflate, decode_for_wow_addon_channel, decompress_deflate,
+                               encode_for_wow_addon_channel)
+from sparks.libserialize import deserialize, serialize
+
+FIXTURES = json.loads((Path(__file__).parent / "fixtures" / "addon_codec.json").read_text(encoding="utf-8"))
+ADDON_DIR = Path(__file__).parent.parent
+
+
+def fixture_value(fixture):
+    # Fixture values are Python expressions written next to the Lua source they mirror
+    return eval(fixture["value"])
+
+
+@pytest.mark.parametrize("fixture", FIXTURES, ids=[f["name"] for f in FIXTURES])
+class TestLuaFixtures:
+    """Round trips against output of the bundled Lua libraries."""
+
+    def test_serialize_matches_lua(self, fixture):
+        """Test that serialization is byte-identical to LibSerialize."""
+        assert serialize(fixture_value(fixture), stable=fixture["stable"]) == bytes.fromhex(fixture["serialized"])
+
+    def test_deserialize_lua_output(self, fixture):
+        """Test that LibSerialize output deserializes to the expected value."""
+        assert deserialize(bytes.fromhex(fixture["serialized"])) == (fixture_value(fixture),)
+
+    def test_decode_lua_message(self, fixture):
+        """Test decoding LibDeflate-compressed, addon channel encoded Lua output."""
+        assert decode_message(bytes.fromhex(fixture["encoded"])) == fixture_value(fixture)
+
+    def test_python_message_round_trip(self, fixture):
+        """Test that Python-encoded messages decode to the same value."""
+        encoded = encode_message(fixture_value(fixture))
+
+        assert b"\x00" not in encoded
+        assert decode_message(encoded) == fixture_value(fixture)
+
+
+class TestLibSerialize:
+    """Test cases for behaviour not covered by the fixtures."""
+
+    def test_multiple_values_and_nil(self):
+        """Test variadic serialization including nil."""
+        assert deserialize(serialize(None, True, "x")) == (None, True, "x")
+
+    def test_recursive_table_reference(self):
+        """Test that a self-referencing table is written once and restored."""
+        table = {"a": 1}
+        table["self"] = table
+
+        restored = deserialize(serialize(table))[0]
+
+        assert restored["self"] is restored
+
+    def test_invalid_input(self):
+        """Test that truncated or foreign payloads raise ValueError."""
+        with pytest.raises(ValueError):
+            deserialize(b"\x02\x01")
+        with pytest.raises(ValueError, match="past end"):
+            deserialize(serialize("a long enough string")[:-3])
+        with pytest.raises(ValueError, match="Unhandled type"):
+            serialize(object())
+
+
+class TestLibDeflate:
+    """Test cases for compression and the addon channel codec."""
+
+    def test_addon_channel_codec(self):
+        """Test that NUL and the escape byte are escaped and restored."""
+        data = bytes(range(256)) * 2
+
+        encoded = encode_for_wow_addon_channel(data)
+
+        assert b"\x00" not in encoded
+        assert encoded.startswith(b"\x01\x02\x01\x03\x02")
+        assert decode_for_wow_addon_channel(encoded) == data
+
+    def test_decode_rejects_nul(self):
+        """Test that undecodable channel data is rejected like LibDeflate returns nil."""
+        with pytest.raises(ValueError):
+            decode_for_wow_addon_channel(b"a\x00b")
+        with pytest.raises(ValueError):
+            decompress_deflate(b"not deflate")
+
+    def test_compression_round_trip(self):
+        """Test raw deflate round trip."""
+        data = b"Tank 1: Warr -> Healer: Priest\n" * 50
+
+        assert decompress_deflate(compress_deflate(data)) == data
+        assert len(compress_deflate(data)) < len(data) / 10
+
+
+class TestPageExport:
+    """Test cases for turning assignment text into AngrySparks pages."""
+
+    LINES = ["=== BWL RAID ASSIGNMENTS ===", "", "# BWL", "## Trash", "TANK ASSIGNMENTS:",
+             "  Tank 1: Warr -> Healer: Priest", "", "## Razorgore", "Orb: Mage", ""]
+
+    def test_parse_pages(self):
+        """Test that # headings become categories and ## headings pages."""
+        categories, pages = parse_pages(self.LINES, updated=1700000000)
+
+        assert [c.name for c in categories] == ["BWL"]
+        assert [(p.name, p.contents) for p in pages] == [
+            ("Trash", "TANK ASSIGNMENTS:\n  Tank 1: Warr -> Healer: Priest"),
+            ("Razorgore", "Orb: Mage"),
+        ]
+        assert all(p.category_id == categories[0].id for p in pages)
+        assert pages[0].id == stable_id("page", "BWL", "Trash")
+
+    def test_page_message_layout(self):
+        """Test the PAGE message indexes used by Src/Comm.lua."""
+        page = Page(id=7, name="Trash", contents="x", updated=1700000000)
+
+        assert decode_message(encode_message(page.message())) == {
+            1: "PAGE", 2: 7, 3: 1700000000, 4: "Trash", 5: "x", 7: []}
+
+    def test_encode_assignments(self):
+        """Test the exported blob and that it is smaller than the text for real pages."""
+        text = "\n".join(self.LINES + ["  Tank 2: Warr -> Healer: Priest"] * 40)
+
+        bundle = decode_message(encode_assignments(text, updated=1700000000))
+
+        category_id = stable_id("cat", "BWL")
+        assert bundle["Categories"] == {category_id: {"Id": category_id, "Name": "BWL"}}
+        assert {page["Name"] for page in bundle["Pages"].values()} == {"Trash", "Razorgore"}
+        assert len(encode_assignments(text)) < len(text.encode("utf-8")) / 2
+
+
+def test_generator_save_blob(tmp_path, capsys):
+    """Test writing the blob for generated assignments."""
+    generator = RaidAssignmentGenerator("test.toml")
+    text = "\n".join(TestPageExport.LINES)
+
+    path = generator.save_blob(text, str(tmp_path / "bwl.blob"))
+
+    bundle = decode_message(Path(path).read_bytes())
+    assert [page["Name"] for page in bundle["Pages"].values()] == ["Trash", "Razorgore"]
+    assert "Assignment blob saved to" in capsys.readouterr().out
+
+
+def test_lua_decodes_python_messages():
+    """Test that the bundled Lua libraries decode Python-encoded messages."""
+    lua51 = pytest.importorskip("lupa.lua51")
+    lua = lua51.LuaRuntime(encoding=None, unpack_returned_tuples=True)
+    for lib in ("libs/LibStub/LibStub.lua", "libs/LibSerialize-1.1.0/LibSerialize.lua",
+                "libs/LibDeflate/LibDeflate.lua"):
+        lua.execute((ADDON_DIR / lib).read_bytes())
+    reserialize = lua.eval(b"""function(payload)
+        local LibSerialize = LibStub("LibSerialize")
+        local LibDeflate = LibStub("LibDeflate")
+        local decoded = LibDeflate:DecodeForWoWAddonChannel(payload)
+        local success, value = LibSerialize:Deserialize(LibDeflate:DecompressDeflate(decoded))
+        assert(success, value)
+        return LibSerialize:SerializeEx({stable = true}, value)
+    end""")
+
+    for fixture in FIXTURES:
+        value = fixture_value(fixture)
+        assert reserialize(encode_message(value)) == serialize(value, stable=True), fixture["name"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
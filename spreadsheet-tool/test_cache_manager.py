@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded cache directory and the cache CLI subcommand
+"""
+
+import json
+import time
+
+import pytest
+
+from main import main
+from sparks.cache_manager import CacheManager
+
+
+class TestCacheManager:
+    """Test cases for CacheManager."""
+
+    def test_write_is_atomic_and_indexed(self, tmp_path):
+        """Test that writes leave no temporary files and are recorded in the index."""
+        cache = CacheManager(tmp_path)
+        cache.write_text("a.json", "{}")
+        cache.write_bytes("frames/b.pkl", b"1234")
+
+        assert not list(tmp_path.rglob(".tmp-*"))
+        index = json.loads((tmp_path / "index.json").read_text())
+        assert index["a.json"]["size"] == 2
+        assert index["frames/b.pkl"]["size"] == 4
+        assert cache.read_text("a.json") == "{}"
+
+    def test_lookup_uses_index(self, tmp_path):
+        """Test that files unknown to the index are not looked up on disk."""
+        cache = CacheManager(tmp_path)
+        (tmp_path / "stray.json").write_text("{}")
+
+        assert not cache.contains("stray.json")
+        assert cache.read_text("stray.json") is None
+
+        cache.rebuild_index()
+        assert cache.read_text("stray.json") == "{}"
+
+    def test_evicts_least_recently_used_entries(self, tmp_path):
+        """Test LRU eviction when the entry limit is exceeded."""
+        cache = CacheManager(tmp_path, max_entries=2)
+        cache.write_text("old", "1")
+        cache.write_text("used", "2")
+        cache._index["old"]["accessed"] -= 10
+        cache._index["used"]["accessed"] -= 5
+        cache.read_text("used")
+        cache.write_text("new", "3")
+
+        assert cache.contains("used") and cache.contains("new")
+        assert not cache.contains("old")
+        assert not (tmp_path / "old").exists()
+
+    def test_evicts_beyond_max_bytes(self, tmp_path):
+        """Test that the total size is kept under max_bytes."""
+        cache = CacheManager(tmp_path, max_bytes=10)
+        for i in range(5):
+            cache.write_bytes(f"entry{i}", b"1234")
+            cache._index[f"entry{i}"]["accessed"] -= 10 - i
+
+        assert cache.stats()["bytes"] <= 10
+        assert cache.contains("entry4")
+
+    def test_prune_removes_expired_entries(self, tmp_path):
+        """Test that entries older than max_age are pruned."""
+        cache = CacheManager(tmp_path, max_age=60)
+        cache.write_text("stale", "1")
+        cache.write_text("fresh", "2")
+        cache._index["stale"]["modified"] = time.time() - 120
+
+        assert cache.prune() == ["stale"]
+        assert cache.contains("fresh")
+
+    def test_index_survives_restart_and_corruption(self, tmp_path):
+        """Test that the index is reloaded, and rebuilt from disk when corrupt."""
+        CacheManager(tmp_path).write_text("a", "1")
+        assert CacheManager(tmp_path).contains("a")
+
+        (tmp_path / "index.json").write_text("not json")
+        assert CacheManager(tmp_path).contains("a")
+
+    def test_clear(self, tmp_path):
+        """Test that clear removes every file."""
+        cache = CacheManager(tmp_path)
+        cache.write_text("a", "1")
+        cache.write_text("frames/b", "2")
+
+        assert cache.clear() == 2
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestCacheCommand:
+    """Test cases for the main.py cache subcommand."""
+
+    def test_stats_prune_clear(self, tmp_path, capsys):
+        """Test the stats, prune and clear actions."""
+        cache = CacheManager(tmp_path)
+        cache.write_text("a", "1")
+        cache.write_text("b", "2")
+
+        assert main(["cache", "stats", "--cache-dir", str(tmp_path)]) == 0
+        assert "Entries: 2" in capsys.readouterr().out
+
+        assert main(["cache", "prune", "--cache-dir", str(tmp_path), "--max-entries", "1"]) == 0
+        assert "Pruned 1" in capsys.readouterr().out
+
+        assert main(["cache", "clear", "--cache-dir", str(tmp_path)]) == 0
+        assert "Removed 1" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the parsed-frame cache tier
+"""
+
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from sparks import frame_cache
+from sparks.cache_manager import CacheManager
+from sparks.frame_cache import FrameCache
+from sparks.google_web_client import GoogleWebClient
+
+
+def sample_frame() -> pd.DataFrame:
+    return pd.DataFrame({"Tank": ["Alice", "Bob", None], "Healer": ["Carol", None, "Dave"]})
+
+
+class TestFrameCache:
+    """Test cases for FrameCache."""
+
+    def test_load_missing_returns_none(self, tmp_path):
+        """Test that an unknown content hash is a cache miss."""
+        assert FrameCache(CacheManager(tmp_path)).load("missing") is None
+
+    def test_pickle_round_trip(self, tmp_path):
+        """Test storing and loading a frame without Parquet."""
+        cache = FrameCache(CacheManager(tmp_path), use_parquet=False)
+        cache.store("abc", sample_frame())
+
+        assert (tmp_path / "frames" / "abc.pkl").exists()
+        pd.testing.assert_frame_equal(cache.load("abc"), sample_frame())
+
+    @pytest.mark.skipif(not frame_cache.HAVE_PYARROW, reason="pyarrow is not installed")
+    def test_parquet_round_trip(self, tmp_path):
+        """Test storing and memory-mapped loading of a Parquet frame."""
+        cache = FrameCache(CacheManager(tmp_path), use_parquet=True)
+        cache.store("abc", sample_frame())
+
+        assert (tmp_path / "frames" / "abc.parquet").exists()
+        pd.testing.assert_frame_equal(cache.load("abc"), sample_frame())
+
+    @pytest.mark.skipif(not frame_cache.HAVE_PYARROW, reason="pyarrow is not installed")
+    def test_mixed_columns_fall_back_to_pickle(self, tmp_path):
+        """Test that frames Parquet cannot represent are pickled."""
+        cache = FrameCache(CacheManager(tmp_path), use_parquet=True)
+        frame = pd.DataFrame({"Mixed": [1, "two", 3.0]})
+        cache.store("mixed", frame)
+
+        assert (tmp_path / "frames" / "mixed.pkl").exists()
+        pd.testing.assert_frame_equal(cache.load("mixed"), frame)
+
+
+def test_warm_fetch_skips_csv_parsing(sheet_server, tmp_path):
+    """Test that a cache hit loads the parsed frame instead of re-parsing CSV text."""
+    sheet_server.tabs = {"1": "Tank,Healer\nAlice,Carol\n"}
+    client = GoogleWebClient(base_url=sheet_server.base_url, cache_dir=tmp_path, retries=0, backend="pandas")
+    first = client.fetch_tab("book", "1")
+
+    with patch("pandas.read_csv") as read_csv:
+        second = client.fetch_tab("book", "1")
+
+    read_csv.assert_not_called()
+    pd.testing.assert_frame_equal(second, first)
+    assert second.attrs["content_hash"] == first.attrs["content_hash"]
+
+
+def test_csv_text_is_fallback(sheet_server, tmp_path):
+    """Test that a missing binary frame falls back to the cached CSV text."""
+    sheet_server.tabs = {"1": "Tank,Healer\nAlice,Carol\n"}
+    client = GoogleWebClient(base_url=sheet_server.base_url, cache_dir=tmp_path, retries=0, backend="pandas")
+    first = client.fetch_tab("book", "1")
+
+    for frame_file in (tmp_path / "frames").iterdir():
+        frame_file.unlink()
+    client.cache.rebuild_index()
+    second = client.fetch_tab("book", "1")
+
+    assert len(sheet_server.requests) == 1
+    pd.testing.assert_frame_equal(second, first)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
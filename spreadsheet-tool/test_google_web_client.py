@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Tests for GoogleWebClient against a local stand-in sheet server
+"""
+
+import time
+
+import pandas as pd
+import pytest
+
+from sparks.google_web_client import CachePolicy, GoogleWebClient, parse_tab_names
+from sparks.sheet import SheetBounds, SheetTable
+
+
+def make_client(sheet_server, tmp_path, **kwargs) -> GoogleWebClient:
+    kwargs.setdefault("retries", 0)
+    kwargs.setdefault("backend", "pandas")
+    return GoogleWebClient(base_url=sheet_server.base_url, cache_dir=tmp_path / "cache", **kwargs)
+
+
+class TestFetchMany:
+    """Test cases for concurrent multi-tab fetching."""
+
+    def test_fetch_many_returns_frame_per_tab(self, sheet_server, tmp_path):
+        """Test that every requested tab is parsed into its own frame."""
+        sheet_server.tabs = {str(gid): f"Name,Gid\nPlayer,{gid}\n" for gid in range(4)}
+        client = make_client(sheet_server, tmp_path)
+
+        results = client.fetch_many([("book", str(gid)) for gid in range(4)])
+
+        assert set(results) == {("book", str(gid)) for gid in range(4)}
+        for (_, gid), frame in results.items():
+            assert isinstance(frame, pd.DataFrame)
+            assert frame.iloc[0]["Gid"] == int(gid)
+
+    def test_fetch_many_is_concurrent_and_bounded(self, sheet_server, tmp_path):
+        """Test wall-clock speedup over sequential fetches and the in-flight limit."""
+        sheet_server.tabs = {str(gid): "A,B\n1,2\n" for gid in range(8)}
+        sheet_server.delay = 0.2
+        client = make_client(sheet_server, tmp_path, max_workers=4)
+
+        started = time.perf_counter()
+        results = client.fetch_many([("book", str(gid)) for gid in range(8)])
+        elapsed = time.perf_counter() - started
+
+        sequential = 8 * sheet_server.delay
+        assert all(isinstance(frame, pd.DataFrame) for frame in results.values())
+        assert elapsed < sequential / 2
+        assert sheet_server.peak_in_flight <= 4
+
+    def test_fetch_many_isolates_failures(self, sheet_server, tmp_path):
+        """Test that one failing tab does not prevent the other tabs from loading."""
+        sheet_server.tabs = {"1": "A\n1\n", "3": "A\n3\n"}
+        sheet_server.fail_gids = {"2"}
+        client = make_client(sheet_server, tmp_path)
+
+        results = client.fetch_many([("book", "1"), ("book", "2"), ("book", "3")])
+
+        assert isinstance(results[("book", "2")], RuntimeError)
+        assert results[("book", "1")].iloc[0]["A"] == 1
+        assert results[("book", "3")].iloc[0]["A"] == 3
+
+    def test_fetch_many_retries_with_backoff(self, sheet_server, tmp_path):
+        """Test that transient server errors are retried."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        original_handle = sheet_server.handle
+        calls = []
+
+        def fail_first(request):
+            calls.append(request.path)
+            if len(calls) == 1:
+                sheet_server.send(request, 503, b"busy")
+            else:
+                original_handle(request)
+
+        sheet_server.handle = fail_first
+        client = make_client(sheet_server, tmp_path, retries=2, backoff_factor=0.01)
+
+        results = client.fetch_many([("book", "1")])
+
+        assert len(calls) == 2
+        assert results[("book", "1")].iloc[0]["A"] == 1
+
+    def test_fetch_many_deduplicates_tabs(self, sheet_server, tmp_path):
+        """Test that repeated tabs are fetched once."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        client = make_client(sheet_server, tmp_path)
+
+        results = client.fetch_many([("book", "1"), ("book", "1")])
+
+        assert len(results) == 1
+        assert len(sheet_server.requests) == 1
+
+
+class TestConditionalRevalidation:
+    """Test cases for ETag/Last-Modified revalidation of cached sheets."""
+
+    def test_fresh_cache_is_served_without_request(self, sheet_server, tmp_path):
+        """Test that an entry inside its lifetime is served from cache."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        client = make_client(sheet_server, tmp_path)
+
+        client.fetch_tab("book", "1")
+        client.fetch_tab("book", "1")
+
+        assert len(sheet_server.requests) == 1
+
+    def test_not_modified_reuses_cached_body(self, sheet_server, tmp_path):
+        """Test that a 304 response reuses the cached CSV and its content hash."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        sheet_server.send_validators = True
+        client = make_client(sheet_server, tmp_path)
+        policy = CachePolicy(revalidate="always")
+
+        first = client.fetch_tab("book", "1", policy)
+        second = client.fetch_tab("book", "1", policy)
+
+        assert len(sheet_server.requests) == 2
+        assert second.equals(first)
+        assert second.attrs["content_hash"] == first.attrs["content_hash"]
+        assert client.content_hashes[("book", "1")] == GoogleWebClient.content_hash("A\n1\n")
+
+    def test_changed_sheet_is_downloaded_again(self, sheet_server, tmp_path):
+        """Test that a changed payload replaces the cached copy and its hash."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        sheet_server.send_validators = True
+        client = make_client(sheet_server, tmp_path)
+        policy = CachePolicy(revalidate="always")
+
+        first = client.fetch_tab("book", "1", policy)
+        sheet_server.tabs["1"] = "A\n2\n"
+        second = client.fetch_tab("book", "1", policy)
+
+        assert second.iloc[0]["A"] == 2
+        assert second.attrs["content_hash"] != first.attrs["content_hash"]
+
+    def test_expired_entry_sends_validators(self, sheet_server, tmp_path):
+        """Test that an expired entry is revalidated instead of re-downloaded."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        sheet_server.send_validators = True
+        client = make_client(sheet_server, tmp_path)
+        policy = CachePolicy(lifetime=0)
+        seen_headers = []
+        original_handle = sheet_server.handle
+
+        def record_headers(request):
+            seen_headers.append(dict(request.headers))
+            original_handle(request)
+
+        sheet_server.handle = record_headers
+        client.fetch_tab("book", "1", policy)
+        client.fetch_tab("book", "1", policy)
+
+        assert "If-None-Match" not in seen_headers[0]
+        assert seen_headers[1]["If-None-Match"].startswith('"')
+        assert seen_headers[1]["If-Modified-Since"] == sheet_server.last_modified
+
+    def test_policy_from_config(self):
+        """Test reading the [cache] table of a configuration."""
+        policy = CachePolicy.from_config({"cache": {"lifetime": 60, "revalidate": "never"}})
+
+        assert policy == CachePolicy(lifetime=60, revalidate="never")
+        assert CachePolicy.from_config({}) == CachePolicy()
+
+        with pytest.raises(ValueError, match="Invalid cache revalidate mode"):
+            CachePolicy.from_config({"cache": {"revalidate": "sometimes"}})
+
+
+class TestCsvBackend:
+    """Test cases for the pandas-free csv backend."""
+
+    def test_fetch_returns_sheet_table(self, sheet_server, tmp_path):
+        """Test that cold and cached fetches parse to the same SheetTable."""
+        sheet_server.tabs = {"1": "Tank,Healer\nAlice,Carol\n"}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+
+        first = client.fetch_tab("book", "1")
+        second = client.fetch_tab("book", "1")
+
+        assert isinstance(second, SheetTable)
+        assert second.rows == first.rows == [("Alice", "Carol")]
+        assert second.attrs["content_hash"] == GoogleWebClient.content_hash("Tank,Healer\nAlice,Carol\n")
+        assert not (tmp_path / "cache" / "frames").exists()
+
+    def test_empty_sheet(self, sheet_server, tmp_path):
+        """Test that an empty export is reported like with pandas."""
+        sheet_server.tabs = {"1": ""}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+
+        with pytest.raises(RuntimeError, match="Spreadsheet appears to be empty"):
+            client.fetch_tab("book", "1")
+
+    def test_backend_from_config(self, tmp_path):
+        """Test the optional backend config key, csv by default."""
+        client = GoogleWebClient(cache_dir=tmp_path)
+        assert client.backend == "csv"
+
+        client.set_config({"backend": "pandas"})
+        assert client.backend == "pandas"
+
+        with pytest.raises(ValueError, match="Invalid sheet backend"):
+            client.set_config({"backend": "polars"})
+
+
+class TestCacheSetup:
+    """Test cases for configuring the cache directory."""
+
+    def test_directory_created_on_first_use(self, sheet_server, tmp_path, monkeypatch):
+        """Test that no cache directory is created before a sheet is fetched, and the configured one then."""
+        monkeypatch.chdir(tmp_path)
+        client = GoogleWebClient(base_url=sheet_server.base_url, retries=0)
+        client.set_config({"cache": {"dir": "sheets", "max_entries": 7}})
+        client.close()
+        assert list(tmp_path.iterdir()) == []
+
+        sheet_server.tabs = {"0": "a\n1\n"}
+        client.fetch_tab("book", "0")
+        client.close()
+
+        assert client.cache.max_entries == 7
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["sheets"]
+        assert (tmp_path / "sheets" / "index.json").exists()
+
+
+def wide_sheet(rows: int, cols: int = 20) -> str:
+    """CSV text whose cell in A1 row r, column c reads "r.c"."""
+    lines = [",".join(f"H{c}" for c in range(cols))]
+    lines += [",".join(f"{r}.{c}" for c in range(cols)) for r in range(1, rows + 1)]
+    return "\n".join(lines) + "\n"
+
+
+class TestBoundedFetch:
+    """Test cases for streaming only the rows and columns within the bounds."""
+
+    def test_download_stops_after_last_row(self, sheet_server, tmp_path):
+        """Test that a large sheet read with small bounds is cut short."""
+        body = wide_sheet(20000)
+        sheet_server.tabs = {"1": body}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+
+        sheet = client.fetch_tab("book", "1", bounds=SheetBounds(3, 2))
+
+        assert sheet.columns == ("H0", "H1")
+        assert sheet.rows == [("1.0", "1.1"), ("2.0", "2.1"), ("3.0", "3.1")]
+        info = client.last_fetch[("book", "1")]
+        assert info.source == "download"
+        assert info.bytes_downloaded < len(body) // 10
+        assert client.metrics.counters["partial_downloads"] == 1
+        assert sheet.attrs["content_hash"] == GoogleWebClient.content_hash(
+            "".join(body.splitlines(keepends=True)[:4]))
+
+    def test_quoted_newlines_and_multibyte_text(self, sheet_server, tmp_path):
+        """Test that records spanning lines and UTF-8 split across chunks are read whole."""
+        body = 'Tank,Note\n"Ålice","line one\nline two"\nBob,x\nCarol,y\n'
+        sheet_server.tabs = {"1": body}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+        client.STREAM_CHUNK_SIZE = 1
+
+        sheet = client.fetch_tab("book", "1", bounds=SheetBounds(2, 5))
+
+        assert sheet.rows == [("Ålice", "line one\nline two"), ("Bob", "x")]
+        assert client.metrics.counters["partial_downloads"] == 1
+
+    def test_bounds_past_end_read_whole_sheet(self, sheet_server, tmp_path):
+        """Test that a sheet shorter than the bounds is cached as complete."""
+        sheet_server.tabs = {"1": wide_sheet(3)}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+
+        client.fetch_tab("book", "1", bounds=SheetBounds(10, 2))
+        client.fetch_tab("book", "1")
+
+        assert len(sheet_server.requests) == 1
+        assert "partial_downloads" not in client.metrics.counters
+
+    def test_cut_short_entry_serves_only_smaller_bounds(self, sheet_server, tmp_path):
+        """Test that a cached prefix is not served to a fetch that needs more rows."""
+        sheet_server.tabs = {"1": wide_sheet(50)}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+
+        client.fetch_tab("book", "1", bounds=SheetBounds(10, 20))
+        assert len(client.fetch_tab("book", "1", bounds=SheetBounds(5, 20))) == 5
+        assert len(sheet_server.requests) == 1
+
+        assert len(client.fetch_tab("book", "1", bounds=SheetBounds(20, 20))) == 20
+        assert len(client.fetch_tab("book", "1")) == 50
+        assert len(sheet_server.requests) == 3
+        assert client.fetch_tab("book", "1", bounds=SheetBounds(30, 20)).rows[-1][0] == "30.0"
+        assert len(sheet_server.requests) == 3
+
+    def test_not_modified_prefix_is_reused(self, sheet_server, tmp_path):
+        """Test that a cut-short entry is revalidated for bounds it covers."""
+        sheet_server.tabs = {"1": wide_sheet(50)}
+        sheet_server.send_validators = True
+        client = make_client(sheet_server, tmp_path, backend="csv")
+        policy = CachePolicy(revalidate="always")
+
+        client.fetch_tab("book", "1", policy, SheetBounds(10, 20))
+        sheet = client.fetch_tab("book", "1", policy, SheetBounds(10, 20))
+
+        assert client.last_fetch[("book", "1")].source == "not-modified"
+        assert len(sheet) == 10
+
+    def test_fetch_many_bounds_per_tab(self, sheet_server, tmp_path):
+        """Test that fetch_many passes each tab its own bounds."""
+        sheet_server.tabs = {"1": wide_sheet(30), "2": wide_sheet(30)}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+
+        results = client.fetch_many([("book", "1"), ("book", "2")],
+                                    bounds={("book", "1"): SheetBounds(4, 3)})
+
+        assert (len(results[("book", "1")]), len(results[("book", "1")].columns)) == (4, 3)
+        assert (len(results[("book", "2")]), len(results[("book", "2")].columns)) == (30, 20)
+
+
+class TestTabNames:
+    """Test cases for resolving tab names to gids."""
+
+    def test_name_is_resolved_once(self, sheet_server, tmp_path):
+        """Test that later runs resolve the name from the cache without a request."""
+        sheet_server.tab_names = {"Sheet1": "0", "Raid – BWL": "1474"}
+        sheet_server.tabs = {"1474": "Tank\nAlice\n"}
+
+        sheet = make_client(sheet_server, tmp_path, backend="csv").fetch_tab("book", "Raid – BWL")
+        assert sheet.rows == [("Alice",)]
+        assert [path.split("?")[0] for path in sheet_server.requests] == ["/book/htmlview", "/book/export"]
+
+        client = make_client(sheet_server, tmp_path, backend="csv")
+        assert client.resolve_gid("book", "Raid – BWL") == "1474"
+        client.fetch_tab("book", "Raid – BWL")
+        assert len(sheet_server.requests) == 2
+        assert "tab_name_requests" not in client.metrics.counters
+
+    def test_gid_needs_no_lookup(self, sheet_server, tmp_path):
+        """Test that numeric sheets are used as gids directly."""
+        client = make_client(sheet_server, tmp_path)
+
+        assert client.resolve_gid("book", "7") == "7"
+        assert client.resolve_gid("book", "") == ""
+        assert sheet_server.requests == []
+
+    def test_missing_name_refreshes_cached_names(self, sheet_server, tmp_path):
+        """Test that a name missing from the cached list downloads it again."""
+        sheet_server.tab_names = {"MC": "1"}
+        client = make_client(sheet_server, tmp_path)
+        client.resolve_gid("book", "MC")
+
+        sheet_server.tab_names["BWL"] = "2"
+        assert client.resolve_gid("book", "BWL") == "2"
+        with pytest.raises(ValueError, match="No sheet named 'AQ40' in spreadsheet book. Sheets: MC, BWL"):
+            client.resolve_gid("book", "AQ40")
+        assert client.metrics.counters["tab_name_requests"] == 3
+
+    def test_names_expire(self, sheet_server, tmp_path):
+        """Test the [cache] tab_names_lifetime setting."""
+        sheet_server.tab_names = {"MC": "1"}
+        client = make_client(sheet_server, tmp_path)
+        client.set_config({"cache": {"tab_names_lifetime": 0}})
+
+        client.resolve_gid("book", "MC")
+        sheet_server.tab_names = {"MC": "5"}
+        assert client.resolve_gid("book", "MC") == "5"
+
+    def test_recreated_tab_is_looked_up_again(self, sheet_server, tmp_path):
+        """Test that a cached gid which no longer exists is resolved again once."""
+        sheet_server.tab_names = {"BWL": "2"}
+        client = make_client(sheet_server, tmp_path, backend="csv")
+        client.resolve_gid("book", "BWL")
+
+        sheet_server.tab_names = {"BWL": "9"}
+        sheet_server.tabs = {"9": "Tank\nAlice\n"}
+        assert client.fetch_tab("book", "BWL").rows == [("Alice",)]
+
+        sheet_server.tab_names = {}
+        client.invalidate_tab_names("book")
+        with pytest.raises(RuntimeError, match="Could not read the sheet names"):
+            client.fetch_tab("book", "BWL")
+
+    def test_missing_tab_list_is_requested_once(self, sheet_server, tmp_path):
+        """Test that a tab list answered with 404 fails with one request per run."""
+        sheet_server.tab_names_status = 404
+        client = make_client(sheet_server, tmp_path, backend="csv")
+
+        for sheet in ("BWL", "MC"):
+            with pytest.raises(RuntimeError, match="Could not look up the sheet names of spreadsheet book"):
+                client.fetch_tab("book", sheet)
+        assert sheet_server.requests == ["/book/htmlview"]
+        assert client.metrics.counters["tab_name_requests"] == 1
+
+        sheet_server.tab_names_status = 200
+        sheet_server.tab_names = {"BWL": "2"}
+        client.invalidate_tab_names("book")
+        assert client.resolve_gid("book", "BWL") == "2"
+
+    def test_parse_tab_names(self):
+        """Test the JavaScript string escapes of tab names."""
+        html = (r'items.push({name: "Raid \u2013 \"BWL\" \x26 it\'s \\x41", pageUrl: "https:\/\/x\x3d1", '
+                r'gid: "12",initialSheet: ("12" == gid)});')
+
+        assert parse_tab_names(html) == {'Raid – "BWL" & it\'s \\x41': "12"}
+        assert parse_tab_names("<html>Sign in</html>") == {}
+
+    def test_tab_key_falls_back_to_url_gid(self, tmp_path):
+        """Test that an empty sheet uses the gid of the spreadsheet URL."""
+        client = GoogleWebClient(cache_dir=tmp_path)
+        client.set_config({"spreadsheet_url": "https://docs.google.com/spreadsheets/d/abc/edit#gid=42",
+                           "sheet": ""})
+        assert client.get_tab_key() == ("abc", "42")
+
+        client.set_config({"spreadsheet_url": "https://docs.google.com/spreadsheets/d/abc/edit#gid=42",
+                           "sheet": 0})
+        assert client.get_tab_key() == ("abc", "0")
+
+
+def test_build_csv_url_uses_base_url(tmp_path):
+    """Test that the export URL is built from the configured base URL."""
+    client = GoogleWebClient(base_url="http://localhost:1234/", cache_dir=tmp_path)
+
+    assert client._build_csv_url("abc", "7") == "http://localhost:1234/abc/export?format=csv&gid=7"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
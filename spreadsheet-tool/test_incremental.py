@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental assignment generation
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from main import RaidAssignmentGenerator
+from sparks.incremental import IncrementalOutput, split_sections
+from sparks.layout import compile_layout
+from test_layout import SPEC
+from test_sheet import BWL_CELLS, make_sheet
+
+HEAD = ["=== MC RAID ASSIGNMENTS ===\n", "Processing MC assignments..."]
+CELLS = {"AA2": "Warr", "AB2": "Mage", "C2": "Hunter", "D2": "Druid"}
+
+
+class TestIncrementalOutput:
+    """Test cases for IncrementalOutput."""
+
+    def test_first_run_writes_everything(self, tmp_path):
+        """Test that the first run renders every section like a full run."""
+        plan = compile_layout(SPEC)
+        output = IncrementalOutput(tmp_path / "mc.txt")
+
+        changed = output.update(HEAD, plan, make_sheet(CELLS))
+
+        assert changed == ["Lucifron", "Trash"]
+        expected = "\n".join(HEAD + plan.run(make_sheet(CELLS)))
+        assert (tmp_path / "mc.txt").read_text(encoding="utf-8") == expected
+        assert (tmp_path / "mc.txt.fingerprints.json").exists()
+
+    def test_unchanged_sheet_changes_nothing(self, tmp_path):
+        """Test that a second run over the same cells regenerates nothing."""
+        plan = compile_layout(SPEC)
+        output = IncrementalOutput(tmp_path / "mc.txt")
+        output.update(HEAD, plan, make_sheet(CELLS))
+
+        assert output.update(HEAD, plan, make_sheet(CELLS)) == []
+
+    def test_only_changed_section_is_regenerated(self, tmp_path):
+        """Test that an edit in one section leaves the other section's text untouched."""
+        plan = compile_layout(SPEC)
+        output = IncrementalOutput(tmp_path / "mc.txt")
+        output.update(HEAD, plan, make_sheet(CELLS))
+
+        # Mark the Lucifron page so we can see it is copied, not re-rendered
+        path = tmp_path / "mc.txt"
+        path.write_text(path.read_text(encoding="utf-8").replace("Warr kicks", "Warr (kept) kicks"),
+                        encoding="utf-8")
+
+        changed = output.update(HEAD, plan, make_sheet(dict(CELLS, D2="Shaman")))
+
+        assert changed == ["Trash"]
+        sections = split_sections(path.read_text(encoding="utf-8"))[1]
+        assert sections["Lucifron"][0] == "Warr (kept) kicks Mage"
+        assert "1) Shaman" in sections["Trash"]
+
+    def test_identical_payload_skips_extraction(self, tmp_path):
+        """Test that an unchanged content hash short-circuits the whole update."""
+        plan = compile_layout(SPEC)
+        output = IncrementalOutput(tmp_path / "mc.txt")
+        output.update(HEAD, plan, make_sheet(CELLS), content_hash="abc")
+
+        with patch.object(type(plan), "extract") as extract:
+            assert output.update(HEAD, plan, make_sheet(CELLS), content_hash="abc") == []
+        extract.assert_not_called()
+
+
+def test_generator_update_output_file(tmp_path):
+    """Test incremental output through RaidAssignmentGenerator."""
+    generator = RaidAssignmentGenerator("test.toml")
+    generator.config = {"raid_name": "BWL", "output_file": str(tmp_path / "bwl.txt")}
+    generator.sheet_data = make_sheet(BWL_CELLS)
+
+    assert generator.update_output_file() == ["Trash"]
+    assert (tmp_path / "bwl.txt").read_text(encoding="utf-8") == generator.generate_assignments()
+    assert generator.update_output_file() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for declarative raid layout specs
+"""
+
+import pandas as pd
+import pytest
+
+from sparks.layout import Assignment, compile_layout, find_layout, load_layout_file
+from sparks.sheet import SheetBounds
+from test_sheet import BWL_CELLS, make_sheet
+
+SPEC = {
+    "raid": "MC",
+    "category": "Molten Core",
+    "sections": [
+        {"title": "Lucifron", "blocks": [
+            {"kind": "pairs", "left": "AA2:AA4", "right": "AB2:AB4",
+             "line": "{left} kicks {right}", "missing": "nobody"},
+        ]},
+        {"title": "Trash", "blocks": [
+            {"kind": "cell", "cell": "C2", "line": "Puller: {value}"},
+            {"kind": "list", "heading": "Decursers:", "range": "D2:E3", "line": "{n}) {value}"},
+        ]},
+    ],
+}
+
+
+class TestCompileLayout:
+    """Test cases for compiling layout specs."""
+
+    def test_bounding_box_covers_all_ranges(self):
+        """Test that the plan reads one bounding box around every range."""
+        plan = compile_layout(SPEC)
+
+        assert plan.bounding_box == (2, 2, 4, 27)
+        assert plan.bounds == SheetBounds(4, 28)
+        assert len(plan.ranges) == 4
+
+    def test_render_blocks(self):
+        """Test pairs, cell and list blocks."""
+        sheet = make_sheet({"AA2": "Warr", "AA3": "Rogue", "AB2": "Mage",
+                            "C2": "Hunter", "D2": "Druid", "E3": "Mage2"})
+
+        assert compile_layout(SPEC).run(sheet) == [
+            "# Molten Core",
+            "## Lucifron",
+            "Warr kicks Mage",
+            "Rogue kicks nobody",
+            "",
+            "## Trash",
+            "Puller: Hunter",
+            "",
+            "Decursers:",
+            "1) Druid",
+            "2) Mage2",
+            "",
+        ]
+
+    def test_empty_blocks_are_skipped(self):
+        """Test that blocks without values produce no lines."""
+        sections = compile_layout(SPEC).render_sections(make_sheet({}))
+
+        assert sections == [("Lucifron", []), ("Trash", [])]
+
+    def test_invalid_specs(self):
+        """Test validation of kinds, required keys and ranges."""
+        with pytest.raises(ValueError, match="missing 'raid'"):
+            compile_layout({"sections": []})
+        with pytest.raises(ValueError, match="unknown block kind"):
+            compile_layout({"raid": "MC", "sections": [{"title": "A", "blocks": [{"kind": "grid"}]}]})
+        with pytest.raises(ValueError, match="missing 'right'"):
+            compile_layout({"raid": "MC", "sections": [
+                {"title": "A", "blocks": [{"kind": "pairs", "left": "A1:A2", "line": "x"}]}]})
+        with pytest.raises(ValueError, match="Invalid cell reference"):
+            compile_layout({"raid": "MC", "sections": [
+                {"title": "A", "blocks": [{"kind": "cell", "cell": "1A", "line": "x"}]}]})
+        with pytest.raises(ValueError, match="only pairs blocks have a 'right_role'"):
+            compile_layout({"raid": "MC", "sections": [
+                {"title": "A", "blocks": [{"kind": "cell", "cell": "A1", "line": "x", "right_role": "healer"}]}]})
+
+    def test_assignments(self):
+        """Test that blocks with a role become records; pairs assign the right cells to the left ones."""
+        spec = {"raid": "MC", "sections": [{"title": "Lucifron", "blocks": [
+            {"kind": "pairs", "left": "A2:A4", "right": "B2:B4", "line": "{left}", "role": "tank",
+             "right_role": "healer"},
+            {"kind": "list", "range": "C2:C3", "line": "{value}", "role": "dps", "target": "adds"},
+            {"kind": "cell", "cell": "D2", "line": "{value}"},
+        ]}]}
+        sheet = make_sheet({"A2": "Warr", "A3": "Druid", "B2": "Priest", "C3": "Mage", "D2": "Nobody"})
+
+        assert [(a.player, a.role, a.target) for a in compile_layout(spec).assignments(sheet)] == [
+            ("Warr", "tank", ""), ("Druid", "tank", ""), ("Priest", "healer", "Warr"), ("Mage", "dps", "adds")]
+
+
+class TestFindLayout:
+    """Test cases for locating layout specs."""
+
+    def test_bundled_bwl_layout(self):
+        """Test that the bundled BWL spec is found and cached."""
+        plan = find_layout("BWL")
+
+        assert plan is find_layout("BWL")
+        assert plan.bounding_box == (6, 4, 19, 13)
+        assert plan.run(make_sheet(BWL_CELLS))[:3] == ["# BWL", "## Trash", "TANK ASSIGNMENTS:"]
+        records = plan.assignments(make_sheet(BWL_CELLS))
+        assert len(records) == 12 and {record.section for record in records} == {"Trash"}
+        assert Assignment("Healtwo", "healer", "Tanktwo", "Trash", "BWL") in records
+
+    def test_unknown_raid_has_no_layout(self):
+        """Test that raids without a spec return None."""
+        assert find_layout("Naxx") is None
+
+    def test_layout_file_from_config(self, tmp_path):
+        """Test loading a custom spec file."""
+        spec = tmp_path / "naxx.toml"
+        spec.write_text('raid = "Naxx"\n[[sections]]\ntitle = "Patchwerk"\n'
+                        '[[sections.blocks]]\nkind = "cell"\ncell = "A2"\nline = "Tank: {value}"\n')
+        load_layout_file.cache_clear()
+
+        plan = find_layout("Naxx", str(spec))
+
+        assert plan.run(pd.DataFrame({"A": ["x", "Tanky"]})) == ["# Naxx", "## Patchwerk", "Tank: Tanky", ""]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -9,7 +9,11 @@ import os
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
-from main import RaidAssignmentGenerator
+import pandas as pd
+
+from main import BatchAssignmentGenerator, RaidAssignmentGenerator, main
+from sparks.google_web_client import GoogleWebClient
+from sparks.sheet import SheetBounds, SheetTable
 
 
 class TestRaidAssignmentGenerator:
@@ -99,6 +103,17 @@ class TestRaidAssignmentGenerator:
         with pytest.raises(RuntimeError, match="Sheet data not loaded"):
             generator.generate_assignments()
 
+    def test_header_row_count(self):
+        """Test that the header says when the download stopped at the layout's last row."""
+        generator = RaidAssignmentGenerator("test.toml")
+        generator.config = {"raid_name": "BWL"}
+
+        generator.sheet_data = SheetTable.from_csv("a\n" + "x\n" * 5)
+        assert "Found 5 entries in spreadsheet" in generator.generate_assignments()
+
+        generator.sheet_data = SheetTable.from_csv("a\n" + "x\n" * 40, generator.sheet_bounds())
+        assert "Read 19 rows (bounded by layout)" in generator.generate_assignments()
+
     def test_save_to_file(self):
         """Test saving assignments to file."""
         generator = RaidAssignmentGenerator("test.toml")
@@ -154,6 +169,151 @@ class TestConfigFileLoading:
                 os.unlink(f.name)
 
 
+class TestBatchAssignmentGenerator:
+    """Test cases for batch mode over many configuration files."""
+
+    @staticmethod
+    def _write_config(directory: str, name: str, url: str, sheet: str, raid: str = "BWL",
+                      extra: str = "") -> Path:
+        path = Path(directory) / name
+        output = Path(directory) / f"{Path(name).stem}.txt"
+        path.write_text(
+            f'spreadsheet_url = "{url}"\n'
+            f'raid_name = "{raid}"\n'
+            f'sheet = "{sheet}"\n'
+            f'output_file = "{output.as_posix()}"\n'
+            f'{extra}',
+            encoding="utf-8",
+        )
+        return path
+
+    def test_expand_config_paths_directory_and_glob(self):
+        """Test that directories and globs expand to sorted, unique TOML files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            url = "https://docs.google.com/spreadsheets/d/abc/edit"
+            b = self._write_config(temp_dir, "b.toml", url, "1")
+            a = self._write_config(temp_dir, "a.toml", url, "1")
+
+            assert BatchAssignmentGenerator.expand_config_paths([temp_dir]) == [a, b]
+            assert BatchAssignmentGenerator.expand_config_paths(
+                [os.path.join(temp_dir, "*.toml"), str(a)]) == [a, b]
+
+    def test_one_fetch_per_distinct_tab(self):
+        """Test that configs sharing a spreadsheet tab share one fetch."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            url_1 = "https://docs.google.com/spreadsheets/d/sheet1/edit"
+            url_2 = "https://docs.google.com/spreadsheets/d/sheet2/edit"
+            paths = [
+                self._write_config(temp_dir, "bwl_a.toml", url_1, "3"),
+                self._write_config(temp_dir, "bwl_b.toml", url_1, "3"),
+                self._write_config(temp_dir, "mc.toml", url_1, "4", raid="MC"),
+                self._write_config(temp_dir, "other.toml", url_2, "3"),
+            ]
+
+            batch = BatchAssignmentGenerator(paths)
+            frame = pd.DataFrame({"A": ["x"]})
+            with patch.object(batch.web_client, "fetch_tab", return_value=frame) as fetch:
+                output_files = batch.run()
+
+            assert fetch.call_count == 3
+            assert batch.fetch_count == 3
+            assert len(output_files) == 4
+            assert batch.generators[0].sheet_data is batch.generators[1].sheet_data
+            for path in paths:
+                assert path.with_suffix(".txt").exists()
+
+    def test_fetch_count(self, sheet_server, tmp_path, monkeypatch, capsys):
+        """Test that failed tabs are not counted as fetches and cached ones are counted apart."""
+        sheet_server.tabs = {"1": "a,b\n1,2\n", "2": "a,b\n3,4\n"}
+        sheet_server.fail_gids = {"3"}
+        monkeypatch.setattr(GoogleWebClient, "EXPORT_BASE_URL", sheet_server.base_url)
+        cache = f'[cache]\ndir = "{(tmp_path / "cache").as_posix()}"\n'
+        url = "https://docs.google.com/spreadsheets/d/book/edit"
+        paths = [self._write_config(str(tmp_path), f"{name}.toml", url, gid, raid="MC", extra=cache)
+                 for name, gid in (("a", "1"), ("b", "2"), ("c", "3"))]
+        monkeypatch.setattr(GoogleWebClient, "RETRY_STATUS_CODES", ())
+
+        counts = []
+        for _ in range(2):
+            batch = BatchAssignmentGenerator(paths)
+            try:
+                batch.run()
+            finally:
+                batch.close()
+            counts.append((batch.fetch_count, batch.cached_count, len(batch.failures)))
+            assert all(generator._web_client is None for generator in batch.generators)
+
+        assert counts == [(2, 0, 1), (0, 2, 1)]
+        assert main([str(tmp_path / "a.toml"), str(tmp_path / "b.toml")]) == 0
+        assert "from 0 sheet fetch(es) and 2 cached tab(s)!" in capsys.readouterr().out
+
+    def test_group_bounds(self):
+        """Test that a tab is read as far as every raid sharing it needs."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            url = "https://docs.google.com/spreadsheets/d/sheet1/edit"
+            paths = [
+                self._write_config(temp_dir, "bwl.toml", url, "3"),
+                self._write_config(temp_dir, "bwl_2.toml", url, "3"),
+                self._write_config(temp_dir, "bwl_mc.toml", url, "4"),
+                self._write_config(temp_dir, "mc.toml", url, "4", raid="MC"),
+            ]
+            batch = BatchAssignmentGenerator(paths)
+            batch.load_configs()
+
+            bounds = batch.group_bounds(batch.group_by_tab())
+
+            assert bounds == {("sheet1", "3"): SheetBounds(19, 14), ("sheet1", "4"): None}
+
+    def test_batch_uses_configured_cache(self, sheet_server, tmp_path, monkeypatch):
+        """Test that a batch fetches into the [cache] dir its configs set."""
+        sheet_server.tabs = {"1": "a,b\n1,2\n", "2": "a,b\n3,4\n"}
+        monkeypatch.setattr(GoogleWebClient, "EXPORT_BASE_URL", sheet_server.base_url)
+        cache = f'backend = "csv"\n[cache]\ndir = "{(tmp_path / "cache").as_posix()}"\nmax_entries = 50\n'
+        url = "https://docs.google.com/spreadsheets/d/book/edit"
+        paths = [self._write_config(str(tmp_path), "a.toml", url, "1", extra=cache),
+                 self._write_config(str(tmp_path), "b.toml", url, "2", raid="MC", extra=cache)]
+
+        batch = BatchAssignmentGenerator(paths)
+        try:
+            batch.run()
+        finally:
+            batch.close()
+
+        assert batch.web_client.cache.max_entries == 50
+        assert (tmp_path / "cache" / "index.json").exists()
+        assert len(list((tmp_path / "cache").glob("*.csv"))) == 2
+
+    def test_cache_policy_per_config(self, sheet_server, tmp_path, monkeypatch):
+        """Test that configs of one batch may differ in lifetime and revalidate."""
+        sheet_server.tabs = {"1": "a,b\n1,2\n", "2": "a,b\n3,4\n"}
+        monkeypatch.setattr(GoogleWebClient, "EXPORT_BASE_URL", sheet_server.base_url)
+        store = f'[cache]\ndir = "{(tmp_path / "cache").as_posix()}"\n'
+        url = "https://docs.google.com/spreadsheets/d/book/edit"
+        paths = [self._write_config(str(tmp_path), "a.toml", url, "1", extra=store + "lifetime = 600\n"),
+                 self._write_config(str(tmp_path), "b.toml", url, "2", raid="MC",
+                                    extra=store + 'revalidate = "always"\n')]
+
+        for _ in range(2):
+            batch = BatchAssignmentGenerator(paths)
+            try:
+                assert len(batch.run()) == 2
+            finally:
+                batch.close()
+
+        gids = [request.rsplit("gid=", 1)[1] for request in sheet_server.requests]
+        assert sorted(gids) == ["1", "2", "2"]
+
+    def test_different_cache_settings_rejected(self, tmp_path):
+        """Test that configs of one batch must agree on the cache and backend."""
+        url = "https://docs.google.com/spreadsheets/d/book/edit"
+        paths = [self._write_config(str(tmp_path), "a.toml", url, "1", extra='[cache]\ndir = "a"\n'),
+                 self._write_config(str(tmp_path), "b.toml", url, "2")]
+
+        with pytest.raises(ValueError, match="different \\[cache\\] store or backend settings"):
+            BatchAssignmentGenerator(paths).load_configs()
+        assert not (tmp_path / "a").exists()
+
+
 def test_main_function_structure():
     """Test that main function exists and has expected structure."""
     from main import main
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Tests for the AngrySparks display markup renderer
+"""
+
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+import main
+from main import RaidAssignmentGenerator
+from sparks.markup import (GameData, MarkupRenderer, highlight_tokens, lint_markup, preview_html,
+                           render_display, render_display_chained, split_pages, texture_label, to_ansi,
+                           to_html)
+
+ADDON_DIR = Path(__file__).parent.parent
+SKULL = "|TInterface\\TargetingFrame\\UI-RaidTargetingIcon_8:0|t"
+
+# Fragments the fuzz tests glue together, heavy on the cases where rule order matters
+FRAGMENTS = ["{", "}", "|", "||", "|c", "red", "Red", "warrior", "monk", "deathknight", " ", "\n",
+             "skull", "{x}", "{rt8}", "{rt9}", "{spell 12}", "{SPELL\t7}", "{icon 5}", "{icon Ab_c}",
+             "{boss 3}", "{hero}", "{bl}", "Bob", "bob", "g1", "{a}", "{b}", "%", "x", "_", "é", "1",
+             "{damage}", "{page}", ",", "{healthstone}", "{hs}", "{|cred}", "{bob}", "|r"]
+HIGHLIGHTS = ["bob", "skull", "g1", "12", "red"]
+VARIABLES = [("a", "{b} %% and %1"), ("b", "{skull}bob"), ("c", "x")]
+
+
+def random_texts(count, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 25))) for _ in range(count)]
+
+
+class TestRenderDisplay:
+    """Test cases for the single-pass renderer."""
+
+    def test_colors_markers_and_icons(self):
+        """Test class colors, raid target aliases, roles and spells."""
+        text = "{skull} |cwarriorBob|r {healer} {spell 123} {icon Spell_Fire}"
+
+        assert render_display(text) == (
+            f"{SKULL} |cffc79c6eBob|r "
+            "|TInterface\\LFGFrame\\UI-LFG-ICON-PORTRAITROLES:0:0:0:0:64:64:20:39:1:20|t "
+            "|cff71d5ff|Hspell:123|h[Spell 123]|h|r |TInterface\\Icons\\Spell_Fire:0|t")
+
+    def test_markup_is_case_insensitive(self):
+        """Test that utilsModule:Pattern style matching ignores case."""
+        assert render_display("{SKULL} |cRED") == f"{SKULL} |cffeb310c"
+
+    def test_escaped_pipe_can_start_a_color(self):
+        """Test that "||" becomes "|" before the color rules run."""
+        assert render_display("||cred |||cred ||r") == "|cffeb310c ||cffeb310c |r"
+
+    def test_highlights(self):
+        """Test highlighted words, group tokens and words glued to a color code."""
+        highlights = highlight_tokens("Bob, group", group=2)
+
+        assert highlights == ["bob", "g2"]
+        assert render_display("BOB g2 g3 |credBob", highlights=highlights, highlight_color="00ff00") == \
+            "|cff00ff00BOB|r |cff00ff00g2|r g3 |cffeb310cBob"
+
+    def test_highlight_breaks_a_marker(self):
+        """Test that a highlighted word inside a marker stops it rendering, as in the addon."""
+        assert render_display("{skull}", highlights=["skull"]) == "{|cffffd200skull|r}"
+
+    def test_variables(self):
+        """Test that a variable may use the variables after it, but not the ones before it."""
+        variables = [("mt", "{ot} Bob"), ("ot", "Alice {mt}")]
+
+        assert render_display("{mt}", variables) == "Alice {mt} Bob"
+
+    def test_variable_percent_escapes(self):
+        """Test Lua gsub replacement string rules in variable values."""
+        assert render_display("{v}", [("v", "100%% %0")]) == "100% {v}"
+        with pytest.raises(ValueError):
+            render_display("{v}", [("v", "%2")])
+
+    def test_retail_only_markup(self):
+        """Test that retail colors and markers only render when not classic."""
+        assert render_display("|cmonk {hero} {boss 1}") == "|cmonk {hero} {boss 1}"
+        game = GameData(encounter_link=lambda id: f"[Boss {id}]")
+        assert render_display("|cmonk {bl} {boss 1}", classic=False, game=game) == \
+            "|cff00ff96 |TInterface\\Icons\\SPELL_Nature_Bloodlust:0|t [Boss 1]"
+
+    def test_unknown_spell_keeps_marker(self):
+        """Test that a nil GetSpellLink leaves the marker as typed."""
+        assert render_display("{spell 1}", game=GameData(spell_link=lambda id: None)) == "{spell 1}"
+
+    def test_split_pages(self):
+        """Test {page} separators."""
+        assert split_pages("a{page}b{page}") == ["a", "b", ""]
+
+
+class TestChainedEquivalence:
+    """The single pass must match the literal port of the gsub chain."""
+
+    @pytest.mark.parametrize("classic", [True, False])
+    def test_random_texts(self, classic):
+        """Test random mixes of markup against the chained port."""
+        renderer = MarkupRenderer(classic)
+        for text in random_texts(2000):
+            expected, passes = render_display_chained(text, VARIABLES, HIGHLIGHTS, classic=classic)
+            assert renderer.render(text, VARIABLES, HIGHLIGHTS) == expected, text
+        assert passes > 40
+
+    def test_matches_addon_lua(self):
+        """Test against the gsub chain run from Src/Core.lua by a Lua 5.1 interpreter."""
+        lua51 = pytest.importorskip("lupa.lua51")
+        lua = lua51.LuaRuntime(encoding=None, unpack_returned_tuples=True)
+        core = (ADDON_DIR / "Src" / "Core.lua").read_text(encoding="utf-8")
+        utils = (ADDON_DIR / "Src" / "Utils.lua").read_text(encoding="utf-8")
+        pattern = re.search(r"function utilsModule:Pattern\(pattern\).*?\nend\n", utils, re.S).group(0)
+        chain = re.search(r'\n( +text = text:gsub\("\|\|", "\|"\).*?\n        end\n)', core, re.S).group(1)
+        render = lua.execute(("""
+            local utilsModule = {}
+            local format = string.format
+            local function GetSpellLink(id) return "|cff71d5ff|Hspell:" .. id .. "|h[Spell " .. id .. "]|h|r" end
+            local function GetSpellInfo(id) return "", "", "Interface\\\\Icons\\\\INV_Misc_QuestionMark" end
+            local function EJ_GetEncounterInfo(id) end
+            local C_EncounterJournal = { GetSectionInfo = function(id) end }
+            """ + pattern + """
+            return function(text, highlights, highlightHex, isClassic)
+            """ + chain + """
+                return text
+            end""").encode("utf-8"))
+
+        for classic in (True, False):
+            for text in random_texts(300, seed=1):
+                # Variables are substituted by AngrySparks:ReplaceVariables before the chain
+                expanded = MarkupRenderer(classic).replace_variables(text, VARIABLES)
+                expected = render(expanded.encode("utf-8"), lua.table(*[h.encode() for h in HIGHLIGHTS]),
+                                  b"ffd200", classic)
+                assert render_display(text, VARIABLES, HIGHLIGHTS, classic=classic) == \
+                    expected.decode("utf-8"), text
+
+
+class TestPreview:
+    """Test cases for HTML/ANSI previews and linting."""
+
+    def test_to_html(self):
+        """Test colors, textures, links and escaping in HTML."""
+        text = render_display("|credA<b>|r {skull} {spell 5}")
+
+        assert to_html(text) == (
+            '<span style="color:#eb310c">A&lt;b&gt;</span> '
+            f'<span class="texture" title="{SKULL[2:-2]}">[skull]</span> '
+            '<span style="color:#71d5ff">[Spell 5]</span>')
+
+    def test_to_ansi(self):
+        """Test 24-bit colors and texture labels in terminal output."""
+        assert to_ansi(render_display("|cgreenok|r {tank}")) == \
+            "\x1b[38;2;10;220;0mok\x1b[39m [tank]\x1b[39m"
+
+    def test_texture_label(self):
+        """Test labels of known and unknown textures."""
+        assert texture_label("Interface\\Icons\\INV_Stone_04:0") == "healthstone"
+        assert texture_label("Interface\\Icons\\Spell_Fire:0") == "Spell_Fire"
+
+    def test_preview_html_splits_pages(self):
+        """Test that each {page} becomes its own section."""
+        document = preview_html([("Trash", "a{page}b")])
+
+        assert document.count("<h2>Trash</h2>") == 2
+
+    def test_lint(self):
+        """Test unknown markers, retail-only markers and unknown colors."""
+        issues = lint_markup("{skul} {mt}\n|cgrey {hero} |cff00ff00 |credits {page}", variables=[("mt", "x")])
+
+        assert [str(issue) for issue in issues] == [
+            "1:1: Unknown marker {skul}",
+            "2:1: Unknown color |cgrey",
+            "2:8: {hero} is not rendered by this client",
+        ]
+
+
+def test_generator_preview_and_lint(tmp_path, capsys):
+    """Test the preview and lint helpers of RaidAssignmentGenerator."""
+    generator = RaidAssignmentGenerator("test.toml")
+    generator.config = {"raid_name": "BWL"}
+    text = "=== BWL ===\n# BWL\n## Trash\n{skull} |cwarriorBob|r\n## Razorgore\n{skul} kicks"
+
+    path = generator.save_preview(text, str(tmp_path / "bwl.html"))
+
+    document = Path(path).read_text(encoding="utf-8")
+    assert "<h2>Trash</h2>" in document and "[skull]" in document
+    assert generator.lint_pages(text) == ["Razorgore 1:1: Unknown marker {skul}"]
+    generator.save_preview(text, "-")
+    assert "== Razorgore" in capsys.readouterr().out
+
+
+def test_lint_requires_single_config(tmp_path, capsys):
+    """Test that --lint is rejected in batch mode."""
+    (tmp_path / "a.toml").write_text("", encoding="utf-8")
+
+    assert main.main(["--lint", str(tmp_path)]) == 1
+    assert "--lint can only be used with a single config" in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
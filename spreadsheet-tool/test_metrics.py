@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for per-stage run metrics and profiling
+"""
+
+import json
+import pstats
+import time
+
+import pytest
+
+import main
+from sparks.google_web_client import CachePolicy, GoogleWebClient
+from sparks.metrics import RunMetrics
+
+
+class TestRunMetrics:
+    """Test cases for stage timings and counters."""
+
+    def test_stage_timings(self):
+        """Test that wall and CPU time accumulate per stage."""
+        metrics = RunMetrics()
+        for _ in range(2):
+            with metrics.stage("fetch"):
+                time.sleep(0.01)
+        with metrics.stage("process"):
+            sum(range(100000))
+
+        assert metrics.stages["fetch"].calls == 2
+        assert metrics.stages["fetch"].wall >= 0.02
+        assert metrics.stages["fetch"].cpu < metrics.stages["fetch"].wall
+        assert metrics.stages["process"].cpu > 0
+
+    def test_stage_records_failures(self):
+        """Test that a stage which raises is still timed."""
+        metrics = RunMetrics()
+        with pytest.raises(ValueError):
+            with metrics.stage("config"):
+                raise ValueError("bad")
+
+        assert metrics.stages["config"].calls == 1
+
+    def test_to_json(self):
+        """Test that stages come out in pipeline order, with counters."""
+        metrics = RunMetrics()
+        for name in ("write", "custom", "config"):
+            with metrics.stage(name):
+                pass
+        metrics.count("cache_hits")
+        metrics.count("bytes_downloaded", 10)
+        metrics.count("bytes_downloaded", 5)
+
+        report = json.loads(metrics.to_json())
+
+        assert list(report["stages"]) == ["config", "write", "custom"]
+        assert report["counters"] == {"bytes_downloaded": 15, "cache_hits": 1}
+        assert set(report["stages"]["config"]) == {"wall", "cpu", "calls"}
+        assert report["wall"] >= 0
+
+    def test_profile(self, tmp_path):
+        """Test that only the processing stage is profiled."""
+        metrics = RunMetrics(tmp_path / "run.prof")
+
+        def processing():
+            return sorted(range(1000), reverse=True)
+
+        def fetching():
+            return list(range(1000))
+
+        with metrics.stage("process"):
+            processing()
+        with metrics.stage("fetch"):
+            fetching()
+
+        stats = pstats.Stats(str(metrics.dump_profile()))
+        functions = {name for _, _, name in stats.stats}
+        assert "processing" in functions and "fetching" not in functions
+
+    def test_no_profile(self):
+        """Test that nothing is written without a profile path."""
+        assert RunMetrics().dump_profile() is None
+
+
+def test_client_counters(sheet_server, tmp_path):
+    """Test cache hit/miss counters and bytes downloaded."""
+    sheet_server.tabs = {"1": "A\n1\n"}
+    sheet_server.send_validators = True
+    client = GoogleWebClient(base_url=sheet_server.base_url, cache_dir=tmp_path / "cache", retries=0,
+                             backend="pandas")
+
+    client.fetch_tab("book", "1")
+    client.fetch_tab("book", "1")
+    client.fetch_tab("book", "1", CachePolicy(revalidate="always"))
+
+    assert client.metrics.counters == {
+        "bytes_downloaded": len(b"A\n1\n"), "cache_hits": 1, "cache_misses": 1, "cache_revalidated": 1,
+        "frame_cache_hits": 2, "frame_cache_misses": 1, "requests": 2,
+    }
+    assert set(client.metrics.stages) == {"url", "cache_lookup", "fetch", "cache_store", "parse"}
+    assert client.metrics.stages["url"].calls == 3
+
+
+def test_main_metrics_json(sheet_server, tmp_path, monkeypatch, capsys):
+    """Test that --metrics json prints every stage as the last line."""
+    sheet_server.tabs = {"1": "Tank,Healer\nArthas,Jaina\n"}
+    monkeypatch.setattr(GoogleWebClient, "EXPORT_BASE_URL", sheet_server.base_url)
+    config = tmp_path / "bwl.toml"
+    config.write_text(f'raid_name = "BWL"\nsheet = "1"\n'
+                      f'spreadsheet_url = "https://docs.google.com/spreadsheets/d/book/edit"\n'
+                      f'output_file = "{(tmp_path / "bwl.txt").as_posix()}"\n'
+                      f'[cache]\ndir = "{(tmp_path / "cache").as_posix()}"\n', encoding="utf-8")
+
+    assert main.main(["--metrics", "json", "--profile", str(tmp_path / "run.prof"), str(config)]) == 0
+
+    report = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert list(report["stages"]) == ["config", "url", "cache_lookup", "fetch", "cache_store", "parse",
+                                      "process", "write"]
+    assert report["counters"]["cache_misses"] == 1
+    assert (tmp_path / "run.prof").exists()
+
+
+def test_metrics_rejected_in_watch_mode(tmp_path, capsys):
+    """Test that --metrics points watch mode at --watch-log."""
+    config = tmp_path / "a.toml"
+    config.write_text("", encoding="utf-8")
+
+    assert main.main(["--watch", "--metrics", "json", str(config)]) == 1
+    assert "use --watch-log" in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for the roster model and the assignment cross-check
+"""
+
+import pytest
+
+import main
+from main import BatchAssignmentGenerator
+from sparks.google_web_client import GoogleWebClient
+from sparks.layout import Assignment
+from sparks.roster import Roster, check_assignments
+
+ROSTER = """
+[players]
+Arthas = "warrior"
+Jaina = "Priest"
+Thrall = { class = "shaman", roles = ["healer"] }
+Malfurion = "druid"
+Rexxar = "hunter"
+
+[limits]
+healer = 2
+"""
+
+
+def trash(player: str, role: str, target: str = "", section: str = "Trash", raid: str = "BWL") -> Assignment:
+    return Assignment(player, role, target, section, raid)
+
+
+def kinds(conflicts):
+    return [(conflict.kind, conflict.player) for conflict in conflicts]
+
+
+class TestRoster:
+    """Test cases for loading the roster."""
+
+    def test_load(self, tmp_path):
+        """Test classes, explicit roles, limits and case-insensitive lookup."""
+        path = tmp_path / "roster.toml"
+        path.write_text(ROSTER, encoding="utf-8")
+        roster = Roster.load(path)
+
+        assert len(roster) == 5
+        assert "arthas" in roster and "Sylvanas" not in roster
+        assert roster.get("JAINA").player_class == "priest"
+        assert roster.get("Jaina").roles == {"healer", "dps"}
+        assert roster.get("Thrall").roles == {"healer"}
+        assert roster.limit("healer") == 2 and roster.limit("tank") == 1
+
+    def test_unknown_class(self):
+        """Test that a class outside Classic is rejected."""
+        with pytest.raises(ValueError, match="unknown class 'monk' for Chen"):
+            Roster.from_dict({"players": {"Chen": "monk"}})
+
+    def test_missing_file(self, tmp_path):
+        """Test the error for a missing roster file."""
+        with pytest.raises(FileNotFoundError, match="Roster file not found"):
+            Roster.load(tmp_path / "missing.toml")
+
+
+class TestCheckAssignments:
+    """Test cases for the single-pass conflict check."""
+
+    roster = Roster.from_dict({"players": {"Arthas": "warrior", "Jaina": "priest", "Malfurion": "druid",
+                                           "Rexxar": "hunter", "Thrall": {"class": "shaman", "roles": ["healer"]}}})
+
+    def test_clean_raid(self):
+        """Test that a valid raid has no conflicts."""
+        records = [trash("Arthas", "tank"), trash("Jaina", "healer", "Arthas"), trash("Rexxar", "puller"),
+                   trash("Jaina", "healer", "Arthas", section="Razorgore")]
+
+        assert check_assignments({"bwl.toml": records}, self.roster) == []
+
+    def test_duplicate_and_overload(self):
+        """Test a name listed twice and a healer assigned to two tanks."""
+        records = [trash("Arthas", "tank"), trash("arthas", "tank"),
+                   trash("Jaina", "healer", "Arthas"), trash("Jaina", "healer", "Malfurion")]
+
+        conflicts = check_assignments({"bwl.toml": records})
+
+        assert kinds(conflicts) == [("duplicate", "arthas"), ("overload", "Jaina")]
+        assert str(conflicts[1]) == "overload: Jaina has 2 healer assignments: Arthas, Malfurion (bwl.toml, Trash)"
+
+    def test_limits_count_per_block(self):
+        """Test that a healer in several blocks of a section is not overloaded, but twice in one is."""
+        records = [Assignment("Jaina", "healer", "Arthas", "Trash", "BWL", 0),
+                   Assignment("Jaina", "healer", "trash", "Trash", "BWL", 2),
+                   Assignment("Jaina", "healer", "melee", "Trash", "BWL", 3),
+                   Assignment("Thrall", "healer", "Arthas", "Trash", "BWL", 0),
+                   Assignment("Thrall", "healer", "Malfurion", "Trash", "BWL", 0)]
+
+        assert kinds(check_assignments({"bwl.toml": records}, self.roster)) == [("overload", "Thrall")]
+
+    def test_roster_limits(self):
+        """Test that the roster's limits replace the default of one target per role."""
+        records = [trash("Jaina", "healer", "Arthas"), trash("Jaina", "healer", "melee")]
+        roster = Roster.from_dict({"players": {"Jaina": "priest"}, "limits": {"healer": 2}})
+
+        assert check_assignments({"bwl.toml": records}, roster) == []
+
+    def test_lockout(self):
+        """Test that a player in two groups of the same raid is reported once per group."""
+        groups = {"bwl_a.toml": [trash("Arthas", "tank"), trash("Jaina", "healer", "Arthas")],
+                  "bwl_b.toml": [trash("Arthas", "tank"), trash("Arthas", "tank", section="Razorgore")],
+                  "mc.toml": [trash("Arthas", "tank", raid="MC")]}
+
+        conflicts = check_assignments(groups)
+
+        assert kinds(conflicts) == [("lockout", "Arthas")]
+        assert conflicts[0].group == "bwl_b.toml" and "also in BWL group bwl_a.toml" in str(conflicts[0])
+
+    def test_unknown_and_mismatch(self):
+        """Test names missing from the roster and roles the class or entry does not play."""
+        records = [trash("Sylvanas", "tank"), trash("Sylvanas", "healer", "Arthas"), trash("Rexxar", "tank"),
+                   trash("Thrall", "dps", "melee"), trash("Malfurion", "tank"), trash("Arthas", "puller")]
+
+        conflicts = check_assignments({"bwl.toml": records}, self.roster)
+
+        assert kinds(conflicts) == [("unknown", "Sylvanas"), ("mismatch", "Rexxar"), ("mismatch", "Thrall")]
+        assert str(conflicts[1]) == "mismatch: Rexxar is a hunter assigned as tank (bwl.toml, Trash)"
+
+    def test_without_roster(self):
+        """Test that unknown names are only reported with a roster."""
+        assert check_assignments({"bwl.toml": [trash("Sylvanas", "tank")]}) == []
+
+
+def write_config(tmp_path, name: str, sheet: str, extra: str = ""):
+    path = tmp_path / name
+    path.write_text(f'raid_name = "BWL"\nsheet = "{sheet}"\n'
+                    f'spreadsheet_url = "https://docs.google.com/spreadsheets/d/book/edit"\n'
+                    f'output_file = "{(tmp_path / name).with_suffix(".txt").as_posix()}"\n{extra}'
+                    f'[cache]\ndir = "{(tmp_path / "cache").as_posix()}"\n', encoding="utf-8")
+    return path
+
+
+def bwl_sheet(tanks, healers) -> str:
+    """CSV text with the BWL layout's tanks in E6 and down and their healers in N6 and down."""
+    rows = [[""] * 14 for _ in range(20)]
+    for i, (tank, healer) in enumerate(zip(tanks, healers)):
+        rows[6 + i][4], rows[6 + i][13] = tank, healer
+    return "\n".join(",".join(row) for row in rows) + "\n"
+
+
+def test_main_roster_from_config(sheet_server, tmp_path, monkeypatch, capsys):
+    """Test that the config's roster key turns on the check in a single run."""
+    sheet_server.tabs = {"1": bwl_sheet(["Arthas", "Rexxar"], ["Jaina", "Jaina"])}
+    monkeypatch.setattr(GoogleWebClient, "EXPORT_BASE_URL", sheet_server.base_url)
+    (tmp_path / "roster.toml").write_text(ROSTER.replace("healer = 2", "healer = 1"), encoding="utf-8")
+    config = write_config(tmp_path, "bwl.toml", "1", f'roster = "{(tmp_path / "roster.toml").as_posix()}"\n')
+
+    assert main.main([str(config)]) == 0
+
+    out = capsys.readouterr().out
+    assert "Roster check: 2 conflict(s)" in out
+    assert "mismatch: Rexxar is a hunter assigned as tank" in out
+    assert "overload: Jaina has 2 healer assignments: Arthas, Rexxar" in out
+
+
+def test_batch_checks_all_groups(sheet_server, tmp_path, monkeypatch, capsys):
+    """Test one check over all configs, with configs sharing a tab counted as one group."""
+    sheet_server.tabs = {"1": bwl_sheet(["Arthas"], ["Jaina"]), "2": bwl_sheet(["Arthas"], ["Thrall"])}
+    monkeypatch.setattr(GoogleWebClient, "EXPORT_BASE_URL", sheet_server.base_url)
+    paths = [write_config(tmp_path, "a.toml", "1"), write_config(tmp_path, "a_copy.toml", "1"),
+             write_config(tmp_path, "b.toml", "2")]
+
+    assert main.main(["--check-roster", *map(str, paths)]) == 0
+    out = capsys.readouterr().out
+    assert "Roster check: 1 conflict(s)" in out
+    assert f"lockout: Arthas is also in BWL group {paths[0]} ({paths[2]})" in out
+
+    batch = BatchAssignmentGenerator(paths)
+    batch.load_configs()
+    batch.fetch_sheet_data()
+    assert kinds(batch.check_roster()) == [("lockout", "Arthas")]
+
+
+def test_different_rosters_are_rejected(tmp_path, capsys):
+    """Test that configs naming different roster files need --roster."""
+    paths = [write_config(tmp_path, "a.toml", "1", 'roster = "a.toml"\n'),
+             write_config(tmp_path, "b.toml", "2", 'roster = "b.toml"\n')]
+    generators = BatchAssignmentGenerator(paths).generators
+    for generator in generators:
+        generator.load_config()
+
+    with pytest.raises(ValueError, match="choose one with --roster"):
+        main.load_roster(None, generators)
+    assert main.load_roster(None, generators[:0]) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
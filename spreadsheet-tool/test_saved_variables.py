@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Tests for the SavedVariables reader and the AngrySparks page hash
+"""
+
+import random
+import zlib
+from pathlib import Path
+
+import pytest
+
+import main
+from main import RaidAssignmentGenerator
+from sparks.addon_export import Page, decode_message, parse_pages
+from sparks.saved_variables import (SavedState, page_hash, parse_saved_variables, read_saved_variables,
+                                    serialize_variables)
+
+ADDON_DIR = Path(__file__).parent.parent
+ASSIGNMENTS = "# BWL\n## Trash\n{skull} Arthas\n## Razorgore\nOrbs: Jaina\n# MC\n## Rag\nTanks: Thrall"
+
+# Written the way the client writes SavedVariables files
+SAVED = b"""
+AngrySparks_Pages = {
+\t[123] = {
+\t\t["Updated"] = 1700000000,
+\t\t["Name"] = "Trash",
+\t\t["Contents"] = "{skull} Arthas\\n\\"quoted\\" \\\\ tab\\t\\195\\169",
+\t\t["Id"] = 123,
+\t\t["UpdateId"] = -5,
+\t},
+}
+AngrySparks_State = {
+\t["displayed"] = 123,
+\t["locked"] = true,
+\t["nested"] = { { 1, 2 }, { ["x"] = "}" } },
+}
+AngrySparks_Variables = {
+\t{
+\t\t"mt", -- [1]
+\t\t"Arthas", -- [2]
+\t}, -- [1]
+\t{
+\t\t"ot", -- [1]
+\t}, -- [2]
+}
+AngrySparks_Config = {
+\t["scale"] = 0.85,
+\t["hex"] = 0x10,
+\t["exp"] = -1e3,
+\t["long"] = [==[
+a]]b]==],
+}
+"""
+
+
+def saved_variables_file(path, pages, variables=()):
+    """A SavedVariables file holding pages as the addon saves them."""
+    text = serialize_variables([list(v) for v in variables]).decode('utf-8')
+    lines = ["AngrySparks_Pages = {"]
+    for page in pages:
+        lines.append(f'\t[{page.id}] = {{ ["Id"] = {page.id}, ["Name"] = "{page.name}", '
+                     f'["Contents"] = "{page.contents}", '
+                     f'["UpdateId"] = {page_hash(page.name, page.contents, text)} }},')
+    lines.append("}")
+    lines.append("AngrySparks_Variables = {")
+    lines.extend(f'\t{{ "{name}", "{value}" }},' for name, value in variables)
+    lines.append("}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+class TestReadSavedVariables:
+    """Test cases for the SavedVariables parser."""
+
+    def test_values(self):
+        """Test strings, escapes, numbers, booleans, lists and dicts."""
+        values = parse_saved_variables(SAVED)
+
+        page = values["AngrySparks_Pages"][123]
+        assert page["Contents"] == '{skull} Arthas\n"quoted" \\ tab\té'
+        assert page["UpdateId"] == -5 and page["Updated"] == 1700000000
+        assert values["AngrySparks_State"] == {"displayed": 123, "locked": True,
+                                               "nested": [[1, 2], {"x": "}"}]}
+        assert values["AngrySparks_Variables"] == [["mt", "Arthas"], ["ot"]]
+        assert values["AngrySparks_Config"] == {"scale": 0.85, "hex": 16, "exp": -1000.0, "long": "a]]b"}
+
+    def test_only_names(self):
+        """Test that other variables are skipped."""
+        assert list(parse_saved_variables(SAVED, ["AngrySparks_Config"])) == ["AngrySparks_Config"]
+
+    def test_invalid_utf8_is_bytes(self):
+        """Test that strings which are not UTF-8 stay bytes, as in sparks.libserialize."""
+        assert parse_saved_variables(b'X = "\\255a"') == {"X": b"\xffa"}
+
+    @pytest.mark.parametrize("data", [b"X = {", b"X = { 1 2 }", b"X = @", b"X = \"\\300\"", b"= 1"])
+    def test_malformed(self, data):
+        """Test that malformed input raises ValueError."""
+        with pytest.raises(ValueError):
+            parse_saved_variables(data)
+
+    def test_read_malformed_file(self, tmp_path):
+        """Test that a malformed file on disk raises ValueError with its line number."""
+        (tmp_path / "saved.lua").write_bytes(b'AngrySparks_Variables = {}\nAngrySparks_Pages = { ["a"] = @ }\n')
+
+        with pytest.raises(ValueError, match="Unexpected character at line 2"):
+            read_saved_variables(tmp_path / "saved.lua")
+
+    def test_read_file(self, tmp_path):
+        """Test reading a file, including an empty one."""
+        (tmp_path / "empty.lua").write_bytes(b"")
+        (tmp_path / "saved.lua").write_bytes(SAVED)
+
+        assert read_saved_variables(tmp_path / "empty.lua") == {}
+        assert read_saved_variables(tmp_path / "saved.lua", ["AngrySparks_Variables"]) == \
+            {"AngrySparks_Variables": [["mt", "Arthas"], ["ot"]]}
+
+
+class TestPageHash:
+    """Test cases for the AngrySparks:Hash port."""
+
+    def test_signed_crc32(self):
+        """Test that the hash is CRC-32 as a signed 32-bit number."""
+        assert page_hash("Trash", "x", "") == 1180034413
+        assert page_hash(b"Rag", b"x", b"") == zlib.crc32(b"Rag\nx\n") - (1 << 32)
+
+    def test_serialize_variables(self):
+        """Test that entries without a name or value are left out."""
+        assert serialize_variables([["mt", "Arthas"], ["ot"], [False, "x"], ["n", 1]]) == b"mt Arthas\nn 1\n"
+        assert serialize_variables({1: ["a", "b"], 3: ["c", "d"]}) == b"a b\n"
+
+    def test_matches_lua(self):
+        """Test against LibCompress's fcs32 with LuaJIT's bit library."""
+        luajit = pytest.importorskip("lupa.luajit21")
+        lua = luajit.LuaRuntime(encoding=None, unpack_returned_tuples=True)
+        lua.execute(b"function CreateFrame() return {SetScript = function() end, Hide = function() end} end")
+        for lib in ("libs/LibStub/LibStub.lua", "libs/LibCompress/LibCompress.lua"):
+            lua.execute((ADDON_DIR / lib).read_bytes())
+        core = (ADDON_DIR / "Src" / "Core.lua").read_text(encoding="utf-8")
+        start = core.index("function AngrySparks:Hash")
+        hash_function = core[start:core.index("\nend\n", start) + 5]
+        lua_hash = lua.execute(("local libC = LibStub('LibCompress')\nlocal AngrySparks = {}\n"
+                                + hash_function + "return function(...) return AngrySparks:Hash(...) end").encode())
+
+        rng = random.Random(0)
+        for _ in range(50):
+            name, contents, variables = (bytes(rng.randrange(256) for _ in range(rng.randint(0, 300)))
+                                         for _ in range(3))
+            assert page_hash(name, contents, variables) == lua_hash(name, contents, variables)
+        assert page_hash("a", "b") == lua_hash(b"a", b"b")
+
+
+class TestSavedState:
+    """Test cases for finding pages that changed since the SavedVariables were written."""
+
+    def test_changed_pages(self, tmp_path):
+        """Test that pages whose name, contents or saved variables differ are changed."""
+        _, pages = parse_pages(ASSIGNMENTS.split("\n"))
+        path = saved_variables_file(tmp_path / "AngrySparks.lua", pages[:2], [("mt", "Arthas")])
+        saved = SavedState.load(path)
+
+        assert saved.changed_pages(pages) == [pages[2]]
+        edited = Page(id=pages[0].id, name="Trash", contents="{skull} Jaina", updated=1)
+        assert saved.changed_pages([edited]) == [edited]
+        saved.variables = b""
+        assert saved.changed_pages(pages[:1]) == pages[:1]
+
+    def test_page_without_update_id(self):
+        """Test that a saved page without an UpdateId is compared by name and contents."""
+        page = Page(id=7, name="Trash", contents="x", updated=1)
+        saved = SavedState(pages={7: {"Id": 7, "Name": "Trash", "Contents": "x"}})
+
+        assert saved.changed_pages([page]) == []
+
+
+def test_generator_changed_pages_blob(tmp_path, capsys):
+    """Test that the blob holds only changed pages and their categories."""
+    generator = RaidAssignmentGenerator("test.toml")
+    categories, pages = parse_pages(ASSIGNMENTS.split("\n"))
+    saved = SavedState.load(saved_variables_file(tmp_path / "AngrySparks.lua", pages[:2]))
+
+    path = generator.save_blob(ASSIGNMENTS, str(tmp_path / "raid.blob"), saved=saved)
+
+    bundle = decode_message(Path(path).read_bytes())
+    assert [page["Name"] for page in bundle["Pages"].values()] == ["Rag"]
+    assert [category["Name"] for category in bundle["Categories"].values()] == ["MC"]
+    assert "Skipping 2 of 3 pages" in capsys.readouterr().out
+
+    saved = SavedState.load(saved_variables_file(tmp_path / "AngrySparks.lua", pages))
+    assert generator.save_blob(ASSIGNMENTS, str(tmp_path / "none.blob"), saved=saved) is None
+    assert not (tmp_path / "none.blob").exists()
+
+
+def test_saved_variables_requires_blob(tmp_path, capsys):
+    """Test --saved-variables option validation."""
+    config = tmp_path / "a.toml"
+    config.write_text("", encoding="utf-8")
+
+    assert main.main(["--saved-variables", "AngrySparks.lua", str(config)]) == 1
+    assert "--saved-variables requires --blob" in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Tests for A1-style sheet access and the BWL processor
+"""
+
+import csv
+from io import StringIO
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sparks.bwl import process_bwl_assignments
+from sparks.sheet import (EmptySheetError, SheetBounds, SheetGrid, SheetTable, column_index, parse_cell,
+                          parse_range, read_block, union_bounds)
+
+
+def make_sheet(cells: Dict[str, object], rows: int = 25, cols: int = 30) -> pd.DataFrame:
+    """Build a frame where A1 row N is frame row N-1, like the processors expect."""
+    frame = pd.DataFrame(np.full((rows, cols), np.nan, dtype=object),
+                         columns=[f"Col{c}" for c in range(cols)])
+    for ref, value in cells.items():
+        row, col = parse_cell(ref)
+        frame.iloc[row - 1, col] = value
+    return frame
+
+
+def make_table(cells: Dict[str, object], rows: int = 25, cols: int = 30) -> SheetTable:
+    """make_sheet as CSV text parsed by the csv backend."""
+    grid: List[List[object]] = [[""] * cols for _ in range(rows)]
+    for ref, value in cells.items():
+        row, col = parse_cell(ref)
+        grid[row - 1][col] = value
+    text = StringIO()
+    csv.writer(text).writerows([[f"Col{c}" for c in range(cols)], *grid])
+    return SheetTable.from_csv(text.getvalue())
+
+
+BWL_CELLS = {
+    "E6": "Tankone", "E7": "Tanktwo", "E8": " Tankthree ",
+    "N6": "Healone", "N7": "Healtwo",
+    "G13": "Pullhunter",
+    "E17": "Rezzer", "E19": "Rezzertwo",
+    "N13": "Meleeheal", "N16": "Rangedheal", "N17": "Rangedtwo",
+    "N19": "Flexheal",
+}
+
+
+class TestA1References:
+    """Test cases for A1 reference parsing."""
+
+    def test_column_index(self):
+        """Test single and multi-letter columns."""
+        assert column_index("A") == 0
+        assert column_index("z") == 25
+        assert column_index("AA") == 26
+        assert column_index("AB") == 27
+        assert column_index("AZ") == 51
+        assert column_index("BA") == 52
+
+    def test_parse_range(self):
+        """Test ranges are normalised to (row1, col1, row2, col2)."""
+        assert parse_range("E6:N19") == (6, 4, 19, 13)
+        assert parse_range("N19:E6") == (6, 4, 19, 13)
+        assert parse_range("G13") == (13, 6, 13, 6)
+
+    def test_invalid_reference(self):
+        """Test that malformed references raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid cell reference"):
+            parse_cell("13G")
+
+
+class TestSheetGrid:
+    """Test cases for SheetGrid."""
+
+    def test_cell_values_are_stripped_strings(self):
+        """Test NaN, whitespace and numeric cells."""
+        grid = SheetGrid(make_sheet({"B2": "  Name ", "C3": 4.0}))
+
+        assert grid.cell("B2") == "Name"
+        assert grid.cell("C3") == "4.0"
+        assert grid.cell("A1") == ""
+
+    def test_multi_letter_columns(self):
+        """Test that AA/AB columns are addressed correctly."""
+        grid = SheetGrid(make_sheet({"AA5": "Left", "AB5": "Right"}))
+
+        assert grid.cell("AA5") == "Left"
+        assert grid.values("AA5:AB5") == ["Left", "Right"]
+
+    def test_range_is_padded_outside_sheet(self):
+        """Test that cells beyond the sheet read as empty."""
+        grid = SheetGrid(make_sheet({"B2": "x"}, rows=3, cols=3))
+        block = grid.range("B2:E6")
+
+        assert block.shape == (5, 4)
+        assert block[0, 0] == "x"
+        assert (block.ravel()[1:] == "").all()
+        assert grid.cell("ZZ100") == ""
+
+    def test_values_skip_empty_cells(self):
+        """Test that values returns non-empty cells in row-major order."""
+        grid = SheetGrid(make_sheet({"E6": "a", "E8": "b", "F6": "c"}))
+
+        assert grid.values("E6:E10") == ["a", "b"]
+        assert grid.values("E6:F8") == ["a", "c", "b"]
+
+
+class TestSheetTable:
+    """Test cases for the csv module sheet backend."""
+
+    def test_from_csv(self):
+        """Test the header row, quoting, blank lines and short rows."""
+        table = SheetTable.from_csv('Tank,Healer\r\n"Bob, Jr",Alice\r\n\r\nCarol\r\n')
+
+        assert table.columns == ("Tank", "Healer")
+        assert table.shape == (2, 2) and len(table) == 2
+        assert table.block(1, 0, 2, 1) == [["Bob, Jr", "Alice"], ["Carol", ""]]
+
+    def test_from_csv_bounds(self):
+        """Test that rows and columns past the bounds are dropped and unread lines left alone."""
+        lines = iter(["A,B,C\n", "1,2,3\n", "\n", "4,5,6\n", "7,8,9\n", "10,11,12\n"])
+        table = SheetTable.from_csv(lines, SheetBounds(2, 2))
+
+        assert table.columns == ("A", "B")
+        assert table.rows == [("1", "2"), ("4", "5")]
+        assert next(lines) == "7,8,9\n"
+
+    def test_block_is_padded_and_stripped(self):
+        """Test cells outside the sheet and whitespace."""
+        table = make_table({"B2": "  x "}, rows=3, cols=3)
+
+        assert table.block(2, 1, 4, 3) == [["x", "", ""], ["", "", ""], ["", "", ""]]
+
+    def test_empty(self):
+        """Test that a sheet without a header row is rejected."""
+        with pytest.raises(EmptySheetError):
+            SheetTable.from_csv("\n")
+
+    def test_to_frame(self):
+        """Test the DataFrame view keeps cells, empty cells and attrs."""
+        table = make_table({"A1": "x", "B2": "y"}, rows=2, cols=2)
+        table.attrs["content_hash"] = "abc"
+        frame = table.to_frame()
+
+        assert SheetGrid(frame).range("A1:B2").tolist() == table.block(1, 0, 2, 1)
+        assert frame.attrs["content_hash"] == "abc"
+
+    def test_matches_sheet_grid(self):
+        """Test that both backends read the same blocks."""
+        table = make_table(BWL_CELLS)
+        frame = make_sheet(BWL_CELLS)
+
+        for box in [(1, 0, 30, 40), (6, 4, 19, 13), (13, 6, 13, 6)]:
+            assert read_block(table, *box) == read_block(frame, *box).tolist()
+
+
+def test_union_bounds():
+    """Test that the union covers every bounds, and None stands for the whole sheet."""
+    union = union_bounds([SheetBounds(19, 14), SheetBounds(30, 3)])
+
+    assert union == SheetBounds(30, 14)
+    assert union.covers(SheetBounds(19, 14)) and not SheetBounds(19, 14).covers(union)
+    assert union_bounds([SheetBounds(19, 14), None]) is None
+    assert union_bounds([]) is None
+
+
+@pytest.mark.parametrize("make", [make_sheet, make_table])
+def test_process_bwl_assignments(make):
+    """Test the BWL trash page built from the sheet cells."""
+    assignments = process_bwl_assignments(make(BWL_CELLS))
+
+    assert assignments == [
+        "# BWL",
+        "## Trash",
+        "TANK ASSIGNMENTS:",
+        "  Tank 1: Tankone -> Healer: Healone",
+        "  Tank 2: Tanktwo -> Healer: Healtwo",
+        "  Tank 3: Tankthree -> Healer: No healer assigned",
+        "",
+        "PULLER: Pullhunter",
+        "",
+        "TRASH HEALERS/RESURRECTORS:",
+        "  1. Rezzer",
+        "  2. Rezzertwo",
+        "",
+        "MELEE HEALERS:",
+        "  1. Meleeheal",
+        "",
+        "RANGED HEALERS:",
+        "  1. Rangedheal",
+        "  2. Rangedtwo",
+        "",
+        "FLEX HEALER: Flexheal",
+        "",
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming output sinks (text, Discord, markup, JSON)
+"""
+
+import json
+
+import pytest
+
+import main
+from main import RaidAssignmentGenerator
+from sparks.google_web_client import GoogleWebClient
+from sparks.layout import Assignment, RenderedSection
+from sparks.markup import lint_markup
+from sparks.metrics import RunMetrics
+from sparks.roster import Roster
+from sparks.sheet import SheetTable
+from sparks.sinks import (MESSAGE_SEPARATOR, DiscordSink, JsonSink, MarkupSink, OutputSink, TextSink,
+                          write_document)
+
+
+def bwl_rows(tanks, healers):
+    """Rows with the BWL layout's tanks in E7 and down and their healers in N7 and down."""
+    rows = [["Col%d" % c for c in range(15)]] + [[""] * 15 for _ in range(20)]
+    for i, (tank, healer) in enumerate(zip(tanks, healers)):
+        rows[6 + i][4], rows[6 + i][13] = tank, healer
+    return rows
+
+
+def bwl_generator(tanks=("Arthas", "Malfurion"), healers=("Jaina", "Thrall")) -> RaidAssignmentGenerator:
+    app = RaidAssignmentGenerator("bwl.toml")
+    app.config = {"raid_name": "BWL"}
+    app.sheet_data = SheetTable.from_csv("\n".join(",".join(row) for row in bwl_rows(tanks, healers)))
+    return app
+
+
+def section(title: str, lines, assignments=()) -> RenderedSection:
+    return RenderedSection(title, tuple(lines), tuple(assignments))
+
+
+def write(sink: OutputSink, sections, header=("Header",), category="BWL"):
+    return write_document([sink], list(header), category, sections)
+
+
+class TestTextSink:
+    """Test cases for the text output."""
+
+    def test_same_as_generate_assignments(self, tmp_path):
+        """Test that the streamed text file matches generate_assignments exactly."""
+        app = bwl_generator()
+
+        paths = app.write_outputs(str(tmp_path / "bwl.txt"), {})
+
+        assert paths == [str((tmp_path / "bwl.txt").absolute())]
+        assert (tmp_path / "bwl.txt").read_text(encoding="utf-8") == app.generate_assignments()
+
+    def test_missing_layout(self, tmp_path):
+        """Test the text written for a raid without a layout."""
+        app = bwl_generator()
+        app.config = {"raid_name": "ZG"}
+
+        app.write_outputs(str(tmp_path / "zg.txt"), {})
+
+        text = (tmp_path / "zg.txt").read_text(encoding="utf-8")
+        assert text == app.generate_assignments()
+        assert text.endswith("No sheet layout defined for ZG")
+
+    def test_sections_rendered_once(self, tmp_path):
+        """Test that every sink receives each section from a single pass over the generator."""
+        rendered = []
+
+        def sections():
+            for title in ("One", "Two"):
+                rendered.append(title)
+                yield section(title, [f"{title} line"])
+
+        sinks = [TextSink(tmp_path / "a.txt"), JsonSink(tmp_path / "a.json"), DiscordSink(tmp_path / "a.discord")]
+        metrics = RunMetrics()
+        write_document(sinks, ["Header"], "BWL", sections(), metrics)
+
+        assert rendered == ["One", "Two"]
+        assert (tmp_path / "a.txt").read_text(encoding="utf-8") == "Header\n# BWL\n## One\nOne line\n## Two\nTwo line"
+        assert metrics.stages["write"].calls == 4 and metrics.stages["process"].calls == 3
+
+
+class TestDiscordSink:
+    """Test cases for Discord-sized messages."""
+
+    def messages(self, path):
+        return path.read_text(encoding="utf-8").split(f"\n{MESSAGE_SEPARATOR}\n")
+
+    def test_splits_between_sections(self, tmp_path):
+        """Test that sections that do not fit start a new message."""
+        sections = [section(f"Boss {i}", [f"Tank {n}: Player{n}" for n in range(8)]) for i in range(30)]
+
+        write(DiscordSink(tmp_path / "bwl.txt", limit=400), sections)
+
+        messages = self.messages(tmp_path / "bwl.txt")
+        assert len(messages) > 1
+        assert all(len(message) <= 400 for message in messages)
+        assert all(message.startswith("## Boss") for message in messages[1:])
+        assert "\n".join(messages) == "\n".join(["Header", "# BWL"] + [
+            line for s in sections for line in (f"## {s.title}", *s.lines)])
+
+    def test_long_section_and_line(self, tmp_path):
+        """Test that a section over the limit breaks between lines and a long line anywhere."""
+        long_line = "x" * 250
+        sections = [section("Short", ["a"]), section("Long", [f"line {n:03d}" for n in range(30)] + [long_line])]
+
+        write(DiscordSink(tmp_path / "bwl.txt", limit=100), sections)
+
+        messages = self.messages(tmp_path / "bwl.txt")
+        assert all(len(message) <= 100 for message in messages)
+        assert messages[0] == "Header\n# BWL\n## Short\na"
+        assert "".join(messages[-3:]).endswith(long_line)
+
+    def test_default_limit(self, tmp_path):
+        """Test that the default limit is Discord's 2000 characters."""
+        write(DiscordSink(tmp_path / "bwl.txt"), [section(f"Boss {i}", ["y" * 90] * 10) for i in range(5)])
+
+        messages = self.messages(tmp_path / "bwl.txt")
+        assert len(messages) == 3 and all(len(message) <= 2000 for message in messages)
+
+
+class TestMarkupSink:
+    """Test cases for the AngrySparks markup output."""
+
+    def test_icons_and_colors(self, tmp_path):
+        """Test raid target icons on the tanks and class colors from the roster."""
+        app = bwl_generator()
+        app.roster = Roster.from_dict({"players": {"Arthas": "warrior", "Jaina": "mage"}})
+
+        app.write_outputs(outputs={"markup": str(tmp_path / "bwl.sparks.txt")}, text=False)
+
+        text = (tmp_path / "bwl.sparks.txt").read_text(encoding="utf-8")
+        assert "Tank 1: {skull} |cwarriorArthas|r -> Healer: |cmageJaina|r" in text
+        assert "Tank 2: {cross} Malfurion -> Healer: Thrall" in text
+        assert app.lint_pages(text) == []
+
+    def test_whole_names_only(self, tmp_path):
+        """Test that names inside longer words are left alone."""
+        records = [Assignment("Rag", "tank", "", "Boss", "MC")]
+
+        write(MarkupSink(tmp_path / "mc.txt"), [section("Boss", ["Tank: Rag", "Ragnaros is the boss"], records)])
+
+        lines = (tmp_path / "mc.txt").read_text(encoding="utf-8").split("\n")
+        assert lines[-2:] == ["Tank: {skull} Rag", "Ragnaros is the boss"]
+        assert lint_markup("\n".join(lines)) == []
+
+
+class TestJsonSink:
+    """Test cases for the JSON output."""
+
+    def test_structure(self, tmp_path):
+        """Test the header, sections and assignment records of the JSON document."""
+        app = bwl_generator()
+
+        app.write_outputs(outputs={"json": str(tmp_path / "bwl.json")}, text=False)
+
+        data = json.loads((tmp_path / "bwl.json").read_text(encoding="utf-8"))
+        assert data["header"][0] == "=== BWL RAID ASSIGNMENTS ==="
+        assert data["category"] == "BWL"
+        trash = data["sections"][0]
+        assert {"player": "Jaina", "role": "healer", "target": "Arthas"} in trash["assignments"]
+        assert "## " + trash["title"] in app.generate_assignments()
+
+    def test_empty_document(self, tmp_path):
+        """Test a document without sections."""
+        write(JsonSink(tmp_path / "a.json"), [], header=["Nothing"], category=None)
+
+        assert json.loads((tmp_path / "a.json").read_text(encoding="utf-8")) == {
+            "header": ["Nothing"], "category": None, "sections": []}
+
+
+class TestAtomicOutputs:
+    """Test cases for writing all outputs or none."""
+
+    def test_failure_keeps_previous_files(self, tmp_path):
+        """Test that an error while rendering leaves every previous output and no temporary files."""
+        (tmp_path / "a.txt").write_text("old text", encoding="utf-8")
+        (tmp_path / "a.json").write_text("{}", encoding="utf-8")
+
+        def sections():
+            yield section("One", ["line"])
+            raise ValueError("bad cell")
+
+        with pytest.raises(ValueError, match="bad cell"):
+            write_document([TextSink(tmp_path / "a.txt"), JsonSink(tmp_path / "a.json")], [], None, sections())
+
+        assert (tmp_path / "a.txt").read_text(encoding="utf-8") == "old text"
+        assert (tmp_path / "a.json").read_text(encoding="utf-8") == "{}"
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["a.json", "a.txt"]
+
+    def test_sink_needs_begin(self, tmp_path):
+        """Test that the base class is abstract and a sink is written only after begin()."""
+        with pytest.raises(TypeError):
+            OutputSink(tmp_path / "a.txt")
+
+        with pytest.raises(RuntimeError, match="Call begin\\(\\) first"):
+            TextSink(tmp_path / "a.txt").commit()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unknown_format(self):
+        """Test that an unknown format in [outputs] is rejected."""
+        app = bwl_generator()
+        app.config["outputs"] = {"pdf": "bwl.pdf"}
+
+        with pytest.raises(ValueError, match="Unknown output format: pdf"):
+            app.output_paths()
+
+
+def write_config(tmp_path, extra: str = ""):
+    path = tmp_path / "bwl.toml"
+    path.write_text(f'raid_name = "BWL"\nsheet = "1"\n'
+                    f'spreadsheet_url = "https://docs.google.com/spreadsheets/d/book/edit"\n'
+                    f'output_file = "{(tmp_path / "bwl.txt").as_posix()}"\n'
+                    f'[cache]\ndir = "{(tmp_path / "cache").as_posix()}"\n{extra}', encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def bwl_server(sheet_server, monkeypatch):
+    sheet_server.tabs = {"1": "\n".join(",".join(row) for row in bwl_rows(["Arthas"], ["Jaina"])) + "\n"}
+    monkeypatch.setattr(GoogleWebClient, "EXPORT_BASE_URL", sheet_server.base_url)
+    return sheet_server
+
+
+def test_main_writes_all_formats(bwl_server, tmp_path):
+    """Test the --discord, --markup and --json options next to the text output."""
+    config = write_config(tmp_path)
+
+    assert main.main(["--discord", str(tmp_path / "d.txt"), "--markup", str(tmp_path / "m.txt"),
+                      "--json", str(tmp_path / "bwl.json"), "--lint", str(config)]) == 0
+
+    text = (tmp_path / "bwl.txt").read_text(encoding="utf-8")
+    assert "Tank 1: Arthas -> Healer: Jaina" in text
+    assert (tmp_path / "d.txt").read_text(encoding="utf-8") == text.rstrip()
+    assert "Tank 1: {skull} Arthas -> Healer: Jaina" in (tmp_path / "m.txt").read_text(encoding="utf-8")
+    assert json.loads((tmp_path / "bwl.json").read_text(encoding="utf-8"))["category"] == "BWL"
+
+
+def test_batch_outputs_from_config(bwl_server, tmp_path):
+    """Test that batch runs, incremental ones included, write the [outputs] of each config."""
+    write_config(tmp_path, f'[outputs]\njson = "{(tmp_path / "bwl.json").as_posix()}"\n')
+
+    for options in ([], ["--incremental"]):
+        (tmp_path / "bwl.json").unlink(missing_ok=True)
+        assert main.main([*options, str(tmp_path)]) == 0
+        assert json.loads((tmp_path / "bwl.json").read_text(encoding="utf-8"))["sections"]
+
+
+def test_session_closed_on_error(bwl_server, tmp_path, monkeypatch, capsys):
+    """Test that a failed single-config run still closes the web client."""
+    config = write_config(tmp_path)
+    (tmp_path / "bwl.txt").mkdir()
+    closed = []
+    monkeypatch.setattr(GoogleWebClient, "close", lambda self: closed.append(self))
+
+    assert main.main([str(config)]) == 1
+    assert "Failed to save assignments to file" in capsys.readouterr().err
+    assert len(closed) == 1
+
+
+def test_output_options_single_config_only(tmp_path, capsys):
+    """Test that the output options are rejected in batch mode."""
+    write_config(tmp_path)
+
+    assert main.main(["--json", "a.json", str(tmp_path)]) == 1
+    assert "--json can only be used with a single config" in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
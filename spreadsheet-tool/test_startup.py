@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for CLI startup cost: pandas and friends stay unimported until needed
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_startup import TOOL_DIR, import_times
+
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow")
+
+# A whole generation from CSV text through the layouts and the page lint (A1 row N is rows[N])
+GENERATE = """
+import sys
+from main import RaidAssignmentGenerator
+from sparks.sheet import SheetTable
+
+rows = [["Col%%d" %% c for c in range(15)]] + [[""] * 15 for _ in range(20)]
+rows[6][4], rows[6][13] = "Tankone", "Healone"
+app = RaidAssignmentGenerator("bwl.toml")
+app.config = {"raid_name": "BWL"}
+app.sheet_data = SheetTable.from_csv("\\n".join(",".join(row) for row in rows))
+text = app.generate_assignments()
+assert "Tank 1: Tankone -> Healer: Healone" in text, text
+app.lint_pages(text)
+print(" ".join(name for name in %r if name in sys.modules))
+""" % (HEAVY_MODULES,)
+
+
+def test_import_main_skips_heavy_modules():
+    """Test with -X importtime that importing the CLI loads no pandas, numpy or pyarrow."""
+    times = import_times("import main")
+
+    assert "main" in times
+    assert not [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+
+
+def test_generation_skips_heavy_modules():
+    """Test that generating assignments from a SheetTable never imports pandas."""
+    result = subprocess.run([sys.executable, "-c", GENERATE], cwd=TOOL_DIR,
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Tests for the LibDeflate compressor port and addon channel transmission costs
+"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+import main
+from main import RaidAssignmentGenerator
+from sparks.addon_export import Page, decode_message
+from sparks.libdeflate import compress_deflate_exact, decompress_deflate, encode_for_wow_addon_channel
+from sparks.libserialize import serialize
+from sparks.transmission import comm_messages, page_cost, send_seconds, split_page
+
+ADDON_DIR = Path(__file__).parent.parent
+PLAYERS = ["Arthas", "Jaina", "Thrall", "Sylvanas", "Varian", "Anduin", "Tyrande", "Malfurion"]
+LINE = "{skull} |cwarriorArthas|r taunts, {cross} |cpaladinUther|r, kicks: Jaina Thrall Velen"
+
+# CTL's OnUpdate frame and clock, stubbed so ChatThrottleLib runs outside the game
+WOW_STUBS = b"""
+now = 100
+sent = {}
+Enum = {}
+function GetTime() return now end
+function GetFramerate() return 60 end
+function hooksecurefunc() end
+function securecallfunction(f, ...) return f(...) end
+function geterrorhandler() return print end
+-- WoW's xpcall passes extra arguments on to the function, like Lua 5.2
+local xpcall51 = xpcall
+function xpcall(f, handler, ...)
+    local args, n = {...}, select("#", ...)
+    return xpcall51(function() return f(unpack(args, 1, n)) end, handler)
+end
+function CreateFrame()
+    local frame = {scripts = {}, shown = true}
+    function frame:Hide() self.shown = false end
+    function frame:Show() self.shown = true end
+    function frame:SetScript(name, f) self.scripts[name] = f end
+    function frame:RegisterEvent() end
+    function frame:UnregisterAllEvents() end
+    return frame
+end
+C_ChatInfo = {SendAddonMessage = function(prefix, text) sent[#sent + 1] = {now, text} end}
+function send(text, step)
+    ChatThrottleLib.LastAvailUpdate = 0
+    ChatThrottleLib.HardThrottlingBeginTime = 0
+    LibStub("AceComm-3.0"):SendCommMessage("<Sparks100>", text, "RAID", nil, "BULK")
+    local frame = ChatThrottleLib.Frame
+    while frame.shown do
+        now = now + step
+        frame.scripts.OnUpdate(frame, step)
+    end
+    return sent
+end
+"""
+
+
+def random_inputs(count, seed=0):
+    rng = random.Random(seed)
+    return [bytes(rng.choice(b"ab{}|c \n") for _ in range(rng.randint(0, 3000))) for _ in range(count)]
+
+
+def lua_runtime(*libs):
+    lua51 = pytest.importorskip("lupa.lua51")
+    lua = lua51.LuaRuntime(encoding=None, unpack_returned_tuples=True)
+    for lib in libs:
+        lua.execute((ADDON_DIR / lib).read_bytes())
+    return lua
+
+
+def big_page(lines, seed=0):
+    rng = random.Random(seed)
+    contents = "\n".join(f"{LINE} {rng.choice(PLAYERS)} {rng.getrandbits(128):032x}" for _ in range(lines))
+    return Page(id=1, name="Trash", contents=contents, updated=1700000000)
+
+
+class TestCompressDeflateExact:
+    """Test cases for the LibDeflate:CompressDeflate port."""
+
+    @pytest.mark.parametrize("data, expected", [
+        (b"", "03fc"),
+        (b"Tank 1: Warr -> Healer: Priest\n" * 20,
+         "0b49cccb5630b452084f2c2a52d0b553f0484dcc492db2520828ca4c2d2ee11a951e95a69a34e0"),
+    ])
+    def test_known_output(self, data, expected):
+        """Test output captured from LibDeflate."""
+        assert compress_deflate_exact(data).hex() == expected
+
+    def test_round_trip(self):
+        """Test that every level produces a valid raw DEFLATE stream."""
+        data = "\n".join(f"{LINE} {i}" for i in range(300)).encode("utf-8")
+        for level in range(10):
+            assert decompress_deflate(compress_deflate_exact(data, level)) == data
+
+    def test_invalid_level(self):
+        """Test that levels LibDeflate rejects are rejected."""
+        with pytest.raises(ValueError):
+            compress_deflate_exact(b"x", 10)
+
+    def test_matches_lua(self):
+        """Test byte-identical output against the bundled LibDeflate, including multi-block input."""
+        lua = lua_runtime("libs/LibStub/LibStub.lua", "libs/LibDeflate/LibDeflate.lua")
+        compress = lua.eval(b"""function(data, level)
+            return (LibStub("LibDeflate"):CompressDeflate(data, level and {level = level}))
+        end""")
+        inputs = random_inputs(40) + [bytes(range(256)) * 3, "\n".join(f"{LINE} {i}" for i in range(1500)).encode()]
+        for data in inputs:
+            for level in (None, 0, 1, 4, 9):
+                assert compress_deflate_exact(data, level) == compress(data, level), (len(data), level)
+
+
+class TestTransmission:
+    """Test cases for AceComm message splitting and ChatThrottleLib send times."""
+
+    @pytest.mark.parametrize("length, sizes", [
+        (0, [0]), (255, [255]), (256, [255, 3]), (508, [255, 255]), (509, [255, 255, 2]),
+    ])
+    def test_comm_messages(self, length, sizes):
+        """Test the 255 byte limit and the part marker byte."""
+        text = b"x" * length
+        messages = comm_messages(text)
+
+        assert [len(message) for message in messages] == sizes
+        assert b"".join(message[1:] if len(sizes) > 1 else message for message in messages) == text
+
+    def test_comm_messages_escape_control_character(self):
+        """Test that a leading control byte is escaped, or forces a multipart message."""
+        assert comm_messages(b"\x01\x03") == [b"\x04\x01\x03"]
+        assert [message[:1] for message in comm_messages(b"\x01" * 255)] == [b"\x01", b"\x03"]
+
+    def test_send_seconds(self):
+        """Test that the burst goes out at once and the rest at 800 bytes per second."""
+        assert send_seconds([255] * 10) == 0
+        assert send_seconds([255] * 100) == pytest.approx((100 * 295 - 4000) / 800, abs=0.1)
+
+    def test_matches_lua(self):
+        """Test messages and send times against AceComm and ChatThrottleLib with a stubbed clock."""
+        rng = random.Random(1)
+        for length in (0, 300, 3900, 4100, 9000, 20000):
+            text = bytes(rng.randint(2, 255) for _ in range(length))
+            lua = lua_runtime("libs/LibStub/LibStub.lua", "libs/CallbackHandler-1.0/CallbackHandler-1.0.lua")
+            lua.execute(WOW_STUBS)
+            for lib in ("libs/AceComm-3.0/ChatThrottleLib.lua", "libs/AceComm-3.0/AceComm-3.0.lua"):
+                lua.execute((ADDON_DIR / lib).read_bytes())
+
+            # Two frames of 0.0625 s per OnUpdate keeps the Lua clock exact
+            sent = list(lua.globals().send(text, 0.0625).values())
+            messages = comm_messages(text)
+
+            assert [bytes(message[2]) for message in sent] == messages
+            assert sent[-1][1] - 100 == send_seconds([len(m) for m in messages], interval=0.125)
+
+    def test_page_cost(self):
+        """Test the size at each step of SendOutMessage."""
+        cost = page_cost(big_page(200))
+
+        assert cost.serialized > cost.text > cost.encoded >= cost.compressed
+        assert cost.chunks == len(comm_messages(b"x" * cost.encoded))
+        assert cost.seconds > 0
+        assert str(cost).startswith(f"Trash: {cost.text} B text, {cost.serialized} serialized")
+
+    def test_page_cost_matches_encoding(self):
+        """Test that the encoded size is the size of the actual message."""
+        page = big_page(3)
+        cost = page_cost(page, [("mt", "Arthas")])
+
+        assert cost.encoded == len(encode_for_wow_addon_channel(compress_deflate_exact(
+            serialize(page.message([("mt", "Arthas")])))))
+
+
+class TestSplitPage:
+    """Test cases for splitting pages over the send budget."""
+
+    def test_small_page_is_kept(self):
+        """Test that a page within budget is returned unchanged."""
+        page = big_page(3)
+
+        assert split_page(page, 0.5) == [page]
+
+    def test_split(self):
+        """Test that parts fit the budget, keep every line and have stable numbered names."""
+        page = big_page(400)
+        parts = split_page(page, 1.0)
+
+        assert len(parts) > 1
+        assert all(page_cost(part).seconds <= 1.0 for part in parts)
+        assert "\n".join(part.contents for part in parts) == page.contents
+        assert [part.name for part in parts] == [f"Trash ({i}/{len(parts)})" for i in range(1, len(parts) + 1)]
+        assert [part.id for part in split_page(page, 1.0)] == [part.id for part in parts]
+
+
+def test_generator_split_blob(tmp_path, capsys):
+    """Test splitting pages in the blob and the per-page costs."""
+    generator = RaidAssignmentGenerator("test.toml")
+    text = "\n".join(["# BWL", "## Trash", big_page(400).contents, "## Razorgore", "x"])
+
+    path = generator.save_blob(text, str(tmp_path / "bwl.blob"), split_budget=1.0)
+
+    names = [page["Name"] for page in decode_message(Path(path).read_bytes())["Pages"].values()]
+    assert names[-1] == "Razorgore" and names[0].startswith("Trash (1/")
+    assert "Split page 'Trash' into" in capsys.readouterr().out
+    assert [cost.name for cost in generator.transmission_costs(text)] == ["Trash", "Razorgore"]
+
+
+def test_split_pages_requires_blob_and_budget(tmp_path, capsys):
+    """Test --split-pages option validation."""
+    config = tmp_path / "a.toml"
+    config.write_text("", encoding="utf-8")
+
+    assert main.main(["--split-pages", "--send-budget", "2", str(config)]) == 1
+    assert "--split-pages requires --blob and --send-budget" in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for watch mode polling
+"""
+
+import json
+from typing import List
+
+import pytest
+
+from main import BatchAssignmentGenerator
+from sparks.watch import AdaptiveInterval, SheetWatcher
+from test_google_web_client import make_client
+from test_sinks import bwl_rows
+
+
+class FakeClock:
+    """Clock and sleep pair that only advances when slept."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestAdaptiveInterval:
+    """Test cases for AdaptiveInterval."""
+
+    def test_backs_off_and_resets(self):
+        """Test doubling while unchanged, the upper bound and reset on change."""
+        interval = AdaptiveInterval(10, 50)
+
+        assert [interval.update(False) for _ in range(4)] == [20, 40, 50, 50]
+        assert interval.update(True) == 10
+
+    def test_invalid_bounds(self):
+        """Test that a maximum below the base interval is rejected."""
+        with pytest.raises(ValueError):
+            AdaptiveInterval(10, 5)
+
+
+class TestSheetWatcher:
+    """Test cases for SheetWatcher against the stand-in server."""
+
+    def make_watcher(self, sheet_server, tmp_path, tabs, **kwargs):
+        clock = FakeClock()
+        changes = []
+        watcher = SheetWatcher(make_client(sheet_server, tmp_path), tabs,
+                               lambda tab, df: changes.append((tab, df.iloc[0]["A"])),
+                               interval=10, max_interval=40, sleep=clock.sleep, clock=clock, **kwargs)
+        return watcher, clock, changes
+
+    def test_change_detection_and_backoff(self, sheet_server, tmp_path):
+        """Test that only changed payloads trigger on_change and 304s back off."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        sheet_server.send_validators = True
+        watcher, clock, changes = self.make_watcher(sheet_server, tmp_path, [("book", "1")])
+
+        watcher.run(max_polls=3)
+        sheet_server.tabs["1"] = "A\n2\n"
+        watcher.run(max_polls=1)
+
+        assert changes == [(("book", "1"), 1), (("book", "1"), 2)]
+        assert [r.status for r in watcher.records] == ["changed", "unchanged", "unchanged", "changed"]
+        assert [r.source for r in watcher.records] == ["download", "not-modified", "not-modified", "download"]
+        assert clock.slept == [10, 20, 40]
+        assert watcher.records[-1].next_interval == 10
+        assert watcher.records[1].bytes_downloaded == 0
+
+    def test_failing_tab_is_isolated(self, sheet_server, tmp_path):
+        """Test that an erroring tab is recorded while other tabs keep updating."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        sheet_server.fail_gids = {"2"}
+        watcher, _, changes = self.make_watcher(sheet_server, tmp_path, [("book", "1"), ("book", "2")])
+
+        records = {(r.sheet, r.status) for r in watcher.poll_due()}
+
+        assert records == {("1", "changed"), ("2", "error")}
+        assert changes == [(("book", "1"), 1)]
+
+    def test_records_are_bounded(self, sheet_server, tmp_path):
+        """Test that only the most recent polls are kept in memory."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        sheet_server.send_validators = True
+        watcher, _, _ = self.make_watcher(sheet_server, tmp_path, [("book", "1")], max_records=2)
+
+        watcher.run(max_polls=4)
+
+        assert [r.status for r in watcher.records] == ["unchanged", "unchanged"]
+        assert watcher.records[-1].next_interval == 40
+
+    def test_metrics_log(self, sheet_server, tmp_path):
+        """Test that every poll is appended to the JSON lines metrics file."""
+        sheet_server.tabs = {"1": "A\n1\n"}
+        sheet_server.send_validators = True
+        metrics = tmp_path / "polls.jsonl"
+        watcher, _, _ = self.make_watcher(sheet_server, tmp_path, [("book", "1")], metrics_path=metrics)
+
+        watcher.run(max_polls=2)
+
+        lines = [json.loads(line) for line in metrics.read_text().splitlines()]
+        assert [line["source"] for line in lines] == ["download", "not-modified"]
+        assert lines[0]["bytes_downloaded"] == len("A\n1\n")
+        assert lines[0]["latency"] >= 0
+
+
+def test_batch_watch_regenerates_output(sheet_server, tmp_path, monkeypatch):
+    """Test that watch mode writes the output of every config sharing a changed tab."""
+    sheet_server.tabs = {"5": "A,B\nx,y\n"}
+    outputs = []
+    configs = []
+    for name in ("a", "b"):
+        output = tmp_path / f"{name}.txt"
+        config = tmp_path / f"{name}.toml"
+        config.write_text(f'raid_name = "BWL"\noutput_file = "{output.as_posix()}"\n'
+                          'spreadsheet_url = "https://docs.google.com/spreadsheets/d/book/edit"\nsheet = "5"\n')
+        outputs.append(output)
+        configs.append(config)
+
+    batch = BatchAssignmentGenerator(configs)
+    batch.web_client = make_client(sheet_server, tmp_path)
+    monkeypatch.setattr(SheetWatcher, "run", lambda self, max_polls=None: self.poll_due())
+
+    batch.watch(30, 600)
+
+    assert len(sheet_server.requests) == 1
+    assert all("=== BWL RAID ASSIGNMENTS ===" in output.read_text() for output in outputs)
+
+
+def test_batch_watch_rewrites_extra_outputs(sheet_server, tmp_path, monkeypatch):
+    """Test that watch mode also rewrites the [outputs] files of a config on change."""
+    def csv(tank, healer):
+        return "\n".join(",".join(row) for row in bwl_rows([tank], [healer])) + "\n"
+
+    sheet_server.tabs = {"5": csv("Arthas", "Jaina")}
+    sheet_server.send_validators = True
+    config = tmp_path / "bwl.toml"
+    config.write_text(f'raid_name = "BWL"\noutput_file = "{(tmp_path / "bwl.txt").as_posix()}"\n'
+                      'spreadsheet_url = "https://docs.google.com/spreadsheets/d/book/edit"\nsheet = "5"\n'
+                      f'[outputs]\njson = "{(tmp_path / "bwl.json").as_posix()}"\n')
+
+    batch = BatchAssignmentGenerator([config])
+    batch.web_client = make_client(sheet_server, tmp_path)
+    monkeypatch.setattr(SheetWatcher, "run", lambda self, max_polls=None: self.poll_due())
+    batch.watch(30, 600)
+    assert "Arthas" in (tmp_path / "bwl.json").read_text(encoding="utf-8")
+
+    sheet_server.tabs["5"] = csv("Malfurion", "Thrall")
+    batch.watch(30, 600)
+
+    trash = json.loads((tmp_path / "bwl.json").read_text(encoding="utf-8"))["sections"][0]
+    assert {"player": "Thrall", "role": "healer", "target": "Malfurion"} in trash["assignments"]
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Tests for the addon release and install tool
+"""
+
+import argparse
+import os
+import zipfile
+
+import pytest
+
+import wowaddon
+from wowaddon import BuildTool
+
+HEAD = "0123456789abcdef0123456789abcdef01234567"
+
+TEMPLATE = """## Interface: ${UI_VERSION}
+## Title: ${ADDON_TITLE}
+## Version: ${VERSION}
+
+embeds.xml
+Src/Core.lua
+"""
+
+
+@pytest.fixture
+def addon_tree(tmp_path, monkeypatch):
+    """A minimal addon checkout in tmp_path, made the working directory."""
+    files = {
+        "toc_template.toc": TEMPLATE,
+        "embeds.xml": '<Ui>\n  <Script file="Libs/LibStub/LibStub.lua"/>\n</Ui>\n',
+        "Libs/LibStub/LibStub.lua": "LibStub = {}\n",
+        "Src/Core.lua": "local addon = LibStub\n",
+        "Textures/icon.tga": "tga",
+        "Bindings.xml": "<Bindings/>\n",
+        "ANGRYASSIGN_README.md": "readme\n",
+        ".git/HEAD": HEAD + "\n",
+    }
+    for name, content in files.items():
+        path = tmp_path / "src" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    monkeypatch.chdir(tmp_path / "src")
+    wowaddon.git_head.cache_clear()
+    wowaddon.read_template.cache_clear()
+    yield tmp_path
+    wowaddon.git_head.cache_clear()
+    wowaddon.read_template.cache_clear()
+
+
+def build_args(dst, **options) -> argparse.Namespace:
+    defaults = {"version": None, "jobs": 1, "checksum": False, "strip": False, "verify": False, "dry_run": False}
+    return argparse.Namespace(dst=str(dst), **{**defaults, **options})
+
+
+def install(dst, **options) -> None:
+    BuildTool(build_args(dst, **options)).do_install(wowaddon.ADDON_NAME_CLASSIC)
+
+
+def source_files(root, files):
+    """Write FILES (relative path -> text) under ROOT; returns the install sources for them."""
+    sources = {}
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        sources[rel] = str(path)
+    return sources
+
+
+def tree(root):
+    return {rel: (root / rel).read_text(encoding="utf-8") for rel in sorted(wowaddon.list_files(str(root)))}
+
+
+class TestSyncInstall:
+    """Test cases for the delta sync into a staging directory."""
+
+    def test_copies_new_install(self, tmp_path):
+        """Test a first install, with a generated file next to copied ones."""
+        sources = source_files(tmp_path / "src", {"Core.lua": "core", "Libs/Lib.lua": "lib"})
+        sources["Addon.toc"] = b"## Title: Addon\n"
+
+        stats = wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+
+        assert (stats.copied, stats.unchanged, stats.removed) == (3, 0, 0)
+        assert stats.bytes_copied == len("core") + len("lib") + len("## Title: Addon\n")
+        assert tree(tmp_path / "Addon") == {"Addon.toc": "## Title: Addon\n", "Core.lua": "core",
+                                            "Libs/Lib.lua": "lib"}
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["Addon", "src"]
+
+    def test_skips_unchanged_and_removes_stale(self, tmp_path):
+        """Test that only changed files are copied and files no longer shipped are removed."""
+        sources = source_files(tmp_path / "src", {"Core.lua": "core", "Old.lua": "old", "Same.lua": "same"})
+        wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+        assert wowaddon.sync_install(sources, str(tmp_path / "Addon")).up_to_date
+
+        sources = source_files(tmp_path / "src", {"Core.lua": "core v2"})
+        sources["Same.lua"] = str(tmp_path / "src" / "Same.lua")
+        stats = wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+
+        assert (stats.copied, stats.unchanged, stats.removed) == (1, 1, 1)
+        assert tree(tmp_path / "Addon") == {"Core.lua": "core v2", "Same.lua": "same"}
+
+    def test_destination_altered_out_of_band(self, tmp_path):
+        """Test that installed files deleted, edited or added by hand are put back in line."""
+        sources = source_files(tmp_path / "src", {"Core.lua": "core", "Utils.lua": "utils"})
+        wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+        (tmp_path / "Addon" / "Core.lua").unlink()
+        (tmp_path / "Addon" / "Utils.lua").write_text("local utils", encoding="utf-8")
+        (tmp_path / "Addon" / "Extra.lua").write_text("extra", encoding="utf-8")
+
+        stats = wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+
+        assert (stats.copied, stats.removed) == (2, 1)
+        assert tree(tmp_path / "Addon") == {"Core.lua": "core", "Utils.lua": "utils"}
+
+    def test_checksum_compares_contents(self, tmp_path):
+        """Test that --checksum catches an edit that kept the size and modification time."""
+        sources = source_files(tmp_path / "src", {"Core.lua": "core"})
+        wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+        installed = tmp_path / "Addon" / "Core.lua"
+        stat = installed.stat()
+        installed.write_text("CORE", encoding="utf-8")
+        os.utime(installed, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert wowaddon.is_installed(sources["Core.lua"], str(installed), checksum=False)
+        assert not wowaddon.is_installed(sources["Core.lua"], str(installed), checksum=True)
+        assert wowaddon.sync_install(sources, str(tmp_path / "Addon"), checksum=True).copied == 1
+        assert installed.read_text(encoding="utf-8") == "core"
+
+    def test_recovers_interrupted_swap(self, tmp_path, capsys):
+        """Test a swap stopped after moving the old install aside: it is restored, then synced."""
+        sources = source_files(tmp_path / "src", {"Core.lua": "core", "Utils.lua": "utils"})
+        wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+        (tmp_path / "Addon").rename(tmp_path / ".Addon.old")
+        (tmp_path / ".Addon.staging").mkdir()
+        (tmp_path / ".Addon.staging" / "Partial.lua").write_text("partial", encoding="utf-8")
+
+        stats = wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+
+        assert "restoring" in capsys.readouterr().out
+        assert stats.up_to_date and stats.unchanged == 2
+        assert tree(tmp_path / "Addon") == {"Core.lua": "core", "Utils.lua": "utils"}
+
+    def test_drops_backup_of_finished_swap(self, tmp_path):
+        """Test a swap stopped after both renames: the old install left behind is deleted."""
+        sources = source_files(tmp_path / "src", {"Core.lua": "core"})
+        wowaddon.sync_install(sources, str(tmp_path / "Addon"))
+        (tmp_path / ".Addon.old").mkdir()
+        (tmp_path / ".Addon.old" / "Core.lua").write_text("previous", encoding="utf-8")
+
+        wowaddon.recover_interrupted_swap(str(tmp_path / "Addon"), str(tmp_path / ".Addon.old"))
+
+        assert not (tmp_path / ".Addon.old").exists()
+        assert tree(tmp_path / "Addon") == {"Core.lua": "core"}
+
+
+class TestBuildGraph:
+    """Test cases for the fingerprinted build steps."""
+
+    def graph(self, tmp_path, fingerprints, actions):
+        """A graph of step a, writing a.txt, and step b depending on it."""
+        graph = wowaddon.BuildGraph(str(tmp_path / "state.json"))
+
+        def write_a():
+            actions.append("a")
+            (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+
+        graph.add(wowaddon.BuildStep("a", lambda: fingerprints["a"], write_a, outputs=[str(tmp_path / "a.txt")]))
+        graph.add(wowaddon.BuildStep("b", lambda: fingerprints["b"], lambda: actions.append("b"), deps=["a"]))
+        return graph
+
+    def test_dry_run_lists_steps(self, tmp_path, capsys):
+        """Test that a dry run lists the stale steps and why, without running them."""
+        actions = []
+
+        ran = self.graph(tmp_path, {"a": "1", "b": "1"}, actions).run(dry_run=True)
+
+        assert ran == ["a", "b"] and actions == []
+        out = capsys.readouterr().out
+        assert f"Would run: a ({tmp_path / 'a.txt'} is missing)" in out
+        assert "Would run: b (a would run)" in out
+        assert not (tmp_path / "state.json").exists()
+
+    def test_skips_matching_fingerprints(self, tmp_path, capsys):
+        """Test that steps whose fingerprint is unchanged are skipped, and changed ones rerun."""
+        fingerprints, actions = {"a": "1", "b": "1"}, []
+        assert self.graph(tmp_path, fingerprints, actions).run() == ["a", "b"]
+        assert self.graph(tmp_path, fingerprints, actions).run() == []
+        assert "Up to date: a" in capsys.readouterr().out
+
+        fingerprints["b"] = "2"
+        assert self.graph(tmp_path, fingerprints, actions).run() == ["b"]
+        assert actions == ["a", "b", "b"]
+        assert "Running: b (inputs changed)" in capsys.readouterr().out
+
+    def test_reruns_when_output_missing(self, tmp_path, capsys):
+        """Test that a deleted output reruns its step, whose fingerprint still matches."""
+        fingerprints, actions = {"a": "1", "b": "1"}, []
+        self.graph(tmp_path, fingerprints, actions).run()
+        (tmp_path / "a.txt").unlink()
+
+        assert self.graph(tmp_path, fingerprints, actions).run() == ["a"]
+        assert (tmp_path / "a.txt").exists()
+
+    def test_unknown_dependency(self, tmp_path):
+        """Test that a step must come after the steps it depends on."""
+        graph = wowaddon.BuildGraph(str(tmp_path / "state.json"))
+        with pytest.raises(ValueError, match="depends on unknown step 'a'"):
+            graph.add(wowaddon.BuildStep("b", str, lambda: None, deps=["a"]))
+
+
+class TestReadGitHead:
+    """Test cases for resolving HEAD without running git."""
+
+    other = "fedcba9876543210fedcba9876543210fedcba98"
+
+    def git_dir(self, root, files):
+        for name, content in files.items():
+            path = root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+        return str(root)
+
+    def test_loose_ref(self, tmp_path):
+        """Test a branch ref file, which wins over packed-refs."""
+        repo = self.git_dir(tmp_path, {".git/HEAD": "ref: refs/heads/main\n",
+                                       ".git/refs/heads/main": HEAD + "\n",
+                                       ".git/packed-refs": f"{self.other} refs/heads/main\n"})
+        assert wowaddon.read_git_head(repo) == HEAD
+
+    def test_packed_refs(self, tmp_path):
+        """Test a branch found only in packed-refs."""
+        repo = self.git_dir(tmp_path, {".git/HEAD": "ref: refs/heads/main\n",
+                                       ".git/packed-refs": f"# pack-refs with: peeled fully-peeled sorted\n"
+                                                           f"{self.other} refs/heads/dev\n{HEAD} refs/heads/main\n"})
+        assert wowaddon.read_git_head(repo) == HEAD
+
+    def test_detached_head(self, tmp_path):
+        """Test a HEAD holding the commit hash itself."""
+        repo = self.git_dir(tmp_path, {".git/HEAD": HEAD + "\n"})
+        assert wowaddon.read_git_head(repo) == HEAD
+
+    def test_worktree(self, tmp_path):
+        """Test a worktree's .git file, with the branch ref in the main repository."""
+        self.git_dir(tmp_path / "main", {".git/worktrees/wt/HEAD": "ref: refs/heads/feature\n",
+                                         ".git/worktrees/wt/commondir": "../..\n",
+                                         ".git/refs/heads/feature": HEAD + "\n"})
+        repo = self.git_dir(tmp_path / "wt", {".git": "gitdir: ../main/.git/worktrees/wt\n"})
+        assert wowaddon.read_git_head(repo) == HEAD
+
+    def test_unresolved(self, tmp_path):
+        """Test None for a missing .git or an unknown branch."""
+        assert wowaddon.read_git_head(str(tmp_path)) is None
+        repo = self.git_dir(tmp_path, {".git/HEAD": "ref: refs/heads/gone\n"})
+        assert wowaddon.read_git_head(repo) is None
+
+
+EMBEDS = {
+    "embeds.xml": """<Ui>
+  <!-- <Include file="Libs\\Commented\\lib.xml"/> -->
+  <Script file="Libs\\LibStub\\LibStub.lua"/>
+  <Include file="Libs\\AceAddon\\AceAddon.xml"/>
+  <Include file="Libs\\AceGUI\\AceGUI.xml"/>
+  <Include file="Libs\\Media\\widget.xml"/>
+  <Include file="Libs\\LibUnused\\lib.xml"/>
+</Ui>
+""",
+    "Libs/LibStub/LibStub.lua": "LibStub = {}\n",
+    "Libs/AceAddon/AceAddon.xml": '<Ui><Script file="AceAddon.lua"/></Ui>\n',
+    "Libs/AceAddon/AceAddon.lua": 'local MAJOR, MINOR = "AceAddon-3.0", 1\nLibStub:NewLibrary(MAJOR, MINOR)\n'
+                                  'local gui = LibStub("AceGUI-3.0")\n',
+    "Libs/AceGUI/AceGUI.xml": '<Ui><Script file="AceGUI.lua"/><Include file="widgets\\widgets.xml"/></Ui>\n',
+    "Libs/AceGUI/AceGUI.lua": 'LibStub:NewLibrary("AceGUI-3.0", 1)\n',
+    "Libs/AceGUI/widgets/widgets.xml": '<Ui>\n<Script file="Button.lua"/>\n<!-- <Script file="Old.lua"/> -->\n</Ui>\n',
+    "Libs/AceGUI/widgets/Button.lua": 'local Type = "Button"\nAceGUI:RegisterWidgetType(Type, Constructor, 1)\n',
+    "Libs/AceGUI/widgets/Old.lua": "-- not loaded\n",
+    "Libs/Media/widget.xml": '<Ui><Script file="Font.lua"/></Ui>\n',
+    "Libs/Media/Font.lua": 'AceGUI:RegisterWidgetType("LSM30_Font", Constructor, 1)\nLibStub("LibUnused-1.0")\n',
+    "Libs/LibUnused/lib.xml": '<Ui><Script file="lib.lua"/></Ui>\n',
+    "Libs/LibUnused/lib.lua": 'LibStub:NewLibrary("LibUnused-1.0", 1)\n',
+    "Src/Core.lua": 'local addon = LibStub("AceAddon-3.0"):NewAddon("AngrySparks")\n',
+}
+
+
+class TestPruneEmbeds:
+    """Test cases for shipping only the libraries embeds.xml entries need."""
+
+    @pytest.fixture
+    def embeds_tree(self, addon_tree):
+        for name, content in EMBEDS.items():
+            path = addon_tree / "src" / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+        return addon_tree
+
+    def test_xml_load_list(self, embeds_tree):
+        """Test nested Include entries in load order, without commented-out ones."""
+        files = wowaddon.xml_load_list(os.path.join("Libs", "AceGUI", "AceGUI.xml"))
+
+        assert [path.replace(os.sep, "/") for path in files] == [
+            "Libs/AceGUI/AceGUI.xml", "Libs/AceGUI/AceGUI.lua",
+            "Libs/AceGUI/widgets/widgets.xml", "Libs/AceGUI/widgets/Button.lua"]
+
+    def test_kept_and_dropped(self, embeds_tree):
+        """Test that libraries are kept through references from kept code, transitively."""
+        kept, dropped = wowaddon.prune_embeds("embeds.xml", [os.path.join("Src", "Core.lua")])
+
+        assert [unit.entry for unit in kept] == [
+            '<Script file="Libs\\LibStub\\LibStub.lua"/>', '<Include file="Libs\\AceAddon\\AceAddon.xml"/>',
+            '<Include file="Libs\\AceGUI\\AceGUI.xml"/>']
+        assert kept[2].provides == {"AceGUI-3.0", "Button"}
+        # The Media widget is used by nothing kept, so the library only it names goes too
+        assert [sorted(unit.provides) for unit in dropped] == [["LSM30_Font"], ["LibUnused-1.0"]]
+
+    def test_shipped_files(self, embeds_tree):
+        """Test that the packaged Libs hold exactly the files the kept entries load."""
+        tool = BuildTool(build_args(embeds_tree / "out"))
+        tool.write_embeds()
+
+        inputs = dict(tool.source_inputs("AngrySparks", ["embeds.xml"]))
+
+        assert sorted(name for name in inputs if name.startswith("AngrySparks/Libs/")) == [
+            "AngrySparks/Libs/AceAddon/AceAddon.lua", "AngrySparks/Libs/AceAddon/AceAddon.xml",
+            "AngrySparks/Libs/AceGUI/AceGUI.lua", "AngrySparks/Libs/AceGUI/AceGUI.xml",
+            "AngrySparks/Libs/AceGUI/widgets/Button.lua", "AngrySparks/Libs/AceGUI/widgets/widgets.xml",
+            "AngrySparks/Libs/LibStub/LibStub.lua"]
+        with open(inputs["AngrySparks/embeds.xml"], encoding="utf-8") as f:
+            embeds = f.read()
+        assert "AceGUI.xml" in embeds and "Media" not in embeds and "LibUnused" not in embeds
+
+
+def kinds(source):
+    return [(kind, text) for kind, text, _ in wowaddon.lua_tokens(source) if kind != "space"]
+
+
+class TestLuaTokens:
+    """Test cases for the Lua lexer behind --strip."""
+
+    def test_long_brackets(self):
+        """Test long strings and comments with levels, holding closers of other levels."""
+        source = "s = [==[ a ]] b ]=] ]==]\n--[[ one\ntwo ]] t = [[x]]\n--[=[ ]] ]=]"
+
+        assert kinds(source) == [("name", "s"), ("op", "="), ("string", "[==[ a ]] b ]=] ]==]"),
+                                 ("comment", "--[[ one\ntwo ]]"), ("name", "t"), ("op", "="),
+                                 ("string", "[[x]]"), ("comment", "--[=[ ]] ]=]")]
+        assert [line for kind, _, line in wowaddon.lua_tokens(source) if kind == "name"] == [1, 3]
+
+    def test_minus_and_comment(self):
+        """Test that `- -x` is two minus signs and `--x` a comment."""
+        assert kinds("y = - -x") == [("name", "y"), ("op", "="), ("op", "-"), ("op", "-"), ("name", "x")]
+        assert kinds("y = --x") == [("name", "y"), ("op", "="), ("comment", "--x")]
+
+    def test_numbers_and_concatenation(self):
+        """Test that `1 ..x` stays a number and a concatenation, like llex.c reads it."""
+        assert kinds("1 ..x") == [("number", "1"), ("op", ".."), ("name", "x")]
+        assert kinds("1..x") == [("number", "1..x")]  # a malformed number in Lua too
+        assert kinds("a.. b") == [("name", "a"), ("op", ".."), ("name", "b")]
+        assert kinds("1e-5+0x1F") == [("number", "1e-5"), ("op", "+"), ("number", "0x1F")]
+
+    def test_escaped_newline_in_string(self):
+        """Test a string continued on the next line with a backslash."""
+        tokens = wowaddon.lua_tokens('s = "a\\\nb" x')
+
+        assert tokens[4] == ("string", '"a\\\nb"', 1)
+        assert tokens[-1] == ("name", "x", 2)
+
+
+class TestStripSource:
+    """Test cases for stripping packaged files."""
+
+    def test_strip_lua(self):
+        """Test that comments and spaces go, and spaces that keep tokens apart stay."""
+        source = ("-- header\nlocal s = [==[ keep  --this ]==] -- note\n"
+                  "y = - -x\na = 1 ..x\nb = a.. b\nc = \"a\\\nb\" --[[ long\n comment ]]\n")
+
+        stripped = wowaddon.strip_lua(source)
+
+        assert stripped == ("\nlocal s=[==[ keep  --this ]==]\ny=- -x\na=1 ..x\nb=a..b\n"
+                            "c=\"a\\\nb\"\n")
+        assert wowaddon.lua_significant(stripped) == wowaddon.lua_significant(source)
+
+    def test_strip_xml_and_toc(self):
+        """Test that XML loses comments and indentation and TOC files keep ## lines."""
+        assert wowaddon.strip_source("embeds.xml", "<Ui>\n  <!-- c -->\n  <Script file=\"a.lua\"/>\n\n</Ui>\n",
+                                     verify=True) == "<Ui>\n<Script file=\"a.lua\"/>\n</Ui>\n"
+        assert wowaddon.strip_source("A.toc", "## Title: A\n# comment\n\nSrc/Core.lua\n",
+                                     verify=True) == "## Title: A\nSrc/Core.lua\n"
+
+    def test_verify_passes(self):
+        """Test that verify accepts the stripped text of a tricky file."""
+        source = "local t = {1 ..x, - -y} -- c\nreturn a.. b\n"
+        assert wowaddon.strip_source("Src/A.lua", source, verify=True) == "local t={1 ..x,- -y}\nreturn a..b\n"
+
+    def test_verify_failure(self, monkeypatch):
+        """Test that verify rejects a stripper that changed the tokens."""
+        monkeypatch.setitem(wowaddon.STRIPPERS, ".lua", (lambda text: text.replace(" ", ""), wowaddon.lua_significant))
+
+        assert wowaddon.strip_source("Src/A.lua", "y = - -x\n") == "y=--x\n"
+        with pytest.raises(RuntimeError, match="Stripping changed the tokens of Src/A.lua"):
+            wowaddon.strip_source("Src/A.lua", "y = - -x\n", verify=True)
+
+
+class TestBuildZip:
+    """Test cases for the deterministic archive and its incremental rebuild."""
+
+    def inputs(self, tmp_path, files):
+        sources = source_files(tmp_path / "src", files)
+        return [(f"Addon/{rel}", path) for rel, path in sources.items()]
+
+    def test_byte_identical(self, tmp_path):
+        """Test that the same inputs give the same bytes, reused from the manifest or not."""
+        inputs = self.inputs(tmp_path, {"Core.lua": "core", "Libs/Lib.lua": "lib" * 100})
+
+        wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json"))
+        first = (tmp_path / "a.zip").read_bytes()
+        stats = wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json"))
+        wowaddon.build_zip(str(tmp_path / "b.zip"), inputs, str(tmp_path / "b.json"))
+
+        assert stats == {"reused": 2, "compressed": 0}
+        assert (tmp_path / "a.zip").read_bytes() == first == (tmp_path / "b.zip").read_bytes()
+
+    def test_recompresses_changed_member_only(self, tmp_path):
+        """Test that an edited file is compressed again and every other member is copied raw."""
+        inputs = self.inputs(tmp_path, {"Core.lua": "core", "Utils.lua": "utils", "Libs/Lib.lua": "lib"})
+        wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json"))
+        before = wowaddon.read_raw_members(str(tmp_path / "a.zip"))
+
+        (tmp_path / "src" / "Utils.lua").write_text("local utils = {}", encoding="utf-8")
+        stats = wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json"))
+        after = wowaddon.read_raw_members(str(tmp_path / "a.zip"))
+
+        assert stats == {"reused": 2, "compressed": 1}
+        assert after["Addon/Core.lua"].data == before["Addon/Core.lua"].data
+        assert after["Addon/Libs/Lib.lua"].data == before["Addon/Libs/Lib.lua"].data
+        assert after["Addon/Utils.lua"].data != before["Addon/Utils.lua"].data
+
+    def test_archive_is_valid(self, tmp_path):
+        """Test that zipfile reads back every member with a matching CRC."""
+        inputs = self.inputs(tmp_path, {"Core.lua": "core", "Empty.lua": "", "Textures/icon.tga": "tga"})
+        wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json"))
+        (tmp_path / "src" / "Core.lua").write_text("core v2", encoding="utf-8")
+        wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json"))
+
+        with zipfile.ZipFile(tmp_path / "a.zip") as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == ["Addon/Core.lua", "Addon/Empty.lua", "Addon/Textures/icon.tga"]
+            assert zf.read("Addon/Core.lua") == b"core v2"
+            assert zf.getinfo("Addon/Core.lua").date_time == (1980, 1, 1, 0, 0, 0)
+
+    def test_missing_previous_archive(self, tmp_path):
+        """Test that a manifest whose archive was deleted compresses every member again."""
+        inputs = self.inputs(tmp_path, {"Core.lua": "core"})
+        wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json"))
+        (tmp_path / "a.zip").unlink()
+
+        assert wowaddon.build_zip(str(tmp_path / "a.zip"), inputs, str(tmp_path / "a.json")) == \
+            {"reused": 0, "compressed": 1}
+
+
+class TestReleaseCommand:
+    """Test cases for the release and zip commands."""
+
+    @staticmethod
+    def tocs(zip_path):
+        with zipfile.ZipFile(zip_path) as zf:
+            assert zf.testzip() is None
+            return {name: zf.read(name).decode("utf-8") for name in zf.namelist() if name.endswith(".toc")}
+
+    def test_release(self, addon_tree):
+        """Test the multi-TOC archive and one archive per flavor with that flavor's TOC."""
+        dst = addon_tree / "dist"
+        dst.mkdir()
+        BuildTool(build_args(dst)).do_release(wowaddon.ADDON_NAME_CLASSIC)
+
+        multi = self.tocs(dst / f"AngrySparks-{wowaddon.VERSION}.zip")
+        assert sorted(multi) == sorted(f"AngrySparks/{toc}" for toc, _ in
+                                       BuildTool.toc_targets(wowaddon.ADDON_NAME_CLASSIC))
+        assert len(multi) == 5
+        for ui_version, suffix in wowaddon.FLAVORS.values():
+            tocs = self.tocs(dst / f"AngrySparks-{wowaddon.VERSION}{suffix}.zip")
+            assert list(tocs) == ["AngrySparks/AngrySparks.toc"]
+            assert f"## Interface: {ui_version}\n" in tocs["AngrySparks/AngrySparks.toc"]
+            assert multi[f"AngrySparks/AngrySparks{suffix}.toc"] == tocs["AngrySparks/AngrySparks.toc"]
+
+    def test_zip_version(self, addon_tree):
+        """Test that zip --version writes only that flavor's archive."""
+        dst = addon_tree / "dist"
+        dst.mkdir()
+        BuildTool(build_args(dst, version="tbc")).do_zip(wowaddon.ADDON_NAME_CLASSIC)
+
+        assert sorted(path.name for path in dst.glob("*.zip")) == [f"AngrySparks-{wowaddon.VERSION}-BCC.zip"]
+        tocs = self.tocs(dst / f"AngrySparks-{wowaddon.VERSION}-BCC.zip")
+        assert list(tocs) == ["AngrySparks/AngrySparks.toc"]
+        assert "## Interface: 20504\n" in tocs["AngrySparks/AngrySparks.toc"]
+
+
+class TestInstallCommand:
+    """Test cases for the install command."""
+
+    def test_restores_files_changed_out_of_band(self, addon_tree, capsys):
+        """Test that a file deleted or edited in the AddOns folder is restored with unchanged sources."""
+        addon = addon_tree / "AddOns" / "AngrySparks"
+        install(addon_tree / "AddOns")
+        assert (addon / "Src" / "Core.lua").read_text(encoding="utf-8") == "local addon = LibStub\n"
+        assert f"## Version: {wowaddon.VERSION}-{HEAD[:8]}" in (addon / "AngrySparks.toc").read_text()
+
+        (addon / "Src" / "Core.lua").unlink()
+        (addon / "Bindings.xml").write_text("<Broken/>\n", encoding="utf-8")
+        capsys.readouterr()
+        install(addon_tree / "AddOns", checksum=True)
+
+        assert "2 file(s) copied" in capsys.readouterr().out
+        assert (addon / "Src" / "Core.lua").read_text(encoding="utf-8") == "local addon = LibStub\n"
+        assert (addon / "Bindings.xml").read_text(encoding="utf-8") == "<Bindings/>\n"
+
+        install(addon_tree / "AddOns")
+        assert "already up to date, nothing to do" in capsys.readouterr().out
+
+    def test_dry_run(self, addon_tree, capsys):
+        """Test that a dry run reports the sync without touching the destination."""
+        install(addon_tree / "AddOns")
+        (addon_tree / "AddOns" / "AngrySparks" / "Src" / "Core.lua").unlink()
+        capsys.readouterr()
+
+        install(addon_tree / "AddOns", dry_run=True)
+
+        assert "Would install: 1 file(s) to copy" in capsys.readouterr().out
+        assert not (addon_tree / "AddOns" / "AngrySparks" / "Src" / "Core.lua").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
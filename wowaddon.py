@@ -4,11 +4,21 @@
 #
 
 import argparse
+import hashlib
+import json
 import os
+import re
 import shutil
+import struct
 import subprocess
 import sys
+import tempfile
 import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 
 VERSION = '2025.7.0'  # year.month.build_num
 
@@ -28,6 +38,654 @@ SUFFIX_TBC = "-BCC"  # "_TBC"
 SUFFIX_WRATH = "-WOTLKC"  # "_Wrath"
 SUFFIX_CATA = "-Cata"  # "_Cata???"
 
+# --version name: (UI version, TOC and artifact suffix)
+FLAVORS = {
+    'classic': (UI_VERSION_CLASSIC, SUFFIX_CLASSIC),
+    'tbc': (UI_VERSION_CLASSIC_TBC, SUFFIX_TBC),
+    'wotlk': (UI_VERSION_CLASSIC_WOTLK, SUFFIX_WRATH),
+    'cata': (UI_VERSION_CLASSIC_CATA, SUFFIX_CATA),
+}
+
+
+# Fixed timestamp for every zip member (1980-01-01 00:00, the DOS epoch), so identical
+# inputs produce byte-identical archives
+ZIP_DOS_TIME = 0
+ZIP_DOS_DATE = (0 << 9) | (1 << 5) | 1
+ZIP_EXTERNAL_ATTR = 0o100644 << 16  # regular file, rw-r--r--
+ZIP_COMPRESS_LEVEL = zlib.Z_DEFAULT_COMPRESSION  # same level zipfile used
+
+BUILD_STATE = '.build-state.json'  # fingerprints of the last run of every build step
+PRUNED_EMBEDS = os.path.join('.build', 'embeds.xml')  # embeds.xml without the unused libraries
+STRIP_DIR = os.path.join('.build', 'strip')  # --strip copies of the packaged files, by archive name
+
+XML_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+XML_LOAD_RE = re.compile(r'<(?:Script|Include)\s+file\s*=\s*"([^"]+)"[^>]*>', re.I)
+LUA_STRING_RE = re.compile(r'"((?:[^"\\\n]|\\.)*)"|\'((?:[^\'\\\n]|\\.)*)\'')
+# Names a library registers: LibStub:NewLibrary(MAJOR, ...) and AceGUI:RegisterWidgetType(Type, ...)
+LUA_REGISTER_RE = re.compile(r'(?:LibStub:NewLibrary|:RegisterWidgetType)\(\s*("[^"]*"|\'[^\']*\'|\w+)')
+
+# Lua 5.1 lexer. Numbers are matched like llex.c reads them (digits and dots, an
+# exponent sign, then any alphanumerics), so a stripped `1 ..x` is not glued into `1..x`
+LUA_TOKEN_RE = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>--\[(?P<ceq>=*)\[.*?\](?P=ceq)\]|--[^\n]*)
+  | (?P<string>\[(?P<seq>=*)\[.*?\](?P=seq)\]|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<number>(?:\d|\.\d)[\d.]*(?:[eE][+-]?)?\w*)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>\.\.\.|\.\.|==|~=|<=|>=|::|//|<<|>>|.)
+''', re.S | re.X)
+
+
+def resolve_path(path: str) -> str:
+    """ Find PATH on disk ignoring case (COPY_DIRS says 'Libs', the checkout may have 'libs') """
+    if os.path.exists(path):
+        return path
+    resolved = '.'
+    for part in path.replace('\\', '/').split('/'):
+        candidate = os.path.join(resolved, part)
+        if not os.path.exists(candidate) and os.path.isdir(resolved):
+            candidate = next((os.path.join(resolved, name) for name in os.listdir(resolved)
+                              if name.lower() == part.lower()), candidate)
+        resolved = candidate
+    return os.path.normpath(resolved)
+
+
+def collect_inputs(toc_name: str, copy_dirs: List[str], copy_files: List[str]) -> List[Tuple[str, str]]:
+    """ List (archive name, source path) for every packaged file, sorted by archive name """
+    inputs = []
+    for copy_dir in copy_dirs:
+        src_dir = resolve_path(copy_dir)
+        for root, dirs, files in os.walk(src_dir):
+            dirs.sort()
+            rel_root = os.path.relpath(root, src_dir).replace(os.sep, '/')
+            for file in sorted(files):
+                rel = file if rel_root == '.' else f'{rel_root}/{file}'
+                inputs.append((f'{toc_name}/{copy_dir}/{rel}', os.path.join(root, file)))
+    for copy_file in copy_files:
+        inputs.append((f'{toc_name}/{copy_file}', resolve_path(copy_file)))
+    return sorted(inputs)
+
+
+def xml_load_list(xml_path: str) -> List[str]:
+    """ XML_PATH and every file it loads through Script and Include, recursively, in load order """
+    with open(xml_path, 'rt', encoding='utf-8') as f:
+        text = XML_COMMENT_RE.sub('', f.read())
+    files = [xml_path]
+    for ref in XML_LOAD_RE.findall(text):
+        path = resolve_path(os.path.join(os.path.dirname(xml_path), ref.replace('\\', '/')))
+        files.extend(xml_load_list(path) if path.lower().endswith('.xml') else [path])
+    return files
+
+
+def lua_strings(source: str) -> Set[str]:
+    return {double or single for double, single in LUA_STRING_RE.findall(source)}
+
+
+def lua_registered_names(source: str) -> Set[str]:
+    """ Library and widget type names a Lua file registers, resolving `local MAJOR = "Name"` """
+    names = set()
+    for arg in LUA_REGISTER_RE.findall(source):
+        if arg[0] in '"\'':
+            names.add(arg[1:-1])
+        else:
+            names.update(re.findall(rf'\b{arg}\s*(?:,\s*\w+\s*)*=\s*["\']([^"\']+)["\']', source))
+    return names
+
+
+@dataclass
+class EmbedUnit:
+    """ One embeds.xml entry: the files it loads, the names they register and the strings they use """
+    entry: str
+    files: List[str]
+    provides: Set[str]
+    references: Set[str]
+
+    @staticmethod
+    def load(entry: str, path: str) -> 'EmbedUnit':
+        files = xml_load_list(path) if path.lower().endswith('.xml') else [path]
+        provides, references = set(), set()
+        for file in files:
+            if file.lower().endswith('.lua'):
+                with open(file, 'rt', encoding='utf-8', errors='replace') as f:
+                    source = f.read()
+                provides |= lua_registered_names(source)
+                references |= lua_strings(source)
+        return EmbedUnit(entry, files, provides, references)
+
+
+def prune_embeds(embeds_path: str, root_files: List[str]) -> Tuple[List[EmbedUnit], List[EmbedUnit]]:
+    """ Split the embeds.xml entries into (kept, dropped).
+
+    An entry is kept if something already kept names one of the libraries or AceGUI
+    widget types it registers, in LibStub("Name"), a NewAddon mixin list or a
+    dialogControl. This matches any string literal, so an unsure match keeps the
+    library. Entries registering nothing, like LibStub itself, are always kept.
+    """
+    with open(embeds_path, 'rt', encoding='utf-8') as f:
+        text = XML_COMMENT_RE.sub('', f.read())
+    units = [EmbedUnit.load(m.group(0), resolve_path(m.group(1).replace('\\', '/')))
+             for m in XML_LOAD_RE.finditer(text)]
+
+    references: Set[str] = set()
+    for root in root_files:
+        with open(root, 'rt', encoding='utf-8', errors='replace') as f:
+            references |= lua_strings(f.read())
+
+    kept = [unit for unit in units if not unit.provides]
+    for unit in kept:
+        references |= unit.references
+    changed = True
+    while changed:
+        changed = False
+        for unit in units:
+            if unit not in kept and unit.provides & references:
+                kept.append(unit)
+                references |= unit.references
+                changed = True
+    return [unit for unit in units if unit in kept], [unit for unit in units if unit not in kept]
+
+
+def lua_tokens(source: str) -> List[Tuple[str, str, int]]:
+    """ Split Lua source into (kind, text, line) tokens, including whitespace and comments """
+    tokens: List[Tuple[str, str, int]] = []
+    pos, line = 0, 1
+    while pos < len(source):
+        m = LUA_TOKEN_RE.match(source, pos)
+        if m is None or m.lastgroup is None or m.end() == pos:
+            raise ValueError(f'Cannot tokenize Lua at line {line}: {source[pos:pos + 20]!r}')
+        tokens.append((m.lastgroup, m.group(0), line))
+        line += m.group(0).count('\n')
+        pos = m.end()
+    return tokens
+
+
+def lua_significant(source: str) -> List[Tuple[str, int]]:
+    return [(text, line) for kind, text, line in lua_tokens(source) if kind not in ('space', 'comment')]
+
+
+def strip_lua(source: str) -> str:
+    """ Drop comments and whitespace from Lua source, keeping string literals verbatim.
+
+    Line breaks are kept, so every token stays on its original line and error
+    messages from players still point at the right source line.
+    """
+    out: List[str] = []
+    prev: Optional[str] = None
+    newlines = 0
+    for kind, text, _ in lua_tokens(source):
+        if kind in ('space', 'comment'):
+            newlines += text.count('\n')
+            continue
+        if newlines:
+            out.append('\n' * newlines)
+        elif prev is not None and [t for _, t, _ in lua_tokens(prev + text)] != [prev, text]:
+            out.append(' ')  # the two tokens would merge, like `local x` or `- -x`
+        out.append(text)
+        prev, newlines = text, 0
+    return ''.join(out) + '\n' if out else ''
+
+
+def strip_xml(text: str) -> str:
+    """ Drop comments, indentation and blank lines from a WoW UI XML file """
+    lines = (line.strip() for line in XML_COMMENT_RE.sub('', text).splitlines())
+    return ''.join(f'{line}\n' for line in lines if line)
+
+
+def xml_significant(text: str) -> List[str]:
+    parts = re.split(r'(<[^>]+>)', XML_COMMENT_RE.sub('', text))
+    return [line.strip() for part in parts for line in part.splitlines() if line.strip()]
+
+
+def strip_toc(text: str) -> str:
+    """ Drop blank and comment lines from a TOC file, keeping the ## metadata """
+    return ''.join(f'{line}\n' for line in toc_significant(text))
+
+
+def toc_significant(text: str) -> List[str]:
+    lines = (line.strip() for line in text.splitlines())
+    return [line for line in lines if line and (line.startswith('##') or not line.startswith('#'))]
+
+
+# Extension: (stripper, what the stripped file must still tokenize to)
+STRIPPERS = {
+    '.lua': (strip_lua, lua_significant),
+    '.xml': (strip_xml, xml_significant),
+    '.toc': (strip_toc, toc_significant),
+}
+
+
+def strip_source(name: str, text: str, verify: bool = False) -> str:
+    """ Strip a packaged Lua, XML or TOC file. With VERIFY, raise RuntimeError unless the
+    stripped text tokenizes to the same tokens (on the same lines, for Lua) """
+    stripper, significant = STRIPPERS[os.path.splitext(name)[1].lower()]
+    stripped = stripper(text)
+    if verify and significant(stripped) != significant(text):
+        raise RuntimeError(f'Stripping changed the tokens of {name}')
+    return stripped
+
+
+@dataclass
+class ZipMember:
+    """ One archive member: its source hash and the raw deflate data stored in the zip """
+    name: str
+    sha256: str
+    crc: int
+    file_size: int
+    data: bytes = field(repr=False)
+
+    @staticmethod
+    def compress(name: str, content: bytes, sha256: str) -> 'ZipMember':
+        compressor = zlib.compressobj(ZIP_COMPRESS_LEVEL, zlib.DEFLATED, -15)
+        data = compressor.compress(content) + compressor.flush()
+        return ZipMember(name, sha256, zlib.crc32(content), len(content), data)
+
+
+class PackageManifest:
+    """ Content hashes of the inputs of the last built archive, stored next to it as JSON.
+
+    Files whose size and mtime are unchanged keep their recorded hash without being
+    read; files whose hash is unchanged reuse their compressed data from the archive.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.archive: Optional[str] = None
+        self.files: Dict[str, dict] = {}
+
+    def load(self) -> 'PackageManifest':
+        try:
+            with open(self.path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            self.archive = data.get('archive')
+            self.files = data.get('files', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return self
+
+    def save(self, archive: str, files: Dict[str, dict]):
+        self.archive, self.files = archive, files
+        with open(self.path, 'wt', encoding='utf-8') as f:
+            json.dump({'archive': archive, 'files': files}, f, indent=1, sort_keys=True)
+
+    def file_hash(self, name: str, path: str) -> Tuple[str, os.stat_result]:
+        """ Return the content hash of PATH, reusing the recorded one if size and mtime match """
+        st = os.stat(path)
+        entry = self.files.get(name)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['sha256'], st
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest(), st
+
+
+def read_raw_members(zip_path: str) -> Dict[str, ZipMember]:
+    """ Read the still-compressed data of every deflated member of an existing archive """
+    members = {}
+    try:
+        with zipfile.ZipFile(zip_path) as zf, open(zip_path, 'rb') as raw:
+            for info in zf.infolist():
+                if info.compress_type != zipfile.ZIP_DEFLATED:
+                    continue
+                raw.seek(info.header_offset)
+                header = raw.read(30)
+                name_len, extra_len = struct.unpack('<HH', header[26:30])
+                raw.seek(info.header_offset + 30 + name_len + extra_len)
+                members[info.filename] = ZipMember(info.filename, '', info.CRC, info.file_size,
+                                                   raw.read(info.compress_size))
+    except (FileNotFoundError, zipfile.BadZipFile):
+        pass
+    return members
+
+
+def write_deterministic_zip(zip_path: str, members: List[ZipMember]):
+    """ Write pre-compressed members with fixed timestamps, atomically replacing ZIP_PATH """
+    out_dir = os.path.dirname(os.path.abspath(zip_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.zip', dir=out_dir)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            central = []
+            for m in members:
+                name = m.name.encode('utf-8')
+                offset = out.tell()
+                out.write(struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, 0x800, zipfile.ZIP_DEFLATED,
+                                      ZIP_DOS_TIME, ZIP_DOS_DATE, m.crc, len(m.data), m.file_size,
+                                      len(name), 0))
+                out.write(name)
+                out.write(m.data)
+                central.append(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 0x0314, 20, 0x800,
+                                           zipfile.ZIP_DEFLATED, ZIP_DOS_TIME, ZIP_DOS_DATE, m.crc,
+                                           len(m.data), m.file_size, len(name), 0, 0, 0, 0,
+                                           ZIP_EXTERNAL_ATTR, offset) + name)
+            cd_offset = out.tell()
+            cd = b''.join(central)
+            out.write(cd)
+            out.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(members), len(members),
+                                  len(cd), cd_offset, 0))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _compress_file(job: Tuple[str, str, str]) -> ZipMember:
+    """ Process pool worker: read and compress one input file """
+    name, path, sha256 = job
+    with open(path, 'rb') as f:
+        return ZipMember.compress(name, f.read(), sha256)
+
+
+def prepare_members(inputs: List[Tuple[str, str]], manifest: PackageManifest,
+                    jobs: int = 1) -> Tuple[List[ZipMember], Dict[str, dict], Dict[str, int]]:
+    """ Compressed members for INPUTS, reusing unchanged ones from the manifest's archive.
+
+    Changed files are compressed in a process pool when JOBS > 1. Returns the members,
+    the manifest records for them and counts of reused and compressed members.
+    """
+    previous = read_raw_members(manifest.archive) if manifest.archive else {}
+
+    members: Dict[str, ZipMember] = {}
+    files = {}
+    to_compress = []
+    for name, path in inputs:
+        sha256, st = manifest.file_hash(name, path)
+        old = previous.get(name)
+        if old and manifest.files.get(name, {}).get('sha256') == sha256:
+            members[name] = ZipMember(name, sha256, old.crc, old.file_size, old.data)
+        else:
+            to_compress.append((name, path, sha256))
+        files[name] = {'sha256': sha256, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+    if jobs > 1 and len(to_compress) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            compressed = list(pool.map(_compress_file, to_compress, chunksize=8))
+    else:
+        compressed = [_compress_file(job) for job in to_compress]
+    members.update((member.name, member) for member in compressed)
+
+    stats = {'reused': len(inputs) - len(to_compress), 'compressed': len(to_compress)}
+    return [members[name] for name, _ in inputs], files, stats
+
+
+def build_zip(zip_path: str, inputs: List[Tuple[str, str]], manifest_path: str) -> Dict[str, int]:
+    """ Build ZIP_PATH from INPUTS, recompressing only files changed since the last build.
+
+    Returns counts of reused and compressed members.
+    """
+    manifest = PackageManifest(manifest_path).load()
+    members, files, stats = prepare_members(inputs, manifest)
+    write_deterministic_zip(zip_path, members)
+    manifest.save(os.path.abspath(zip_path), files)
+    return stats
+
+
+def _write_archive(job: Tuple[str, List[ZipMember]]) -> str:
+    """ Process pool worker: write one release archive """
+    zip_path, members = job
+    write_deterministic_zip(zip_path, sorted(members, key=lambda m: m.name))
+    return zip_path
+
+
+InstallSource = Union[str, bytes]  # a file to copy, or generated content
+
+
+@dataclass
+class SyncStats:
+    copied: int = 0
+    bytes_copied: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+    @property
+    def up_to_date(self) -> bool:
+        return self.copied == 0 and self.removed == 0
+
+
+def file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def is_installed(source: InstallSource, current: str, checksum: bool) -> bool:
+    """ Whether CURRENT already holds SOURCE: same size and mtime, or same content """
+    try:
+        dst_stat = os.stat(current)
+    except FileNotFoundError:
+        return False
+    if isinstance(source, bytes):
+        if dst_stat.st_size != len(source):
+            return False
+        with open(current, 'rb') as f:
+            return f.read() == source
+
+    src_stat = os.stat(source)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    # copy2 preserves mtime; allow the 2 second resolution of FAT/exFAT game drives
+    if not checksum and abs(src_stat.st_mtime - dst_stat.st_mtime) < 2:
+        return True
+    return file_digest(source) == file_digest(current)
+
+
+def list_files(root: str) -> List[str]:
+    """ Relative paths of all files under ROOT, with forward slashes """
+    found: List[str] = []
+    for dir_path, _, files in os.walk(root):
+        rel_dir = os.path.relpath(dir_path, root).replace(os.sep, '/')
+        found.extend(file if rel_dir == '.' else f'{rel_dir}/{file}' for file in files)
+    return found
+
+
+def recover_interrupted_swap(dst_path: str, backup: str):
+    """ Finish or roll back a swap that was interrupted between its two renames """
+    if os.path.isdir(backup):
+        if os.path.isdir(dst_path):
+            shutil.rmtree(backup)
+        else:
+            print(f'Warning: restoring {dst_path} from an interrupted install')
+            os.rename(backup, dst_path)
+
+
+def plan_install(desired: Dict[str, InstallSource], dst_path: str,
+                 checksum: bool = False) -> Tuple[SyncStats, set]:
+    """ Count what sync_install would copy and remove, and which files it keeps """
+    stats = SyncStats()
+    unchanged = set()
+    for rel, source in desired.items():
+        if is_installed(source, os.path.join(dst_path, rel), checksum):
+            unchanged.add(rel)
+    stats.unchanged = len(unchanged)
+    if os.path.isdir(dst_path):
+        stats.removed = len(set(list_files(dst_path)) - set(desired))
+    stats.copied = len(desired) - len(unchanged)
+    return stats, unchanged
+
+
+def sync_install(desired: Dict[str, InstallSource], dst_path: str, checksum: bool = False) -> SyncStats:
+    """ Bring DST_PATH to exactly DESIRED (relative path -> source), copying only changes.
+
+    The new tree is assembled in a sibling staging directory: unchanged files are
+    hard-linked (or copied) from the current install, changed ones copied from the
+    source. The staging directory is then swapped in with two renames, so an
+    interrupted install leaves the previous version in place.
+    """
+    parent, base = os.path.split(os.path.abspath(dst_path))
+    staging = os.path.join(parent, f'.{base}.staging')
+    backup = os.path.join(parent, f'.{base}.old')
+    recover_interrupted_swap(dst_path, backup)
+
+    stats, unchanged = plan_install(desired, dst_path, checksum)
+    if stats.up_to_date:
+        return stats
+
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)
+    for rel, source in sorted(desired.items()):
+        target = os.path.join(staging, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if rel in unchanged:
+            try:
+                os.link(os.path.join(dst_path, rel), target)
+                continue
+            except OSError:
+                pass  # No hard links on this filesystem, copy below
+        if isinstance(source, bytes):
+            with open(target, 'wb') as f:
+                f.write(source)
+        else:
+            shutil.copy2(source, target)
+        if rel not in unchanged:
+            print(f'Copying: {rel}')
+            stats.bytes_copied += os.path.getsize(target)
+
+    if os.path.isdir(dst_path):
+        os.rename(dst_path, backup)
+    os.rename(staging, dst_path)
+    if os.path.isdir(backup):
+        shutil.rmtree(backup)
+    return stats
+
+
+def read_git_head(repo: str = '.') -> Optional[str]:
+    """ Resolve HEAD to a commit hash by reading .git directly, or None if that fails """
+    git_dir = os.path.join(repo, '.git')
+    try:
+        if os.path.isfile(git_dir):  # worktree or submodule: "gitdir: <path>"
+            with open(git_dir, 'rt') as f:
+                git_dir = os.path.join(repo, f.read().strip()[len('gitdir:'):].strip())
+        with open(os.path.join(git_dir, 'HEAD'), 'rt') as f:
+            head = f.read().strip()
+        if not head.startswith('ref:'):
+            return head  # detached HEAD
+        ref = head[len('ref:'):].strip()
+
+        # Branch refs of a worktree live in the main repository's git directory
+        common_dir = git_dir
+        if os.path.isfile(os.path.join(git_dir, 'commondir')):
+            with open(os.path.join(git_dir, 'commondir'), 'rt') as f:
+                common_dir = os.path.join(git_dir, f.read().strip())
+        for ref_dir in dict.fromkeys([git_dir, common_dir]):
+            ref_path = os.path.join(ref_dir, ref)
+            if os.path.isfile(ref_path):
+                with open(ref_path, 'rt') as f:
+                    return f.read().strip()
+        with open(os.path.join(common_dir, 'packed-refs'), 'rt') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=None)
+def git_head() -> str:
+    """ The commit hash of HEAD, resolved once per run; runs git only if .git can't be read """
+    head = read_git_head()
+    if head:
+        return head
+    return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True).strip()
+
+
+@lru_cache(maxsize=None)
+def read_template(path: str = 'toc_template.toc') -> str:
+    with open(path, 'rt') as f:
+        return f.read()
+
+
+def write_if_changed(path: str, content: str, encoding: Optional[str] = None) -> bool:
+    """ Write CONTENT to PATH unless it already holds it, keeping the mtime of unchanged files """
+    try:
+        with open(path, 'rt', encoding=encoding, newline='') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wt', encoding=encoding, newline='') as f:
+        f.write(content)
+    return True
+
+
+def sources_fingerprint(sources: Dict[str, InstallSource]) -> str:
+    """ Hash of the names and contents of a set of files and generated contents """
+    digest = hashlib.sha256()
+    for name, source in sorted(sources.items()):
+        content_hash = hashlib.sha256(source).hexdigest() if isinstance(source, bytes) else file_digest(source)
+        digest.update(f'{name}\0{content_hash}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+@dataclass
+class BuildStep:
+    """ One node of the build graph.
+
+    The step runs when the fingerprint of its inputs differs from the one recorded
+    on its last run, or when one of its outputs is missing. The fingerprint is
+    computed only after every dependency has run.
+    """
+    name: str
+    fingerprint: Callable[[], str]
+    action: Callable[[], None]
+    outputs: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    force: bool = False
+
+
+class BuildGraph:
+    """ Build steps in dependency order, with their last fingerprints kept in a JSON file """
+
+    def __init__(self, state_path: str = BUILD_STATE):
+        self.state_path = state_path
+        self.steps: Dict[str, BuildStep] = {}
+        try:
+            with open(state_path, 'rt', encoding='utf-8') as f:
+                self.state: Dict[str, str] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = {}
+
+    def add(self, step: BuildStep) -> BuildStep:
+        for dep in step.deps:
+            if dep not in self.steps:
+                raise ValueError(f'Build step {step.name!r} depends on unknown step {dep!r}')
+        self.steps[step.name] = step
+        return step
+
+    def run(self, dry_run: bool = False) -> List[str]:
+        """ Run the stale steps, or with DRY_RUN only list them. Returns their names """
+        ran: List[str] = []
+        for step in self.steps.values():
+            fingerprint = None
+            changed_dep = next((dep for dep in step.deps if dep in ran), None)
+            missing = next((path for path in step.outputs if not os.path.exists(path)), None)
+            if step.force:
+                reason = 'forced'
+            elif dry_run and changed_dep:
+                # Its inputs are not regenerated yet, so the fingerprint would be stale
+                reason = f'{changed_dep} would run'
+            elif missing:
+                reason = f'{missing} is missing'
+            else:
+                fingerprint = step.fingerprint()
+                if self.state.get(step.name) == fingerprint:
+                    print(f'Up to date: {step.name}')
+                    continue
+                reason = 'inputs changed' if step.name in self.state else 'never built'
+
+            ran.append(step.name)
+            if dry_run:
+                print(f'Would run: {step.name} ({reason})')
+                continue
+            print(f'Running: {step.name} ({reason})')
+            if fingerprint is None:
+                fingerprint = step.fingerprint()
+            step.action()
+            self.state[step.name] = fingerprint
+
+        if ran and not dry_run:
+            with open(self.state_path, 'wt', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=1, sort_keys=True)
+        return ran
+
 
 class BuildTool:
     def __init__(self, args: argparse.Namespace):
@@ -35,109 +693,237 @@ class BuildTool:
         self.version = VERSION
         self.copy_dirs = COPY_DIRS[:]
         self.copy_files = COPY_FILES[:]
-        self.create_toc(dst=f'{ADDON_NAME_CLASSIC}.toc',
-                        ui_version=UI_VERSION_CLASSIC,
-                        title=ADDON_TITLE_CLASSIC)
-        self.create_toc(dst=f'{ADDON_NAME_CLASSIC}{SUFFIX_CLASSIC}.toc',
-                        ui_version=UI_VERSION_CLASSIC,
-                        title=ADDON_TITLE_CLASSIC)
-        self.create_toc(dst=f'{ADDON_NAME_CLASSIC}{SUFFIX_TBC}.toc',
-                        ui_version=UI_VERSION_CLASSIC_TBC,
-                        title=ADDON_TITLE_CLASSIC)
-        self.create_toc(dst=f'{ADDON_NAME_CLASSIC}{SUFFIX_WRATH}.toc',
-                        ui_version=UI_VERSION_CLASSIC_WOTLK,
-                        title=ADDON_TITLE_CLASSIC)
-        self.create_toc(dst=f'{ADDON_NAME_CLASSIC}{SUFFIX_CATA}.toc',
-                        ui_version=UI_VERSION_CLASSIC_CATA,
-                        title=ADDON_TITLE_CLASSIC)
+        self.libs: Optional[Tuple[List[EmbedUnit], List[EmbedUnit]]] = None
+        self.graph = BuildGraph()
+        for dst, ui_version in self.toc_targets(ADDON_NAME_CLASSIC):
+            self.graph.add(self.toc_step(dst, ui_version, ADDON_TITLE_CLASSIC))
+        self.graph.add(BuildStep(f'embeds {PRUNED_EMBEDS}', outputs=[PRUNED_EMBEDS], action=self.write_embeds,
+                                 fingerprint=lambda: hashlib.sha256(self.render_embeds().encode('utf-8')).hexdigest()))
+        if args.strip:
+            self.graph.add(self.strip_step(ADDON_NAME_CLASSIC))
+
+    def toc_step(self, dst: str, ui_version: str, title: str) -> BuildStep:
+        """ Template, UI version and git hash -> one generated TOC file """
+        def render() -> str:
+            return self.render_toc(ui_version, title)
+
+        def write():
+            if not write_if_changed(dst, render()):
+                print(f'TOC: {dst} unchanged')
+
+        return BuildStep(f'toc {dst}', outputs=[dst], action=write,
+                         fingerprint=lambda: hashlib.sha256(render().encode('utf-8')).hexdigest())
+
+    def prune_libs(self) -> Tuple[List[EmbedUnit], List[EmbedUnit]]:
+        """ The (kept, dropped) embeds.xml entries for the files the TOC loads """
+        if self.libs is None:
+            roots = [resolve_path(line.strip()) for line in read_template().splitlines()
+                     if line.strip() and not line.startswith('#') and line.strip().lower() != 'embeds.xml']
+            self.libs = prune_embeds(resolve_path('embeds.xml'), roots)
+            kept, dropped = self.libs
+            print(f'Libs: {len(kept)} embeds kept, {len(dropped)} dropped'
+                  + (': ' + ', '.join(sorted(n for unit in dropped for n in unit.provides)) if dropped else ''))
+        return self.libs
+
+    def render_embeds(self) -> str:
+        with open(resolve_path('embeds.xml'), 'rt', encoding='utf-8', newline='') as f:
+            text = f.read()
+        for unit in self.prune_libs()[1]:
+            text = re.sub(rf'[ \t]*{re.escape(unit.entry)}[ \t]*(\r?\n)?', '', text, count=1)
+        return text
+
+    def write_embeds(self):
+        os.makedirs(os.path.dirname(PRUNED_EMBEDS), exist_ok=True)
+        write_if_changed(PRUNED_EMBEDS, self.render_embeds())
+
+    def strip_step(self, toc_name: str) -> BuildStep:
+        """ Packaged Lua, XML and TOC files -> their stripped copies under STRIP_DIR """
+        def sources() -> List[Tuple[str, str]]:
+            return [(name, path) for name, path in
+                    self.source_inputs(toc_name, self.copy_files + self.toc_files(toc_name))
+                    if os.path.splitext(name)[1].lower() in STRIPPERS]
+
+        # --verify checks the files, so it always runs the step
+        return BuildStep(f'strip {STRIP_DIR}', outputs=[STRIP_DIR], force=self.args.verify,
+                         fingerprint=lambda: sources_fingerprint(dict(sources())),
+                         action=lambda: self.write_stripped(sources()))
+
+    def write_stripped(self, sources: List[Tuple[str, str]]):
+        total_before = total_after = 0
+        for name, path in sources:
+            # Latin-1 maps every byte to one character, so non-UTF-8 bytes in strings survive
+            with open(path, 'rt', encoding='latin-1', newline='') as f:
+                text = f.read()
+            stripped = strip_source(name, text, verify=self.args.verify)
+            target = os.path.join(STRIP_DIR, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            write_if_changed(target, stripped, encoding='latin-1')
+            total_before += len(text)
+            total_after += len(stripped)
+            print(f'Strip: {name}: {len(text)} -> {len(stripped)} bytes '
+                  f'(-{100 * (len(text) - len(stripped)) / max(len(text), 1):.0f}%)')
+        print(f'Strip: {len(sources)} files, {total_before / 1024:.1f} -> {total_after / 1024:.1f} KiB'
+              + (', tokens verified' if self.args.verify else ''))
+
+    def stripped_path(self, name: str, path: str) -> str:
+        if self.args.strip and os.path.splitext(name)[1].lower() in STRIPPERS:
+            return os.path.join(STRIP_DIR, name)
+        return path
+
+    def package_inputs(self, toc_name: str, copy_files: List[str]) -> List[Tuple[str, str]]:
+        """ The files to package, with --strip the stripped copies """
+        return [(name, self.stripped_path(name, path)) for name, path in self.source_inputs(toc_name, copy_files)]
+
+    def generated_toc(self, ui_version: str) -> bytes:
+        """ A flavor's {toc_name}.toc, rendered for a single-flavor install or artifact """
+        toc = self.render_toc(ui_version, ADDON_TITLE_CLASSIC)
+        return (strip_toc(toc) if self.args.strip else toc).encode('utf-8')
+
+    def source_inputs(self, toc_name: str, copy_files: List[str]) -> List[Tuple[str, str]]:
+        """ collect_inputs, shipping only the library files the kept embeds load, and the pruned embeds.xml """
+        runtime = {os.path.normcase(os.path.normpath(file)) for unit in self.prune_libs()[0] for file in unit.files}
+        libs_prefix = f'{toc_name}/Libs/'
+        inputs = []
+        for name, path in collect_inputs(toc_name, self.copy_dirs, copy_files):
+            if name.startswith(libs_prefix) and os.path.normcase(os.path.normpath(path)) not in runtime:
+                continue
+            inputs.append((name, PRUNED_EMBEDS if name == f'{toc_name}/embeds.xml' else path))
+        return inputs
+
+    def run_step(self, name: str, fingerprint: Callable[[], str], action: Callable[[], None],
+                 outputs: List[str], force: bool = False):
+        """ Run the TOC and embeds steps, then the packaging step NAME if its inputs changed """
+        generate_steps = list(self.graph.steps)
+        self.graph.add(BuildStep(name, fingerprint, action, outputs, deps=generate_steps, force=force))
+        self.graph.run(dry_run=self.args.dry_run)
+
+    def install_sources(self, toc_name: str) -> Dict[str, InstallSource]:
+        """ Relative path in AddOns/{toc_name} -> source file or generated content """
+        copy_files = self.copy_files if self.args.version else self.copy_files + self.toc_files(toc_name)
+        prefix = f'{toc_name}/'
+        desired: Dict[str, InstallSource] = {name[len(prefix):]: path for name, path in
+                                             self.package_inputs(toc_name, copy_files)}
+        if self.args.version:
+            ui_version, _ = FLAVORS[self.args.version]
+            desired[f'{toc_name}.toc'] = self.generated_toc(ui_version)
+        return desired
 
     def do_install(self, toc_name: str):
-        self.copy_files.append(f'{toc_name}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_CLASSIC}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_TBC}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_WRATH}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_CATA}.toc')
+        """ Sync the addon into AddOns/{toc_name}, copying only changed files.
 
+        Only the TOC, embeds and strip steps go through the build graph. The sync
+        itself always compares against what is installed, so files deleted or edited
+        in the AddOns folder since the last install are restored.
+        """
         dst_path = f'{self.args.dst}/{toc_name}'
-
-        if os.path.isdir(dst_path):
-            print("Warning: Folder already exists, removing!")
-            shutil.rmtree(dst_path)
-
-        os.makedirs(dst_path, exist_ok=True)
-
         print(f'Destination: {dst_path}')
 
-        for copy_dir in self.copy_dirs:
-            print(f'Copying directory: {copy_dir}/*')
-            shutil.copytree(copy_dir, f'{dst_path}/{copy_dir}')
+        ran = self.graph.run(dry_run=self.args.dry_run)
+        if self.args.dry_run:
+            if ran:
+                # The generated files the sync would copy are not written yet
+                print(f'Would run: install {os.path.abspath(dst_path)}')
+                return
+            stats, _ = plan_install(self.install_sources(toc_name), dst_path, checksum=self.args.checksum)
+            if stats.up_to_date:
+                print(f'Install: {stats.unchanged} file(s) already up to date, nothing to do')
+            else:
+                print(f'Would install: {stats.copied} file(s) to copy, {stats.unchanged} unchanged, '
+                      f'{stats.removed} stale file(s) to remove')
+            return
 
-        for copy_file in self.copy_files:
-            print(f'Copying: {copy_file}')
-            shutil.copy(copy_file, f'{dst_path}/{copy_file}')
+        stats = sync_install(self.install_sources(toc_name), dst_path, checksum=self.args.checksum)
+        if stats.up_to_date:
+            print(f'Install: {stats.unchanged} file(s) already up to date, nothing to do')
+        else:
+            print(f'Install: {stats.copied} file(s) copied ({stats.bytes_copied / 1024:.1f} KiB), '
+                  f'{stats.unchanged} unchanged, {stats.removed} stale file(s) removed')
 
     @staticmethod
-    def do_zip_add_dir(zip: zipfile.ZipFile, dir: str, toc_name: str):
-        """ Add a directory to the zipfile, inside TOC_NAME/... subdir """
-        for file in os.listdir(dir):
-            file = dir + "/" + file
-            print(f'ZIP: Directory {file}/')
-            if os.path.isdir(file):
-                BuildTool.do_zip_add_dir(zip, dir=file, toc_name=toc_name)
-            else:
-                zip.write(file, f'{toc_name}/{file}')
+    def toc_targets(toc_name: str) -> List[Tuple[str, str]]:
+        """ (file, UI version) of the generated TOC files shipped in the multi-TOC artifact """
+        return [(f'{toc_name}.toc', UI_VERSION_CLASSIC)] + \
+               [(f'{toc_name}{suffix}.toc', ui_version) for ui_version, suffix in FLAVORS.values()]
 
-    @staticmethod
-    def do_zip_add_root_dir(zip: zipfile.ZipFile, dir: str, toc_name: str):
-        """ Add a directory to the root of the zip file """
-        for file in os.listdir(dir):
-            file = dir + "/" + file
-            print(f'ZIP: Directory {file}/')
-            if os.path.isdir(file):
-                BuildTool.do_zip_add_root_dir(zip, dir=file, toc_name=toc_name)
-            else:
-                zip.write(file, file)
+    def toc_files(self, toc_name: str) -> List[str]:
+        return [dst for dst, _ in self.toc_targets(toc_name)]
 
     def do_zip(self, toc_name: str):
-        self.copy_files.append(f'{toc_name}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_CLASSIC}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_TBC}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_WRATH}.toc')
-        self.copy_files.append(f'{toc_name}{SUFFIX_CATA}.toc')
-
-        zip_name = f'{self.args.dst}/{toc_name}-{VERSION}.zip'
-
-        with zipfile.ZipFile(zip_name, "w", zipfile.ZIP_DEFLATED,
-                             allowZip64=True) as zip_file:
-            # Add deprecation addon to zip
-            # BuildTool.do_zip_add_root_dir(zip_file, dir=f"{ADDON_NAME_CLASSIC}TBC", toc_name=toc_name)
-
-            for input_dir in self.copy_dirs:
-                BuildTool.do_zip_add_dir(zip_file, dir=input_dir, toc_name=toc_name)
-
-            for input_f in self.copy_files:
-                print(f'ZIP: File {input_f}')
-                zip_file.write(input_f, f'{toc_name}/{input_f}')
+        """ Build the multi-TOC artifact, or only the --version flavor's artifact """
+        flavors = [self.args.version] if self.args.version else []
+        self.do_release(toc_name, multi_toc=not flavors, flavors=flavors)
+
+    def do_release(self, toc_name: str, multi_toc: bool = True, flavors: Optional[List[str]] = None):
+        """ Build the multi-TOC artifact and per-flavor artifacts in one pass.
+
+        Shared files are hashed and compressed once and fanned out to every archive;
+        the archives are then written in a process pool. Each flavor artifact carries
+        only {toc_name}.toc, generated for that flavor's UI version.
+        """
+        flavors = list(FLAVORS) if flavors is None else flavors
+        multi_zip = f'{self.args.dst}/{toc_name}-{VERSION}.zip'
+        zip_paths = ([multi_zip] if multi_toc else []) + \
+                    [f'{self.args.dst}/{toc_name}-{VERSION}{FLAVORS[flavor][1]}.zip' for flavor in flavors]
+
+        def inputs() -> List[Tuple[str, str]]:
+            return self.package_inputs(toc_name, self.copy_files + self.toc_files(toc_name))
+
+        def fingerprint() -> str:
+            # Flavor TOCs are rendered like the TOC files, so the inputs cover them too
+            sources: Dict[str, InstallSource] = dict(inputs())
+            sources['archives'] = '\n'.join(zip_paths).encode('utf-8')
+            return sources_fingerprint(sources)
+
+        self.run_step(f'zip {os.path.abspath(self.args.dst)}/{toc_name}', fingerprint,
+                      lambda: self.write_release(toc_name, inputs(), multi_zip if multi_toc else None, flavors),
+                      outputs=zip_paths)
+
+    def write_release(self, toc_name: str, inputs: List[Tuple[str, str]], multi_zip: Optional[str],
+                      flavors: List[str]):
+        jobs = self.args.jobs or os.cpu_count() or 1
+        manifest = PackageManifest(f'{self.args.dst}/{toc_name}.manifest.json').load()
+
+        members, files, stats = prepare_members(inputs, manifest, jobs)
+        print(f'ZIP: {len(inputs)} files, {stats["compressed"]} compressed, '
+              f'{stats["reused"]} reused from the previous build')
+
+        toc_members = {f'{toc_name}/{toc}' for toc in self.toc_files(toc_name)}
+        shared = [m for m in members if m.name not in toc_members]
+
+        archives = []
+        if multi_zip:
+            archives.append((multi_zip, members))
+        for flavor in flavors:
+            ui_version, suffix = FLAVORS[flavor]
+            toc = self.generated_toc(ui_version)
+            toc_member = ZipMember.compress(f'{toc_name}/{toc_name}.toc', toc, hashlib.sha256(toc).hexdigest())
+            archives.append((f'{self.args.dst}/{toc_name}-{VERSION}{suffix}.zip', shared + [toc_member]))
+
+        if jobs > 1 and len(archives) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(archives))) as pool:
+                written = list(pool.map(_write_archive, archives))
+        else:
+            written = [_write_archive(archive) for archive in archives]
+
+        # The manifest describes the multi-TOC archive, the only one holding every input
+        if multi_zip:
+            manifest.save(os.path.abspath(multi_zip), files)
+        for zip_path in written:
+            print(f'ZIP: {zip_path}')
 
     @staticmethod
     def git_hash() -> str:
-        # Call: git rev-parse HEAD
-        p = subprocess.check_output(
-            ["git", "rev-parse", "HEAD"])
-        hash1 = str(p).rstrip("\\n'").lstrip("b'")
-        return hash1[:8]
+        return git_head()[:8]
 
     @staticmethod
-    def create_toc(dst: str, ui_version: str, title: str):
+    def render_toc(ui_version: str, title: str) -> str:
         hash1 = BuildTool.git_hash()
 
-        template = open('toc_template.toc', "rt").read()
+        template = read_template()
         template = template.replace('${UI_VERSION}', ui_version)
         template = template.replace('${VERSION}', f'{VERSION}-{hash1}')
         template = template.replace('${ADDON_TITLE}', title)
-
-        with open(dst, "wt") as out_f:
-            out_f.write(template)
+        return template
 
 
 def main():
@@ -150,15 +936,40 @@ def main():
              'name.')
 
     parser.add_argument(
-        '--version', choices=['classic', 'tbc', 'wotlk'],
-        help='The version to copy or zip: classic, TBC or WotLK')
+        '--version', choices=list(FLAVORS),
+        help='The version to copy or zip: classic, TBC, WotLK or Cata. '
+             'Without it zip builds one archive with every TOC')
+
+    parser.add_argument(
+        '--jobs', type=int, default=0,
+        help='Worker processes for compression and archive writing '
+             '(default: CPU count, 1 disables the process pool)')
+
+    parser.add_argument(
+        '--checksum', action='store_true',
+        help='Install: compare file contents instead of size and modification time')
+
+    parser.add_argument(
+        '--strip', action='store_true',
+        help='Strip comments and whitespace from packaged Lua, XML and TOC files')
 
     parser.add_argument(
-        'command', choices=['help', 'zip', 'install'],
+        '--verify', action='store_true',
+        help='With --strip, check every stripped file still tokenizes identically')
+
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help='List the build steps that would run, without running them')
+
+    parser.add_argument(
+        'command', choices=['help', 'zip', 'release', 'install'],
         help='The action to take. ZIP will create an archive. '
-             'Install will copy')
+             'Release will create the multi-TOC archive and one archive per '
+             'version. Install will copy')
 
     args = parser.parse_args(sys.argv[1:])
+    if args.verify and not args.strip:
+        parser.error('--verify needs --strip')
     print(args)
 
     if args.command == 'install':
@@ -168,6 +979,10 @@ def main():
     elif args.command == 'zip':
         bt = BuildTool(args)
         bt.do_zip(toc_name=ADDON_NAME_CLASSIC)
+
+    elif args.command == 'release':
+        bt = BuildTool(args)
+        bt.do_release(toc_name=ADDON_NAME_CLASSIC)
     else:
         parser.print_help()
 